@@ -2,7 +2,13 @@
 FastAPI Backend - Senaryo Modülü API
 """
 
+import asyncio
+import hashlib
 import logging
+import time
+import uuid
+from contextlib import asynccontextmanager, aclosing
+from datetime import datetime, timedelta
 from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
@@ -24,7 +30,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Modül importları
-from src.core import GeminiClient, ContextManager, ProjectSession
+from src.core import (
+    GeminiClient, ContextManager, ProjectSession, get_client_pool,
+    CallPriority, call_priority, get_rate_limiter, get_resilience, get_response_cache,
+    get_schema_registry, get_cache_manager, get_shared_caches, get_token_estimator,
+    get_telemetry, get_cost_model, get_state_flusher,
+    StreamParseError
+)
 from src.models.project import Project, ProjectConfig, ModuleType
 from src.models.screenplay import (
     FilmConcept, CharacterCard, BeatSheet, 
@@ -38,10 +50,31 @@ from src.db import ProjectRepository, get_db
 from src.models.screenplay import StoryMethodology, METHODOLOGY_DEFINITIONS, get_methodology_info
 
 # ==================== APP SETUP ====================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Uygulama yaşam döngüsü (başlangıç / kapanış)"""
+    # Structured output schema'larını bir kez derle
+    get_schema_registry().precompile([
+        ConceptsResponse, CharacterCardResponse, BeatSheetResponse,
+        SceneOutlinesResponse, SceneResponse, OptimizationReport
+    ])
+    # Cache TTL uzatma ve artık temizliği
+    get_cache_manager().start()
+    yield
+    await get_cache_manager().stop()
+    # Paylaşılan Gemini HTTP bağlantılarını kapat
+    await get_client_pool().aclose()
+    # Write-behind oturumlarını kaydet, bekleyen veritabanı yazmalarını bitir
+    get_state_flusher().stop()
+    get_db().close()
+    # Kuyrukta kalan telemetry span'lerini yaz
+    get_telemetry().close()
+
 app = FastAPI(
     title="🎬 AI Film Yapım Stüdyosu API",
     description="Senaryo yazımı, asset yönetimi, shotlist ve storyboard üretimi",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS - Frontend erişimi için
@@ -60,6 +93,10 @@ repo = ProjectRepository()
 # RAM önbellek (performans için - SQLite her zaman source of truth)
 sessions: dict[str, ProjectSession] = {}
 services: dict[str, ScenarioService] = {}
+upload_progress: dict[str, dict] = {}  # project_id -> son yükleme ilerlemesi
+
+# Upload akışı parça boyutu
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 # ==================== REQUEST/RESPONSE MODELS ====================
 class CreateProjectRequest(BaseModel):
@@ -67,6 +104,8 @@ class CreateProjectRequest(BaseModel):
     target_duration_minutes: int = 30
     language: str = "tr"
     methodology: str = "save_the_cat"  # Varsayılan Save the Cat
+    speculative_scenes: bool = False    # Sıradaki sahneyi arka planda önceden yaz
+    state_flush_window_ms: int = 0      # >0: durum write-behind kaydedilir
 
 class SelectConceptRequest(BaseModel):
     concept_index: int
@@ -101,6 +140,45 @@ def get_session(project_id: str) -> ProjectSession:
             raise HTTPException(status_code=404, detail="Proje bulunamadı")
     return sessions[project_id]
 
+async def save_upload_stream(
+    file: UploadFile,
+    data_dir: Path,
+    ext: str,
+    on_progress
+) -> tuple[Path, str, int]:
+    """
+    Upload'u parça parça diske yaz ve SHA-256 hesapla.
+    
+    Dosya içerik hash'i ile adlandırılır; aynı içerik zaten varsa
+    yeni kopya yazılmaz.
+    
+    Returns:
+        (dosya yolu, sha256, boyut)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = data_dir / f".upload_{uuid.uuid4().hex}.part"
+    
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+                size += len(chunk)
+                on_progress("receiving", bytes_received=size)
+        
+        sha256 = digest.hexdigest()
+        file_path = data_dir / f"source_{sha256[:16]}{ext}"
+        if file_path.exists():
+            tmp_path.unlink()
+        else:
+            tmp_path.replace(file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    return file_path, sha256, size
+
 def get_service(project_id: str) -> ScenarioService:
     """Senaryo servisini al veya oluştur"""
     if project_id not in services:
@@ -129,11 +207,14 @@ async def create_project(request: CreateProjectRequest):
     config = ProjectConfig(
         target_duration_minutes=request.target_duration_minutes,
         language=request.language,
-        story_methodology=methodology
+        story_methodology=methodology,
+        speculative_scenes=request.speculative_scenes,
+        state_flush_window_ms=request.state_flush_window_ms
     )
     
-    # ProjectSession oluştur (SQLite'a kaydeder)
-    session = ProjectSession(
+    # ProjectSession oluştur (SQLite'a kaydeder - event loop dışında)
+    session = await asyncio.to_thread(
+        ProjectSession,
         project_name=request.name,
         config=config,
         project_id=project_id
@@ -157,7 +238,7 @@ async def create_project(request: CreateProjectRequest):
 @app.get("/api/v1/projects")
 async def list_projects():
     """Tüm projeleri SQLite'tan listele"""
-    projects_list = repo.list_projects()
+    projects_list = await asyncio.to_thread(repo.list_projects)
     
     return {
         "projects": projects_list
@@ -219,17 +300,27 @@ async def get_project(project_id: str):
 
 @app.delete("/api/v1/projects/{project_id}")
 async def delete_project(project_id: str):
-    """Projeyi SQLite ve RAM'den sil"""
+    """Projeyi SQLite ve RAM'den sil (uzak cache ve kaynak dosyalar dahil)"""
     import shutil
     
+    # Gemini tarafındaki cache/dosyaları sil (eşlemeler SQLite'tan silinmeden önce)
+    removed = await get_cache_manager().delete_project_resources(project_id)
+    if removed["caches"] or removed["files"]:
+        logger.info(f"Uzak kaynaklar silindi: {project_id} - {removed}")
+    
+    # Bekleyen write-behind kaydetmesi silinen projeyi yeniden yazmasın
+    if project_id in sessions:
+        sessions[project_id].discard_pending()
+    
     # SQLite'tan sil
-    deleted = repo.delete_project(project_id)
+    deleted = await asyncio.to_thread(repo.delete_project, project_id)
     
     # RAM cache'den sil
     if project_id in sessions:
         del sessions[project_id]
     if project_id in services:
         del services[project_id]
+    get_client_pool().release(project_id)
     
     # Proje klasörünü de sil (dosya yüklemeleri için)
     project_dir = Path("data/projects") / project_id
@@ -248,49 +339,71 @@ async def delete_project(project_id: str):
 # ==================== SOURCE UPLOAD ====================
 @app.post("/api/v1/projects/{project_id}/source")
 async def upload_source(project_id: str, file: UploadFile = File(...)):
-    """Kaynak materyal yükle"""
-    from fastapi.concurrency import run_in_threadpool
-    from datetime import datetime
-    
+    """
+    Kaynak materyal yükle.
+    
+    Dosya parça parça diske yazılırken SHA-256 hesaplanır. Aynı içerik
+    diskte tek kopya tutulur; Files API'de süresi dolmamış bir kopyası
+    varsa (herhangi bir projede) yeniden yüklenmez. İlerleme
+    GET .../source/progress ile izlenebilir.
+    """
     session = get_session(project_id)
     
-    # Dosyayı kaydet
     data_dir = Path("data/projects") / project_id
     data_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Dosya adına timestamp ekle (üzerine yazma sorununu önle)
-    timestamp = int(datetime.now().timestamp())
     ext = Path(file.filename).suffix if '.' in file.filename else '.txt'
-    safe_filename = f"source_{project_id}_{timestamp}{ext}"
     
-    file_path = data_dir / safe_filename
-    content = await file.read()
+    progress = upload_progress[project_id] = {
+        "stage": "receiving",
+        "file_name": file.filename,
+        "bytes_received": 0,
+        "total_bytes": file.size,
+        "reused": False,
+        "updated_at": time.time()
+    }
     
-    with open(file_path, "wb") as f:
-        f.write(content)
+    def report(stage: str, **details):
+        progress.update(stage=stage, updated_at=time.time(), **details)
     
-    # Gemini Files API'ye yükle (thread pool'da çalıştır - event loop'u bloklamaz)
     try:
-        file_uri = await run_in_threadpool(session.upload_source, str(file_path))
+        file_path, sha256, size = await save_upload_stream(file, data_dir, ext, report)
+        
+        # Gemini Files API'ye yükle (async - event loop'u bloklamaz)
+        file_uri = await session.upload_source_async(
+            str(file_path), sha256=sha256, on_progress=report
+        )
+        report("ready", file_uri=file_uri)
         
         return {
             "success": True,
             "file_name": file.filename,  # Orijinal ad göster
             "file_uri": file_uri,
+            "sha256": sha256,
+            "size_bytes": size,
+            "reused": progress["reused"],
             "message": "Kaynak dosya yüklendi"
         }
     except Exception as e:
+        report("failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/projects/{project_id}/source/progress")
+async def get_upload_progress(project_id: str):
+    """Kaynak yükleme ilerlemesi (receiving -> uploading/reused -> processing -> ready)"""
+    progress = upload_progress.get(project_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Aktif yükleme yok")
+    return progress
+
 # ==================== SENARYO WORKFLOW ====================
 @app.post("/api/v1/projects/{project_id}/senaryo/analyze")
-async def analyze_source(project_id: str):
-    """Kaynakı analiz et ve 3 konsept öner"""
+async def analyze_source(project_id: str, use_cache: Optional[bool] = None):
+    """Kaynakı analiz et ve 3 konsept öner (tekrar çağrı konseptleri yeniden üretir)"""
     service = get_service(project_id)
     session = get_session(project_id)
     
     try:
-        result = service.analyze_source()
+        result = await service.analyze_source_async(use_cache=use_cache)
         
         # Screenplay başlat veya güncelle
         if session.screenplay is None:
@@ -304,7 +417,7 @@ async def analyze_source(project_id: str):
             session.screenplay.source_summary = result.source_summary
         
         # SQLite'a kaydet
-        session.save_screenplay()
+        await session.save_screenplay_async()
         
         logger.info(f"Kaynak analiz edildi: {project_id}")
         
@@ -328,7 +441,7 @@ async def select_concept(project_id: str, request: SelectConceptRequest):
     
     try:
         # Chat history sayesinde AI önceki konuşmayı hatırlıyor
-        result = service.select_concept(
+        result = await service.select_concept_async(
             concept_index=request.concept_index, 
             duration_minutes=duration
         )
@@ -337,7 +450,7 @@ async def select_concept(project_id: str, request: SelectConceptRequest):
         if session.screenplay:
             session.screenplay.selected_concept_index = request.concept_index
             session.screenplay.protagonist = result.protagonist
-            session.save_screenplay()
+            await session.save_screenplay_async()
         
         logger.info(f"Konsept seçildi: {project_id} - index {request.concept_index}")
         
@@ -371,13 +484,13 @@ async def create_beat_sheet(project_id: str, request: CreateBeatSheetRequest = N
     
     try:
         # Chat history sayesinde AI önceki konuşmaları hatırlıyor
-        result = service.create_beat_sheet()
+        result = await service.create_beat_sheet_async()
         
         # Screenplay güncelle
         if session.screenplay:
             session.screenplay.beat_sheet = result.beat_sheet
             session.screenplay.methodology = session.project.config.story_methodology
-            session.save_screenplay()
+            await session.save_screenplay_async()
         
         method_info = get_methodology_info(session.project.config.story_methodology)
         logger.info(f"Beat sheet oluşturuldu: {project_id} - {method_info['name']}")
@@ -402,7 +515,7 @@ async def update_beat_sheet(project_id: str, beat_sheet: BeatSheet):
         raise HTTPException(status_code=404, detail="Screenplay bulunamadı")
     
     session.screenplay.beat_sheet = beat_sheet
-    session.save_screenplay()
+    await session.save_screenplay_async()
     
     return {"success": True, "message": "Beat sheet güncellendi"}
 
@@ -413,12 +526,12 @@ async def create_scene_outlines(project_id: str):
     session = get_session(project_id)
     
     try:
-        result = service.create_scene_outlines()
+        result = await service.create_scene_outlines_async()
         
         # Screenplay güncelle
         if session.screenplay:
             session.screenplay.scene_outlines = result.outlines
-            session.save_screenplay()
+            await session.save_screenplay_async()
         
         logger.info(f"Sahne listesi oluşturuldu: {project_id} - {len(result.outlines)} sahne")
         
@@ -443,11 +556,11 @@ async def write_next_scene(project_id: str):
         raise HTTPException(status_code=400, detail="Önce sahne listesi oluşturulmalı")
     
     try:
-        result = service.write_next_scene(screenplay.scene_outlines)
+        result = await service.write_next_scene_async(screenplay.scene_outlines)
         
         # Screenplay güncelle
-        screenplay.scenes.append(result.scene)
-        session.save_screenplay()
+        screenplay.put_scene(result.scene)
+        await session.save_screenplay_async()
         
         logger.info(f"Sahne yazıldı: {project_id} - Sahne {result.scene.scene_number}")
         
@@ -480,47 +593,47 @@ async def write_next_scene_stream(project_id: str):
         return StreamingResponse(error_generator(), media_type="text/event-stream")
     
     async def event_generator():
-        """SSE event generator"""
+        """
+        SSE event generator.
+        
+        Ham metin parçaları ("chunk") ile birlikte alanlar tamamlandıkça
+        tipli olaylar gönderilir: "header", "action" (paragraf), "dialogue".
+        Akış şemadan saparsa model çağrısı kesilir ve hata gönderilir.
+        """
         try:
-            # Streaming modunda sahne yaz
-            scene_generator = service.write_next_scene(
-                screenplay.scene_outlines,
-                stream=True
-            )
-            
-            full_text = ""
-            for chunk in scene_generator:
-                if chunk:
-                    full_text += chunk
+            # Streaming modunda sahne yaz (async - diğer istekler beklemez)
+            # Kullanıcı canlı izliyor: rate limiter kuyruğunda en önce
+            result = None
+            with call_priority(CallPriority.INTERACTIVE):
+                async for event in service.stream_next_scene_async(screenplay.scene_outlines):
+                    if isinstance(event, SceneResponse):
+                        result = event
+                        continue
+                    if event["type"] == "chunk" and not event["text"]:
+                        continue
                     # SSE formatı: data: {...}\n\n
-                    payload = json.dumps({"text": chunk, "type": "chunk"})
-                    yield f"data: {payload}\n\n"
+                    yield f"data: {json.dumps(event)}\n\n"
+            
+            if result is None:
+                # Akış sahne yanıtı üretmeden bitti (boş veya yarım yanıt)
+                raise StreamParseError("Akış tamamlanmış bir sahne olmadan bitti")
+            
+            # Screenplay'e kaydet
+            screenplay.put_scene(result.scene)
+            await session.save_screenplay_async()
+            logger.info(f"Sahne yazıldı: {project_id} - Sahne {result.scene.scene_number}")
             
-            # Final sonuç - generator'dan SceneResponse gelir
-            # Ama generator protocol'ü farklı çalışıyor, result zor
-            # Bu yüzden full_text'i parse etmeye çalış
-            try:
-                scene_data = json.loads(full_text)
-                result_payload = json.dumps({
-                    "type": "complete",
-                    "scene": scene_data
-                })
-                yield f"data: {result_payload}\n\n"
-                
-                # Screenplay'e kaydet
-                from src.models.screenplay import Scene, SceneResponse
-                scene_response = SceneResponse(**scene_data)
-                screenplay.scenes.append(scene_response.scene)
-                session.save_screenplay()
-                
-            except json.JSONDecodeError:
-                # Parse edilemezse raw text olarak kaydet
-                logger.warning("Streaming sonucu JSON olarak parse edilemedi")
-                yield f"data: {json.dumps({'type': 'complete', 'raw_text': full_text[:500]})}\n\n"
+            payload = json.dumps({"type": "complete", "scene": result.model_dump()})
+            yield f"data: {payload}\n\n"
             
             # Stream sonu
             yield "data: [DONE]\n\n"
             
+        except StreamParseError as e:
+            # Şema dışı akış: sahne kaydedilmez, sıradaki sahne değişmez
+            logger.warning(f"Streaming yanıtı şemadan saptı, akış kesildi: {e}")
+            payload = json.dumps({"type": "error", "error": f"Yanıt şemaya uymuyor: {e}"})
+            yield f"data: {payload}\n\n"
         except ValueError as e:
             # Tüm sahneler tamamlandı
             payload = json.dumps({"type": "complete", "message": str(e), "all_scenes_completed": True})
@@ -541,6 +654,110 @@ async def write_next_scene_stream(project_id: str):
         }
     )
 
+@app.get("/api/v1/projects/{project_id}/senaryo/scenes/all/stream")
+async def write_all_scenes_stream(project_id: str, concurrency: Optional[int] = None):
+    """Kalan tüm sahneleri paralel yaz; ilerlemeyi SSE ile gönder"""
+    import json
+
+    session = get_session(project_id)
+    service = get_service(project_id)
+
+    if not session.screenplay or not session.screenplay.scene_outlines:
+        async def error_generator():
+            yield f"data: {json.dumps({'error': 'Önce sahne listesi oluşturulmalı'})}\n\n"
+        return StreamingResponse(error_generator(), media_type="text/event-stream")
+
+    async def event_generator():
+        """
+        SSE event generator.
+
+        Sahneler sınırlı paralellikle yazılır, sahne sırasıyla kaydedilir;
+        olaylar için bkz. ScenarioService.write_remaining_scenes_async.
+        """
+        try:
+            # Toplu yazım etkileşimli isteklerin önüne geçmemeli; öncelik
+            # worker task'ları oluşturulmadan önce ayarlanır ki onlara da geçsin
+            with call_priority(CallPriority.BACKGROUND):
+                async with aclosing(service.write_remaining_scenes_async(concurrency)) as events:
+                    async for event in events:
+                        yield f"data: {json.dumps(event)}\n\n"
+
+            logger.info(f"Toplu sahne yazımı bitti: {project_id} - {len(session.screenplay.scenes)} sahne")
+            yield "data: [DONE]\n\n"
+
+        except ValueError as e:
+            # Tüm sahneler tamamlandı
+            payload = json.dumps({"type": "complete", "message": str(e), "all_scenes_completed": True})
+            yield f"data: {payload}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logger.error(f"Toplu sahne yazım hatası: {e}")
+            payload = json.dumps({"error": str(e)})
+            yield f"data: {payload}\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.post("/api/v1/projects/{project_id}/senaryo/scenes/batch")
+async def submit_scene_batch(project_id: str):
+    """Kalan tüm sahneleri Batch API işi olarak gönder (indirimli, etkileşimsiz)"""
+    service = get_service(project_id)
+
+    try:
+        result = await service.submit_scene_batch_async()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch gönderme hatası: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"Sahne batch işi gönderildi: {project_id} - {result['job_name']}")
+    return {"success": True, **result}
+
+@app.get("/api/v1/projects/{project_id}/senaryo/scenes/batch/{job_name:path}")
+async def collect_scene_batch(project_id: str, job_name: str):
+    """Sahne batch işini sorgula; tamamlandıysa sahneleri senaryoya ekle"""
+    service = get_service(project_id)
+
+    try:
+        result = await service.collect_scene_batch_async(job_name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch sorgulama hatası: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"success": True, **result, "status": service.get_status()}
+
+@app.get("/api/v1/projects/{project_id}/batches")
+async def list_batches(project_id: str, pending_only: bool = False):
+    """Projenin Batch API işleri"""
+    session = get_session(project_id)
+    return {"batches": await asyncio.to_thread(session.batch_jobs, pending_only=pending_only)}
+
+@app.post("/api/v1/projects/{project_id}/checkpoint")
+async def checkpoint_project(project_id: str):
+    """Write-behind modunda bekleyen durum değişikliklerini hemen kaydet"""
+    session = get_session(project_id)
+    await asyncio.to_thread(session.checkpoint)
+    return {"project_id": project_id, "write_behind": session.write_behind}
+
+@app.get("/api/v1/projects/{project_id}/usage")
+async def get_project_usage(project_id: str, group_by: str = "step"):
+    """Projenin kullanım defteri özeti (adım/modül/model/gün bazında, maliyete göre azalan)"""
+    session = get_session(project_id)
+    try:
+        return {"group_by": group_by, "usage": session.usage_summary(group_by)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.put("/api/v1/projects/{project_id}/senaryo/scenes/{scene_number}")
 async def revise_scene(project_id: str, scene_number: int, request: ReviseSceneRequest):
     """Sahneyi revize et"""
@@ -557,7 +774,7 @@ async def revise_scene(project_id: str, scene_number: int, request: ReviseSceneR
         raise HTTPException(status_code=404, detail="Sahne bulunamadı")
     
     try:
-        result = service.revise_scene(scene, request.revision_notes)
+        result = await service.revise_scene_async(scene, request.revision_notes)
         
         # Sahneyi güncelle
         for i, s in enumerate(screenplay.scenes):
@@ -565,7 +782,7 @@ async def revise_scene(project_id: str, scene_number: int, request: ReviseSceneR
                 screenplay.scenes[i] = result.scene
                 break
         
-        session.save_screenplay()
+        await session.save_screenplay_async()
         
         return {
             "success": True,
@@ -591,7 +808,7 @@ async def expand_scene(project_id: str, scene_number: int):
         raise HTTPException(status_code=404, detail="Sahne bulunamadı")
     
     try:
-        result = service.expand_scene(scene)
+        result = await service.expand_scene_async(scene)
         
         # Sahneyi güncelle
         for i, s in enumerate(screenplay.scenes):
@@ -599,7 +816,7 @@ async def expand_scene(project_id: str, scene_number: int):
                 screenplay.scenes[i] = result.scene
                 break
         
-        session.save_screenplay()
+        await session.save_screenplay_async()
         
         return {
             "success": True,
@@ -622,7 +839,7 @@ async def approve_scene(project_id: str, scene_number: int):
     for i, s in enumerate(screenplay.scenes):
         if s.scene_number == scene_number:
             screenplay.scenes[i].status = "approved"
-            session.save_screenplay()
+            await session.save_screenplay_async()
             return {"success": True, "message": f"Sahne {scene_number} onaylan dı"}
     
     raise HTTPException(status_code=404, detail="Sahne bulunamadı")
@@ -638,7 +855,7 @@ async def run_optimization(project_id: str):
         raise HTTPException(status_code=404, detail="Screenplay bulunamadı")
     
     try:
-        result = service.run_optimization(screenplay)
+        result = await service.run_optimization_async(screenplay)
         
         logger.info(f"Optimizasyon tamamlandı: {project_id}")
         
@@ -660,6 +877,9 @@ async def export_screenplay(project_id: str, format: str = "json"):
     if not screenplay:
         raise HTTPException(status_code=404, detail="Screenplay bulunamadı")
     
+    # Write-behind: diskteki kayıt da export edilenle aynı olsun
+    await asyncio.to_thread(session.checkpoint)
+    
     if format == "json":
         return screenplay.model_dump()
     elif format == "markdown":
@@ -719,16 +939,56 @@ async def get_context_status(project_id: str):
     session = get_session(project_id)
     return session.context.check_status()
 
+# ==================== METRICS ====================
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    """Gemini çağrı metrikleri (adım bazında gecikme yüzdelikleri, rate limiter kuyruğu, retry/circuit breaker)"""
+    return {
+        "telemetry": get_telemetry().summary(),
+        "database": get_db().stats(),
+        "state_saves": ProjectRepository.save_stats(),
+        "write_behind": get_state_flusher().stats(),
+        "rate_limiter": get_rate_limiter().metrics(),
+        "resilience": get_resilience().metrics(),
+        "response_cache": get_response_cache().stats(),
+        "schemas": get_schema_registry().stats(),
+        "token_estimator": get_token_estimator().stats(),
+        "cache_manager": get_cache_manager().stats(),
+        "shared_caches": get_shared_caches().stats(),
+        "client_pool": get_client_pool().stats()
+    }
+
+@app.get("/api/v1/usage")
+async def get_usage(group_by: str = "day", days: Optional[int] = None, project_id: Optional[str] = None):
+    """Tüm projelerin kullanım defteri özeti ve fiyat tablosu"""
+    since = datetime.now() - timedelta(days=days) if days else None
+    try:
+        usage = await asyncio.to_thread(repo.usage_summary, group_by, project_id=project_id, since=since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "group_by": group_by,
+        "usage": usage,
+        "total_cost_usd": round(sum(item["cost_usd"] for item in usage), 6),
+        "pricing": get_cost_model().to_dict()
+    }
+
+@app.get("/api/v1/metrics/spans")
+async def get_call_spans(limit: int = 100, step: Optional[str] = None):
+    """Son Gemini çağrılarının span kayıtları (yeniden eskiye)"""
+    return {"spans": get_telemetry().recent(limit, step)}
+
 # ==================== HEALTH CHECK ====================
 @app.get("/health")
 async def health_check():
     """API sağlık kontrolü"""
-    project_count = len(repo.list_projects())
+    project_count = len(await asyncio.to_thread(repo.list_projects))
     return {
         "status": "healthy",
         "api_key_configured": bool(os.getenv("GEMINI_API_KEY")),
         "projects_count": project_count,
-        "database": "SQLite"
+        "database": "SQLite",
+        "gemini_pool": get_client_pool().stats()
     }
 
 # ==================== MAIN ====================
@@ -1,6 +1,34 @@
 # Core modüller
-from .gemini_client import GeminiClient
+from .gemini_client import GeminiClient, BatchRequest, BatchResult
+from .async_gemini_client import AsyncGeminiClient
+from .client_pool import GeminiClientPool, get_client_pool
+from .rate_limiter import RateLimiter, CallPriority, call_priority, get_rate_limiter
+from .resilience import ResilienceLayer, RetryPolicy, CircuitOpenError, get_resilience
+from .response_cache import ResponseCache, get_response_cache
+from .schema_registry import SchemaRegistry, SchemaVariant, get_schema_registry
+from .token_estimator import TokenEstimator, get_token_estimator
+from .telemetry import Telemetry, CallSpan, call_context, get_telemetry
+from .pricing import CostModel, ModelPrice, get_cost_model
+from .state_flusher import StateFlusher, get_state_flusher
+from .stream_parser import IncrementalJSONParser, ModelStreamParser, StreamParseError
+from .source_files import SourceFileManager
+from .installation import Installation, get_installation
+from .shared_cache import SharedCacheRegistry, get_shared_caches
+from .cache_manager import CacheLifecycleManager, get_cache_manager
 from .context_manager import ContextManager
 from .session import ProjectSession
 
-__all__ = ["GeminiClient", "ContextManager", "ProjectSession"]
+__all__ = ["GeminiClient", "BatchRequest", "BatchResult", "AsyncGeminiClient", "GeminiClientPool", "get_client_pool",
+    "RateLimiter", "CallPriority", "call_priority", "get_rate_limiter",
+    "ResilienceLayer", "RetryPolicy", "CircuitOpenError", "get_resilience",
+    "ResponseCache", "get_response_cache",
+    "SchemaRegistry", "SchemaVariant", "get_schema_registry",
+    "TokenEstimator", "get_token_estimator",
+    "Telemetry", "CallSpan", "call_context", "get_telemetry",
+    "CostModel", "ModelPrice", "get_cost_model",
+    "StateFlusher", "get_state_flusher",
+    "IncrementalJSONParser", "ModelStreamParser", "StreamParseError",
+    "SourceFileManager", "Installation", "get_installation",
+    "SharedCacheRegistry", "get_shared_caches",
+    "CacheLifecycleManager", "get_cache_manager",
+    "ContextManager", "ProjectSession"]
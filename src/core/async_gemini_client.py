@@ -0,0 +1,487 @@
+"""
+Async Gemini API Client.
+SDK'nın aio yüzeyi üzerinden event loop'u bloklamayan çağrılar.
+"""
+
+import asyncio
+import inspect
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Type, AsyncGenerator, AsyncIterator, Callable, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from google.genai import types
+
+from .rate_limiter import Reservation
+from .schema_registry import SchemaVariant
+from ..models.project import CacheInfo, TokenUsage, ThinkingLevel
+
+if TYPE_CHECKING:
+    from .gemini_client import GeminiClient, BatchRequest
+
+
+class AsyncGeminiClient:
+    """
+    Async Gemini API istemcisi.
+
+    Bağımsız bir istemci değildir: bağlı olduğu GeminiClient'ın genai.Client'ını,
+    cache/chat registry'lerini ve config yardımcılarını paylaşır. Böylece bir
+    projede sync ve async çağrılar karışık kullanılsa da chat geçmişi tek kalır.
+    Veritabanına yazan adımlar (yanıt cache'i, chat turunun kalıcı kaydı)
+    asyncio.to_thread ile event loop dışında çalışır; bellekteki durum
+    (chat geçmişi) event loop'ta güncellenir.
+
+    Kullanım:
+        result, usage = await gemini.aio.generate_structured(...)
+    """
+
+    def __init__(self, client: "GeminiClient"):
+        """
+        AsyncGeminiClient başlat.
+
+        Args:
+            client: Registry'leri paylaşılacak sync GeminiClient
+        """
+        self._sync = client
+
+    @property
+    def _aio(self):
+        """SDK async yüzeyi (genai.Client.aio)"""
+        return self._sync._client.aio
+
+    async def _acquire(
+        self,
+        model: str,
+        prompt: str,
+        history: Optional[List[Any]] = None
+    ) -> Reservation:
+        """Çağrı öncesi RPM/TPM kotası al (async bekler). Bkz. GeminiClient._acquire."""
+        chars = self._sync._request_chars(prompt, history)
+        reservation = await self._sync._limiter.acquire_async(
+            model, self._sync._tokens.estimate_chars(chars, self._sync.language, model)
+        )
+        reservation.request_chars = chars
+        return reservation
+    
+    async def _generate(
+        self,
+        model: str,
+        contents: Any,
+        config: types.GenerateContentConfig,
+        prompt: str,
+        history: Optional[List[Any]] = None,
+        operation: str = "generate",
+        schema: Optional[str] = None
+    ) -> tuple[Any, TokenUsage]:
+        """generate_content çağrısı (kota + retry + circuit breaker). Bkz. GeminiClient._generate."""
+        async def attempt():
+            span = self._sync._start_span(model, config, operation, schema)
+            reservation = None
+            try:
+                reservation = await self._acquire(model, prompt, history)
+                self._sync._attach_span(reservation, span)
+                response = await self._aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config
+                )
+                usage = self._sync._parse_usage(response.usage_metadata)
+            except Exception as e:
+                self._sync._fail_attempt(reservation, span, e)
+                raise
+            self._sync._reconcile(reservation, usage)
+            return response, usage
+        
+        return await self._sync._resilience.call_async(model, attempt, operation)
+    
+    async def _open_stream(
+        self,
+        model: str,
+        contents: Any,
+        config: types.GenerateContentConfig,
+        prompt: str,
+        history: Optional[List[Any]] = None,
+        operation: str = "stream",
+        schema: Optional[str] = None,
+        labels: Optional[Dict[str, Any]] = None
+    ) -> tuple[Reservation, Any, AsyncIterator[Any]]:
+        """
+        Streaming çağrısını aç; sadece ilk chunk gelene kadar retry yapılır.
+        
+        Returns:
+            (rezervasyon, ilk chunk veya None, kalan chunk'lar)
+        """
+        async def attempt():
+            span = self._sync._start_span(model, config, operation, schema, labels)
+            reservation = None
+            try:
+                reservation = await self._acquire(model, prompt, history)
+                self._sync._attach_span(reservation, span)
+                stream = await self._aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config
+                )
+                first = await anext(stream, None)
+            except Exception as e:
+                self._sync._fail_attempt(reservation, span, e)
+                raise
+            self._sync._telemetry.first_token(span)
+            return reservation, first, stream
+        
+        return await self._sync._resilience.call_async(model, attempt, operation)
+
+    async def _commit_turn(
+        self,
+        chat_data: Dict[str, Any],
+        contents: Optional[List[types.Content]],
+        kind: Optional[str] = None
+    ) -> None:
+        """
+        Eklenen turu kalıcı kaydet. Bkz. GeminiClient._commit_turn.
+
+        Sadece kalıcı kayıt worker thread'de yapılır; on_turn'ün döndürdüğü
+        bellek güncellemesi (geçmiş istatistiği, context) event loop'ta çalışır.
+        """
+        apply = await asyncio.to_thread(self._sync._persist_turn, chat_data, contents, kind)
+        if apply:
+            apply()
+
+    # ==================== FILES API ====================
+
+    async def upload_file(
+        self,
+        file_path: str,
+        display_name: Optional[str] = None,
+        wait_for_processing: bool = True,
+        sha256: Optional[str] = None,
+        on_progress: Optional[Callable[..., None]] = None
+    ) -> Any:
+        """
+        Dosya yükle (Files API, async).
+
+        İşleme durumu artan aralıklarla asyncio.sleep ile yoklanır; event loop
+        bloklanmaz. Tekilleştirme ve parametreler GeminiClient.upload_file ile aynı.
+
+        Returns:
+            File objesi (cache'e geçilebilir)
+        """
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Dosya bulunamadı: {file_path}")
+
+        reusable = self._sync._reusable_file(sha256)
+        if reusable:
+            self._sync._report(on_progress, "reused", reused=True, gemini_file=reusable.name)
+            return self._sync._register_uploaded_file(file_path, reusable, sha256)
+
+        self._sync._report(on_progress, "uploading")
+        uploaded_file = await self._aio.files.upload(
+            file=path,
+            config={"display_name": display_name or path.name}
+        )
+
+        if wait_for_processing:
+            for attempt, delay in enumerate(self._sync._file_poll_delays(), start=1):
+                if uploaded_file.state.name != "PROCESSING":
+                    break
+                self._sync._report(on_progress, "processing", poll=attempt)
+                await asyncio.sleep(delay)
+                uploaded_file = await self._aio.files.get(name=uploaded_file.name)
+
+        return self._sync._register_uploaded_file(file_path, uploaded_file, sha256)
+
+    async def get_file(self, file_name: str) -> Optional[Any]:
+        """File objesini getir (async). Bkz. GeminiClient.get_file."""
+        try:
+            return await self._aio.files.get(name=file_name)
+        except Exception:
+            return None
+
+    async def count_file_tokens(self, model: str, uploaded_file: Any, sha256: str) -> int:
+        """Yüklenen dosyanın token sayısı (async). Bkz. GeminiClient.count_file_tokens."""
+        key = f"{model}:file:{sha256}"
+        tokens = self._sync._tokens.lookup(key)
+        if tokens is None:
+            result = await self._aio.models.count_tokens(model=model, contents=[uploaded_file])
+            tokens = self._sync._tokens.remember(key, result.total_tokens)
+        return tokens
+
+    # ==================== CONTEXT CACHING ====================
+
+    async def create_cache(
+        self,
+        cache_id: str,
+        model: str,
+        system_instruction: str,
+        contents: List[Any] = None,
+        ttl_seconds: int = 3600,
+        display_name: Optional[str] = None
+    ) -> CacheInfo:
+        """Context cache oluştur (async). Parametreler GeminiClient.create_cache ile aynı."""
+        cache = await self._aio.caches.create(
+            model=model,
+            config=self._sync._cache_config(
+                cache_id, system_instruction, contents, ttl_seconds, display_name
+            )
+        )
+
+        return self._sync._register_cache(cache_id, cache, model, ttl_seconds)
+
+    # ==================== CHAT API ====================
+
+    async def send_message(
+        self,
+        chat_id: str,
+        message: str
+    ) -> tuple[str, TokenUsage]:
+        """
+        Chat'e mesaj gönder (async).
+
+        Returns:
+            (yanıt metni, token kullanımı)
+        """
+        chat_data = self._sync._get_chat_data(chat_id)
+        user_content = self._sync._user_content(message)
+
+        response, usage = await self._generate(
+            chat_data["model"],
+            chat_data["history"] + [user_content],
+            self._sync._chat_config(chat_data),
+            message,
+            chat_data["history"],
+            operation="chat"
+        )
+        # Tur sadece başarılı denemeden sonra eklenir (retry geçmişi çoğaltmaz)
+        await self._commit_turn(chat_data, self._sync._add_turn(chat_data, user_content, response))
+
+        return response.text, usage
+
+    async def send_message_structured(
+        self,
+        chat_id: str,
+        message: str,
+        response_schema: Type[BaseModel],
+        use_cache: Optional[bool] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> tuple[BaseModel, TokenUsage]:
+        """
+        Chat oturumu üzerinden structured output al (async).
+
+        Args:
+            chat_id: Chat ID
+            message: Prompt/mesaj
+            response_schema: Pydantic model sınıfı
+            use_cache: Yanıt cache'i kullanılsın mı (None ise varsayılan)
+            schema_variant: Gönderilecek schema varyantı (full/compact/minimal)
+
+        Returns:
+            (Pydantic model instance, TokenUsage)
+        """
+        chat_data = self._sync._get_chat_data(chat_id)
+        user_content = self._sync._user_content(message)
+
+        key, cached_text = await asyncio.to_thread(
+            self._sync._lookup_response,
+            use_cache, chat_data["model"], message, response_schema,
+            chat_data.get("cache_id"), history=chat_data["history"],
+            schema_variant=schema_variant
+        )
+        if cached_text is not None:
+            result = response_schema.model_validate_json(cached_text)
+            kind = response_schema.__name__
+            await self._commit_turn(
+                chat_data, self._sync._add_text_turn(chat_data, user_content, cached_text, kind), kind
+            )
+            return result, TokenUsage()
+
+        response, usage = await self._generate(
+            chat_data["model"],
+            chat_data["history"] + [user_content],
+            self._sync._chat_structured_config(chat_data, response_schema, schema_variant),
+            message,
+            chat_data["history"],
+            operation="chat_structured",
+            schema=response_schema.__name__
+        )
+
+        result = response_schema.model_validate_json(response.text)
+
+        # Parse başarılıysa turu geçmişe ekle
+        kind = response_schema.__name__
+        await self._commit_turn(chat_data, self._sync._add_turn(chat_data, user_content, response, kind), kind)
+        await asyncio.to_thread(self._sync._store_response, key, chat_data["model"], response.text, usage)
+
+        return result, usage
+
+    async def preview_message_structured(
+        self,
+        chat_id: str,
+        message: str,
+        response_schema: Type[BaseModel],
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> tuple[BaseModel, str, TokenUsage]:
+        """
+        Chat geçmişiyle structured yanıt al ama turu geçmişe yazma.
+
+        Spekülatif üretim içindir: yanıt kullanılırsa GeminiClient.add_chat_turn
+        ile geçmişe eklenir, kullanılmazsa chat hiç değişmemiş olur.
+        Yanıt cache'i kullanılmaz.
+
+        Returns:
+            (Pydantic model instance, ham yanıt metni, TokenUsage)
+        """
+        chat_data = self._sync._get_chat_data(chat_id)
+        history = list(chat_data["history"])
+
+        response, usage = await self._generate(
+            chat_data["model"],
+            history + [self._sync._user_content(message)],
+            self._sync._chat_structured_config(chat_data, response_schema, schema_variant),
+            message,
+            history,
+            operation="chat_structured",
+            schema=response_schema.__name__
+        )
+
+        return response_schema.model_validate_json(response.text), response.text, usage
+
+    async def add_chat_turn(
+        self,
+        chat_id: str,
+        message: str,
+        text: str,
+        kind: Optional[str] = None
+    ) -> None:
+        """Önceden üretilmiş yanıtı tur olarak geçmişe ekle (async). Bkz. GeminiClient.add_chat_turn."""
+        chat_data = self._sync._get_chat_data(chat_id)
+        contents = self._sync._add_text_turn(chat_data, self._sync._user_content(message), text, kind)
+        await self._commit_turn(chat_data, contents, kind)
+
+    # ==================== STRUCTURED OUTPUT ====================
+
+    async def generate_structured(
+        self,
+        model: str,
+        prompt: str,
+        response_schema: Type[BaseModel],
+        cache_id: Optional[str] = None,
+        thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
+        use_cache: Optional[bool] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> tuple[BaseModel, TokenUsage]:
+        """
+        Yapılandırılmış yanıt üret (async).
+
+        Returns:
+            (Pydantic model instance, token kullanımı)
+        """
+        key, cached_text = await asyncio.to_thread(
+            self._sync._lookup_response,
+            use_cache, model, prompt, response_schema, cache_id, thinking_level,
+            schema_variant=schema_variant
+        )
+        if cached_text is not None:
+            return response_schema.model_validate_json(cached_text), TokenUsage()
+
+        response, usage = await self._generate(
+            model,
+            prompt,
+            self._sync._structured_config(response_schema, cache_id, thinking_level, schema_variant),
+            prompt,
+            operation="structured",
+            schema=response_schema.__name__
+        )
+
+        result = response_schema.model_validate_json(response.text)
+        await asyncio.to_thread(self._sync._store_response, key, model, response.text, usage)
+
+        return result, usage
+
+    async def generate_content_stream(
+        self,
+        model: str,
+        prompt: str,
+        cache_id: Optional[str] = None,
+        thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
+        on_usage: Optional[Callable[[TokenUsage], Any]] = None,
+        response_schema: Optional[Type[BaseModel]] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL,
+        labels: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        Streaming içerik üret (async generator, chat oturumu olmadan).
+
+        Async generator değer döndüremediği için token kullanımı,
+        stream bitince on_usage callback'i ile bildirilir (coroutine
+        döndürürse beklenir). response_schema
+        verilirse yanıt bu JSON schema'ya uygun akar. labels telemetry
+        etiketleridir (generator call_context dışında çalışır).
+
+        Yields:
+            Her chunk'taki metin
+        """
+        usage = TokenUsage()
+        reservation, first, stream = await self._open_stream(
+            model,
+            prompt,
+            self._sync._stream_config(cache_id, thinking_level, response_schema, schema_variant),
+            prompt,
+            operation="stream",
+            schema=response_schema.__name__ if response_schema else None,
+            labels=labels
+        )
+
+        async def chunks():
+            try:
+                if first is not None:
+                    yield first
+                    async for chunk in stream:
+                        yield chunk
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose:
+                    await aclose()
+
+        inner = chunks()
+        try:
+            async for chunk in inner:
+                if chunk.text:
+                    yield chunk.text
+                if getattr(chunk, "usage_metadata", None):
+                    usage = self._sync._parse_usage(chunk.usage_metadata)
+        except BaseException as e:
+            # Tüketici bıraktı (aclose, iptal) veya stream koptu
+            self._sync._abort_stream(reservation, usage, e)
+            raise
+        finally:
+            await inner.aclose()
+
+        self._sync._reconcile(reservation, usage)
+        if on_usage:
+            pending = on_usage(usage)
+            if inspect.isawaitable(pending):
+                await pending
+
+    # ==================== BATCH API ====================
+
+    async def submit_batch(
+        self,
+        model: str,
+        requests: List["BatchRequest"],
+        display_name: Optional[str] = None
+    ) -> types.BatchJob:
+        """Structured istekleri tek batch işi olarak gönder (async). Bkz. GeminiClient.submit_batch."""
+        return await self._aio.batches.create(
+            model=model,
+            src=self._sync._batch_source(model, requests),
+            config=types.CreateBatchJobConfig(display_name=display_name)
+        )
+
+    async def get_batch(self, job_name: str) -> types.BatchJob:
+        """Batch işinin güncel durumu (async)"""
+        return await self._aio.batches.get(name=job_name)
+
+    async def cancel_batch(self, job_name: str) -> None:
+        """Batch işini iptal et (async)"""
+        await self._aio.batches.cancel(name=job_name)
@@ -0,0 +1,378 @@
+"""
+Cache Lifecycle Manager.
+Context cache'lerinin TTL uzatma, süresi dolma ve artık (orphan) temizliği.
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta, timezone
+
+from .client_pool import GeminiClientPool, get_client_pool
+from .installation import get_installation
+from .resilience import ResilienceLayer
+from .shared_cache import SharedCacheRegistry
+from .transport import OFFLINE_API_KEY, is_offline
+from ..db import ProjectRepository
+from ..models.project import ModuleType
+
+logger = logging.getLogger(__name__)
+
+
+class CacheLifecycleManager:
+    """
+    Arka plan cache yöneticisi.
+
+    module_caches tablosundaki cache_id -> Gemini cache adı eşlemeleri
+    üzerinden çalışır (veritabanı işleri asyncio.to_thread ile event loop
+    dışında yapılır):
+
+    - Aktif projeler (son ACTIVE_WINDOW içinde güncellenen) için bitişe
+      RENEW_MARGIN'den az kalan cache'lerin TTL'i uzatılır
+    - Boştaki projelerin cache'lerine dokunulmaz; süreleri dolunca eşleme
+      silinir (gerekirse chat kurtarmada yeniden oluşturulur)
+    - SWEEP_INTERVAL'de bir caches.list / files.list ile bu kuruluma ait
+      ama hiçbir projede kayıtlı olmayan cache ve dosyalar silinir
+
+    Süresinden önce silinen cache'lerin kalan ömrü "tasarruf edilen
+    depolama" olarak raporlanır (saat ve token-saat).
+    """
+
+    DEFAULT_INTERVAL_SECONDS = 300
+    DEFAULT_ACTIVE_WINDOW = timedelta(hours=2)
+    RENEW_MARGIN = timedelta(minutes=15)
+    SWEEP_INTERVAL = timedelta(hours=1)
+    SWEEP_GRACE = timedelta(minutes=10)  # yeni oluşturulup henüz kaydedilmemiş olabilir
+
+    # Bu kurulumun oluşturduğu kaynaklar: display_name = "fs-{kurulum id}.{ad}"
+    # (bkz. Installation); etiketsiz ad cache için "{proje id}_{modül}" veya
+    # "shared_{prompt hash}", dosya için "source_{proje id}" (proje id: uuid
+    # veya ilk 8 hanesi). Başka kurulumların kaynaklarına ve etiketsiz
+    # kaynaklara dokunulmaz.
+    OWNED_CACHE_PATTERN = re.compile(
+        r"^(?:[0-9a-f]{8}(?:-[0-9a-f]{4}){0,3}(?:-[0-9a-f]{12})?_(?:%s)|%s[0-9a-f]{16})$"
+        % ("|".join(m.value for m in ModuleType), SharedCacheRegistry.DISPLAY_PREFIX)
+    )
+    OWNED_FILE_PREFIX = "source_"
+
+    def __init__(
+        self,
+        repository: Optional[ProjectRepository] = None,
+        pool: Optional[GeminiClientPool] = None,
+        api_key: Optional[str] = None,
+        interval_seconds: Optional[int] = None,
+        active_window: Optional[timedelta] = None
+    ):
+        """
+        CacheLifecycleManager başlat.
+
+        Args:
+            repository: Proje repository (None ise yeni instance)
+            pool: Paylaşılan client havuzu
+            api_key: Gemini API key (None ise GEMINI_API_KEY env var)
+            interval_seconds: Kontrol aralığı (None ise GEMINI_CACHE_MANAGER_INTERVAL)
+            active_window: Projenin aktif sayılacağı süre (None ise
+                GEMINI_CACHE_ACTIVE_WINDOW_MIN)
+        """
+        self._repo = repository or ProjectRepository()
+        self._pool = pool or get_client_pool()
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or (
+            OFFLINE_API_KEY if is_offline() else None
+        )
+
+        self.interval_seconds = interval_seconds or int(
+            os.getenv("GEMINI_CACHE_MANAGER_INTERVAL", self.DEFAULT_INTERVAL_SECONDS)
+        )
+        window_min = os.getenv("GEMINI_CACHE_ACTIVE_WINDOW_MIN")
+        self.active_window = active_window or (
+            timedelta(minutes=int(window_min)) if window_min else self.DEFAULT_ACTIVE_WINDOW
+        )
+
+        self._task: Optional[asyncio.Task] = None
+        self._last_tick: Optional[datetime] = None
+        self._last_sweep: Optional[datetime] = None
+
+        # Sayaçlar (process ömrü boyunca)
+        self._renewed = 0
+        self._lapsed = 0
+        self._swept_caches = 0
+        self._swept_files = 0
+        self._deleted_with_projects = 0
+        self._cache_hours_saved = 0.0
+        self._token_hours_saved = 0.0
+
+    @property
+    def _aio(self) -> Any:
+        return self._pool.get_client(self.api_key).aio
+
+    # ==================== ARKA PLAN DÖNGÜSÜ ====================
+
+    def start(self) -> None:
+        """Arka plan döngüsünü başlat (çalışan event loop içinde)"""
+        if not self.api_key:
+            logger.warning("Cache yöneticisi başlatılmadı: API key yok")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="cache-lifecycle")
+            logger.info(f"Cache yöneticisi başladı (aralık={self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Döngüyü durdur"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.warning(f"Cache yöneticisi turu başarısız: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def tick(self) -> Dict[str, int]:
+        """Tek tur: TTL uzatma, gerekiyorsa artık temizliği"""
+        result = await self.keep_alive()
+
+        now = datetime.now()
+        if self._last_sweep is None or now - self._last_sweep >= self.SWEEP_INTERVAL:
+            result.update(await self.sweep())
+            self._last_sweep = now
+
+        self._last_tick = now
+        return result
+
+    # ==================== TTL UZATMA ====================
+
+    async def keep_alive(self) -> Dict[str, int]:
+        """
+        Aktif projelerin cache TTL'lerini uzat, süresi dolan eşlemeleri sil.
+        
+        Paylaşılan cache'in birden çok eşlemesi olabilir; referans veren
+        projelerden biri aktifse bir kez uzatılır.
+        """
+        now = datetime.now()
+        renewed = 0
+        groups, lapsed = await asyncio.to_thread(self._prune_expired, now)
+
+        for cache_name, rows in groups.items():
+            expires_at = min(datetime.fromisoformat(r["expires_at"]) for r in rows)
+            active = any(
+                datetime.fromisoformat(r["project_updated_at"]) >= now - self.active_window
+                for r in rows
+            )
+            if not active or expires_at - now > self.RENEW_MARGIN:
+                continue
+
+            ttl_seconds = max(r["ttl_seconds"] for r in rows)
+            try:
+                await self._aio.caches.update(
+                    name=cache_name,
+                    config={"ttl": f"{ttl_seconds}s"}
+                )
+            except Exception as e:
+                if ResilienceLayer.status_code(e) in (403, 404):
+                    await asyncio.to_thread(self._forget_cache, cache_name, rows)
+                    lapsed += len(rows)
+                else:
+                    logger.warning(f"Cache TTL uzatılamadı ({cache_name}): {e}")
+                continue
+
+            new_expires = now + timedelta(seconds=ttl_seconds)
+            await asyncio.to_thread(self._repo.update_module_cache_expiry, cache_name, new_expires)
+            for r in rows:
+                self._mirror_expiry(r, new_expires)
+            renewed += 1
+
+        self._renewed += renewed
+        self._lapsed += lapsed
+        if renewed or lapsed:
+            logger.info(f"Cache TTL: {renewed} uzatıldı, {lapsed} süresi doldu")
+        return {"renewed": renewed, "lapsed": lapsed}
+
+    def _prune_expired(self, now: datetime) -> tuple[Dict[str, List[Dict[str, Any]]], int]:
+        """
+        Süresi dolan eşlemeleri sil (worker thread'de çalışır).
+
+        Returns:
+            (Gemini cache adı -> geçerli eşlemeler, silinen eşleme sayısı)
+        """
+        lapsed = 0
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self._repo.list_module_caches():
+            if datetime.fromisoformat(row["expires_at"]) <= now:
+                self._repo.delete_module_cache(row["cache_id"])
+                lapsed += 1
+            else:
+                groups.setdefault(row["cache_name"], []).append(row)
+
+        for row in self._repo.list_shared_caches():
+            if datetime.fromisoformat(row["expires_at"]) <= now:
+                self._repo.delete_shared_cache(row["cache_name"])
+        return groups, lapsed
+
+    def _forget_cache(self, cache_name: str, rows: List[Dict[str, Any]]) -> None:
+        """Gemini'de artık olmayan cache'in eşlemelerini sil"""
+        for r in rows:
+            self._repo.delete_module_cache(r["cache_id"])
+        self._repo.delete_shared_cache(cache_name)
+
+    def _mirror_expiry(self, row: Dict[str, Any], expires_at: datetime) -> None:
+        """Bellekteki oturumun CacheInfo'sunu güncelle (proje yüklüyse)"""
+        registry = self._pool.find_registry(row["project_id"])
+        cache_info = registry["caches"].get(row["cache_id"]) if registry else None
+        if cache_info and cache_info.cache_name == row["cache_name"]:
+            cache_info.expires_at = expires_at
+
+    # ==================== ARTIK TEMİZLİĞİ ====================
+
+    async def sweep(self) -> Dict[str, int]:
+        """Bu kuruluma ait ama kayıtlı olmayan cache ve dosyaları sil"""
+        installation = get_installation()
+        cutoff = datetime.now(timezone.utc) - self.SWEEP_GRACE
+        known_caches, known_files = await asyncio.to_thread(self._known_resources)
+
+        caches = 0
+        for cache in await self._collect(self._aio.caches.list()):
+            if (
+                cache.name in known_caches
+                or not self.OWNED_CACHE_PATTERN.match(installation.owned_name(cache.display_name) or "")
+                or not cache.create_time or cache.create_time > cutoff
+            ):
+                continue
+            if await self._delete_cache(cache.name):
+                self._count_saved(cache.expire_time, cache.usage_metadata)
+                caches += 1
+
+        files = 0
+        for uploaded_file in await self._collect(self._aio.files.list()):
+            if (
+                uploaded_file.name in known_files
+                or not (installation.owned_name(uploaded_file.display_name) or "").startswith(self.OWNED_FILE_PREFIX)
+                or not uploaded_file.create_time or uploaded_file.create_time > cutoff
+            ):
+                continue
+            if await self._delete_file(uploaded_file.name):
+                files += 1
+
+        self._swept_caches += caches
+        self._swept_files += files
+        if caches or files:
+            logger.info(f"Artık temizliği: {caches} cache, {files} dosya silindi")
+        return {"swept_caches": caches, "swept_files": files}
+
+    def _known_resources(self) -> tuple[set, set]:
+        """Kayıtlı (cache adları, dosya adları)"""
+        known_caches = {row["cache_name"] for row in self._repo.list_module_caches()}
+        known_caches |= {row["cache_name"] for row in self._repo.list_shared_caches()}
+        known_files = {row["file_name"] for row in self._repo.list_source_files()}
+        return known_caches, known_files
+
+    async def delete_project_resources(self, project_id: str) -> Dict[str, int]:
+        """
+        Silinen projenin uzak cache'lerini ve başka projede kullanılmayan
+        kaynak dosyalarını sil. Proje veritabanından silinmeden önce çağrılmalı.
+        """
+        if not self.api_key:
+            return {"caches": 0, "files": 0}
+
+        caches = 0
+        module_caches = await asyncio.to_thread(self._repo.get_module_caches, project_id)
+        for cache_id, cache_info in module_caches.items():
+            await asyncio.to_thread(self._repo.delete_module_cache, cache_id)
+            # Paylaşılan cache'i kullanan başka proje varsa silinmez
+            if await asyncio.to_thread(self._repo.count_cache_refs, cache_info.cache_name) > 0:
+                continue
+            if await self._delete_cache(cache_info.cache_name):
+                remaining = cache_info.expires_at - datetime.now()
+                self._add_saved(remaining, cache_info.token_count)
+                await asyncio.to_thread(self._repo.delete_shared_cache, cache_info.cache_name)
+                caches += 1
+
+        files = 0
+        rows = await asyncio.to_thread(self._repo.list_source_files)
+        shared = {r["file_name"] for r in rows if r["project_id"] != project_id}
+        for row in rows:
+            if row["project_id"] != project_id:
+                continue
+            if row["file_name"] not in shared and await self._delete_file(row["file_name"]):
+                self._pool.forget_file(row["sha256"])
+                files += 1
+
+        self._deleted_with_projects += caches
+        self._swept_files += files
+        return {"caches": caches, "files": files}
+
+    async def _delete_cache(self, cache_name: str) -> bool:
+        try:
+            await self._aio.caches.delete(name=cache_name)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache silinemedi ({cache_name}): {e}")
+            return False
+
+    async def _delete_file(self, file_name: str) -> bool:
+        try:
+            await self._aio.files.delete(name=file_name)
+            return True
+        except Exception as e:
+            logger.warning(f"Dosya silinemedi ({file_name}): {e}")
+            return False
+
+    @staticmethod
+    async def _collect(pager_call: Any) -> List[Any]:
+        """list() sonucunu listeye çevir (SDK async pager veya düz liste)"""
+        pager = await pager_call
+        if hasattr(pager, "__aiter__"):
+            return [item async for item in pager]
+        return list(pager)
+
+    # ==================== METRİKLER ====================
+
+    def _count_saved(self, expire_time: Optional[datetime], usage_metadata: Any) -> None:
+        if expire_time:
+            tokens = getattr(usage_metadata, "total_token_count", 0) or 0
+            self._add_saved(expire_time - datetime.now(timezone.utc), tokens)
+
+    def _add_saved(self, remaining: timedelta, token_count: int) -> None:
+        """Erken silinen cache'in kalan ömrünü tasarrufa ekle"""
+        hours = max(remaining.total_seconds(), 0) / 3600
+        self._cache_hours_saved += hours
+        self._token_hours_saved += hours * token_count
+
+    def stats(self) -> Dict[str, Any]:
+        """Yönetici sayaçları ve tasarruf"""
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "interval_seconds": self.interval_seconds,
+            "active_window_minutes": int(self.active_window.total_seconds() // 60),
+            "tracked_caches": len(self._repo.list_module_caches()),
+            "shared_caches": len(self._repo.list_shared_caches()),
+            "renewed": self._renewed,
+            "lapsed": self._lapsed,
+            "swept_caches": self._swept_caches,
+            "swept_files": self._swept_files,
+            "deleted_with_projects": self._deleted_with_projects,
+            "storage_hours_saved": round(self._cache_hours_saved, 2),
+            "storage_token_hours_saved": round(self._token_hours_saved),
+            "last_tick": self._last_tick.isoformat() if self._last_tick else None,
+            "last_sweep": self._last_sweep.isoformat() if self._last_sweep else None
+        }
+
+
+# Global instance
+_cache_manager: Optional[CacheLifecycleManager] = None
+
+
+def get_cache_manager() -> CacheLifecycleManager:
+    """Global cache yöneticisini al"""
+    global _cache_manager
+    if _cache_manager is None:
+        _cache_manager = CacheLifecycleManager()
+    return _cache_manager
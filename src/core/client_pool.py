@@ -0,0 +1,198 @@
+"""
+Gemini Client Pool.
+Process genelinde paylaşılan genai.Client ve HTTP bağlantı havuzu.
+"""
+
+import os
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+import httpx
+from google import genai
+from google.genai import types
+
+from .transport import create_client, transport_stats
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiClientPool:
+    """
+    Paylaşılan Gemini istemci havuzu.
+
+    Her API key için tek bir genai.Client (ve tek bir keep-alive HTTP
+    bağlantı havuzu) tutar. Proje başına GeminiClient'lar bu istemciyi
+    paylaşır; cache/chat registry'leri ise namespace (proje ID) bazında
+    ayrı tutulur. Böylece proje yüklemek yeni TLS bağlantısı açmaz ve
+    soket sayısı max_connections ile sınırlanır.
+    """
+
+    # Varsayılan bağlantı limitleri (env ile değiştirilebilir)
+    DEFAULT_MAX_CONNECTIONS = 32
+    DEFAULT_MAX_KEEPALIVE = 16
+    DEFAULT_KEEPALIVE_EXPIRY = 60.0  # saniye
+
+    _instance: Optional["GeminiClientPool"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None
+    ):
+        """
+        GeminiClientPool başlat.
+
+        Args:
+            max_connections: Eşzamanlı maksimum HTTP bağlantısı
+                (None ise GEMINI_MAX_CONNECTIONS env var)
+            max_keepalive_connections: Açık tutulacak boşta bağlantı sayısı
+                (None ise GEMINI_MAX_KEEPALIVE env var)
+            keepalive_expiry: Boşta bağlantının kapatılma süresi (saniye)
+        """
+        self.max_connections = max_connections or int(
+            os.getenv("GEMINI_MAX_CONNECTIONS", self.DEFAULT_MAX_CONNECTIONS)
+        )
+        self.max_keepalive_connections = max_keepalive_connections or int(
+            os.getenv("GEMINI_MAX_KEEPALIVE", self.DEFAULT_MAX_KEEPALIVE)
+        )
+        self.keepalive_expiry = keepalive_expiry or self.DEFAULT_KEEPALIVE_EXPIRY
+
+        self._lock = threading.Lock()
+        self._clients: Dict[str, genai.Client] = {}  # api_key -> client
+        self._http_clients: list = []  # kapatılacak httpx istemcileri
+        self._registries: Dict[str, Dict[str, Dict[str, Any]]] = {}  # namespace -> registry
+        self._files_by_hash: Dict[str, Any] = {}  # sha256 -> File (tüm projeler)
+
+    @classmethod
+    def get_instance(cls) -> "GeminiClientPool":
+        """Singleton instance al"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    # ==================== CLIENT ====================
+
+    def get_client(self, api_key: str) -> genai.Client:
+        """
+        API key için paylaşılan genai.Client al (yoksa oluştur).
+
+        Args:
+            api_key: Gemini API key
+
+        Returns:
+            genai.Client
+        """
+        client = self._clients.get(api_key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if api_key not in self._clients:
+                self._clients[api_key] = create_client(api_key, self._http_options)
+                logger.info(
+                    f"Gemini client oluşturuldu (max_connections={self.max_connections})"
+                )
+            return self._clients[api_key]
+
+    def _http_options(self) -> types.HttpOptions:
+        """Bağlantı limitli HTTP ayarları"""
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        try:
+            # Timeout SDK tarafından istek bazında verilir
+            sync_client = httpx.Client(limits=limits, timeout=None)
+            async_client = httpx.AsyncClient(limits=limits, timeout=None)
+            options = types.HttpOptions(
+                httpx_client=sync_client,
+                httpx_async_client=async_client
+            )
+            self._http_clients.extend([sync_client, async_client])
+            return options
+        except Exception:
+            # Eski SDK sürümleri hazır httpx istemcisi kabul etmez
+            return types.HttpOptions(
+                client_args={"limits": limits},
+                async_client_args={"limits": limits}
+            )
+
+    # ==================== NAMESPACE REGISTRY ====================
+
+    def registry(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Namespace (proje) için cache/chat/dosya registry'si al.
+
+        Aynı namespace ile oluşturulan GeminiClient'lar aynı sözlükleri
+        paylaşır; proje oturumu yeniden yüklense de chat geçmişi korunur.
+
+        Returns:
+            {"caches": {...}, "chats": {...}, "uploaded_files": {...}}
+        """
+        with self._lock:
+            if namespace not in self._registries:
+                self._registries[namespace] = {
+                    "caches": {},
+                    "chats": {},
+                    "uploaded_files": {}
+                }
+            return self._registries[namespace]
+
+    def find_registry(self, namespace: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Namespace registry'si (oluşturmadan; bellekte yoksa None)"""
+        return self._registries.get(namespace)
+
+    def release(self, namespace: str) -> bool:
+        """Namespace registry'sini bırak (proje silindiğinde)"""
+        with self._lock:
+            return self._registries.pop(namespace, None) is not None
+    
+    # ==================== DOSYA İNDEKSİ ====================
+    
+    def remember_file(self, sha256: str, uploaded_file: Any) -> None:
+        """Yüklenen dosyayı içerik hash'i ile indeksle (projeler arası paylaşım)"""
+        with self._lock:
+            self._files_by_hash[sha256] = uploaded_file
+    
+    def file_by_hash(self, sha256: str) -> Optional[Any]:
+        """Aynı içerikle daha önce yüklenmiş File objesi"""
+        return self._files_by_hash.get(sha256)
+    
+    def forget_file(self, sha256: str) -> None:
+        with self._lock:
+            self._files_by_hash.pop(sha256, None)
+
+    # ==================== YAŞAM DÖNGÜSÜ ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """Havuz istatistikleri"""
+        return {
+            "transport": transport_stats(next(iter(self._clients.values()), None)),
+            "clients": len(self._clients),
+            "namespaces": len(self._registries),
+            "active_chats": sum(len(r["chats"]) for r in self._registries.values()),
+            "indexed_files": len(self._files_by_hash),
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections
+        }
+
+    async def aclose(self) -> None:
+        """Tüm HTTP bağlantılarını kapat (uygulama kapanışında)"""
+        for http_client in self._http_clients:
+            if isinstance(http_client, httpx.AsyncClient):
+                await http_client.aclose()
+            else:
+                http_client.close()
+        self._http_clients.clear()
+        self._clients.clear()
+
+
+def get_client_pool() -> GeminiClientPool:
+    """Global istemci havuzunu al"""
+    return GeminiClientPool.get_instance()
@@ -3,10 +3,11 @@ Context Manager.
 Token kullanımı takibi ve bağlam yönetimi.
 """
 
-from typing import Dict, Optional, List
+from typing import Dict, Optional
 from datetime import datetime
 from dataclasses import dataclass, field
 
+from .token_estimator import TokenEstimator, get_token_estimator
 from ..models.project import TokenUsage
 
 
@@ -34,7 +35,9 @@ class ContextManager:
     def __init__(
         self,
         max_tokens: int = DEFAULT_MAX_TOKENS,
-        project_id: Optional[str] = None
+        project_id: Optional[str] = None,
+        language: Optional[str] = None,
+        token_estimator: Optional[TokenEstimator] = None
     ):
         """
         ContextManager başlat.
@@ -42,9 +45,13 @@ class ContextManager:
         Args:
             max_tokens: Maksimum token limiti
             project_id: Proje ID
+            language: İçerik dili (token tahmini için, örn. "tr")
+            token_estimator: Kalibre edilen token tahmincisi (None ise global)
         """
         self.max_tokens = max_tokens
         self.project_id = project_id
+        self.language = language
+        self._estimator = token_estimator or get_token_estimator()
         
         # Bileşen takibi
         self._components: Dict[str, ContextComponent] = {}
@@ -56,7 +63,10 @@ class ContextManager:
         self._total_usage = TokenUsage()
         
         # Geçmiş kullanımlar (her istek için)
-        self._usage_history: List[TokenUsage] = []
+        self._request_count = 0  # çağrı bazında kayıt: kullanım defteri (usage_ledger)
+        
+        # Kullanılan paylaşılan cache'ler: cache adı -> {"tokens", "refs"}
+        self._shared_caches: Dict[str, Dict[str, int]] = {}
     
     # ==================== BİLEŞEN YÖNETİMİ ====================
     
@@ -64,7 +74,8 @@ class ContextManager:
         self,
         name: str,
         content: str,
-        is_cached: bool = False
+        is_cached: bool = False,
+        token_count: Optional[int] = None
     ) -> bool:
         """
         Bağlama bileşen ekle.
@@ -73,11 +84,13 @@ class ContextManager:
             name: Bileşen adı (system_prompt, source_material, vb.)
             content: İçerik
             is_cached: Cache'lenmiş mi
+            token_count: Bilinen token sayısı (count_tokens); None ise tahmin edilir
             
         Returns:
             Başarılı mı (False = limit aşıldı)
         """
-        token_count = self._estimate_tokens(content)
+        if token_count is None:
+            token_count = self._estimate_tokens(content)
         
         # Limit kontrolü
         if self.current_tokens + token_count > self.max_tokens:
@@ -120,6 +133,26 @@ class ContextManager:
         """Bileşen bilgisi al"""
         return self._components.get(name)
     
+    def update_shared_cache(self, cache_name: str, token_count: int, refs: int) -> None:
+        """
+        Projenin kullandığı paylaşılan cache'i kaydet.
+        
+        Args:
+            cache_name: Gemini cache adı
+            token_count: Cache'deki token sayısı
+            refs: Cache'i kullanan proje modülü sayısı
+        """
+        self._shared_caches[cache_name] = {"tokens": token_count, "refs": refs}
+    
+    @property
+    def shared_cache_savings(self) -> int:
+        """
+        Paylaşım sayesinde ayrı ayrı saklanmayan cache token'ı.
+        
+        N referanslı bir cache tek kopya saklanır; N-1 kopyanın token'ı tasarruftur.
+        """
+        return sum(c["tokens"] * max(c["refs"] - 1, 0) for c in self._shared_caches.values())
+    
     # ==================== TOKEN TAKİBİ ====================
     
     def record_usage(self, usage: TokenUsage) -> None:
@@ -133,7 +166,7 @@ class ContextManager:
         - prompt_tokens: Son çağrının context boyutu (gösterilecek)
         - total_tokens: Oturum boyunca toplam harcanan token
         """
-        self._usage_history.append(usage)
+        self._request_count += 1
         
         # SON çağrının değerlerini sakla (birikimli DEĞİL)
         # Bu değer mevcut context boyutunu gösterir
@@ -141,6 +174,7 @@ class ContextManager:
         
         # Toplam harcanan token (birikimli) - fatura için
         self._total_usage.output_tokens += usage.output_tokens
+        self._total_usage.thinking_tokens += usage.thinking_tokens
         self._total_usage.total_tokens += usage.total_tokens
         
         # Cached tokens en son değeri al
@@ -230,6 +264,10 @@ class ContextManager:
             "remaining": real_remaining,
             "cached_tokens": self._total_usage.cached_tokens,
             "cache_ratio": (self._total_usage.cached_tokens / real_tokens * 100) if real_tokens > 0 else 0,
+            # Paylaşılan cache (projeler arası tek kopya system prompt)
+            "shared_cache_tokens": sum(c["tokens"] for c in self._shared_caches.values()),
+            "shared_cache_refs": sum(c["refs"] for c in self._shared_caches.values()),
+            "cached_tokens_saved": self.shared_cache_savings,
             # Ek bilgiler
             "total_output_tokens": self._total_usage.output_tokens,
             "total_tokens_all": self._total_usage.total_tokens
@@ -264,7 +302,7 @@ class ContextManager:
             "status": status,
             "breakdown": self.get_breakdown(),
             "cumulative": {
-                "total_requests": len(self._usage_history),
+                "total_requests": self._request_count,
                 "total_prompt_tokens": self._total_usage.prompt_tokens,
                 "total_cached_tokens": self._total_usage.cached_tokens,
                 "total_output_tokens": self._total_usage.output_tokens,
@@ -297,13 +335,13 @@ class ContextManager:
     # ==================== YARDIMCI METODLAR ====================
     
     def _estimate_tokens(self, text: str) -> int:
-        """Yaklaşık token sayısı hesapla (4 karakter ≈ 1 token)"""
-        return len(text) // 4
+        """Yaklaşık token sayısı (dil bazında kalibre edilen oranla)"""
+        return self._estimator.estimate(text, self.language)
     
     def reset(self) -> None:
         """Bağlamı sıfırla"""
         self._components.clear()
-        self._usage_history.clear()
+        self._request_count = 0
         self._total_usage = TokenUsage()
     
     def to_dict(self) -> Dict:
@@ -324,6 +362,7 @@ class ContextManager:
                 "prompt_tokens": self._total_usage.prompt_tokens,
                 "cached_tokens": self._total_usage.cached_tokens,
                 "output_tokens": self._total_usage.output_tokens,
+                "thinking_tokens": self._total_usage.thinking_tokens,
                 "total_tokens": self._total_usage.total_tokens
             }
         }
@@ -336,5 +375,6 @@ class ContextManager:
                 prompt_tokens=usage_data.get("prompt_tokens", 0),
                 cached_tokens=usage_data.get("cached_tokens", 0),
                 output_tokens=usage_data.get("output_tokens", 0),
+                thinking_tokens=usage_data.get("thinking_tokens", 0),
                 total_tokens=usage_data.get("total_tokens", 0)
             )
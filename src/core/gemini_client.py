@@ -5,17 +5,49 @@ Files API, Caching, Chat ve Structured Output yönetimi.
 
 import os
 import time
+import asyncio
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Type, Generator
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Type, Generator, Iterator, Callable, TYPE_CHECKING
+from datetime import datetime, timedelta, timezone
 
-from google import genai
 from google.genai import types
 from pydantic import BaseModel
 
+from .client_pool import GeminiClientPool, get_client_pool
+from .rate_limiter import RateLimiter, Reservation, get_rate_limiter
+from .resilience import ResilienceLayer, get_resilience
+from .response_cache import ResponseCache, get_response_cache
+from .transport import OFFLINE_API_KEY, is_offline
+from .schema_registry import SchemaRegistry, SchemaVariant, get_schema_registry
+from .token_estimator import TokenEstimator, get_token_estimator
+from .telemetry import Telemetry, CallSpan, get_telemetry
 from ..models.project import CacheInfo, TokenUsage, ThinkingLevel
 
+if TYPE_CHECKING:
+    from .async_gemini_client import AsyncGeminiClient
+
+
+@dataclass
+class BatchRequest:
+    """Batch işindeki tek structured istek"""
+    key: str                             # sonucu eşlemek için (metadata olarak gider)
+    prompt: str
+    response_schema: Type[BaseModel]
+    cache_id: Optional[str] = None
+    thinking_level: Optional[ThinkingLevel] = None   # None ise HIGH
+    schema_variant: SchemaVariant = SchemaVariant.FULL
+
+
+@dataclass
+class BatchResult:
+    """Batch işinden dönen tek sonuç (hata varsa result None)"""
+    key: str
+    result: Optional[BaseModel]
+    usage: TokenUsage
+    error: Optional[str] = None
+
 
 class GeminiClient:
     """
@@ -32,27 +64,87 @@ class GeminiClient:
     MAX_CONTEXT_TOKENS = 1_000_000
     MAX_OUTPUT_TOKENS = 8_000
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Dosya işleme bekleme (backoff) ayarları - saniye
+    FILE_POLL_INITIAL = 0.5
+    FILE_POLL_MAX = 5.0
+    FILE_POLL_TIMEOUT = 600
+    # Süresi bu kadardan az kalan dosya yeniden kullanılmaz
+    FILE_REUSE_MIN_REMAINING = timedelta(hours=1)
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        namespace: Optional[str] = None,
+        pool: Optional[GeminiClientPool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        resilience: Optional[ResilienceLayer] = None,
+        response_cache: Optional[ResponseCache] = None,
+        schema_registry: Optional[SchemaRegistry] = None,
+        language: Optional[str] = None,
+        token_estimator: Optional[TokenEstimator] = None,
+        telemetry: Optional[Telemetry] = None
+    ):
         """
         GeminiClient başlat.
         
         Args:
-            api_key: Gemini API key. None ise GEMINI_API_KEY env var kullanılır.
+            api_key: Gemini API key. None ise GEMINI_API_KEY env var kullanılır
+                (GEMINI_TRANSPORT=replay/synthetic iken gerekmez).
+            namespace: Registry namespace'i (genelde proje ID). Verilirse
+                cache/chat registry'leri havuzda bu ad altında paylaşılır.
+            pool: İstemci havuzu (None ise global havuz)
+            rate_limiter: RPM/TPM zamanlayıcısı (None ise global limiter)
+            resilience: Retry/circuit breaker katmanı (None ise global katman)
+            response_cache: Structured yanıt cache'i (None ise global cache)
+            schema_registry: Derlenmiş JSON schema kaydı (None ise global kayıt)
+            language: İçerik dili (token tahmini kalibrasyonu için, örn. "tr")
+            token_estimator: Kalibre edilen token tahmincisi (None ise global)
+            telemetry: Çağrı span toplayıcısı (None ise global)
         """
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or (
+            OFFLINE_API_KEY if is_offline() else None
+        )
         if not self.api_key:
             raise ValueError(
                 "GEMINI_API_KEY bulunamadı. "
                 "Lütfen api_key parametresi verin veya GEMINI_API_KEY env var ayarlayın."
             )
         
-        # Client oluştur
-        self._client = genai.Client(api_key=self.api_key)
+        # Paylaşılan client (keep-alive bağlantı havuzu process genelinde tek)
+        self._pool = pool or get_client_pool()
+        self._client = self._pool.get_client(self.api_key)
+        self.namespace = namespace
+        self._limiter = rate_limiter or get_rate_limiter()
+        self._resilience = resilience or get_resilience()
+        self._response_cache = response_cache or get_response_cache()
+        self._schemas = schema_registry or get_schema_registry()
+        self._tokens = token_estimator or get_token_estimator()
+        self._telemetry = telemetry or get_telemetry()
+        self.language = language
         
         # Aktif cache'ler, chat oturumları ve yüklenen dosyalar
-        self._caches: Dict[str, CacheInfo] = {}
-        self._chats: Dict[str, Any] = {}  # chat_id -> Chat instance
-        self._uploaded_files: Dict[str, Any] = {}  # file_path -> File object
+        if namespace:
+            registry = self._pool.registry(namespace)
+        else:
+            registry = {"caches": {}, "chats": {}, "uploaded_files": {}}
+        self._caches: Dict[str, CacheInfo] = registry["caches"]
+        self._chats: Dict[str, Any] = registry["chats"]  # chat_id -> chat kaydı (model, config, history)
+        self._uploaded_files: Dict[str, Any] = registry["uploaded_files"]  # file_path -> File object
+        
+        # Async yüzey (lazy)
+        self._aio: Optional["AsyncGeminiClient"] = None
+    
+    @property
+    def aio(self) -> "AsyncGeminiClient":
+        """
+        Async istemci (SDK'daki client.aio karşılığı).
+        
+        Aynı cache/chat registry'lerini paylaşır; event loop'u bloklamaz.
+        """
+        if self._aio is None:
+            from .async_gemini_client import AsyncGeminiClient
+            self._aio = AsyncGeminiClient(self)
+        return self._aio
         
     # ==================== FILES API ====================
     
@@ -60,15 +152,22 @@ class GeminiClient:
         self,
         file_path: str,
         display_name: Optional[str] = None,
-        wait_for_processing: bool = True
+        wait_for_processing: bool = True,
+        sha256: Optional[str] = None,
+        on_progress: Optional[Callable[..., None]] = None
     ) -> Any:
         """
         Dosya yükle (Files API).
         
+        sha256 verilirse ve aynı içerik (herhangi bir projede) daha önce
+        yüklenmiş ve süresi dolmamışsa, yeniden yüklenmez.
+        
         Args:
             file_path: Yerel dosya yolu
             display_name: Görüntülenen ad (opsiyonel)
             wait_for_processing: İşlenene kadar bekle
+            sha256: Dosya içeriğinin SHA-256 hash'i (tekilleştirme için)
+            on_progress: İlerleme callback'i: on_progress(stage, **detay)
             
         Returns:
             File objesi (cache'e geçilebilir)
@@ -77,26 +176,91 @@ class GeminiClient:
         if not path.exists():
             raise FileNotFoundError(f"Dosya bulunamadı: {file_path}")
         
+        reusable = self._reusable_file(sha256)
+        if reusable:
+            self._report(on_progress, "reused", reused=True, gemini_file=reusable.name)
+            return self._register_uploaded_file(file_path, reusable, sha256)
+        
         # Dosyayı yükle
+        self._report(on_progress, "uploading")
         uploaded_file = self._client.files.upload(
             file=path,
             config={"display_name": display_name or path.name}
         )
         
-        # İşlenene kadar bekle
+        # İşlenene kadar bekle (artan aralıklarla)
         if wait_for_processing:
-            while uploaded_file.state.name == "PROCESSING":
-                time.sleep(2)
+            for attempt, delay in enumerate(self._file_poll_delays(), start=1):
+                if uploaded_file.state.name != "PROCESSING":
+                    break
+                self._report(on_progress, "processing", poll=attempt)
+                time.sleep(delay)
                 uploaded_file = self._client.files.get(name=uploaded_file.name)
-            
-            if uploaded_file.state.name == "FAILED":
-                raise RuntimeError(f"Dosya işleme başarısız: {file_path}")
+        
+        return self._register_uploaded_file(file_path, uploaded_file, sha256)
+    
+    def _register_uploaded_file(
+        self,
+        file_path: str,
+        uploaded_file: Any,
+        sha256: Optional[str] = None
+    ) -> Any:
+        """İşlenmiş dosyayı doğrula ve registry'ye kaydet"""
+        if uploaded_file.state.name == "FAILED":
+            if sha256:
+                self._pool.forget_file(sha256)
+            raise RuntimeError(f"Dosya işleme başarısız: {file_path}")
         
         # File objesini sakla (cache için)
         self._uploaded_files[file_path] = uploaded_file
+        if sha256 and uploaded_file.state.name == "ACTIVE":
+            self._pool.remember_file(sha256, uploaded_file)
+        
+        return uploaded_file
+    
+    def _reusable_file(self, sha256: Optional[str]) -> Optional[Any]:
+        """Aynı içerikli, aktif ve süresi yeterli File objesi (yoksa None)"""
+        if not sha256:
+            return None
+        
+        uploaded_file = self._pool.file_by_hash(sha256)
+        if not uploaded_file or uploaded_file.state.name != "ACTIVE":
+            return None
+        
+        expires = getattr(uploaded_file, "expiration_time", None)
+        if expires and expires - datetime.now(timezone.utc) < self.FILE_REUSE_MIN_REMAINING:
+            self._pool.forget_file(sha256)
+            return None
         
         return uploaded_file
     
+    @classmethod
+    def _file_poll_delays(cls) -> Iterator[float]:
+        """
+        Dosya işleme yoklama aralıkları (üstel artış, üst sınırlı).
+        
+        Raises:
+            TimeoutError: FILE_POLL_TIMEOUT aşılırsa
+        """
+        delay, waited = cls.FILE_POLL_INITIAL, 0.0
+        while waited < cls.FILE_POLL_TIMEOUT:
+            yield delay
+            waited += delay
+            delay = min(cls.FILE_POLL_MAX, delay * 1.5)
+        raise TimeoutError("Dosya işleme zaman aşımına uğradı")
+    
+    @staticmethod
+    def _report(on_progress: Optional[Callable[..., None]], stage: str, **details: Any) -> None:
+        if on_progress:
+            on_progress(stage, **details)
+    
+    def get_file(self, file_name: str) -> Optional[Any]:
+        """File objesini getir (silinmiş/süresi dolmuş ise None)"""
+        try:
+            return self._client.files.get(name=file_name)
+        except Exception:
+            return None
+    
     def get_file_info(self, file_name: str) -> Dict[str, Any]:
         """Dosya bilgisi al"""
         file_info = self._client.files.get(name=file_name)
@@ -155,6 +319,22 @@ class GeminiClient:
         Returns:
             CacheInfo objesi
         """
+        cache = self._client.caches.create(
+            model=model,
+            config=self._cache_config(cache_id, system_instruction, contents, ttl_seconds, display_name)
+        )
+        
+        return self._register_cache(cache_id, cache, model, ttl_seconds)
+    
+    def _cache_config(
+        self,
+        cache_id: str,
+        system_instruction: str,
+        contents: Optional[List[Any]],
+        ttl_seconds: int,
+        display_name: Optional[str]
+    ) -> types.CreateCachedContentConfig:
+        """Cache oluşturma config'i"""
         # İçerikleri hazırla
         # Google dokümantasyonuna göre File objesi direkt geçilebilir
         prepared_contents = contents if contents else []
@@ -170,12 +350,10 @@ class GeminiClient:
         if prepared_contents:
             cache_config.contents = prepared_contents
         
-        # Cache oluştur
-        cache = self._client.caches.create(
-            model=model,
-            config=cache_config
-        )
-        
+        return cache_config
+    
+    def _register_cache(self, cache_id: str, cache: Any, model: str, ttl_seconds: int) -> CacheInfo:
+        """Oluşturulan cache'i registry'ye kaydet"""
         # Token sayısını al - usage_metadata bir obje, dict değil
         usage_meta = getattr(cache, "usage_metadata", None)
         token_count = getattr(usage_meta, "total_token_count", 0) if usage_meta else 0
@@ -237,45 +415,44 @@ class GeminiClient:
         model: str,
         cache_id: Optional[str] = None,
         thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
-        system_instruction: Optional[str] = None
+        system_instruction: Optional[str] = None,
+        history: Optional[List[types.Content]] = None,
+        kinds: Optional[List[Optional[str]]] = None,
+        on_turn: Optional[Callable[[List[types.Content], Optional[str]], Optional[Callable[[], None]]]] = None
     ) -> str:
         """
         Chat oturumu oluştur.
         
+        Chat geçmişi SDK'nın Chat nesnesinde değil, burada tutulur.
+        Böylece sync ve async (aio) çağrılar aynı geçmişi paylaşır.
+        
         Args:
             chat_id: Benzersiz chat ID
             model: Model adı
             cache_id: Kullanılacak cache ID (opsiyonel)
             thinking_level: Düşünme seviyesi
             system_instruction: System prompt (cache yoksa)
+            history: Başlangıç geçmişi (kalıcı kayıttan yeniden kurulum için)
+            kinds: history ile hizalı tur türleri (structured yanıtlarda
+                schema adı; sıkıştırmada kullanılır)
+            on_turn: Her başarılı turdan sonra [kullanıcı, model] Content'leri
+                ve tur türüyle çağrılır (kalıcı kayıt için; async akışta
+                worker thread'de). Bellekteki durum güncellemesini döndürür,
+                o çağıranın thread'inde çalıştırılır
             
         Returns:
             chat_id
         """
-        config = {}
-        
-        # Cache varsa referans ekle
-        if cache_id:
-            cache_info = self._caches.get(cache_id)
-            if cache_info:
-                config["cached_content"] = cache_info.cache_name
-        
-        # Thinking level
-        config["thinking_config"] = types.ThinkingConfig(
-            thinking_level=thinking_level.value
-        )
-        
-        # Chat oluştur
-        chat = self._client.chats.create(
-            model=model,
-            config=types.GenerateContentConfig(**config)
-        )
-        
+        history = list(history or [])
         self._chats[chat_id] = {
-            "chat": chat,
             "model": model,
             "cache_id": cache_id,
-            "message_count": 0
+            "thinking_level": thinking_level,
+            "system_instruction": system_instruction,
+            "history": history,  # types.Content listesi (geçerli turlar)
+            "kinds": list(kinds) if kinds else [None] * len(history),
+            "message_count": len(history) // 2,
+            "on_turn": on_turn
         }
         
         return chat_id
@@ -297,32 +474,26 @@ class GeminiClient:
         Returns:
             (yanıt metni, token kullanımı) tuple
         """
-        chat_data = self._chats.get(chat_id)
-        if not chat_data:
-            raise ValueError(f"Chat bulunamadı: {chat_id}")
-        
-        chat = chat_data["chat"]
+        chat_data = self._get_chat_data(chat_id)
         
         if stream:
-            # Streaming yanıt
-            full_response = ""
-            usage = TokenUsage()
-            
-            for chunk in chat.send_message_stream(message):
-                if chunk.text:
-                    full_response += chunk.text
-                # Son chunk'ta usage bilgisi var
-                if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
-                    usage = self._parse_usage(chunk.usage_metadata)
-            
-            chat_data["message_count"] += 1
-            return full_response, usage
-        else:
-            # Normal yanıt
-            response = chat.send_message(message)
-            usage = self._parse_usage(response.usage_metadata)
-            chat_data["message_count"] += 1
-            return response.text, usage
+            # Streaming yanıt - usage generator bitince chat_data'ya yazılır
+            full_response = "".join(self.send_message_stream(chat_id, message))
+            return full_response, chat_data.get("last_usage", TokenUsage())
+        
+        # Normal yanıt
+        user_content = self._user_content(message)
+        response, usage = self._generate(
+            chat_data["model"],
+            chat_data["history"] + [user_content],
+            self._chat_config(chat_data),
+            message,
+            chat_data["history"],
+            operation="chat"
+        )
+        # Tur sadece başarılı denemeden sonra eklenir (retry geçmişi çoğaltmaz)
+        self._record_turn(chat_data, user_content, response)
+        return response.text, usage
     
     def send_message_stream(
         self,
@@ -338,30 +509,43 @@ class GeminiClient:
         Returns:
             TokenUsage (generator bitince)
         """
-        chat_data = self._chats.get(chat_id)
-        if not chat_data:
-            raise ValueError(f"Chat bulunamadı: {chat_id}")
-        
-        chat = chat_data["chat"]
+        chat_data = self._get_chat_data(chat_id)
+        user_content = self._user_content(message)
         usage = TokenUsage()
+        text_parts: List[str] = []
+        reservation, chunks = self._open_stream(
+            chat_data["model"],
+            chat_data["history"] + [user_content],
+            self._chat_config(chat_data),
+            message,
+            chat_data["history"],
+            operation="chat_stream"
+        )
         
-        for chunk in chat.send_message_stream(message):
-            if chunk.text:
-                yield chunk.text
-            if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
-                usage = self._parse_usage(chunk.usage_metadata)
+        try:
+            for chunk in chunks:
+                if chunk.text:
+                    text_parts.append(chunk.text)
+                    yield chunk.text
+                if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
+                    usage = self._parse_usage(chunk.usage_metadata)
+        except BaseException as e:
+            self._abort_stream(reservation, usage, e)
+            raise
+        finally:
+            chunks.close()
         
-        chat_data["message_count"] += 1
+        self._record_text_turn(chat_data, user_content, "".join(text_parts))
+        self._reconcile(reservation, usage)
+        chat_data["last_usage"] = usage
         return usage
     
     def get_chat_history(self, chat_id: str) -> List[Dict[str, str]]:
         """Chat geçmişini al"""
-        chat_data = self._chats.get(chat_id)
-        if not chat_data:
-            raise ValueError(f"Chat bulunamadı: {chat_id}")
+        chat_data = self._get_chat_data(chat_id)
         
         history = []
-        for message in chat_data["chat"].get_history():
+        for message in chat_data["history"]:
             history.append({
                 "role": message.role,
                 "text": message.parts[0].text if message.parts else ""
@@ -369,6 +553,38 @@ class GeminiClient:
         
         return history
     
+    def replace_chat_history(
+        self,
+        chat_id: str,
+        history: List[types.Content],
+        kinds: List[Optional[str]]
+    ) -> None:
+        """Chat geçmişini değiştir (sıkıştırma için; on_turn çağrılmaz)"""
+        chat_data = self._get_chat_data(chat_id)
+        chat_data["history"] = list(history)
+        chat_data["kinds"] = list(kinds)
+    
+    def add_chat_turn(
+        self,
+        chat_id: str,
+        message: str,
+        text: str,
+        kind: Optional[str] = None
+    ) -> None:
+        """
+        Önceden üretilmiş yanıtı tur olarak geçmişe ekle.
+        
+        Geçmişe yazılmadan alınan (bkz. AsyncGeminiClient.preview_message_structured)
+        yanıt kullanılmaya karar verildiğinde çağrılır; on_turn tetiklenir.
+        """
+        chat_data = self._get_chat_data(chat_id)
+        self._record_text_turn(chat_data, self._user_content(message), text, kind)
+    
+    def chat_turn_count(self, chat_id: str) -> Optional[int]:
+        """Chat'te yapılan tur sayısı (chat yoksa None)"""
+        chat_data = self._chats.get(chat_id)
+        return chat_data["message_count"] if chat_data else None
+    
     def delete_chat(self, chat_id: str) -> bool:
         """Chat oturumunu sil"""
         if chat_id in self._chats:
@@ -380,7 +596,9 @@ class GeminiClient:
         self,
         chat_id: str,
         message: str,
-        response_schema: Type[BaseModel]
+        response_schema: Type[BaseModel],
+        use_cache: Optional[bool] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
     ) -> tuple[BaseModel, TokenUsage]:
         """
         Chat oturumu üzerinden structured output al.
@@ -392,43 +610,43 @@ class GeminiClient:
             chat_id: Chat ID
             message: Prompt/mesaj
             response_schema: Pydantic model sınıfı
+            use_cache: Yanıt cache'i kullanılsın mı (None ise varsayılan)
+            schema_variant: Gönderilecek schema varyantı (full/compact/minimal)
             
         Returns:
             (Pydantic model instance, TokenUsage)
         """
-        chat_data = self._chats.get(chat_id)
-        if not chat_data:
-            raise ValueError(f"Chat bulunamadı: {chat_id}")
-        
-        chat = chat_data["chat"]
-        model = chat_data["model"]
+        chat_data = self._get_chat_data(chat_id)
+        user_content = self._user_content(message)
         
-        text_response = None
-        
-        # Config oluştur
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_json_schema=response_schema.model_json_schema()
+        # Aynı geçmiş + aynı mesaj daha önce yanıtlandıysa API'ye gitme
+        key, cached_text = self._lookup_response(
+            use_cache, chat_data["model"], message, response_schema,
+            chat_data.get("cache_id"), history=chat_data["history"],
+            schema_variant=schema_variant
         )
+        if cached_text is not None:
+            result = response_schema.model_validate_json(cached_text)
+            self._record_text_turn(chat_data, user_content, cached_text, response_schema.__name__)
+            return result, TokenUsage()
         
-        # Cache varsa config'e ekle (Chat config'ini override ediyoruz, bu yüzden tekrar belirtmek gerekebilir)
-        cache_id = chat_data.get("cache_id")
-        if cache_id and cache_id in self._caches:
-             config.cached_content = self._caches[cache_id].cache_name
-             
-        # Chat üzerinden gönder - History otomatik yönetilir
-        response = chat.send_message(
-            message=message,
-            config=config
+        # Chat üzerinden gönder - History bizim tarafımızda yönetilir
+        response, usage = self._generate(
+            chat_data["model"],
+            chat_data["history"] + [user_content],
+            self._chat_structured_config(chat_data, response_schema, schema_variant),
+            message,
+            chat_data["history"],
+            operation="chat_structured",
+            schema=response_schema.__name__
         )
         
-        text_response = response.text
-        
         # JSON parse ve Pydantic model oluştur
-        result = response_schema.model_validate_json(text_response)
-        usage = self._parse_usage(response.usage_metadata)
+        result = response_schema.model_validate_json(response.text)
         
-        chat_data["message_count"] += 1
+        # Parse başarılıysa turu geçmişe ekle
+        self._record_turn(chat_data, user_content, response, response_schema.__name__)
+        self._store_response(key, chat_data["model"], response.text, usage)
         
         return result, usage
     
@@ -440,7 +658,9 @@ class GeminiClient:
         prompt: str,
         response_schema: Type[BaseModel],
         cache_id: Optional[str] = None,
-        thinking_level: ThinkingLevel = ThinkingLevel.HIGH
+        thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
+        use_cache: Optional[bool] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
     ) -> tuple[BaseModel, TokenUsage]:
         """
         Yapılandırılmış yanıt üret (Pydantic modeli).
@@ -451,34 +671,31 @@ class GeminiClient:
             response_schema: Pydantic model sınıfı
             cache_id: Kullanılacak cache ID
             thinking_level: Düşünme seviyesi
+            use_cache: Yanıt cache'i kullanılsın mı (None ise varsayılan)
+            schema_variant: Gönderilecek schema varyantı (full/compact/minimal)
             
         Returns:
             (Pydantic model instance, token kullanımı)
         """
-        # Resmi dokümantasyona uygun config
-        config = {
-            "response_mime_type": "application/json",
-            "response_json_schema": response_schema.model_json_schema(),
-            "thinking_config": types.ThinkingConfig(
-                thinking_level=thinking_level.value
-            )
-        }
-        
-        # Cache varsa ekle
-        if cache_id:
-            cache_info = self._caches.get(cache_id)
-            if cache_info:
-                config["cached_content"] = cache_info.cache_name
+        key, cached_text = self._lookup_response(
+            use_cache, model, prompt, response_schema, cache_id, thinking_level,
+            schema_variant=schema_variant
+        )
+        if cached_text is not None:
+            return response_schema.model_validate_json(cached_text), TokenUsage()
         
-        response = self._client.models.generate_content(
-            model=model,
-            contents=prompt,
-            config=types.GenerateContentConfig(**config)
+        response, usage = self._generate(
+            model,
+            prompt,
+            self._structured_config(response_schema, cache_id, thinking_level, schema_variant),
+            prompt,
+            operation="structured",
+            schema=response_schema.__name__
         )
         
         # JSON parse et ve Pydantic modeline dönüştür
         result = response_schema.model_validate_json(response.text)
-        usage = self._parse_usage(response.usage_metadata)
+        self._store_response(key, model, response.text, usage)
         
         return result, usage
     
@@ -487,7 +704,10 @@ class GeminiClient:
         model: str,
         prompt: str,
         cache_id: Optional[str] = None,
-        thinking_level: ThinkingLevel = ThinkingLevel.HIGH
+        thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
+        response_schema: Optional[Type[BaseModel]] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL,
+        labels: Optional[Dict[str, Any]] = None
     ) -> Generator[str, None, TokenUsage]:
         """
         Streaming içerik üret (chat oturumu olmadan).
@@ -497,6 +717,9 @@ class GeminiClient:
             prompt: Prompt
             cache_id: Kullanılacak cache ID (opsiyonel)
             thinking_level: Düşünme seviyesi
+            response_schema: Verilirse yanıt bu JSON schema'ya uygun akar
+            schema_variant: Schema varyantı (response_schema verildiyse)
+            labels: Telemetry etiketleri (generator call_context dışında çalışır)
             
         Yields:
             Her chunk'taki metin
@@ -504,42 +727,157 @@ class GeminiClient:
         Returns:
             TokenUsage (generator bitince)
         """
-        config = {
-            "thinking_config": types.ThinkingConfig(
-                thinking_level=thinking_level.value
-            )
-        }
-        
-        # Cache varsa ekle
-        if cache_id:
-            cache_info = self._caches.get(cache_id)
-            if cache_info:
-                config["cached_content"] = cache_info.cache_name
-        
         usage = TokenUsage()
         
         # Streaming response al
-        for chunk in self._client.models.generate_content_stream(
-            model=model,
-            contents=prompt,
-            config=types.GenerateContentConfig(**config)
-        ):
-            if chunk.text:
-                yield chunk.text
-            if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
-                usage = self._parse_usage(chunk.usage_metadata)
+        reservation, chunks = self._open_stream(
+            model,
+            prompt,
+            self._stream_config(cache_id, thinking_level, response_schema, schema_variant),
+            prompt,
+            operation="stream",
+            schema=response_schema.__name__ if response_schema else None,
+            labels=labels
+        )
+        try:
+            for chunk in chunks:
+                if chunk.text:
+                    yield chunk.text
+                if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
+                    usage = self._parse_usage(chunk.usage_metadata)
+        except BaseException as e:
+            # Tüketici bıraktı (GeneratorExit) veya stream koptu
+            self._abort_stream(reservation, usage, e)
+            raise
+        finally:
+            chunks.close()
         
+        self._reconcile(reservation, usage)
         return usage
     
+    # ==================== BATCH API ====================
+    
+    # Batch işinin bir daha değişmeyeceği durumlar
+    BATCH_DONE_STATES = frozenset({
+        types.JobState.JOB_STATE_SUCCEEDED,
+        types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+        types.JobState.JOB_STATE_FAILED,
+        types.JobState.JOB_STATE_CANCELLED,
+        types.JobState.JOB_STATE_EXPIRED
+    })
+    BATCH_METADATA_KEY = "key"
+    
+    def submit_batch(
+        self,
+        model: str,
+        requests: List[BatchRequest],
+        display_name: Optional[str] = None
+    ) -> types.BatchJob:
+        """
+        Structured istekleri tek batch işi olarak gönder.
+        
+        Batch çağrıları etkileşimli RPM/TPM kotasını kullanmaz; sonuç
+        saatler içinde gelir, get_batch ile bloklamadan sorgulanır.
+        
+        Args:
+            model: Model adı (tüm istekler için)
+            requests: İstekler (key'ler benzersiz olmalı)
+            display_name: İş adı
+            
+        Returns:
+            Oluşturulan BatchJob (name alanı iş ID'sidir)
+        """
+        return self._client.batches.create(
+            model=model,
+            src=self._batch_source(model, requests),
+            config=types.CreateBatchJobConfig(display_name=display_name)
+        )
+    
+    def get_batch(self, job_name: str) -> types.BatchJob:
+        """Batch işinin güncel durumu (bloklamaz)"""
+        return self._client.batches.get(name=job_name)
+    
+    def cancel_batch(self, job_name: str) -> None:
+        """Batch işini iptal et"""
+        self._client.batches.cancel(name=job_name)
+    
+    @classmethod
+    def batch_done(cls, state: types.JobState | str) -> bool:
+        """İş bu durumda son haline ulaşmış mı"""
+        return state in cls.BATCH_DONE_STATES
+    
+    def batch_results(
+        self,
+        job: types.BatchJob,
+        schemas: Dict[str, Type[BaseModel]]
+    ) -> List[BatchResult]:
+        """
+        Tamamlanan işin inline yanıtlarını doğrula.
+        
+        Args:
+            job: Tamamlanmış BatchJob
+            schemas: key -> response schema
+            
+        Returns:
+            Yanıt başına BatchResult (tanınmayan key'ler atlanır)
+        """
+        responses = job.dest.inlined_responses if job.dest else None
+        results = []
+        for item in responses or []:
+            key = (item.metadata or {}).get(self.BATCH_METADATA_KEY)
+            schema = schemas.get(key)
+            if schema is None:
+                continue
+            
+            usage = self._parse_usage(item.response.usage_metadata) if item.response else TokenUsage()
+            if item.error or not item.response:
+                error = item.error.message if item.error else "Boş yanıt"
+                results.append(BatchResult(key=key, result=None, usage=usage, error=error))
+                continue
+            try:
+                result = schema.model_validate_json(item.response.text)
+                results.append(BatchResult(key=key, result=result, usage=usage))
+            except Exception as e:
+                results.append(BatchResult(key=key, result=None, usage=usage, error=str(e)))
+        return results
+    
+    def _batch_source(self, model: str, requests: List[BatchRequest]) -> List[types.InlinedRequest]:
+        """İstekleri inline batch kaynağına çevir"""
+        return [
+            types.InlinedRequest(
+                model=model,
+                contents=request.prompt,
+                metadata={self.BATCH_METADATA_KEY: request.key},
+                config=self._structured_config(
+                    request.response_schema,
+                    request.cache_id,
+                    request.thinking_level or ThinkingLevel.HIGH,
+                    request.schema_variant
+                )
+            )
+            for request in requests
+        ]
+    
     # ==================== YARDIMCI METODLAR ====================
     
     def count_tokens(self, model: str, text: str) -> int:
-        """Token sayısını hesapla"""
-        result = self._client.models.count_tokens(
-            model=model,
-            contents=text
+        """
+        Token sayısını hesapla (count_tokens API).
+        
+        Sonuç model + içerik hash'i ile saklanır; aynı metin tekrar sayılmaz.
+        """
+        return self._tokens.count(
+            self._tokens.content_key(model, text),
+            lambda: self._client.models.count_tokens(model=model, contents=text).total_tokens,
+            self.language, model, len(text)
+        )
+    
+    def count_file_tokens(self, model: str, uploaded_file: Any, sha256: str) -> int:
+        """Yüklenen dosyanın token sayısı (içerik hash'i ile saklanır)"""
+        return self._tokens.count(
+            f"{model}:file:{sha256}",
+            lambda: self._client.models.count_tokens(model=model, contents=[uploaded_file]).total_tokens
         )
-        return result.total_tokens
     
     def get_model_info(self, model: str) -> Dict[str, Any]:
         """Model bilgisi al"""
@@ -550,6 +888,417 @@ class GeminiClient:
             "output_token_limit": info.output_token_limit,
         }
     
+    @staticmethod
+    def _request_chars(prompt: str, history: Optional[List[types.Content]] = None) -> int:
+        """İsteğin cache dışı metin uzunluğu (prompt + chat geçmişi)"""
+        chars = len(prompt)
+        for content in history or []:
+            for part in content.parts or []:
+                if part.text:
+                    chars += len(part.text)
+        return chars
+    
+    def _acquire(
+        self,
+        model: str,
+        prompt: str,
+        history: Optional[List[types.Content]] = None
+    ) -> Reservation:
+        """Çağrı öncesi RPM/TPM kotası al (gerekirse bekler)"""
+        chars = self._request_chars(prompt, history)
+        reservation = self._limiter.acquire(
+            model, self._tokens.estimate_chars(chars, self.language, model)
+        )
+        reservation.request_chars = chars
+        return reservation
+    
+    def _reconcile(self, reservation: Reservation, usage: TokenUsage) -> None:
+        """
+        Tahmini token'ı gerçek kullanımla uzlaştır ve tahminciyi kalibre et.
+        
+        Kalibrasyonda cache'ten gelen token'lar düşülür; tahmin sadece
+        prompt + geçmişi kapsar.
+        """
+        # Kullanımı bildirilmeyen başarılı yanıtta tahmin kovada kalır
+        if usage.prompt_tokens > 0:
+            self._limiter.reconcile(reservation, usage.prompt_tokens)
+        self._tokens.observe(
+            self.language,
+            reservation.model,
+            reservation.request_chars,
+            usage.prompt_tokens - usage.cached_tokens,
+            reservation.estimated_tokens
+        )
+        if reservation.span:
+            self._telemetry.finish(reservation.span, usage)
+    
+    def _fail_attempt(self, reservation: Optional[Reservation], span: CallSpan, error: Exception) -> None:
+        """Başarısız deneme: ayrılan TPM kotasını iade et, span'i kapat"""
+        if reservation:
+            self._limiter.reconcile(reservation, 0)
+        self._telemetry.fail(span, error)
+    
+    def _abort_stream(self, reservation: Reservation, usage: TokenUsage, error: BaseException) -> None:
+        """
+        Yarıda kalan stream: kotayı uzlaştır, span'i kapat.
+        
+        İstek gönderildiği için ayrılan kota iade edilmez; gelen chunk'larda
+        kullanım bildirildiyse onunla uzlaştırılır. Tüketici stream'i
+        bıraktıysa (GeneratorExit, iptal) span "aborted", stream hata
+        verdiyse "error" olarak kaydedilir.
+        """
+        if usage.prompt_tokens > 0:
+            self._limiter.reconcile(reservation, usage.prompt_tokens)
+        if reservation.span:
+            aborted = isinstance(error, (GeneratorExit, asyncio.CancelledError))
+            self._telemetry.fail(reservation.span, error, status="aborted" if aborted else "error")
+    
+    def _start_span(
+        self,
+        model: str,
+        config: types.GenerateContentConfig,
+        operation: str,
+        schema: Optional[str],
+        labels: Optional[Dict[str, Any]] = None
+    ) -> CallSpan:
+        """Deneme için telemetry span'i aç"""
+        thinking = config.thinking_config.thinking_level if config and config.thinking_config else None
+        return self._telemetry.start(
+            operation,
+            model,
+            project_id=self.namespace,
+            thinking_level=getattr(thinking, "value", thinking),
+            schema=schema,
+            labels=labels
+        )
+    
+    def _attach_span(self, reservation: Reservation, span: CallSpan) -> None:
+        """Kota alındı: kuyruk süresini span'e yaz, uzlaştırma için bağla"""
+        self._telemetry.sent(span, reservation.waited_seconds, reservation.priority.name)
+        reservation.span = span
+    
+    def _generate(
+        self,
+        model: str,
+        contents: Any,
+        config: types.GenerateContentConfig,
+        prompt: str,
+        history: Optional[List[types.Content]] = None,
+        operation: str = "generate",
+        schema: Optional[str] = None
+    ) -> tuple[Any, TokenUsage]:
+        """
+        generate_content çağrısı (kota + retry + circuit breaker).
+        
+        Her deneme kendi kotasını ve telemetry span'ini alır. Yan etkisi
+        yoktur; chat turu çağıran tarafından başarıdan sonra eklenir.
+        
+        Returns:
+            (response, token kullanımı)
+        """
+        def attempt():
+            span = self._start_span(model, config, operation, schema)
+            reservation = None
+            try:
+                reservation = self._acquire(model, prompt, history)
+                self._attach_span(reservation, span)
+                response = self._client.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config
+                )
+                usage = self._parse_usage(response.usage_metadata)
+            except Exception as e:
+                self._fail_attempt(reservation, span, e)
+                raise
+            self._reconcile(reservation, usage)
+            return response, usage
+        
+        return self._resilience.call(model, attempt, operation)
+    
+    def _open_stream(
+        self,
+        model: str,
+        contents: Any,
+        config: types.GenerateContentConfig,
+        prompt: str,
+        history: Optional[List[types.Content]] = None,
+        operation: str = "stream",
+        schema: Optional[str] = None,
+        labels: Optional[Dict[str, Any]] = None
+    ) -> tuple[Reservation, Generator[Any, None, None]]:
+        """
+        Streaming çağrısını aç (kota + retry + circuit breaker).
+        
+        Sadece ilk chunk gelene kadar retry yapılır; sonrasında metin
+        kullanıcıya aktarılmaya başladığı için hata olduğu gibi yükselir.
+        
+        Returns:
+            (rezervasyon, ilk chunk dahil chunk generator'ı; kapatılınca
+            SDK stream'i de kapatılır)
+        """
+        def attempt():
+            span = self._start_span(model, config, operation, schema, labels)
+            reservation = None
+            try:
+                reservation = self._acquire(model, prompt, history)
+                self._attach_span(reservation, span)
+                stream = iter(self._client.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config
+                ))
+                first = next(stream, None)
+            except Exception as e:
+                self._fail_attempt(reservation, span, e)
+                raise
+            self._telemetry.first_token(span)
+            return reservation, first, stream
+        
+        reservation, first, stream = self._resilience.call(model, attempt, operation)
+        return reservation, self._stream_chunks(first, stream)
+    
+    @staticmethod
+    def _stream_chunks(first: Any, stream: Iterator[Any]) -> Generator[Any, None, None]:
+        """İlk chunk ve kalanlar; generator kapanınca SDK stream'i de kapatılır"""
+        try:
+            if first is not None:
+                yield first
+                yield from stream
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+    
+    def _lookup_response(
+        self,
+        use_cache: Optional[bool],
+        model: str,
+        prompt: str,
+        response_schema: Type[BaseModel],
+        cache_id: Optional[str] = None,
+        thinking_level: Optional[ThinkingLevel] = None,
+        history: Optional[List[types.Content]] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Yanıt cache'inde ara.
+        
+        Returns:
+            (anahtar veya None (cache kapalı), kayıtlı yanıt metni veya None)
+        """
+        if not self._response_cache.is_enabled(use_cache):
+            return None, None
+        
+        key = self._response_cache.make_key(
+            model,
+            prompt,
+            self._schemas.get(response_schema).key(schema_variant),
+            self._cache_name(cache_id),
+            thinking_level.value if thinking_level else None,
+            self._response_cache.history_digest(history)
+        )
+        hit = self._response_cache.get(key)
+        return key, hit[0] if hit else None
+    
+    def _store_response(self, key: Optional[str], model: str, text: str, usage: TokenUsage) -> None:
+        """Doğrulanmış yanıtı cache'e yaz (anahtar yoksa cache kapalıdır)"""
+        if key and text:
+            self._response_cache.put(key, model, text, usage)
+    
+    def _get_chat_data(self, chat_id: str) -> Dict[str, Any]:
+        """Chat kaydını getir"""
+        chat_data = self._chats.get(chat_id)
+        if not chat_data:
+            raise ValueError(f"Chat bulunamadı: {chat_id}")
+        return chat_data
+    
+    def _cache_name(self, cache_id: Optional[str]) -> Optional[str]:
+        """Cache ID'den Gemini cache adını çöz"""
+        if cache_id:
+            cache_info = self._caches.get(cache_id)
+            if cache_info:
+                return cache_info.cache_name
+        return None
+    
+    def _generation_config(
+        self,
+        cache_id: Optional[str] = None,
+        thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
+        system_instruction: Optional[str] = None
+    ) -> types.GenerateContentConfig:
+        """Serbest metin üretimi için config"""
+        config = {
+            "thinking_config": types.ThinkingConfig(
+                thinking_level=thinking_level.value
+            )
+        }
+        
+        # Cache varsa ekle (cache içindeki system prompt geçerli olur)
+        cache_name = self._cache_name(cache_id)
+        if cache_name:
+            config["cached_content"] = cache_name
+        elif system_instruction:
+            config["system_instruction"] = system_instruction
+        
+        return types.GenerateContentConfig(**config)
+    
+    def _structured_config(
+        self,
+        response_schema: Type[BaseModel],
+        cache_id: Optional[str] = None,
+        thinking_level: ThinkingLevel = ThinkingLevel.HIGH,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> types.GenerateContentConfig:
+        """Structured output (JSON schema) için config"""
+        config = self._generation_config(cache_id, thinking_level)
+        config.response_mime_type = "application/json"
+        config.response_json_schema = self._schemas.use(response_schema, schema_variant)
+        return config
+    
+    def _stream_config(
+        self,
+        cache_id: Optional[str],
+        thinking_level: ThinkingLevel,
+        response_schema: Optional[Type[BaseModel]] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> types.GenerateContentConfig:
+        """Chat'siz streaming config'i (schema verilirse structured)"""
+        if response_schema:
+            return self._structured_config(response_schema, cache_id, thinking_level, schema_variant)
+        return self._generation_config(cache_id, thinking_level)
+    
+    def _chat_config(self, chat_data: Dict[str, Any]) -> types.GenerateContentConfig:
+        """Chat oturumunun varsayılan config'i"""
+        return self._generation_config(
+            chat_data.get("cache_id"),
+            chat_data["thinking_level"],
+            chat_data.get("system_instruction")
+        )
+    
+    def _chat_structured_config(
+        self,
+        chat_data: Dict[str, Any],
+        response_schema: Type[BaseModel],
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ) -> types.GenerateContentConfig:
+        """
+        Chat üzerinden structured output config'i.
+        
+        Chat config'ini override eder; sadece JSON schema ve cache referansı taşır.
+        """
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_json_schema=self._schemas.use(response_schema, schema_variant)
+        )
+        cache_name = self._cache_name(chat_data.get("cache_id"))
+        if cache_name:
+            config.cached_content = cache_name
+        return config
+    
+    @staticmethod
+    def _user_content(message: str) -> types.Content:
+        """Kullanıcı mesajını Content'e dönüştür"""
+        return types.Content(role="user", parts=[types.Part(text=message)])
+    
+    @staticmethod
+    def _record_turn(
+        chat_data: Dict[str, Any],
+        user_content: types.Content,
+        response,
+        kind: Optional[str] = None
+    ) -> None:
+        """Başarılı turu chat geçmişine ekle ve kalıcı kaydet. Bkz. _add_turn."""
+        GeminiClient._commit_turn(chat_data, GeminiClient._add_turn(chat_data, user_content, response, kind), kind)
+    
+    @staticmethod
+    def _record_text_turn(
+        chat_data: Dict[str, Any],
+        user_content: types.Content,
+        text: str,
+        kind: Optional[str] = None
+    ) -> None:
+        """Metin yanıtlı turu (streaming veya cache'ten) geçmişe ekle ve kalıcı kaydet"""
+        GeminiClient._commit_turn(chat_data, GeminiClient._add_text_turn(chat_data, user_content, text, kind), kind)
+    
+    @staticmethod
+    def _add_turn(
+        chat_data: Dict[str, Any],
+        user_content: types.Content,
+        response,
+        kind: Optional[str] = None
+    ) -> Optional[List[types.Content]]:
+        """
+        Başarılı turu chat geçmişine ekle (sadece bellekte).
+        
+        Geçersiz (boş) yanıtlar geçmişe yazılmaz; SDK Chat davranışıyla aynı.
+        
+        Returns:
+            Eklenen Content'ler (kalıcı kayıt için) veya None
+        """
+        candidates = getattr(response, "candidates", None)
+        model_content = candidates[0].content if candidates else None
+        contents = None
+        if model_content and model_content.parts:
+            contents = [user_content, model_content]
+            GeminiClient._append_turn(chat_data, contents, kind)
+        chat_data["message_count"] += 1
+        return contents
+    
+    @staticmethod
+    def _add_text_turn(
+        chat_data: Dict[str, Any],
+        user_content: types.Content,
+        text: str,
+        kind: Optional[str] = None
+    ) -> Optional[List[types.Content]]:
+        """Metin yanıtlı turu geçmişe ekle (sadece bellekte). Bkz. _add_turn."""
+        contents = None
+        if text:
+            contents = [user_content, types.Content(role="model", parts=[types.Part(text=text)])]
+            GeminiClient._append_turn(chat_data, contents, kind)
+        chat_data["message_count"] += 1
+        return contents
+    
+    @staticmethod
+    def _append_turn(
+        chat_data: Dict[str, Any],
+        contents: List[types.Content],
+        kind: Optional[str] = None
+    ) -> None:
+        """Turu geçmişe ekle"""
+        chat_data["history"].extend(contents)
+        chat_data["kinds"].extend([kind] * len(contents))
+    
+    @staticmethod
+    def _persist_turn(
+        chat_data: Dict[str, Any],
+        contents: Optional[List[types.Content]],
+        kind: Optional[str] = None
+    ) -> Optional[Callable[[], None]]:
+        """
+        Eklenen turu on_turn ile kalıcı kaydet.
+        
+        Async akışta worker thread'de çalışır; on_turn sadece kalıcı kaydı
+        yapar ve bellekteki durumu güncelleyen fonksiyonu döndürür (çağıran
+        kendi thread'inde çalıştırır, bkz. _commit_turn).
+        """
+        on_turn = chat_data.get("on_turn")
+        if contents and on_turn:
+            return on_turn(contents, kind)
+        return None
+    
+    @staticmethod
+    def _commit_turn(
+        chat_data: Dict[str, Any],
+        contents: Optional[List[types.Content]],
+        kind: Optional[str] = None
+    ) -> None:
+        """Eklenen turu kalıcı kaydet ve bellekteki durumu güncelle"""
+        apply = GeminiClient._persist_turn(chat_data, contents, kind)
+        if apply:
+            apply()
+    
     def _parse_usage(self, usage_metadata) -> TokenUsage:
         """usage_metadata'yı TokenUsage'a dönüştür"""
         if not usage_metadata:
@@ -560,9 +1309,17 @@ class GeminiClient:
             prompt_tokens=getattr(usage_metadata, "prompt_token_count", 0) or 0,
             cached_tokens=getattr(usage_metadata, "cached_content_token_count", 0) or 0,
             output_tokens=getattr(usage_metadata, "candidates_token_count", 0) or 0,
+            thinking_tokens=getattr(usage_metadata, "thoughts_token_count", 0) or 0,
             total_tokens=getattr(usage_metadata, "total_token_count", 0) or 0
         )
     
-    def estimate_tokens(self, text: str) -> int:
-        """Yaklaşık token sayısı (4 karakter ≈ 1 token)"""
-        return len(text) // 4
+    def estimate_tokens(self, text: str, model: Optional[str] = None) -> int:
+        """Yaklaşık token sayısı (dil/model bazında kalibre edilen oranla)"""
+        return self._tokens.estimate(text, self.language, model)
+    
+    def estimate_content_tokens(self, content: types.Content, model: Optional[str] = None) -> int:
+        """Chat turunun (Content) yaklaşık token sayısı"""
+        return self.estimate_tokens(
+            "".join(part.text for part in content.parts or [] if part.text),
+            model
+        )
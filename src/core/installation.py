@@ -0,0 +1,49 @@
+"""
+Installation Identity.
+Bu kurulumun oluşturduğu uzak kaynakların (cache, dosya) sahiplik etiketi.
+"""
+
+from typing import Optional
+
+from ..db import ProjectRepository
+
+
+class Installation:
+    """
+    Kurulum kimliği.
+
+    Kimlik veritabanı ilk oluşturulduğunda üretilir ve installation
+    tablosunda saklanır. Uygulamanın oluşturduğu cache ve dosyaların
+    display_name'i "fs-{kimlik}.{ad}" biçimindedir; aynı API key'i paylaşan
+    başka kurulumların kaynakları farklı etiket taşır ve artık
+    temizliğinde silinmez.
+    """
+
+    TAG_PREFIX = "fs-"
+    SEPARATOR = "."
+
+    def __init__(self, repository: Optional[ProjectRepository] = None):
+        self.installation_id = (repository or ProjectRepository()).get_installation_id()
+        self.tag = f"{self.TAG_PREFIX}{self.installation_id}{self.SEPARATOR}"
+
+    def display_name(self, name: str) -> str:
+        """Ada bu kurulumun etiketini ekle"""
+        return f"{self.tag}{name}"
+
+    def owned_name(self, display_name: Optional[str]) -> Optional[str]:
+        """Bu kuruluma aitse etiketsiz ad, değilse None"""
+        if display_name and display_name.startswith(self.tag):
+            return display_name[len(self.tag):]
+        return None
+
+
+# Global instance
+_installation: Optional[Installation] = None
+
+
+def get_installation() -> Installation:
+    """Global kurulum kimliğini al"""
+    global _installation
+    if _installation is None:
+        _installation = Installation()
+    return _installation
@@ -0,0 +1,130 @@
+"""
+Cost Model.
+Model katmanı bazında token fiyatları ve çağrı maliyeti hesabı.
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any
+
+from ..models.project import ModelChoice, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """
+    Bir modelin 1M token fiyatları (USD).
+
+    Düşünme (thinking) token'ları output fiyatından ücretlendirilir.
+    long_context_threshold'u aşan promptlarda (prompt_tokens) tüm çağrı
+    long_* fiyatlarından hesaplanır.
+    """
+    input: float
+    cached_input: float
+    output: float
+    long_context_threshold: Optional[int] = None
+    long_input: Optional[float] = None
+    long_cached_input: Optional[float] = None
+    long_output: Optional[float] = None
+
+
+class CostModel:
+    """
+    Token kullanımını USD maliyete çevirir.
+
+    Fiyatlar model adına göre tutulur; bilinmeyen modeller en pahalı
+    katmandan hesaplanır (maliyet eksik değil fazla görünsün). Batch API
+    çağrıları BATCH_DISCOUNT oranında indirimlidir. Cache depolama
+    (saatlik) ücreti çağrı maliyetine dahil değildir.
+    """
+
+    BATCH_DISCOUNT = 0.5
+
+    DEFAULT_PRICES: Dict[str, ModelPrice] = {
+        ModelChoice.GEMINI_3_PRO.value: ModelPrice(
+            input=2.00,
+            cached_input=0.20,
+            output=12.00,
+            long_context_threshold=200_000,
+            long_input=4.00,
+            long_cached_input=0.40,
+            long_output=18.00
+        ),
+        ModelChoice.GEMINI_3_FLASH.value: ModelPrice(
+            input=0.50,
+            cached_input=0.05,
+            output=3.00
+        )
+    }
+
+    FALLBACK_MODEL = ModelChoice.GEMINI_3_PRO.value
+
+    def __init__(self, prices: Optional[Dict[str, ModelPrice]] = None):
+        """
+        CostModel başlat.
+
+        Args:
+            prices: Model adı -> fiyat (None ise DEFAULT_PRICES)
+        """
+        self.prices = dict(prices or self.DEFAULT_PRICES)
+        self._warned: set = set()
+
+    def price_for(self, model: str) -> ModelPrice:
+        """Modelin fiyatı (bilinmiyorsa en pahalı katman)"""
+        price = self.prices.get(model)
+        if price:
+            return price
+        if model not in self._warned:
+            self._warned.add(model)
+            logger.warning(f"Fiyatı bilinmeyen model: {model}, {self.FALLBACK_MODEL} fiyatı kullanılıyor")
+        return self.prices.get(self.FALLBACK_MODEL) or max(self.prices.values(), key=lambda p: p.output)
+
+    def cost(self, model: str, usage: TokenUsage, batch: bool = False) -> float:
+        """
+        Çağrının USD maliyeti.
+
+        Args:
+            model: Model adı
+            usage: Çağrının token kullanımı
+            batch: Batch API ile mi çalıştı (indirimli)
+        """
+        price = self.price_for(model)
+        input_rate, cached_rate, output_rate = price.input, price.cached_input, price.output
+        if price.long_context_threshold and usage.prompt_tokens > price.long_context_threshold:
+            input_rate = price.long_input or input_rate
+            cached_rate = price.long_cached_input or cached_rate
+            output_rate = price.long_output or output_rate
+
+        uncached = max(0, usage.prompt_tokens - usage.cached_tokens)
+        cost = (
+            uncached * input_rate
+            + usage.cached_tokens * cached_rate
+            + (usage.output_tokens + usage.thinking_tokens) * output_rate
+        ) / 1_000_000
+
+        if batch:
+            cost *= self.BATCH_DISCOUNT
+        return cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fiyat tablosu (API için)"""
+        return {
+            "currency": "USD",
+            "unit": "1M tokens",
+            "batch_discount": self.BATCH_DISCOUNT,
+            "models": {model: asdict(price) for model, price in self.prices.items()}
+        }
+
+
+# Global instance
+_cost_model: Optional[CostModel] = None
+
+
+def get_cost_model() -> CostModel:
+    """Global maliyet modelini al"""
+    global _cost_model
+    if _cost_model is None:
+        _cost_model = CostModel()
+    return _cost_model
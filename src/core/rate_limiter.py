@@ -0,0 +1,389 @@
+"""
+Rate Limiter.
+Model bazında RPM/TPM kotası uygulayan öncelikli token-bucket zamanlayıcı.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Optional, Dict, Any, List
+
+
+class CallPriority(IntEnum):
+    """Çağrı önceliği (küçük değer önce çalışır)"""
+    INTERACTIVE = 0  # SSE / kullanıcının beklediği akış
+    NORMAL = 1       # Normal API istekleri
+    BACKGROUND = 2   # Toplu / arka plan işler
+
+
+# Mevcut çağrının önceliği (api katmanı tarafından ayarlanır)
+_current_priority: ContextVar[CallPriority] = ContextVar(
+    "gemini_call_priority", default=CallPriority.NORMAL
+)
+
+
+@contextmanager
+def call_priority(priority: CallPriority):
+    """
+    Bu blok içindeki Gemini çağrılarının önceliğini ayarla.
+
+    Kullanım:
+        with call_priority(CallPriority.INTERACTIVE):
+            ...
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> CallPriority:
+    """Aktif çağrı önceliği"""
+    return _current_priority.get()
+
+
+@dataclass
+class ModelQuota:
+    """Model kotası"""
+    rpm: int  # Dakikadaki istek
+    tpm: int  # Dakikadaki input token
+
+
+class TokenBucket:
+    """
+    Klasik token bucket.
+    Kapasite dakikalık kota kadardır ve saniyede kota/60 oranında dolar.
+    Uzlaştırma (reconcile) sonrası bakiye negatife düşebilir; bu durumda
+    sonraki çağrılar borç kapanana kadar bekler.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount kadar token için beklenecek süre (saniye)"""
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Bakiyeyi düzelt (pozitif: iade, negatif: ek borç)"""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+@dataclass(order=True)
+class _Ticket:
+    """Kuyruktaki bekleyen çağrı"""
+    priority: int
+    seq: int
+    model: str = field(compare=False)
+    tokens: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    throttled: bool = field(default=False, compare=False)
+
+
+@dataclass
+class Reservation:
+    """Verilen kota rezervasyonu (uzlaştırma için)"""
+    model: str
+    estimated_tokens: int
+    waited_seconds: float
+    priority: CallPriority
+    request_chars: int = 0  # tahminin dayandığı karakter sayısı (kalibrasyon için)
+    span: Optional[Any] = None  # telemetry CallSpan'i (uzlaştırmada kapatılır)
+
+
+class RateLimiter:
+    """
+    Gemini çağrıları için global zamanlayıcı.
+
+    - Her model için RPM ve TPM token bucket'ları tutar.
+    - Çağrılar öncelik sırasıyla (INTERACTIVE > NORMAL > BACKGROUND) kuyruğa
+      girer; bir model için sadece kuyruğun başındaki çağrı kotayı alabilir.
+    - Çağrı öncesi tahmini token düşülür, çağrı sonrası gerçek kullanımla
+      (usage_metadata) uzlaştırılır.
+    - Sync (thread) ve async (asyncio) çağıranları aynı kuyrukta destekler.
+    """
+
+    # Varsayılan kotalar (GEMINI_RPM_LIMIT / GEMINI_TPM_LIMIT ile override edilir)
+    DEFAULT_QUOTAS: Dict[str, ModelQuota] = {
+        "gemini-3-pro-preview": ModelQuota(rpm=25, tpm=1_000_000),
+        "gemini-3-flash-preview": ModelQuota(rpm=1_000, tpm=1_000_000),
+    }
+    FALLBACK_QUOTA = ModelQuota(rpm=60, tpm=1_000_000)
+
+    # Kuyruk başı olmayan bekleyenlerin yoklama aralığı (saniye)
+    POLL_INTERVAL = 0.05
+
+    # Wait-time istatistikleri için son N örnek
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, quotas: Optional[Dict[str, ModelQuota]] = None):
+        """
+        RateLimiter başlat.
+
+        Args:
+            quotas: Model -> kota (None ise varsayılanlar + env)
+        """
+        self._quotas: Dict[str, ModelQuota] = dict(quotas or self._quotas_from_env())
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+        self._rpm: Dict[str, TokenBucket] = {}
+        self._tpm: Dict[str, TokenBucket] = {}
+        self._queues: Dict[str, List[_Ticket]] = {}
+
+        # Metrikler
+        self._wait_samples: deque = deque(maxlen=self.WAIT_SAMPLES)
+        self._granted = 0
+        self._throttled = 0  # Beklemek zorunda kalan çağrı
+        self._estimated_tokens = 0
+        self._actual_tokens = 0
+
+    @classmethod
+    def _quotas_from_env(cls) -> Dict[str, ModelQuota]:
+        rpm = os.getenv("GEMINI_RPM_LIMIT")
+        tpm = os.getenv("GEMINI_TPM_LIMIT")
+        quotas = dict(cls.DEFAULT_QUOTAS)
+        if rpm or tpm:
+            quotas = {
+                model: ModelQuota(
+                    rpm=int(rpm) if rpm else q.rpm,
+                    tpm=int(tpm) if tpm else q.tpm
+                )
+                for model, q in quotas.items()
+            }
+        return quotas
+
+    def set_quota(self, model: str, rpm: int, tpm: int) -> None:
+        """Model kotasını ayarla (bucket'lar sıfırlanır)"""
+        with self._lock:
+            self._quotas[model] = ModelQuota(rpm=rpm, tpm=tpm)
+            self._rpm.pop(model, None)
+            self._tpm.pop(model, None)
+
+    # ==================== KOTA ALMA ====================
+
+    def acquire(
+        self,
+        model: str,
+        estimated_tokens: int,
+        priority: Optional[CallPriority] = None
+    ) -> Reservation:
+        """
+        Kota al (sync, thread'i bekletir).
+
+        Args:
+            model: Model adı
+            estimated_tokens: Tahmini input token
+            priority: Öncelik (None ise context'teki öncelik)
+
+        Returns:
+            Reservation
+        """
+        ticket = self._enqueue(model, estimated_tokens, priority)
+        try:
+            while True:
+                delay = self._try_grant(ticket)
+                if delay is None:
+                    return self._reservation(ticket)
+                time.sleep(delay)
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+
+    async def acquire_async(
+        self,
+        model: str,
+        estimated_tokens: int,
+        priority: Optional[CallPriority] = None
+    ) -> Reservation:
+        """Kota al (async, event loop'u bloklamaz). Bkz. acquire."""
+        ticket = self._enqueue(model, estimated_tokens, priority)
+        try:
+            while True:
+                delay = self._try_grant(ticket)
+                if delay is None:
+                    return self._reservation(ticket)
+                await asyncio.sleep(delay)
+        except BaseException:
+            # İptal (CancelledError) dahil - kuyruğu tıkamasın
+            self._dequeue(ticket)
+            raise
+
+    def reconcile(self, reservation: Reservation, actual_tokens: int) -> None:
+        """
+        Tahmini token'ı gerçek kullanımla uzlaştır.
+
+        Başarısız deneme 0 ile uzlaştırılır: ayrılan token kovaya iade edilir.
+        
+        Args:
+            reservation: acquire'dan dönen rezervasyon
+            actual_tokens: usage_metadata'dan gelen gerçek prompt token
+                (0: deneme kota tüketmedi)
+        """
+        with self._lock:
+            bucket = self._tpm.get(reservation.model)
+            if bucket:
+                bucket.adjust(reservation.estimated_tokens - actual_tokens)
+            # Tahmin isabeti sadece gerçek kullanımı bilinen çağrılarla ölçülür
+            if actual_tokens > 0:
+                self._estimated_tokens += reservation.estimated_tokens
+                self._actual_tokens += actual_tokens
+
+    # ==================== İÇ MEKANİZMA ====================
+
+    def _buckets(self, model: str) -> tuple[TokenBucket, TokenBucket]:
+        if model not in self._rpm:
+            quota = self._quotas.get(model, self.FALLBACK_QUOTA)
+            self._rpm[model] = TokenBucket(quota.rpm)
+            self._tpm[model] = TokenBucket(quota.tpm)
+        return self._rpm[model], self._tpm[model]
+
+    def _enqueue(
+        self,
+        model: str,
+        estimated_tokens: int,
+        priority: Optional[CallPriority]
+    ) -> _Ticket:
+        priority = current_priority() if priority is None else priority
+        with self._lock:
+            _, tpm = self._buckets(model)
+            ticket = _Ticket(
+                priority=int(priority),
+                seq=next(self._seq),
+                model=model,
+                # Kapasiteden büyük istek sonsuza kadar beklemesin
+                tokens=max(0, min(int(estimated_tokens), int(tpm.capacity))),
+                enqueued_at=time.monotonic()
+            )
+            heapq.heappush(self._queues.setdefault(model, []), ticket)
+        return ticket
+
+    def _dequeue(self, ticket: _Ticket) -> None:
+        with self._lock:
+            queue = self._queues.get(ticket.model, [])
+            if ticket in queue:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+
+    def _try_grant(self, ticket: _Ticket) -> Optional[float]:
+        """
+        Kuyruk başındaysa ve kota varsa ver.
+
+        Returns:
+            None: kota verildi; float: tekrar denemeden önce beklenecek süre
+        """
+        with self._lock:
+            queue = self._queues[ticket.model]
+            if queue[0] is not ticket:
+                return self.POLL_INTERVAL
+
+            now = time.monotonic()
+            rpm, tpm = self._buckets(ticket.model)
+            delay = max(rpm.wait_time(1, now), tpm.wait_time(ticket.tokens, now))
+            if delay > 0:
+                ticket.throttled = True
+                return min(delay, 1.0)
+
+            rpm.consume(1)
+            tpm.consume(ticket.tokens)
+            heapq.heappop(queue)
+            return None
+
+    def _reservation(self, ticket: _Ticket) -> Reservation:
+        waited = time.monotonic() - ticket.enqueued_at
+        with self._lock:
+            self._granted += 1
+            if ticket.throttled:
+                self._throttled += 1
+            self._wait_samples.append((ticket.priority, waited))
+        return Reservation(
+            model=ticket.model,
+            estimated_tokens=ticket.tokens,
+            waited_seconds=waited,
+            priority=CallPriority(ticket.priority)
+        )
+
+    # ==================== METRİKLER ====================
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Kuyruk derinliği ve bekleme süresi metrikleri.
+
+        Returns:
+            {
+                "queue_depth": {model: {priority: adet}},
+                "wait_seconds": {priority: {"avg", "p95", "max", "count"}},
+                "granted": int,
+                "throttled": int,
+                "estimation_ratio": float  # gerçek / tahmini token
+            }
+        """
+        with self._lock:
+            depth = {
+                model: {
+                    p.name.lower(): sum(1 for t in queue if t.priority == p)
+                    for p in CallPriority
+                }
+                for model, queue in self._queues.items()
+            }
+            samples = list(self._wait_samples)
+            granted, throttled = self._granted, self._throttled
+            ratio = (
+                self._actual_tokens / self._estimated_tokens
+                if self._estimated_tokens else 0.0
+            )
+
+        waits = {}
+        for p in CallPriority:
+            values = sorted(w for prio, w in samples if prio == p)
+            if not values:
+                continue
+            waits[p.name.lower()] = {
+                "count": len(values),
+                "avg": sum(values) / len(values),
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1]
+            }
+
+        return {
+            "queue_depth": depth,
+            "wait_seconds": waits,
+            "granted": granted,
+            "throttled": throttled,
+            "estimation_ratio": ratio,
+            "quotas": {m: {"rpm": q.rpm, "tpm": q.tpm} for m, q in self._quotas.items()}
+        }
+
+
+# Global instance
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Global rate limiter al"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,393 @@
+"""
+Resilience Layer.
+Gemini çağrıları için retry (decorrelated jitter), retry-after ve circuit breaker.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, Awaitable, TypeVar
+
+import httpx
+from google.genai import errors
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Model devre dışı (circuit open) - çağrı yapılmadan hızlı başarısızlık"""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(
+            f"Gemini modeli geçici olarak devre dışı: {model} "
+            f"({retry_in:.0f} sn sonra tekrar denenecek)"
+        )
+        self.model = model
+        self.retry_in = retry_in
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry politikası.
+
+    Bekleme süreleri "decorrelated jitter" ile hesaplanır:
+        delay = min(max_delay, random(base_delay, önceki_delay * 3))
+    """
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    # Sunucu retry-after'ı bu süreden uzunsa beklemek yerine hata ver
+    max_retry_after: float = 60.0
+
+    def next_delay(self, previous: float) -> float:
+        """Bir sonraki bekleme süresi"""
+        upper = max(self.base_delay, previous * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+
+class CircuitBreaker:
+    """
+    Model bazında circuit breaker.
+
+    closed    -> normal çalışma
+    open      -> ardışık hata eşiği aşıldı; reset_timeout boyunca çağrılar reddedilir
+    half_open -> süre doldu; tek deneme çağrısına izin verilir
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self, model: str) -> bool:
+        """
+        Çağrıya izin ver veya CircuitOpenError fırlat.
+
+        Returns:
+            Bu çağrı half-open deneme çağrısı mı (ise sonucu record_success,
+            record_failure veya release_probe ile bildirilmeli)
+        """
+        with self._lock:
+            if self.state == "closed":
+                return False
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == "open" and elapsed >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            raise CircuitOpenError(model, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit breaker açıldı (ardışık hata: {self.failures})")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release_probe(self, reachable: bool) -> None:
+        """
+        Deneme çağrısı breaker hatası dışında bittiyse slotu bırak.
+
+        Model yanıt verdiyse (400, 429, parse hatası) servis ayaktadır,
+        breaker kapanır. Sonuç bilinmiyorsa (iptal) breaker açık kalır;
+        süre zaten dolduğundan sonraki çağrı yeni deneme olur.
+        """
+        with self._lock:
+            if not self._probe_in_flight:
+                return
+            self._probe_in_flight = False
+            if reachable:
+                self.state = "closed"
+                self.failures = 0
+            else:
+                self.state = "open"
+
+
+@dataclass
+class AttemptRecord:
+    """Tek bir çağrı denemesinin telemetrisi"""
+    model: str
+    operation: str
+    attempt: int
+    outcome: str  # success | retry | failed | circuit_open
+    duration_ms: float
+    delay_seconds: float = 0.0
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+class ResilienceLayer:
+    """
+    Gemini çağrılarını retry + circuit breaker ile saran katman.
+
+    Sadece geçici hatalar (429, 5xx, zaman aşımı, bağlantı hatası) yeniden
+    denenir. 429 circuit breaker'ı tetiklemez (kota sorunu, servis arızası değil).
+    """
+
+    RETRYABLE_CODES = {429, 500, 502, 503, 504}
+    BREAKER_CODES = {500, 502, 503, 504}
+
+    # Telemetri ring buffer boyutu
+    MAX_RECORDS = 500
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._records: deque = deque(maxlen=self.MAX_RECORDS)
+        self._lock = threading.Lock()
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """Model için circuit breaker"""
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[model]
+
+    # ==================== ÇAĞRI ====================
+
+    def call(self, model: str, fn: Callable[[], T], operation: str = "generate") -> T:
+        """
+        fn'i retry ve circuit breaker ile çalıştır (sync).
+
+        fn her denemede baştan çağrılır; yan etkisi (örn. chat geçmişine
+        tur ekleme) sadece başarılı olduktan sonra yapılmalıdır.
+        """
+        delay = 0.0
+        for attempt in range(1, self.policy.max_attempts + 1):
+            probe = self._allow(model, operation, attempt)
+            started = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._on_failure(model, operation, attempt, started, e, delay, probe)
+                time.sleep(delay)
+                continue
+            else:
+                self._on_success(model, operation, attempt, started)
+                return result
+            finally:
+                # İptal vb. ile çıkışta deneme slotu açık kalmasın (bildirildiyse etkisiz)
+                if probe:
+                    self.breaker(model).release_probe(reachable=False)
+        raise AssertionError("unreachable")
+
+    async def call_async(
+        self,
+        model: str,
+        fn: Callable[[], Awaitable[T]],
+        operation: str = "generate"
+    ) -> T:
+        """fn'i retry ve circuit breaker ile çalıştır (async). Bkz. call."""
+        delay = 0.0
+        for attempt in range(1, self.policy.max_attempts + 1):
+            probe = self._allow(model, operation, attempt)
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._on_failure(model, operation, attempt, started, e, delay, probe)
+                await asyncio.sleep(delay)
+                continue
+            else:
+                self._on_success(model, operation, attempt, started)
+                return result
+            finally:
+                # İptal vb. ile çıkışta deneme slotu açık kalmasın (bildirildiyse etkisiz)
+                if probe:
+                    self.breaker(model).release_probe(reachable=False)
+        raise AssertionError("unreachable")
+
+    def _allow(self, model: str, operation: str, attempt: int) -> bool:
+        try:
+            return self.breaker(model).allow(model)
+        except CircuitOpenError:
+            self._record(AttemptRecord(model, operation, attempt, "circuit_open", 0.0))
+            raise
+
+    def _on_success(self, model: str, operation: str, attempt: int, started: float) -> None:
+        self.breaker(model).record_success()
+        self._record(AttemptRecord(
+            model, operation, attempt, "success",
+            (time.monotonic() - started) * 1000
+        ))
+
+    def _on_failure(
+        self,
+        model: str,
+        operation: str,
+        attempt: int,
+        started: float,
+        error: Exception,
+        previous_delay: float,
+        probe: bool = False
+    ) -> float:
+        """
+        Hatayı kaydet ve bekleme süresini döndür.
+        Yeniden denenemeyecekse hatayı tekrar fırlatır.
+        """
+        duration_ms = (time.monotonic() - started) * 1000
+        code = self.status_code(error)
+        retryable = self.is_retryable(error)
+
+        if code in self.BREAKER_CODES or (retryable and code is None):
+            self.breaker(model).record_failure()
+        elif probe:
+            self.breaker(model).release_probe(reachable=True)
+
+        delay = self.policy.next_delay(previous_delay or self.policy.base_delay)
+        hint = self.retry_after(error)
+        if hint is not None:
+            delay = max(delay, hint)
+
+        final = (
+            not retryable
+            or attempt >= self.policy.max_attempts
+            or (hint is not None and hint > self.policy.max_retry_after)
+        )
+        self._record(AttemptRecord(
+            model, operation, attempt,
+            "failed" if final else "retry",
+            duration_ms,
+            delay_seconds=0.0 if final else delay,
+            error=f"{type(error).__name__}: {error}"[:300],
+            status_code=code
+        ))
+        if final:
+            raise error
+
+        logger.warning(
+            f"Gemini {operation} hatası ({model}, deneme {attempt}/{self.policy.max_attempts}): "
+            f"{error} - {delay:.1f} sn sonra tekrar denenecek"
+        )
+        return delay
+
+    # ==================== HATA SINIFLANDIRMA ====================
+
+    @staticmethod
+    def status_code(error: Exception) -> Optional[int]:
+        """Hatanın HTTP durum kodu (varsa)"""
+        if isinstance(error, errors.APIError):
+            return error.code
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code
+        return None
+
+    @classmethod
+    def is_retryable(cls, error: Exception) -> bool:
+        """Geçici (yeniden denenebilir) hata mı"""
+        code = cls.status_code(error)
+        if code is not None:
+            return code in cls.RETRYABLE_CODES
+        return isinstance(error, (
+            httpx.TimeoutException,
+            httpx.TransportError,
+            asyncio.TimeoutError,
+            TimeoutError,
+            ConnectionError
+        ))
+
+    @staticmethod
+    def retry_after(error: Exception) -> Optional[float]:
+        """
+        Sunucunun önerdiği bekleme süresi.
+
+        Kaynaklar: HTTP Retry-After başlığı veya google.rpc.RetryInfo
+        detayı ("retryDelay": "12s").
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            value = headers.get("retry-after")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+
+        details = getattr(error, "details", None)
+        if isinstance(details, dict):
+            details = details.get("error", details).get("details", [])
+        for item in details or []:
+            if isinstance(item, dict) and "RetryInfo" in str(item.get("@type", "")):
+                delay = str(item.get("retryDelay", "")).rstrip("s")
+                try:
+                    return float(delay)
+                except ValueError:
+                    return None
+        return None
+
+    # ==================== TELEMETRİ ====================
+
+    def _record(self, record: AttemptRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def recent_attempts(self, limit: int = 50) -> list[Dict[str, Any]]:
+        """Son denemeler (en yeni sonda)"""
+        with self._lock:
+            records = list(self._records)[-limit:]
+        return [
+            {**asdict(r), "timestamp": r.timestamp.isoformat()}
+            for r in records
+        ]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Deneme sonuçları ve breaker durumları"""
+        with self._lock:
+            records = list(self._records)
+            breakers = dict(self._breakers)
+
+        outcomes: Dict[str, int] = {}
+        for r in records:
+            outcomes[r.outcome] = outcomes.get(r.outcome, 0) + 1
+
+        return {
+            "outcomes": outcomes,
+            "retried_calls": sum(1 for r in records if r.outcome == "success" and r.attempt > 1),
+            "breakers": {
+                model: {"state": b.state, "failures": b.failures}
+                for model, b in breakers.items()
+            }
+        }
+
+
+# Global instance
+_resilience: Optional[ResilienceLayer] = None
+
+
+def get_resilience() -> ResilienceLayer:
+    """Global resilience katmanını al"""
+    global _resilience
+    if _resilience is None:
+        _resilience = ResilienceLayer()
+    return _resilience
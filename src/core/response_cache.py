@@ -0,0 +1,294 @@
+"""
+Response Cache.
+Structured üretimler için içerik adresli (hash anahtarlı) kalıcı yanıt cache'i.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from ..models.project import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    SQLite tabanlı yanıt cache'i.
+
+    Anahtar; model, prompt, schema anahtarı (registry'deki model adı + varyant
+    hash'i), Gemini cache adı, düşünme seviyesi ve chat geçmişi özetinin
+    (digest) SHA-256 hash'idir. Aynı istek tekrar geldiğinde API'ye gidilmez,
+    kayıtlı yanıt metni döndürülür.
+
+    - TTL: süresi dolan kayıtlar okunmaz ve temizlenir
+    - LRU: kayıt sayısı veya toplam boyut sınırı aşılınca en eski
+      erişilen kayıtlar silinir
+    """
+
+    DEFAULT_DB_PATH = "data/response_cache.db"
+    DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+    DEFAULT_MAX_ENTRIES = 2_000
+    DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        ResponseCache başlat.
+
+        Args:
+            db_path: SQLite dosya yolu (filmstudio.db ile aynı dizin)
+            ttl_seconds: Kayıt ömrü (None ise GEMINI_RESPONSE_CACHE_TTL env var)
+            max_entries: Maksimum kayıt sayısı
+            max_bytes: Maksimum toplam yanıt boyutu (None ise GEMINI_RESPONSE_CACHE_MAX_MB)
+            enabled: Varsayılan açık/kapalı (None ise GEMINI_RESPONSE_CACHE env var)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.ttl_seconds = ttl_seconds or int(
+            os.getenv("GEMINI_RESPONSE_CACHE_TTL", self.DEFAULT_TTL_SECONDS)
+        )
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        max_mb = os.getenv("GEMINI_RESPONSE_CACHE_MAX_MB")
+        self.max_bytes = max_bytes or (int(max_mb) * 1024 * 1024 if max_mb else self.DEFAULT_MAX_BYTES)
+        if enabled is None:
+            enabled = os.getenv("GEMINI_RESPONSE_CACHE", "1").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+        # Sayaçlar (process ömrü boyunca)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._saved_tokens = 0
+
+        self._init_database()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Veritabanı bağlantısı"""
+        if self._connection is None:
+            self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        return self._connection
+
+    def _init_database(self) -> None:
+        """Tabloyu oluştur"""
+        with self._lock:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response_text TEXT NOT NULL,
+                    usage_json TEXT DEFAULT '{}',
+                    size_bytes INTEGER NOT NULL,
+                    hit_count INTEGER DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses(last_accessed)"
+            )
+            self.connection.commit()
+
+    def is_enabled(self, use_cache: Optional[bool] = None) -> bool:
+        """Çağrı için cache kullanılacak mı (use_cache None ise varsayılan)"""
+        return self.enabled if use_cache is None else use_cache
+
+    # ==================== ANAHTAR ====================
+
+    @staticmethod
+    def history_digest(history: Optional[List[Any]]) -> Optional[str]:
+        """Chat geçmişinin özeti (rol + metin parçaları)"""
+        if not history:
+            return None
+        digest = hashlib.sha256()
+        for content in history:
+            digest.update((content.role or "").encode())
+            for part in content.parts or []:
+                digest.update(b"\x1f")
+                digest.update((part.text or "").encode())
+            digest.update(b"\x1e")
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt: str,
+        schema_key: str,
+        cache_name: Optional[str] = None,
+        thinking_level: Optional[str] = None,
+        history_digest: Optional[str] = None
+    ) -> str:
+        """İstek anahtarı (SHA-256)"""
+        payload = json.dumps(
+            {
+                "model": model,
+                "prompt": prompt,
+                "schema": schema_key,
+                "cache_name": cache_name,
+                "thinking_level": thinking_level,
+                "history": history_digest
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    # ==================== OKUMA / YAZMA ====================
+
+    def get(self, key: str) -> Optional[tuple[str, TokenUsage]]:
+        """
+        Kayıtlı yanıtı getir.
+
+        Returns:
+            (yanıt metni, orijinal token kullanımı) veya None
+        """
+        now = time.time()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT response_text, usage_json, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or row["expires_at"] <= now:
+                if row is not None:
+                    self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.connection.commit()
+                    self._evictions += 1
+                self._misses += 1
+                return None
+
+            self.connection.execute(
+                "UPDATE responses SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key)
+            )
+            self.connection.commit()
+
+            usage = TokenUsage.model_validate_json(row["usage_json"])
+            self._hits += 1
+            self._saved_tokens += usage.total_tokens
+
+        return row["response_text"], usage
+
+    def put(
+        self,
+        key: str,
+        model: str,
+        response_text: str,
+        usage: TokenUsage,
+        ttl_seconds: Optional[int] = None
+    ) -> None:
+        """Yanıtı kaydet ve gerekirse eviction yap"""
+        now = time.time()
+        size = len(response_text.encode())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self.connection.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                (key, model, response_text, usage_json, size_bytes, hit_count,
+                 created_at, last_accessed, expires_at)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+                """,
+                (
+                    key, model, response_text, usage.model_dump_json(), size,
+                    now, now, now + (ttl_seconds or self.ttl_seconds)
+                )
+            )
+            self._evict(now)
+            self.connection.commit()
+
+    def _evict(self, now: float) -> None:
+        """Süresi dolanları, sonra sınırı aşan en eski erişilenleri sil (lock altında)"""
+        cursor = self.connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._evictions += max(cursor.rowcount, 0)
+
+        count, total = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self.connection.execute(
+            "SELECT key, size_bytes FROM responses ORDER BY last_accessed ASC"
+        ).fetchall()
+        victims = []
+        for row in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((row["key"],))
+            count -= 1
+            total -= row["size_bytes"]
+
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._evictions += len(victims)
+        logger.info(f"Yanıt cache'inden {len(victims)} kayıt çıkarıldı (LRU)")
+
+    def clear(self) -> int:
+        """Tüm kayıtları sil"""
+        with self._lock:
+            cursor = self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+            return cursor.rowcount
+
+    # ==================== METRİKLER ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss sayaçları ve doluluk"""
+        with self._lock:
+            count, total = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+            ).fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": count,
+                "size_bytes": total,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "saved_tokens": self._saved_tokens
+            }
+
+    def close(self) -> None:
+        """Bağlantıyı kapat"""
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+
+# Global instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Global yanıt cache'ini al"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,169 @@
+"""
+Schema Registry.
+Structured output modellerinin JSON schema'larını bir kez derleyip saklar.
+"""
+
+import json
+import hashlib
+import threading
+from enum import Enum
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Type, Iterable
+
+from pydantic import BaseModel
+
+
+class SchemaVariant(str, Enum):
+    """Gemini'ye gönderilecek schema varyantı"""
+    FULL = "full"          # Tüm açıklamalar (en iyi yönlendirme)
+    COMPACT = "compact"    # Kısaltılmış açıklamalar, title'lar yok
+    MINIMAL = "minimal"    # Sadece yapı (açıklama ve title yok)
+
+
+# Yapısal olmayan, sadece yönlendirme amaçlı anahtarlar
+_ANNOTATION_KEYS = ("title", "description", "examples")
+
+
+def _canonical(schema: Dict[str, Any]) -> str:
+    return json.dumps(schema, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def _shorten(text: str, limit: int) -> str:
+    """Açıklamanın ilk cümlesini/parçasını al"""
+    for sep in ("\n", " - ", ". ", " (", ": "):
+        if sep in text:
+            text = text.split(sep, 1)[0]
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _strip(node: Any, description_limit: Optional[int]) -> Any:
+    """
+    Schema'dan açıklama anahtarlarını at veya kısalt.
+
+    "properties" ve "$defs" altındaki anahtarlar alan/tanım adıdır; onlara
+    dokunulmaz, sadece değerleri işlenir.
+    """
+    if isinstance(node, list):
+        return [_strip(item, description_limit) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    result = {}
+    for key, value in node.items():
+        if key in ("properties", "$defs") and isinstance(value, dict):
+            result[key] = {name: _strip(sub, description_limit) for name, sub in value.items()}
+        elif key == "description" and description_limit and isinstance(value, str):
+            result[key] = _shorten(value, description_limit)
+        elif key in _ANNOTATION_KEYS:
+            continue
+        else:
+            result[key] = _strip(value, description_limit)
+    return result
+
+
+@dataclass
+class CompiledSchema:
+    """Bir response modelinin derlenmiş schema varyantları"""
+    model: Type[BaseModel]
+    variants: Dict[SchemaVariant, Dict[str, Any]]
+    hashes: Dict[SchemaVariant, str]
+    sizes: Dict[SchemaVariant, int]  # karakter
+    uses: Dict[SchemaVariant, int] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.model.__name__
+
+    @property
+    def hash(self) -> str:
+        """Modelin kararlı kimliği (tam schema hash'i)"""
+        return self.hashes[SchemaVariant.FULL]
+
+    def schema(self, variant: SchemaVariant = SchemaVariant.FULL) -> Dict[str, Any]:
+        """Varyantın JSON schema'sı (paylaşılan sözlük - değiştirilmemeli)"""
+        return self.variants[variant]
+
+    def key(self, variant: SchemaVariant = SchemaVariant.FULL) -> str:
+        """Cache/metrik anahtarı: model adı + varyant hash'i"""
+        return f"{self.name}:{self.hashes[variant]}"
+
+
+class SchemaRegistry:
+    """
+    Response model schema kaydı.
+
+    Her model için model_json_schema() sadece bir kez çağrılır; tam ve
+    token açısından küçültülmüş varyantlar ile kararlı hash'ler saklanır.
+    Kayıtlı olmayan modeller ilk kullanımda derlenir.
+    """
+
+    # COMPACT varyantta açıklama uzunluk sınırı (karakter)
+    COMPACT_DESCRIPTION_LIMIT = 60
+
+    def __init__(self):
+        self._schemas: Dict[Type[BaseModel], CompiledSchema] = {}
+        self._lock = threading.Lock()
+
+    def register(self, model: Type[BaseModel]) -> CompiledSchema:
+        """Modeli derle ve kaydet (zaten kayıtlıysa mevcut kaydı döndür)"""
+        with self._lock:
+            compiled = self._schemas.get(model)
+            if compiled is None:
+                compiled = self._compile(model)
+                self._schemas[model] = compiled
+            return compiled
+
+    def precompile(self, models: Iterable[Type[BaseModel]]) -> None:
+        """Uygulama açılışında modelleri toplu derle"""
+        for model in models:
+            self.register(model)
+
+    def get(self, model: Type[BaseModel]) -> CompiledSchema:
+        """Derlenmiş schema (yoksa derlenir)"""
+        return self._schemas.get(model) or self.register(model)
+
+    def use(self, model: Type[BaseModel], variant: SchemaVariant = SchemaVariant.FULL) -> Dict[str, Any]:
+        """İstek için schema al ve kullanım sayacını artır"""
+        compiled = self.get(model)
+        with self._lock:
+            compiled.uses[variant] = compiled.uses.get(variant, 0) + 1
+        return compiled.schema(variant)
+
+    def _compile(self, model: Type[BaseModel]) -> CompiledSchema:
+        full = model.model_json_schema()
+        variants = {
+            SchemaVariant.FULL: full,
+            SchemaVariant.COMPACT: _strip(full, self.COMPACT_DESCRIPTION_LIMIT),
+            SchemaVariant.MINIMAL: _strip(full, None),
+        }
+        canonical = {v: _canonical(s) for v, s in variants.items()}
+        return CompiledSchema(
+            model=model,
+            variants=variants,
+            hashes={v: hashlib.sha256(c.encode()).hexdigest()[:16] for v, c in canonical.items()},
+            sizes={v: len(c) for v, c in canonical.items()}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Model bazında hash, boyut ve kullanım"""
+        with self._lock:
+            return {
+                compiled.name: {
+                    "hash": compiled.hash,
+                    "size_chars": {v.value: n for v, n in compiled.sizes.items()},
+                    "uses": {v.value: n for v, n in compiled.uses.items()}
+                }
+                for compiled in self._schemas.values()
+            }
+
+
+# Global instance
+_schema_registry: Optional[SchemaRegistry] = None
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Global schema registry al"""
+    global _schema_registry
+    if _schema_registry is None:
+        _schema_registry = SchemaRegistry()
+    return _schema_registry
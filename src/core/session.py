@@ -3,15 +3,27 @@ Project Session.
 Proje oturumu yönetimi ve durum takibi.
 """
 
+import asyncio
 import json
 import logging
+import threading
 import uuid
+import dataclasses
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
 from datetime import datetime
 
-from .gemini_client import GeminiClient
+from google.genai import types
+
+from .gemini_client import GeminiClient, BatchRequest, BatchResult
 from .context_manager import ContextManager
+from .schema_registry import SchemaVariant
+from .source_files import SourceFileManager, file_sha256
+from .installation import get_installation
+from .shared_cache import SharedCacheRegistry, get_shared_caches
+from .telemetry import call_context, current_call_context
+from .pricing import CostModel, get_cost_model
+from .state_flusher import StateFlusher, get_state_flusher
 from ..models.project import (
     Project, 
     ProjectConfig, 
@@ -19,8 +31,8 @@ from ..models.project import (
     TokenUsage,
     ThinkingLevel
 )
-from ..models.screenplay import Screenplay, ProjectStatus
-from ..db import ProjectRepository, get_db
+from ..models.screenplay import Screenplay, LazyScreenplay, ProjectStatus, SceneResponse
+from ..db import ProjectRepository, ProjectUnitOfWork, get_db
 
 logger = logging.getLogger(__name__)
 
@@ -35,13 +47,26 @@ class ProjectSession:
     # Veri dizini
     DATA_DIR = Path("data/projects")
     
+    # Chat sıkıştırma: bu türlerdeki eski turlar tek bir özet turuna
+    # indirilir; diğerleri (konseptler, karakter kartı, beat sheet, sahne
+    # listesi) her zaman tam kalır
+    COMPACTABLE_KINDS = frozenset({"SceneResponse"})
+    COMPACTION_KEEP_RECENT = 2      # son N sahne turu tam kalır (üslup sürekliliği)
+    SUMMARY_KIND = "summary"
+    SUMMARY_PROMPT = "Şu ana kadar yazılan önceki sahneleri özetle."
+    SUMMARY_HEADER = "Önceki sahnelerin özeti (tam metinleri geçmişten çıkarıldı):"
+    SUMMARY_ACTION_CHARS = 240
+    
     def __init__(
         self,
         project_name: str,
         config: Optional[ProjectConfig] = None,
         project_id: Optional[str] = None,
         api_key: Optional[str] = None,
-        repository: Optional[ProjectRepository] = None
+        repository: Optional[ProjectRepository] = None,
+        shared_caches: Optional[SharedCacheRegistry] = None,
+        cost_model: Optional[CostModel] = None,
+        flusher: Optional[StateFlusher] = None
     ):
         """
         ProjectSession başlat.
@@ -52,6 +77,9 @@ class ProjectSession:
             project_id: Mevcut proje ID (yükleme için)
             api_key: Gemini API key
             repository: Proje repository (SQLite)
+            shared_caches: Paylaşılan system prompt cache registry'si
+            cost_model: Kullanım defteri için maliyet modeli (None ise global)
+            flusher: Write-behind kaydedici (None ise global)
         """
         self.project_id = project_id or str(uuid.uuid4())
         
@@ -70,11 +98,25 @@ class ProjectSession:
                 config=config or ProjectConfig()
             )
         
-        # Clients
-        self.gemini = GeminiClient(api_key=api_key)
+        # Clients (genai.Client havuzdan paylaşılır, registry'ler proje bazında)
+        language = self.project.config.language
+        self.gemini = GeminiClient(api_key=api_key, namespace=self.project_id, language=language)
+        self._shared_caches = shared_caches or get_shared_caches()
+        self._costs = cost_model or get_cost_model()
+        
+        # Write-behind durumu (config.state_flush_window_ms > 0 ise)
+        self._flusher = flusher or get_state_flusher()
+        self._dirty_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Bekleyen kaydetmenin anlık kopyaları (sahibi thread'de alınır)
+        self._pending_state: Optional[ProjectUnitOfWork] = None
+        self._pending_screenplay: Optional[Screenplay] = None
+        # Senaryonun son kopyası (değişmeyen sahneler sonraki kopyayla paylaşılır)
+        self._staged_screenplay: Optional[Screenplay] = None
         self.context = ContextManager(
             max_tokens=1_000_000,
-            project_id=self.project_id
+            project_id=self.project_id,
+            language=language
         )
         
         # Context state yükle (varsa)
@@ -82,12 +124,26 @@ class ProjectSession:
         if context_state and context_state.get("total_usage"):
             self.context.load_from_dict(context_state)
         
-        # Senaryo durumu - veritabanından yükle
-        self.screenplay = self._repo.get_screenplay(self.project_id)
+        # Senaryo durumu - ilk erişimde veritabanından yüklenir
+        self._screenplay: Optional[Screenplay] = None
+        self._screenplay_loaded = False
         
-        # Aktif chat ID'leri ve kaynak dosya
+        # Aktif chat ID'leri
         self._active_chats = self._repo.get_active_chats(self.project_id)
-        self._source_file: Optional[Any] = None  # Yüklenen dosya objesi
+        
+        # Modül bazında kalıcı chat geçmişi büyüklüğü (tur / token)
+        self._chat_history = self._repo.get_chat_history_stats(self.project_id)
+        for module_name in self._chat_history:
+            self._track_chat_history(module_name)
+        
+        # Modül bazında sıkıştırma ve prompt token tasarrufu
+        self._compaction: Dict[str, Dict[str, int]] = {}
+        
+        # Kaynak dosya handle'ı (SQLite'ta kalıcı, kullanımda doğrulanır)
+        self.sources = SourceFileManager(self.gemini, self._repo, self.project_id)
+        
+        # Modül system prompt'ları (cache'i kaybolan chat'in kurtarılması için)
+        self._module_prompts: Dict[str, str] = {}
         
         # Proje dizini oluştur (dosya yüklemeleri için)
         self.project_dir.mkdir(parents=True, exist_ok=True)
@@ -97,14 +153,43 @@ class ProjectSession:
         """Proje dizini"""
         return self.DATA_DIR / self.project_id
     
+    @property
+    def screenplay(self) -> Optional[Screenplay]:
+        """Senaryo (ilk erişimde yüklenir; senaryoya dokunmayan istekler okumaz)"""
+        if not self._screenplay_loaded:
+            self._screenplay = self._repo.get_screenplay(self.project_id)
+            self._screenplay_loaded = True
+        return self._screenplay
+    
+    @screenplay.setter
+    def screenplay(self, value: Optional[Screenplay]) -> None:
+        self._screenplay = value
+        self._screenplay_loaded = True
+    
+    def scene_count(self) -> int:
+        """Yazılmış sahne sayısı (sahneler henüz yüklenmediyse veritabanından sayılır)"""
+        screenplay = self.screenplay
+        if screenplay is None:
+            return 0
+        if isinstance(screenplay, LazyScreenplay) and "scenes" in screenplay.unloaded_fields():
+            return self._repo.count_scenes(self.project_id)
+        return len(screenplay.scenes)
+    
     # ==================== KAYNAK YÖNETİMİ ====================
     
-    def upload_source(self, file_path: str) -> str:
+    def upload_source(
+        self,
+        file_path: str,
+        sha256: Optional[str] = None,
+        on_progress: Optional[Callable[..., None]] = None
+    ) -> str:
         """
         Kaynak materyal yükle.
         
         Args:
             file_path: Dosya yolu
+            sha256: İçerik hash'i (aynı içerik daha önce yüklendiyse tekrar yüklenmez)
+            on_progress: İlerleme callback'i
             
         Returns:
             Dosya URI
@@ -112,27 +197,82 @@ class ProjectSession:
         # Files API ile yükle - File objesi döner
         uploaded_file = self.gemini.upload_file(
             file_path,
-            display_name=f"source_{self.project_id}"
+            display_name=get_installation().display_name(f"source_{self.project_id}"),
+            sha256=sha256,
+            on_progress=on_progress
+        )
+        
+        sha256 = sha256 or file_sha256(file_path)
+        try:
+            token_count = self.gemini.count_file_tokens(self._source_model, uploaded_file, sha256)
+        except Exception as e:
+            logger.warning(f"Kaynak token sayısı alınamadı, tahmin kullanılacak: {e}")
+            token_count = None
+        
+        self.sources.register(file_path, uploaded_file, sha256)
+        self._attach_source(file_path, uploaded_file, token_count)
+        self._save_state()
+        return uploaded_file.uri
+    
+    async def upload_source_async(
+        self,
+        file_path: str,
+        sha256: Optional[str] = None,
+        on_progress: Optional[Callable[..., None]] = None
+    ) -> str:
+        """Kaynak materyal yükle (async). Bkz. upload_source."""
+        uploaded_file = await self.gemini.aio.upload_file(
+            file_path,
+            display_name=get_installation().display_name(f"source_{self.project_id}"),
+            sha256=sha256,
+            on_progress=on_progress
         )
         
-        # File objesini sakla (cache için)
-        self._source_file = uploaded_file
+        sha256 = sha256 or file_sha256(file_path)
+        try:
+            token_count = await self.gemini.aio.count_file_tokens(
+                self._source_model, uploaded_file, sha256
+            )
+        except Exception as e:
+            logger.warning(f"Kaynak token sayısı alınamadı, tahmin kullanılacak: {e}")
+            token_count = None
+        
+        await asyncio.to_thread(self.sources.register, file_path, uploaded_file, sha256)
+        self._attach_source(file_path, uploaded_file, token_count)
+        await self._save_state_async()
+        return uploaded_file.uri
+    
+    @property
+    def _source_model(self) -> str:
+        """Kaynak materyali işleyen model (token sayımı için)"""
+        return self._get_model_for_module(ModuleType.SENARYO)
+    
+    def _attach_source(
+        self,
+        file_path: str,
+        uploaded_file: Any,
+        token_count: Optional[int] = None
+    ) -> None:
+        """
+        Yüklenen kaynak dosyayı projeye bağla.
         
+        Handle'ın kaydı (cache oluşturma ve restart sonrası için) ve durumun
+        kaydedilmesi çağıranın işidir (bkz. upload_source, upload_source_async).
+        """
         # Proje bilgisini güncelle
         self.project.source_file_uri = uploaded_file.uri
         self.project.source_file_name = Path(file_path).name
         
-        # Context'e ekle (tahmini token)
-        file_size = Path(file_path).stat().st_size
-        estimated_tokens = file_size // 4  # Yaklaşık
+        # Context'e ekle (count_tokens sonucu; alınamazsa dil bazında tahmin)
+        if token_count is None:
+            file_size = Path(file_path).stat().st_size
+            token_count = self.context._estimator.estimate_chars(file_size, self.context.language)
         self.context.add_component(
             "source_material",
-            f"[Kaynak Materyal: {file_path}, ~{estimated_tokens} token]",
-            is_cached=False
+            f"[Kaynak Materyal: {file_path}, {token_count} token]",
+            is_cached=False,
+            token_count=token_count
         )
-        
-        self._save_state()
-        return uploaded_file.uri
     
     # ==================== CACHE YÖNETİMİ ====================
     
@@ -145,6 +285,11 @@ class ProjectSession:
         """
         Modül için cache oluştur.
         
+        Kaynak dosya yüklenmişse cache'e eklenir; handle'ın süresi dolmuşsa
+        veya restart sonrası bellekte yoksa önce doğrulanır/yeniden yüklenir.
+        Kaynak ve ek içerik yoksa cache sadece system prompt'tur; bu durumda
+        projeler arası paylaşılan cache kullanılır.
+        
         Args:
             module: Modül türü
             system_prompt: System prompt
@@ -153,32 +298,86 @@ class ProjectSession:
         Returns:
             Cache ID
         """
+        request = self._module_cache_request(
+            module, system_prompt, additional_content, self.sources.get()
+        )
+        if request["contents"] is None:
+            cache_info = self._shared_caches.acquire(
+                self.gemini, request["cache_id"], request["model"],
+                system_prompt, request["ttl_seconds"]
+            )
+        else:
+            cache_info = self.gemini.create_cache(**request)
+        
+        self._save_module_cache(request["cache_id"], cache_info)
+        self._attach_module_cache(module, request["cache_id"], cache_info)
+        self._save_state()
+        return request["cache_id"]
+    
+    async def create_module_cache_async(
+        self,
+        module: ModuleType,
+        system_prompt: str,
+        additional_content: Optional[str] = None
+    ) -> str:
+        """Modül için cache oluştur (async). Bkz. create_module_cache."""
+        request = self._module_cache_request(
+            module, system_prompt, additional_content, await self.sources.get_async()
+        )
+        if request["contents"] is None:
+            cache_info = await self._shared_caches.acquire_async(
+                self.gemini, request["cache_id"], request["model"],
+                system_prompt, request["ttl_seconds"]
+            )
+        else:
+            cache_info = await self.gemini.aio.create_cache(**request)
+        
+        await asyncio.to_thread(self._save_module_cache, request["cache_id"], cache_info)
+        self._attach_module_cache(module, request["cache_id"], cache_info)
+        await self._save_state_async()
+        return request["cache_id"]
+    
+    def _module_cache_request(
+        self,
+        module: ModuleType,
+        system_prompt: str,
+        additional_content: Optional[str],
+        source_file: Optional[Any]
+    ) -> Dict[str, Any]:
+        """create_cache argümanlarını hazırla"""
         cache_id = f"{self.project_id}_{module.value}"
+        self._module_prompts[module.value] = system_prompt
         
         # İçerikleri hazırla - File objesi doğrudan geçilebilir
         contents = []
         
         # Kaynak dosya varsa File objesini ekle
-        if hasattr(self, '_source_file') and self._source_file:
-            contents.append(self._source_file)
+        if source_file:
+            contents.append(source_file)
+        elif self.sources.has_source:
+            logger.warning(f"Kaynak dosya cache'e eklenemedi (handle geçersiz): {cache_id}")
         
         # Ek içerik varsa ekle
         if additional_content:
             contents.append(additional_content)
         
-        # Model seç
-        model = self._get_model_for_module(module)
-        
-        # Cache oluştur
-        cache_info = self.gemini.create_cache(
-            cache_id=cache_id,
-            model=model,
-            system_instruction=system_prompt,
-            contents=contents if contents else None,
-            ttl_seconds=self.project.config.cache_ttl_seconds,
-            display_name=f"{self.project.name}_{module.value}"
+        return {
+            "cache_id": cache_id,
+            "model": self._get_model_for_module(module),
+            "system_instruction": system_prompt,
+            "contents": contents if contents else None,
+            "ttl_seconds": self.project.config.cache_ttl_seconds,
+            "display_name": get_installation().display_name(cache_id)  # Artık temizliğinde sahiplik için (bkz. CacheLifecycleManager)
+        }
+    
+    def _save_module_cache(self, cache_id: str, cache_info) -> None:
+        """cache_id -> cache adı eşlemesini kalıcı kaydet (TTL uzatma ve restart için)"""
+        self._repo.save_module_cache(
+            self.project_id, cache_id, cache_info, self.project.config.cache_ttl_seconds
         )
-        
+    
+    def _attach_module_cache(self, module: ModuleType, cache_id: str, cache_info) -> None:
+        """Oluşturulan cache'i projeye ve context'e ekle"""
         # Proje cache listesine ekle
         self.project.active_caches.append(cache_info)
         
@@ -188,9 +387,16 @@ class ProjectSession:
             f"[Cache: {cache_id}, {cache_info.token_count} token]",
             is_cached=True
         )
-        
-        self._save_state()
-        return cache_id
+        self._track_shared_cache(cache_info)
+    
+    def _track_shared_cache(self, cache_info) -> None:
+        """Paylaşılan cache ise referans sayısını context raporuna işle"""
+        if self._shared_caches.is_shared(cache_info.cache_name):
+            self.context.update_shared_cache(
+                cache_info.cache_name,
+                cache_info.token_count,
+                self._shared_caches.refs(cache_info.cache_name)
+            )
     
     # ==================== CHAT YÖNETİMİ ====================
     
@@ -228,12 +434,13 @@ class ProjectSession:
         model = self._get_model_for_module(module)
         thinking = self._get_thinking_for_module(module)
         
-        # Chat oluştur
-        self.gemini.create_chat(
-            chat_id=chat_id,
-            model=model,
-            cache_id=cache_id or f"{self.project_id}_{module.value}",
-            thinking_level=thinking
+        # Chat oluştur (restart sonrası kalıcı geçmişten)
+        self._open_chat(
+            module,
+            chat_id,
+            cache_id or f"{self.project_id}_{module.value}",
+            model,
+            thinking
         )
         
         self._active_chats[module.value] = chat_id
@@ -262,34 +469,29 @@ class ProjectSession:
         Returns:
             (yanıt, token kullanımı)
         """
-        chat_id = self._active_chats.get(module.value)
-        if not chat_id:
-            raise ValueError(f"Modül için aktif chat yok: {module.value}")
-        
-        # Server restart sonrası chat memory'de olmayabilir - auto-recovery
-        if chat_id not in self.gemini._chats:
-            # Cache ID'yi bul
-            cache_id = f"{self.project_id}_{module.value}"
-            
-            # Yeniden chat oluştur (cache'i kullanarak)
-            model = self._get_model_for_module(module)
-            thinking = self._get_thinking_for_module(module)
-            
-            self.gemini.create_chat(
-                chat_id=chat_id,
-                model=model,
-                cache_id=cache_id,
-                thinking_level=thinking
-            )
+        chat_id = self._ensure_chat(module)
         
         # Mesaj gönder
-        response, usage = self.gemini.send_message(chat_id, message, stream)
+        with call_context(module=module.value):
+            response, usage = self.gemini.send_message(chat_id, message, stream)
         
-        # Token kullanımı kaydet
-        self.context.record_usage(usage)
-        self.project.add_token_usage(usage)
+        self._count_compaction_savings(module)
+        self.record_usage(usage, module, step="message")
+        return response, usage
+    
+    async def send_message_async(
+        self,
+        module: ModuleType,
+        message: str
+    ) -> tuple[str, TokenUsage]:
+        """Modül chat'ine mesaj gönder (async). Bkz. send_message."""
+        chat_id = await self._ensure_chat_async(module)
         
-        self._save_state()
+        with call_context(module=module.value):
+            response, usage = await self.gemini.aio.send_message(chat_id, message)
+        
+        self._count_compaction_savings(module)
+        await self.record_usage_async(usage, module, step="message")
         return response, usage
     
     # ==================== STRUCTURED OUTPUT ====================
@@ -300,7 +502,9 @@ class ProjectSession:
         prompt: str,
         response_schema,
         cache_id: Optional[str] = None,
-        use_chat: bool = True
+        use_chat: bool = True,
+        use_cache: Optional[bool] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
     ):
         """
         Yapılandırılmış yanıt üret.
@@ -314,6 +518,9 @@ class ProjectSession:
             response_schema: Pydantic model sınıfı
             cache_id: Cache ID
             use_chat: Chat oturumu kullan
+            use_cache: Yanıt cache'i kullan (None ise varsayılan; False her
+                zaman yeni yanıt üretir)
+            schema_variant: Schema varyantı (adım bazında token/yönlendirme dengesi)
             
         Returns:
             Pydantic model instance
@@ -322,44 +529,605 @@ class ProjectSession:
         
         # Chat oturumu varsa ve kullanılacaksa, chat üzerinden structured output al
         if use_chat and chat_id:
-            # Server restart sonrası chat memory'de olmayabilir - auto-recovery
-            if chat_id not in self.gemini._chats:
-                # Cache ID'yi bul ve chat'i yeniden oluştur
-                target_cache_id = cache_id or f"{self.project_id}_{module.value}"
-                model = self._get_model_for_module(module)
-                thinking = self._get_thinking_for_module(module)
-                
-                self.gemini.create_chat(
+            chat_id = self._ensure_chat(module, cache_id)
+            with call_context(module=module.value):
+                result, usage = self.gemini.send_message_structured(
                     chat_id=chat_id,
-                    model=model,
-                    cache_id=target_cache_id,
-                    thinking_level=thinking
+                    message=prompt,
+                    response_schema=response_schema,
+                    use_cache=use_cache,
+                    schema_variant=schema_variant
                 )
-            
-            result, usage = self.gemini.send_message_structured(
+            self._count_compaction_savings(module)
+        else:
+            # Fallback: bağımsız çağrı
+            with call_context(module=module.value):
+                result, usage = self.gemini.generate_structured(
+                    model=self._get_model_for_module(module),
+                    prompt=prompt,
+                    response_schema=response_schema,
+                    cache_id=cache_id,
+                    thinking_level=self._get_thinking_for_module(module),
+                    use_cache=use_cache,
+                    schema_variant=schema_variant
+                )
+        
+        self.record_usage(usage, module, step=response_schema.__name__)
+        return result
+    
+    async def generate_structured_async(
+        self,
+        module: ModuleType,
+        prompt: str,
+        response_schema,
+        cache_id: Optional[str] = None,
+        use_chat: bool = True,
+        use_cache: Optional[bool] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ):
+        """Yapılandırılmış yanıt üret (async). Bkz. generate_structured."""
+        chat_id = self._active_chats.get(module.value)
+        
+        if use_chat and chat_id:
+            chat_id = await self._ensure_chat_async(module, cache_id)
+            with call_context(module=module.value):
+                result, usage = await self.gemini.aio.send_message_structured(
+                    chat_id=chat_id,
+                    message=prompt,
+                    response_schema=response_schema,
+                    use_cache=use_cache,
+                    schema_variant=schema_variant
+                )
+            self._count_compaction_savings(module)
+        else:
+            with call_context(module=module.value):
+                result, usage = await self.gemini.aio.generate_structured(
+                    model=self._get_model_for_module(module),
+                    prompt=prompt,
+                    response_schema=response_schema,
+                    cache_id=cache_id,
+                    thinking_level=self._get_thinking_for_module(module),
+                    use_cache=use_cache,
+                    schema_variant=schema_variant
+                )
+        
+        await self.record_usage_async(usage, module, step=response_schema.__name__)
+        return result
+    
+    async def speculate_structured_async(
+        self,
+        module: ModuleType,
+        prompt: str,
+        response_schema,
+        cache_id: Optional[str] = None,
+        schema_variant: SchemaVariant = SchemaVariant.FULL
+    ):
+        """
+        Modül chat'inin geçmişiyle yanıt üret ama turu geçmişe yazma.
+        
+        Token kullanımı harcandığı anda işlenir; yanıt kullanılırsa
+        commit_chat_turn ile geçmişe eklenir.
+        
+        Returns:
+            (Pydantic model instance, ham yanıt metni, TokenUsage)
+        """
+        chat_id = await self._ensure_chat_async(module, cache_id)
+        with call_context(module=module.value):
+            result, text, usage = await self.gemini.aio.preview_message_structured(
                 chat_id=chat_id,
                 message=prompt,
-                response_schema=response_schema
+                response_schema=response_schema,
+                schema_variant=schema_variant
             )
-        else:
-            # Fallback: bağımsız çağrı
-            model = self._get_model_for_module(module)
-            thinking = self._get_thinking_for_module(module)
+        
+        await self.record_usage_async(usage, module, step=response_schema.__name__)
+        return result, text, usage
+    
+    def commit_chat_turn(
+        self,
+        module: ModuleType,
+        prompt: str,
+        text: str,
+        kind: Optional[str] = None
+    ) -> None:
+        """speculate_structured_async yanıtını modül chat'ine tur olarak ekle"""
+        chat_id = self._ensure_chat(module)
+        self.gemini.add_chat_turn(chat_id, prompt, text, kind)
+    
+    async def commit_chat_turn_async(
+        self,
+        module: ModuleType,
+        prompt: str,
+        text: str,
+        kind: Optional[str] = None
+    ) -> None:
+        """Bkz. commit_chat_turn; kalıcı kayıt event loop dışında yapılır."""
+        chat_id = await self._ensure_chat_async(module)
+        await self.gemini.aio.add_chat_turn(chat_id, prompt, text, kind)
+    
+    def chat_turn_count(self, module: ModuleType) -> Optional[int]:
+        """Modül chat'inde yapılan tur sayısı (aktif chat yoksa None)"""
+        chat_id = self._active_chats.get(module.value)
+        return self.gemini.chat_turn_count(chat_id) if chat_id else None
+    
+    def _ensure_chat(self, module: ModuleType, cache_id: Optional[str] = None) -> str:
+        """
+        Modülün aktif chat'ini döndür.
+        
+        Server restart sonrası chat memory'de olmayabilir - auto-recovery:
+        chat, modül cache'i kullanılarak yeniden oluşturulur. Modül cache'i
+        yoksa veya süresi dolmuşsa önce (kaynak dosyayla birlikte) yeniden
+        oluşturulur. Geçmiş eşiği aştıysa gönderimden önce sıkıştırılır.
+        """
+        chat_id = self._active_chats.get(module.value)
+        if not chat_id:
+            raise ValueError(f"Modül için aktif chat yok: {module.value}")
+        
+        if chat_id not in self.gemini._chats:
+            cache_id = cache_id or f"{self.project_id}_{module.value}"
+            if self._needs_module_cache(module, cache_id):
+                self.create_module_cache(module, self._module_prompts[module.value])
+            self._recover_chat(module, chat_id, cache_id)
+        
+        self._compact_chat(module, chat_id)
+        return chat_id
+    
+    async def _ensure_chat_async(self, module: ModuleType, cache_id: Optional[str] = None) -> str:
+        """Modülün aktif chat'ini döndür (async). Bkz. _ensure_chat."""
+        chat_id = self._active_chats.get(module.value)
+        if not chat_id:
+            raise ValueError(f"Modül için aktif chat yok: {module.value}")
+        
+        if chat_id not in self.gemini._chats:
+            cache_id = cache_id or f"{self.project_id}_{module.value}"
+            if self._needs_module_cache(module, cache_id):
+                await self.create_module_cache_async(module, self._module_prompts[module.value])
+            # Kalıcı geçmiş okuma / yeniden yazma event loop dışında
+            await asyncio.to_thread(self._recover_chat, module, chat_id, cache_id)
+        
+        await asyncio.to_thread(self._compact_chat, module, chat_id)
+        return chat_id
+    
+    def set_module_prompt(self, module: ModuleType, system_prompt: str) -> None:
+        """Modül system prompt'unu bildir (chat kurtarmada cache yeniden oluşturmak için)"""
+        self._module_prompts[module.value] = system_prompt
+    
+    def _needs_module_cache(self, module: ModuleType, cache_id: str) -> bool:
+        """Kurtarılan chat için modül cache'i yeniden oluşturulmalı mı"""
+        if cache_id != f"{self.project_id}_{module.value}":
+            return False  # Harici cache - bu oturumun yönetiminde değil
+        if module.value not in self._module_prompts:
+            return False
+        
+        cache_info = self.gemini.get_cache(cache_id)
+        return cache_info is None or cache_info.is_expired
+    
+    def _recover_chat(self, module: ModuleType, chat_id: str, cache_id: str) -> None:
+        """Memory'de olmayan chat'i kalıcı geçmişinden yeniden oluştur"""
+        logger.info(f"Chat memory'de yok, yeniden oluşturuluyor: {chat_id}")
+        self._open_chat(
+            module,
+            chat_id,
+            cache_id,
+            self._get_model_for_module(module),
+            self._get_thinking_for_module(module)
+        )
+    
+    def _open_chat(
+        self,
+        module: ModuleType,
+        chat_id: str,
+        cache_id: str,
+        model: str,
+        thinking: ThinkingLevel
+    ) -> None:
+        """
+        Chat'i kalıcı geçmişiyle oluştur.
+        
+        Geçmişin tamamı değil, chat_replay_token_budget'a sığan en yeni
+        turlar yüklenir; her yeni tur chat_turns tablosuna eklenir.
+        """
+        turns = self._repo.get_chat_turns(chat_id, self.project.config.chat_replay_token_budget)
+        
+        # Geçmiş kullanıcı turuyla başlamalı (bütçe bir turu ortadan bölmüşse)
+        while turns and turns[0]["role"] != "user":
+            turns.pop(0)
+        
+        history = [types.Content.model_validate_json(t["content"]) for t in turns]
+        if history:
+            stored = self._chat_history.get(module.value, {})
+            logger.info(
+                f"Chat geçmişi yüklendi: {chat_id} - {len(history)}/{stored.get('turns', 0)} tur, "
+                f"{sum(t['token_count'] for t in turns)} token"
+            )
+        
+        self.gemini.create_chat(
+            chat_id=chat_id,
+            model=model,
+            cache_id=cache_id,
+            thinking_level=thinking,
+            history=history,
+            kinds=[t["kind"] for t in turns],
+            on_turn=lambda contents, kind: self._persist_chat_turn(module, chat_id, model, contents, kind)
+        )
+    
+    def _persist_chat_turn(
+        self,
+        module: ModuleType,
+        chat_id: str,
+        model: str,
+        contents: List[types.Content],
+        kind: Optional[str] = None
+    ) -> Callable[[], None]:
+        """
+        Başarılı chat turunu kalıcı geçmişe ekle.
+        
+        Async akışta worker thread'de çalışır, sadece veritabanına yazar.
+        Geçmiş istatistiği ve context dağılımı döndürülen fonksiyonla
+        çağıranın thread'inde (event loop) güncellenir; _stage'in okuduğu
+        context worker'dan değiştirilmez.
+        """
+        turns = self._serialize_turns(contents, [kind] * len(contents), model)
+        self._repo.append_chat_turns(self.project_id, chat_id, module.value, turns)
+        return lambda: self._count_chat_turns(module, turns)
+    
+    def _count_chat_turns(self, module: ModuleType, turns: List[Dict[str, Any]]) -> None:
+        """Kalıcı kaydedilen turları geçmiş istatistiğine ve context dağılımına işle"""
+        stats = self._chat_history.setdefault(module.value, {"turns": 0, "tokens": 0})
+        stats["turns"] += len(turns)
+        stats["tokens"] += sum(t["token_count"] for t in turns)
+        self._track_chat_history(module.value)
+    
+    def _serialize_turns(
+        self,
+        contents: List[types.Content],
+        kinds: List[Optional[str]],
+        model: str
+    ) -> List[Dict[str, Any]]:
+        """Content'leri chat_turns satırlarına dönüştür"""
+        return [
+            {
+                "role": content.role,
+                "kind": kind,
+                "content": content.model_dump_json(exclude_none=True),
+                "token_count": self.gemini.estimate_content_tokens(content, model)
+            }
+            for content, kind in zip(contents, kinds)
+        ]
+    
+    # ==================== BATCH API ====================
+    
+    async def submit_batch_async(
+        self,
+        module: ModuleType,
+        kind: str,
+        requests: List[BatchRequest]
+    ) -> str:
+        """
+        Bağımsız structured istekleri tek Batch API işi olarak gönder.
+        
+        Batch indirimli fiyatla çalışır ama sonuç dakikalar/saatler sonra
+        gelir; etkileşimsiz toplu işler içindir. İş SQLite'a kaydedilir,
+        restart sonrası poll_batch_async ile sürdürülür.
+        
+        Args:
+            module: İstekleri yapan modül (model seçimi)
+            kind: İş türü (sonuçları uygulayacak akış, örn. "scenes")
+            requests: İstekler
             
-            result, usage = self.gemini.generate_structured(
-                model=model,
-                prompt=prompt,
-                response_schema=response_schema,
-                cache_id=cache_id,
-                thinking_level=thinking
+        Returns:
+            Batch iş adı
+        """
+        model = self._get_model_for_module(module)
+        thinking = self._get_thinking_for_module(module)
+        requests = [
+            r if r.thinking_level else dataclasses.replace(r, thinking_level=thinking)
+            for r in requests
+        ]
+        job = await self.gemini.aio.submit_batch(
+            model, requests, display_name=f"{self.project_id}_{module.value}_{kind}"
+        )
+        await asyncio.to_thread(
+            self._repo.save_batch_job,
+            self.project_id, job.name, module.value, kind, model,
+            job.state.value, [r.key for r in requests]
+        )
+        logger.info(f"Batch işi gönderildi: {job.name} ({len(requests)} istek)")
+        return job.name
+    
+    async def poll_batch_async(
+        self,
+        job_name: str,
+        response_schema
+    ) -> tuple[str, Optional[List[BatchResult]]]:
+        """
+        Batch işini bir kez sorgula (bloklamaz).
+        
+        Args:
+            job_name: Batch iş adı
+            response_schema: İşteki isteklerin response schema'sı
+            
+        Returns:
+            (JobState değeri, sonuçlar) - iş sürüyorsa veya sonuçları zaten
+            uygulandıysa sonuçlar None
+            
+        Raises:
+            ValueError: İş bu projeye ait değilse
+        """
+        record = await asyncio.to_thread(self._repo.get_batch_job, job_name)
+        if not record or record["project_id"] != self.project_id:
+            raise ValueError(f"Batch işi bulunamadı: {job_name}")
+        if record["applied"]:
+            return record["state"], None
+        
+        job = await self.gemini.aio.get_batch(job_name)
+        state = job.state.value
+        await asyncio.to_thread(
+            self._repo.update_batch_job, job_name, state, error=job.error.message if job.error else None
+        )
+        
+        if not self.gemini.batch_done(job.state):
+            return state, None
+        schemas = {key: response_schema for key in record["request_keys"]}
+        return state, self.gemini.batch_results(job, schemas)
+    
+    def complete_batch(
+        self,
+        job_name: str,
+        results: List[BatchResult],
+        labels: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Uygulanan batch sonuçlarının token kullanımını işle ve işi kapat.
+        
+        Her sonuç deftere ayrı satır (indirimli batch fiyatıyla) olarak
+        yazılır; labels istek key'i -> defter etiketleri (örn. scene_number).
+        """
+        record, usage = self._write_batch_ledger(job_name, results, labels)
+        self.record_usage(usage, ledger=False)
+        
+        self._repo.update_batch_job(job_name, record["state"], applied=True)
+    
+    async def complete_batch_async(
+        self,
+        job_name: str,
+        results: List[BatchResult],
+        labels: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> None:
+        """Bkz. complete_batch; veritabanı işleri event loop dışında yapılır."""
+        record, usage = await asyncio.to_thread(self._write_batch_ledger, job_name, results, labels)
+        await self.record_usage_async(usage, ledger=False)
+        
+        await asyncio.to_thread(self._repo.update_batch_job, job_name, record["state"], applied=True)
+    
+    def _write_batch_ledger(
+        self,
+        job_name: str,
+        results: List[BatchResult],
+        labels: Optional[Dict[str, Dict[str, Any]]]
+    ) -> tuple[Dict[str, Any], TokenUsage]:
+        """Batch sonuçlarını deftere yaz; (iş kaydı, toplam kullanım) döndür"""
+        record = self._repo.get_batch_job(job_name)
+        module = ModuleType(record["module"])
+        step = f"batch_{record['kind']}"
+        
+        usage = TokenUsage()
+        for result in results:
+            usage.prompt_tokens += result.usage.prompt_tokens
+            usage.cached_tokens += result.usage.cached_tokens
+            usage.output_tokens += result.usage.output_tokens
+            usage.thinking_tokens += result.usage.thinking_tokens
+            usage.total_tokens += result.usage.total_tokens
+            self._append_ledger(
+                result.usage, module, step,
+                model=record["model"],
+                batch=True,
+                labels=(labels or {}).get(result.key)
+            )
+        return record, usage
+    
+    def batch_jobs(self, kind: Optional[str] = None, pending_only: bool = False) -> List[Dict[str, Any]]:
+        """Projenin batch işleri (yeniden eskiye)"""
+        return self._repo.list_batch_jobs(self.project_id, kind, pending_only)
+    
+    # ==================== CHAT SIKIŞTIRMA ====================
+    
+    def _compact_chat(self, module: ModuleType, chat_id: str) -> None:
+        """
+        Chat geçmişi eşiği aştıysa eski sahne turlarını özetle.
+        
+        Sahne yazımında her çağrı tüm geçmişi prompt olarak öder; geçmiş
+        sahne sayısıyla doğrusal büyüdüğü için toplam maliyet karesel olur.
+        Eşik aşılınca son COMPACTION_KEEP_RECENT sahne dışındaki sahne
+        turları, sahne başına bir satırlık tek bir özet turuyla değiştirilir
+        (özet her sıkıştırmada genişler). Özet yerel olarak sahne JSON'undan
+        çıkarılır, ek API çağrısı yapılmaz. Kalıcı geçmiş de aynı şekilde
+        yeniden yazılır.
+        """
+        threshold = self.project.config.chat_compaction_threshold_tokens
+        chat_data = self.gemini._chats.get(chat_id)
+        if not threshold or not chat_data:
+            return
+        
+        model = chat_data["model"]
+        history, kinds = chat_data["history"], chat_data["kinds"]
+        tokens = [self.gemini.estimate_content_tokens(c, model) for c in history]
+        if sum(tokens) < threshold:
+            return
+        
+        # Geçmiş (kullanıcı, model) çiftlerinden oluşur; tür model turunda
+        pairs = range(0, len(history) - 1, 2)
+        scene_pairs = [i for i in pairs if kinds[i + 1] in self.COMPACTABLE_KINDS]
+        compacted = set(scene_pairs[:max(len(scene_pairs) - self.COMPACTION_KEEP_RECENT, 0)])
+        if not compacted:
+            return
+        
+        # Önceki özet varsa satırlarına yenilerini ekle
+        previous = next((i for i in pairs if kinds[i + 1] == self.SUMMARY_KIND), None)
+        lines = []
+        if previous is not None:
+            lines = history[previous + 1].parts[0].text.split("\n")[1:]
+            compacted.add(previous)
+        lines += [
+            self._summarize_turn(history[i + 1])
+            for i in sorted(compacted) if i != previous
+        ]
+        summary = [
+            self.gemini._user_content(self.SUMMARY_PROMPT),
+            types.Content(
+                role="model",
+                parts=[types.Part(text="\n".join([self.SUMMARY_HEADER] + lines))]
             )
+        ]
+        
+        # Özet, çıkarılan ilk turun yerine geçer (kronoloji korunur)
+        insert_at = min(compacted)
+        new_history: List[types.Content] = []
+        new_kinds: List[Optional[str]] = []
+        for i in pairs:
+            if i == insert_at:
+                new_history.extend(summary)
+                new_kinds.extend([self.SUMMARY_KIND] * 2)
+            if i not in compacted:
+                new_history.extend(history[i:i + 2])
+                new_kinds.extend(kinds[i:i + 2])
+        
+        turns = self._serialize_turns(new_history, new_kinds, model)
+        saved = sum(tokens) - sum(t["token_count"] for t in turns)
+        
+        self.gemini.replace_chat_history(chat_id, new_history, new_kinds)
+        self._repo.replace_chat_turns(self.project_id, chat_id, module.value, turns)
+        self._chat_history[module.value] = {
+            "turns": len(turns),
+            "tokens": sum(t["token_count"] for t in turns)
+        }
+        self._track_chat_history(module.value)
+        
+        stats = self._compaction.setdefault(module.value, {
+            "compactions": 0,
+            "compacted_turns": 0,
+            "prompt_tokens_saved_per_call": 0,
+            "prompt_tokens_saved": 0
+        })
+        stats["compactions"] += 1
+        stats["compacted_turns"] += len(compacted) - (previous is not None)
+        stats["prompt_tokens_saved_per_call"] += saved
+        
+        logger.info(
+            f"Chat geçmişi sıkıştırıldı: {chat_id} - "
+            f"{len(compacted) - (previous is not None)} sahne özetlendi, "
+            f"çağrı başına ~{saved} token tasarruf"
+        )
+    
+    def _summarize_turn(self, content: types.Content) -> str:
+        """Sahne turunun tek satırlık özeti (başlık, ilk aksiyon satırı, konuşanlar)"""
+        text = "".join(part.text for part in content.parts or [] if part.text)
+        try:
+            scene = SceneResponse.model_validate_json(text).scene
+        except Exception:
+            return f"- {text[:self.SUMMARY_ACTION_CHARS]}"
+        return f"- {scene.summary(self.SUMMARY_ACTION_CHARS)}"
+    
+    def _count_compaction_savings(self, module: ModuleType) -> None:
+        """Chat çağrısının sıkıştırma sayesinde ödemediği prompt token'ı say"""
+        stats = self._compaction.get(module.value)
+        if stats:
+            stats["prompt_tokens_saved"] += stats["prompt_tokens_saved_per_call"]
+    
+    def compaction_stats(self, module: ModuleType) -> Optional[Dict[str, int]]:
+        """Modül chat'inin sıkıştırma istatistikleri (sıkıştırma olmadıysa None)"""
+        return self._compaction.get(module.value)
+    
+    def _track_chat_history(self, module_name: str) -> None:
+        """Chat geçmişi büyüklüğünü context dağılımına işle"""
+        stats = self._chat_history[module_name]
+        name = f"chat_history_{module_name}"
+        self.context.remove_component(name)
+        self.context.add_component(
+            name,
+            f"[Chat geçmişi: {module_name}, {stats['turns']} tur]",
+            token_count=stats["tokens"]
+        )
+    
+    def record_usage(
+        self,
+        usage: TokenUsage,
+        module: Optional[ModuleType] = None,
+        step: Optional[str] = None,
+        labels: Optional[Dict[str, Any]] = None,
+        ledger: bool = True
+    ) -> None:
+        """
+        Token kullanımını context'e ve projeye işle, deftere yaz, durumu kaydet.
         
-        # Token kullanımı kaydet
+        Args:
+            usage: Çağrının token kullanımı
+            module: Çağrıyı yapan modül (None ise etiketlerden, yoksa senaryo)
+            step: Adım (call_context'te step yoksa kullanılır)
+            labels: Ek defter etiketleri (call_context dışında çalışan
+                generator'lar için; aktif call_context'in üzerine yazılır)
+            ledger: Deftere yazılsın mı (satırları ayrıca yazan çağıranlar için)
+        """
         self.context.record_usage(usage)
         self.project.add_token_usage(usage)
+        if ledger:
+            self._append_ledger(usage, module, step, labels=labels)
         
         self._save_state()
-        return result
+    
+    async def record_usage_async(
+        self,
+        usage: TokenUsage,
+        module: Optional[ModuleType] = None,
+        step: Optional[str] = None,
+        labels: Optional[Dict[str, Any]] = None,
+        ledger: bool = True
+    ) -> None:
+        """Token kullanımını işle (async). Bkz. record_usage, _save_state_async."""
+        self.context.record_usage(usage)
+        self.project.add_token_usage(usage)
+        if ledger:
+            # call_context to_thread ile worker'a kopyalanır
+            await asyncio.to_thread(self._append_ledger, usage, module, step, labels=labels)
+        
+        await self._save_state_async()
+    
+    def _append_ledger(
+        self,
+        usage: TokenUsage,
+        module: Optional[ModuleType],
+        step: Optional[str],
+        model: Optional[str] = None,
+        batch: bool = False,
+        labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Çağrıyı kullanım defterine yaz (yanıt cache isabetleri token harcamaz, yazılmaz)"""
+        if not usage.total_tokens and not usage.prompt_tokens:
+            return
+        
+        labels = {**current_call_context(), **(labels or {})}
+        if module is None:
+            module = ModuleType(labels.get("module", ModuleType.SENARYO.value))
+        model = model or self._get_model_for_module(module)
+        
+        try:
+            self._repo.append_usage(
+                self.project_id,
+                model,
+                usage,
+                self._costs.cost(model, usage, batch),
+                module=module.value,
+                step=labels.get("step") or step,
+                scene_number=labels.get("scene_number"),
+                batch=batch
+            )
+        except Exception as e:
+            # Defter kaydı üretimi asla durdurmamalı
+            logger.warning(f"Kullanım defterine yazılamadı: {e}")
+    
+    def usage_summary(self, group_by: str = "step") -> List[Dict[str, Any]]:
+        """Projenin defterdeki kullanımı ve maliyeti (bkz. ProjectRepository.usage_summary)"""
+        return self._repo.usage_summary(group_by, project_id=self.project_id)
     
     # ==================== DURUM YÖNETİMİ ====================
     
@@ -373,6 +1141,16 @@ class ProjectSession:
         self.project.update_module_progress(module, progress, current_step)
         self._save_state()
     
+    async def update_progress_async(
+        self,
+        module: ModuleType,
+        progress: float,
+        current_step: Optional[str] = None
+    ) -> None:
+        """Modül ilerlemesini güncelle (async). Bkz. _save_state_async."""
+        self.project.update_module_progress(module, progress, current_step)
+        await self._save_state_async()
+    
     def get_status(self) -> Dict[str, Any]:
         """Proje durumu al"""
         return {
@@ -384,10 +1162,20 @@ class ProjectSession:
                 "updated_at": self.project.updated_at.isoformat()
             },
             "context": self.context.check_status(),
+            "source": self.sources.status(),
+            "chat_history": {
+                module_name: {
+                    **stats,
+                    "replay_token_budget": self.project.config.chat_replay_token_budget,
+                    "compaction": self._compaction.get(module_name)
+                }
+                for module_name, stats in self._chat_history.items()
+            },
             "token_usage": {
                 "prompt": self.project.total_token_usage.prompt_tokens,
                 "cached": self.project.total_token_usage.cached_tokens,
                 "output": self.project.total_token_usage.output_tokens,
+                "thinking": self.project.total_token_usage.thinking_tokens,
                 "total": self.project.total_token_usage.total_tokens
             },
             "modules": {
@@ -404,44 +1192,206 @@ class ProjectSession:
     # ==================== KAYDETME / YÜKLEME ====================
     
     def _save_state(self) -> None:
-        """Proje durumunu SQLite veritabanına kaydet"""
+        """
+        Proje durumunu SQLite veritabanına kaydet.
+        
+        Write-behind açıksa (config.state_flush_window_ms) sadece kirli
+        işaretlenir; pencere içindeki değişiklikler arka planda tek
+        kaydetmede yazılır (bkz. flush, checkpoint). Event loop'tan
+        çağrılırsa yazma beklenmez (bkz. _defer_write).
+        """
+        if self.write_behind:
+            self._mark_dirty()
+            return
+        if self._on_event_loop():
+            self._defer_write()
+            return
+        self._write_state()
+    
+    async def _save_state_async(self, screenplay: bool = False) -> None:
+        """
+        Proje durumunu kaydet (async). Bkz. _save_state.
+        
+        Kopya event loop'ta alınır, yazma (yazıcı thread'in commit'ini
+        beklemek dahil) worker thread'de yapılır. Eşzamanlı kaydetmelerde
+        flush her zaman en son kopyayı yazar; eski kopya yenisini ezmez.
+        
+        Args:
+            screenplay: Senaryo da kaydedilsin mi
+        """
+        if self.write_behind:
+            self._mark_dirty(screenplay)
+            return
+        self._stage(screenplay)
+        await asyncio.to_thread(self.flush)
+    
+    def _state_unit(self, copy: bool = False) -> ProjectUnitOfWork:
+        """
+        Kaydedilecek proje durumu.
+        
+        Args:
+            copy: Model'ler kopyalansın mı (başka thread'de yazılacaksa;
+                canlı nesneler bu sırada değişebilir)
+        """
+        return ProjectUnitOfWork(
+            self.project_id,
+            project=self.project.model_copy(deep=True) if copy else self.project,
+            context_components=self.context.to_dict().get("components", {}),
+            context_usage=self.context.total_usage.model_copy() if copy else self.context.total_usage,
+            active_chats=dict(self._active_chats) if copy else self._active_chats
+        )
+    
+    def _write_state(self, unit: Optional[ProjectUnitOfWork] = None) -> None:
+        """Proje, context ve aktif chat'leri tek transaction'da yaz (sadece değişenler)"""
         try:
-            # Proje güncelle
-            self._repo.update_project(self.project)
+            statements = self._repo.save_state(unit or self._state_unit())
             
-            # Context state kaydet
-            self._repo.save_context_state(
-                self.project_id,
-                self.context.to_dict().get("components", {}),
-                self.context.total_usage
-            )
-            
-            # Active chats kaydet
-            self._repo.save_active_chats(self.project_id, self._active_chats)
-            
-            logger.debug(f"Proje durumu kaydedildi: {self.project_id}")
+            logger.debug(f"Proje durumu kaydedildi: {self.project_id} ({statements} ifade)")
         except Exception as e:
             logger.error(f"Proje kaydetme hatası: {e}")
             raise
     
     def save_screenplay(self) -> Path:
-        """Senaryoyu SQLite veritabanına kaydet"""
+        """Senaryoyu SQLite veritabanına (ve export için JSON dosyasına) kaydet"""
+        output_file = self._screenplay_output()
+        if self.write_behind:
+            self._mark_dirty(screenplay=True)
+            return output_file
+        if self._on_event_loop():
+            self._defer_write(screenplay=True)
+            return output_file
+        
+        self._write_screenplay(output_file)
+        self._write_state()
+        return output_file
+    
+    async def save_screenplay_async(self) -> Path:
+        """Senaryoyu kaydet (async). Bkz. save_screenplay, _save_state_async."""
+        output_file = self._screenplay_output()
+        await self._save_state_async(screenplay=True)
+        return output_file
+    
+    def _screenplay_output(self) -> Path:
+        """Export JSON dosyasının yolu (proje çıktılarına eklenir)"""
         if not self.screenplay:
             raise ValueError("Kaydedilecek senaryo yok")
         
-        # Veritabanına kaydet
-        self._repo.save_screenplay(self.project_id, self.screenplay)
+        output_file = self.project_dir / "screenplay.json"
+        if str(output_file) not in self.project.output_files:
+            self.project.output_files.append(str(output_file))
+        return output_file
+    
+    def _write_screenplay(self, output_file: Path, snapshot: Optional[Screenplay] = None) -> None:
+        """
+        Senaryoyu yaz.
+        
+        Args:
+            output_file: Export JSON dosyası
+            snapshot: Bekleyen kopya (bkz. _stage); None ise canlı senaryo
+        """
+        screenplay = snapshot or self.screenplay
+        
+        # Veritabanına kaydet (yüklenmemiş bölümler atlanır)
+        self._repo.save_screenplay(self.project_id, screenplay)
         
         # Ayrıca JSON dosyası olarak da kaydet (export için)
-        output_file = self.project_dir / "screenplay.json"
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(self.screenplay.model_dump_json(indent=2))
-        
-        self.project.output_files.append(str(output_file))
-        self._save_state()
+            f.write(screenplay.model_dump_json(indent=2))
         
         logger.info(f"Screenplay kaydedildi: {self.project_id}")
-        return output_file
+    
+    # ==================== WRITE-BEHIND ====================
+    
+    @property
+    def write_behind(self) -> bool:
+        """Durum değişiklikleri ertelenerek mi kaydediliyor"""
+        return self.project.config.state_flush_window_ms > 0
+    
+    def _mark_dirty(self, screenplay: bool = False) -> None:
+        """Değişikliği işaretle ve arka plan kaydetmesini planla"""
+        self._stage(screenplay)
+        self._flusher.schedule(self, self.project.config.state_flush_window_ms / 1000)
+    
+    @staticmethod
+    def _on_event_loop() -> bool:
+        """Çağıran thread'de çalışan bir event loop var mı"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+    
+    def _defer_write(self, screenplay: bool = False) -> None:
+        """
+        Async akıştan çağrılan senkron kaydetme (ör. update_progress).
+        
+        Yazıcı thread'in commit'i event loop'ta beklenmez: kopya burada
+        alınır ve arka planda hemen (pencere beklemeden) yazılır. Sonucu
+        beklenmesi gereken kaydetmeler async varyantları kullanır (bkz.
+        _save_state_async, save_screenplay_async).
+        """
+        self._stage(screenplay)
+        self._flusher.schedule(self, 0)
+    
+    def _stage(self, screenplay: bool = False) -> None:
+        """
+        Durumun kopyasını bekleyen kopya yap (flush yazar).
+        
+        Kopya burada, değişikliği yapan thread'de alınır; yazan thread
+        canlı nesneleri (event loop'ta değişmeye devam eden proje,
+        context, senaryo) hiç okumaz, sadece en son kopyayı yazar.
+        Senaryodan sadece önceki kopyadan beri değişen sahne ve
+        outline'lar kopyalanır, yüklenmemiş bölümler yüklenmez (bkz.
+        LazyScreenplay.snapshot); export JSON'u yazan thread'de üretilir.
+        """
+        state = self._state_unit(copy=True)
+        screenplay_copy = None
+        if screenplay:
+            screenplay_copy = LazyScreenplay.snapshot(self.screenplay, self._staged_screenplay)
+            self._staged_screenplay = screenplay_copy
+        with self._dirty_lock:
+            self._pending_state = state
+            if screenplay_copy is not None:
+                self._pending_screenplay = screenplay_copy
+    
+    def flush(self) -> bool:
+        """
+        Bekleyen kopyaları (write-behind veya async kaydetme) şimdi yaz.
+        
+        Yazma başarısız olursa (bu arada daha yenisi gelmediyse) kopyalar
+        bekler ve tekrar denenir.
+        
+        Returns:
+            Yazılacak bir şey var mıydı
+        """
+        with self._flush_lock:
+            with self._dirty_lock:
+                state, screenplay = self._pending_state, self._pending_screenplay
+                self._pending_state = self._pending_screenplay = None
+            if state is None and screenplay is None:
+                return False
+            try:
+                if screenplay is not None:
+                    self._write_screenplay(self.project_dir / "screenplay.json", screenplay)
+                if state is not None:
+                    self._write_state(state)
+            except Exception:
+                with self._dirty_lock:
+                    self._pending_state = self._pending_state or state
+                    self._pending_screenplay = self._pending_screenplay or screenplay
+                raise
+            return True
+    
+    def checkpoint(self) -> None:
+        """Açık kontrol noktası: bekleyen değişiklikleri hemen kaydet (senkron modda etkisiz)"""
+        self._flusher.flush(self.project_id)
+        self.flush()
+    
+    def discard_pending(self) -> None:
+        """Bekleyen değişiklikleri yazmadan bırak (proje silinirken)"""
+        self._flusher.discard(self.project_id)
+        with self._dirty_lock:
+            self._pending_state = self._pending_screenplay = None
     
     @classmethod
     def load(cls, project_id: str, api_key: Optional[str] = None) -> "ProjectSession":
@@ -471,16 +1421,10 @@ class ProjectSession:
             repository=repo
         )
         
-        # Cache bilgilerini GeminiClient'a aktar (server restart sonrası recovery)
-        for cache_info in project.active_caches:
-            # Cache ID'yi project_id + module şeklinde oluştur
-            cache_id = cache_info.cache_name.split("/")[-1] if "/" in cache_info.cache_name else cache_info.cache_name
-            # Senaryo modülü için cache_id oluştur
-            for module in ["senaryo", "asset", "shotlist", "storyboard"]:
-                if module in cache_id or cache_id.endswith(module):
-                    full_cache_id = f"{project_id}_{module}"
-                    session.gemini._caches[full_cache_id] = cache_info
-                    break
+        # Cache eşlemelerini GeminiClient'a aktar (server restart sonrası recovery)
+        for cache_id, cache_info in repo.get_module_caches(project_id).items():
+            session.gemini._caches[cache_id] = cache_info
+            session._track_shared_cache(cache_info)
         
         logger.info(f"Proje yüklendi: {project_id}")
         return session
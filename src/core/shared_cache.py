@@ -0,0 +1,170 @@
+"""
+Shared Cache Registry.
+Aynı system prompt'u kullanan projeler için tek, paylaşılan context cache.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+from datetime import datetime, timedelta
+
+from .installation import get_installation
+from ..db import ProjectRepository
+from ..models.project import CacheInfo
+
+if TYPE_CHECKING:
+    from .gemini_client import GeminiClient
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCacheRegistry:
+    """
+    Paylaşılan system prompt cache'leri.
+
+    Kaynak materyali olmayan projelerin modül cache'i sadece system
+    prompt'tan oluşur; bu içerik tüm projelerde aynıdır. (model, prompt
+    hash'i) başına tek bir Gemini cache'i oluşturulur ve projelerin
+    module_caches eşlemeleri aynı cache adını gösterir. Referans sayısı bu
+    eşlemelerin sayısıdır: TTL, referans veren projelerden biri aktifken
+    CacheLifecycleManager tarafından uzatılır; referansı kalmayan cache'in
+    süresi dolar veya proje silinirken silinir.
+
+    Kaynak materyali olan projeler system prompt + kaynaktan oluşan kendi
+    cache'lerini kullanır (Gemini'de cache'ler üst üste eklenemez).
+    """
+
+    # Kalan süresi bundan az olan paylaşılan cache yeniden kullanılmaz
+    MIN_REMAINING = timedelta(minutes=5)
+
+    DISPLAY_PREFIX = "shared_"
+
+    def __init__(self, repository: Optional[ProjectRepository] = None):
+        """
+        SharedCacheRegistry başlat.
+
+        Args:
+            repository: Proje repository (None ise yeni instance)
+        """
+        self._repo = repository or ProjectRepository()
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def key(model: str, system_prompt: str) -> tuple[str, str]:
+        """(cache anahtarı, prompt hash'i)"""
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+        return f"{model}:{prompt_hash}", prompt_hash
+
+    # ==================== EDİNME ====================
+
+    def acquire(
+        self,
+        gemini: "GeminiClient",
+        cache_id: str,
+        model: str,
+        system_instruction: str,
+        ttl_seconds: int
+    ) -> CacheInfo:
+        """
+        Paylaşılan cache'i al (yoksa veya süresi bitmek üzereyse oluştur)
+        ve projenin registry'sine cache_id ile bağla.
+
+        Returns:
+            CacheInfo (referans kaydı çağıran tarafından module_caches'e yazılır)
+        """
+        cache_key, prompt_hash = self.key(model, system_instruction)
+        with self._lock:
+            cache_info = self._reusable(cache_key)
+            if cache_info is None:
+                cache_info = gemini.create_cache(
+                    cache_id=cache_id,
+                    model=model,
+                    system_instruction=system_instruction,
+                    ttl_seconds=ttl_seconds,
+                    display_name=self.display_name(prompt_hash)
+                )
+                self._repo.save_shared_cache(cache_key, prompt_hash, cache_info, ttl_seconds)
+                logger.info(f"Paylaşılan cache oluşturuldu: {cache_info.cache_name} ({model})")
+
+        gemini._caches[cache_id] = cache_info
+        return cache_info
+
+    async def acquire_async(
+        self,
+        gemini: "GeminiClient",
+        cache_id: str,
+        model: str,
+        system_instruction: str,
+        ttl_seconds: int
+    ) -> CacheInfo:
+        """Paylaşılan cache'i al (async). Bkz. acquire."""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+
+        cache_key, prompt_hash = self.key(model, system_instruction)
+        async with self._async_lock:
+            cache_info = self._reusable(cache_key)
+            if cache_info is None:
+                cache_info = await gemini.aio.create_cache(
+                    cache_id=cache_id,
+                    model=model,
+                    system_instruction=system_instruction,
+                    ttl_seconds=ttl_seconds,
+                    display_name=self.display_name(prompt_hash)
+                )
+                await asyncio.to_thread(
+                    self._repo.save_shared_cache, cache_key, prompt_hash, cache_info, ttl_seconds
+                )
+                logger.info(f"Paylaşılan cache oluşturuldu: {cache_info.cache_name} ({model})")
+
+        gemini._caches[cache_id] = cache_info
+        return cache_info
+
+    def _reusable(self, cache_key: str) -> Optional[CacheInfo]:
+        cache_info = self._repo.get_shared_cache(cache_key)
+        if cache_info and cache_info.expires_at - datetime.now() > self.MIN_REMAINING:
+            return cache_info
+        return None
+
+    @classmethod
+    def display_name(cls, prompt_hash: str) -> str:
+        return get_installation().display_name(f"{cls.DISPLAY_PREFIX}{prompt_hash[:16]}")
+
+    # ==================== REFERANSLAR ====================
+
+    def is_shared(self, cache_name: str) -> bool:
+        """Cache adı paylaşılan bir cache'e mi ait"""
+        return any(row["cache_name"] == cache_name for row in self._repo.list_shared_caches())
+
+    def refs(self, cache_name: str) -> int:
+        """Cache'i kullanan proje modülü sayısı"""
+        return self._repo.count_cache_refs(cache_name)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Paylaşılan cache'ler: referans sayısı ve tekrar saklanmayan token"""
+        return [
+            {
+                "model": row["model"],
+                "cache_name": row["cache_name"],
+                "token_count": row["token_count"],
+                "refs": row["refs"],
+                "cached_tokens_saved": row["token_count"] * max(row["refs"] - 1, 0),
+                "expires_at": row["expires_at"]
+            }
+            for row in self._repo.list_shared_caches()
+        ]
+
+
+# Global instance
+_shared_caches: Optional[SharedCacheRegistry] = None
+
+
+def get_shared_caches() -> SharedCacheRegistry:
+    """Global paylaşılan cache registry'sini al"""
+    global _shared_caches
+    if _shared_caches is None:
+        _shared_caches = SharedCacheRegistry()
+    return _shared_caches
@@ -0,0 +1,251 @@
+"""
+Source Files.
+Kaynak materyalin Files API handle'larını kalıcı olarak takip eder.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, TYPE_CHECKING
+from datetime import datetime, timedelta, timezone
+
+from .installation import get_installation
+
+if TYPE_CHECKING:
+    from .gemini_client import GeminiClient
+    from ..db import ProjectRepository
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Dosya içeriğinin SHA-256 hash'i (parça parça okunur)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SourceFileManager:
+    """
+    Proje kaynak dosyası handle yöneticisi.
+
+    Files API nesneleri 48 saat sonra silinir; sadece bellekte tutulurlarsa
+    restart sonrası da kaybolur. Handle (proje + içerik hash'i → dosya adı,
+    URI, durum, bitiş zamanı) source_files tablosunda saklanır ve her
+    kullanımda doğrulanır:
+
+    - Bellekte yoksa (restart) files.get ile geri alınır
+    - Dosya yoksa veya bitişe REUPLOAD_MARGIN'den az kaldıysa yerel
+      kopyadan hemen yeniden yüklenir
+    - Bitişe REFRESH_MARGIN'den az kaldıysa arka planda yeniden yüklenir;
+      bu sırada mevcut handle kullanılmaya devam eder
+    """
+
+    REFRESH_MARGIN = timedelta(hours=6)
+    REUPLOAD_MARGIN = timedelta(hours=1)
+
+    def __init__(
+        self,
+        gemini: "GeminiClient",
+        repository: "ProjectRepository",
+        project_id: str
+    ):
+        """
+        SourceFileManager başlat.
+
+        Args:
+            gemini: Projenin GeminiClient'ı
+            repository: Proje repository (SQLite)
+            project_id: Proje ID
+        """
+        self._gemini = gemini
+        self._repo = repository
+        self.project_id = project_id
+
+        self._record: Optional[Dict[str, Any]] = repository.get_source_file(project_id)
+        self._file: Optional[Any] = None  # Doğrulanmış File objesi
+
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def display_name(self) -> str:
+        return get_installation().display_name(f"source_{self.project_id}")
+
+    @property
+    def has_source(self) -> bool:
+        """Projeye kaynak dosya bağlı mı"""
+        return self._record is not None
+
+    # ==================== KAYIT ====================
+
+    def register(self, file_path: str, uploaded_file: Any, sha256: Optional[str] = None) -> None:
+        """Yüklenen dosyayı projenin güncel kaynağı olarak kaydet"""
+        sha256 = sha256 or file_sha256(file_path)
+        expires = getattr(uploaded_file, "expiration_time", None)
+
+        with self._lock:
+            self._file = uploaded_file
+            self._record = {
+                "sha256": sha256,
+                "local_path": str(file_path),
+                "file_name": uploaded_file.name,
+                "uri": uploaded_file.uri,
+                "mime_type": getattr(uploaded_file, "mime_type", None),
+                "state": uploaded_file.state.name,
+                "expires_at": expires.isoformat() if expires else None,
+                "uploaded_at": datetime.now().isoformat()
+            }
+            self._repo.save_source_file(self.project_id, self._record)
+
+    def _adopt(self, uploaded_file: Any) -> None:
+        """files.get ile geri alınan handle'ı kullanıma al ve kaydı güncelle"""
+        with self._lock:
+            self._file = uploaded_file
+            self._record["state"] = uploaded_file.state.name
+            expires = getattr(uploaded_file, "expiration_time", None)
+            self._record["expires_at"] = expires.isoformat() if expires else None
+            self._repo.save_source_file(self.project_id, self._record)
+
+        # Diğer projeler de aynı içeriği tekrar yüklemeden kullanabilsin
+        if uploaded_file.state.name == "ACTIVE":
+            self._gemini._pool.remember_file(self._record["sha256"], uploaded_file)
+
+    # ==================== DOĞRULAMA ====================
+
+    def get(self) -> Optional[Any]:
+        """
+        Cache/chat'e eklenecek geçerli File objesi.
+
+        Returns:
+            File objesi veya None (projeye kaynak yüklenmemişse ya da yerel
+            kopya artık yoksa)
+        """
+        if self._record is None:
+            return None
+
+        current = self._file
+        if current is None:
+            current = self._gemini.get_file(self._record["file_name"])
+            if current is not None:
+                self._adopt(current)
+
+        status = self._status(current)
+        if status == "expired":
+            return self._reupload()
+        if status == "expiring":
+            self._refresh_in_background()
+        return current
+
+    async def get_async(self) -> Optional[Any]:
+        """Geçerli File objesi (async). Bkz. get."""
+        if self._record is None:
+            return None
+
+        current = self._file
+        if current is None:
+            current = await self._gemini.aio.get_file(self._record["file_name"])
+            if current is not None:
+                await asyncio.to_thread(self._adopt, current)
+
+        status = self._status(current)
+        if status == "expired":
+            return await self._reupload_async()
+        if status == "expiring":
+            self._refresh_in_background()
+        return current
+
+    def _status(self, uploaded_file: Optional[Any]) -> str:
+        """Handle durumu: "expired" (kullanılamaz), "expiring" (yenilenmeli) veya "valid" """
+        if uploaded_file is None or uploaded_file.state.name != "ACTIVE":
+            return "expired"
+
+        expires = getattr(uploaded_file, "expiration_time", None)
+        if not expires:
+            return "valid"
+
+        remaining = expires - datetime.now(timezone.utc)
+        if remaining < self.REUPLOAD_MARGIN:
+            return "expired"
+        if remaining < self.REFRESH_MARGIN:
+            return "expiring"
+        return "valid"
+
+    # ==================== YENİDEN YÜKLEME ====================
+
+    def _local_path(self) -> Optional[str]:
+        """Yeniden yükleme için yerel kopya (yoksa None)"""
+        path = self._record["local_path"]
+        if Path(path).exists():
+            return path
+
+        logger.warning(f"Kaynak dosyanın yerel kopyası yok, yeniden yüklenemiyor: {path}")
+        with self._lock:
+            self._file = None
+        return None
+
+    def _reupload(self) -> Optional[Any]:
+        """Yerel kopyadan yeniden yükle (havuzdaki eski handle kullanılmaz)"""
+        local_path = self._local_path()
+        if local_path is None:
+            return None
+
+        sha256 = self._record["sha256"]
+        self._gemini._pool.forget_file(sha256)
+        uploaded_file = self._gemini.upload_file(local_path, self.display_name, sha256=sha256)
+        self.register(local_path, uploaded_file, sha256)
+
+        logger.info(f"Kaynak dosya yeniden yüklendi: {uploaded_file.name} ({self.project_id})")
+        return uploaded_file
+
+    async def _reupload_async(self) -> Optional[Any]:
+        """Yerel kopyadan yeniden yükle (async). Bkz. _reupload."""
+        local_path = self._local_path()
+        if local_path is None:
+            return None
+
+        sha256 = self._record["sha256"]
+        self._gemini._pool.forget_file(sha256)
+        uploaded_file = await self._gemini.aio.upload_file(local_path, self.display_name, sha256=sha256)
+        await asyncio.to_thread(self.register, local_path, uploaded_file, sha256)
+
+        logger.info(f"Kaynak dosya yeniden yüklendi: {uploaded_file.name} ({self.project_id})")
+        return uploaded_file
+
+    def _refresh_in_background(self) -> None:
+        """Süresi yaklaşan handle'ı ayrı thread'de yenile (tek seferde bir yenileme)"""
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh,
+                name=f"source-refresh-{self.project_id[:8]}",
+                daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _refresh(self) -> None:
+        try:
+            self._reupload()
+        except Exception as e:
+            logger.warning(f"Kaynak dosya arka planda yenilenemedi ({self.project_id}): {e}")
+
+    # ==================== DURUM ====================
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """Kayıtlı handle bilgisi (API/metrik için)"""
+        if self._record is None:
+            return None
+        return {
+            "sha256": self._record["sha256"],
+            "file_name": self._record["file_name"],
+            "uri": self._record["uri"],
+            "state": self._record["state"],
+            "expires_at": self._record["expires_at"],
+            "local_copy": Path(self._record["local_path"]).exists(),
+            "refreshing": bool(self._refresh_thread and self._refresh_thread.is_alive())
+        }
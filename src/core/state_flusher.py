@@ -0,0 +1,137 @@
+"""
+State Flusher.
+Write-behind modundaki oturumların kirli durumunu arka planda toplu kaydeder.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .session import ProjectSession
+
+logger = logging.getLogger(__name__)
+
+
+class StateFlusher:
+    """
+    Write-behind kaydedici.
+
+    Oturum bir değişiklikte kendini kirli işaretleyip schedule() çağırır;
+    pencere boyunca gelen diğer değişiklikler aynı kaydetmede toplanır.
+    Pencere dolunca arka plan thread'i session.flush() çağırır. Başarısız
+    kaydetme RETRY_SECONDS sonra yeniden denenir. stop() (uygulama kapanışı
+    ve interpreter çıkışı) bekleyen tüm oturumları kaydeder; SQLite her
+    zaman asıl kaynaktır.
+    """
+
+    RETRY_SECONDS = 1.0
+
+    def __init__(self):
+        # project_id -> (son tarih, oturum)
+        self._pending: Dict[str, Tuple[float, "ProjectSession"]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._atexit_registered = False
+        self._stats = {"scheduled": 0, "coalesced": 0, "flushes": 0, "errors": 0}
+
+    def schedule(self, session: "ProjectSession", window_seconds: float) -> None:
+        """Oturumu pencere sonunda kaydedilmek üzere sıraya al (zaten sıradaysa birleştir)"""
+        with self._cond:
+            if session.project_id in self._pending:
+                self._stats["coalesced"] += 1
+                return
+            self._stats["scheduled"] += 1
+            self._pending[session.project_id] = (time.monotonic() + window_seconds, session)
+            self._ensure_thread()
+            self._cond.notify()
+
+    def discard(self, project_id: str) -> None:
+        """Bekleyen kaydetmeyi yazmadan bırak (silinen projeler için)"""
+        with self._cond:
+            self._pending.pop(project_id, None)
+
+    def flush(self, project_id: str) -> None:
+        """Oturumun bekleyen kaydetmesini hemen, çağıran thread'de yap"""
+        with self._cond:
+            entry = self._pending.pop(project_id, None)
+        if entry:
+            self._flush(entry[1], retry=False)
+
+    def _ensure_thread(self) -> None:
+        """Arka plan thread'ini başlat (lock altında)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="state-flusher", daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    now = time.monotonic()
+                    due = [pid for pid, (deadline, _) in self._pending.items() if deadline <= now]
+                    if due:
+                        break
+                    timeout = min((d for d, _ in self._pending.values()), default=None)
+                    self._cond.wait(None if timeout is None else timeout - now)
+                if self._stopping:
+                    return
+                sessions = [self._pending.pop(pid)[1] for pid in due]
+            for session in sessions:
+                self._flush(session, retry=True)
+
+    def _flush(self, session: "ProjectSession", retry: bool) -> None:
+        try:
+            if session.flush():
+                self._stats["flushes"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Write-behind kaydetme hatası ({session.project_id}): {e}")
+            if retry:
+                self.schedule(session, self.RETRY_SECONDS)
+            else:
+                raise
+
+    def stop(self) -> None:
+        """Thread'i durdur ve bekleyen her şeyi kaydet"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        with self._cond:
+            entries = list(self._pending.values())
+            self._pending.clear()
+        for _, session in entries:
+            try:
+                self._flush(session, retry=False)
+            except Exception:
+                pass  # _flush zaten logladı; kapanışta diğer oturumlar da kaydedilmeli
+
+    def stats(self) -> Dict[str, Any]:
+        """Kaydetme metrikleri"""
+        with self._cond:
+            pending = len(self._pending)
+        return {**self._stats, "pending": pending}
+
+
+# Global instance
+_state_flusher: Optional[StateFlusher] = None
+
+
+def get_state_flusher() -> StateFlusher:
+    """Global write-behind kaydediciyi al"""
+    global _state_flusher
+    if _state_flusher is None:
+        _state_flusher = StateFlusher()
+    return _state_flusher
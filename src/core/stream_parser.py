@@ -0,0 +1,445 @@
+"""
+Stream Parser.
+Akan JSON yanıtlarını parça parça parse eden, alan tamamlandıkça olay üreten parser.
+"""
+
+import re
+import json
+import types
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+
+class StreamParseError(ValueError):
+    """Akış geçerli JSON değil veya beklenen şemadan saptı"""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        super().__init__(f"{message} (karakter {position})" if position is not None else message)
+        self.position = position
+
+
+@dataclass
+class JSONEvent:
+    """
+    Parser olayı.
+
+    kind:
+        start        - Container açıldı (value: "object" / "array")
+        key          - Nesne anahtarı okundu (path: değerin yolu, value: anahtar)
+        string_part  - String değerin bu parçada gelen kısmı
+        value        - Skaler değer tamamlandı
+        end          - Container kapandı (value: dict / list)
+        model        - Container şemadaki modele doğrulandı (ModelStreamParser)
+    """
+    kind: str
+    path: tuple
+    value: Any = None
+
+
+# Parser durumları
+_VALUE = 0            # değer bekleniyor
+_VALUE_OR_END = 1     # "[" sonrası: değer veya "]"
+_KEY_OR_END = 2       # "{" sonrası: anahtar veya "}"
+_KEY = 3              # "," sonrası (nesne): anahtar
+_COLON = 4
+_AFTER_VALUE = 5      # "," veya kapanış
+_STRING = 6
+_NUMBER = 7
+_LITERAL = 8
+_DONE = 9
+
+_STRING_RUN = re.compile(r'[^"\\]+')
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_LITERALS = {"true": True, "false": False, "null": None}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJSONParser:
+    """
+    Artımlı JSON parser.
+
+    Metin parça parça beslenir; her karakter bir kez işlenir (string
+    içerikleri regex ile toplu kopyalanır), bu yüzden toplam maliyet
+    doğrusaldır. Belge beslendikçe kurulur, sonunda json.loads gerekmez.
+    Sözdizimi hatası ilk hatalı karakterde StreamParseError fırlatır.
+    """
+
+    def __init__(self):
+        self._stack: List[Union[dict, list]] = []  # açık container'lar
+        self._path: List[Any] = []                  # her container'daki anahtar / indeks
+        self._state = _VALUE
+        self._root: Any = None
+        self._pos = 0
+
+        # String durumu
+        self._is_key = False
+        self._chars: List[str] = []    # string'in çözülmüş parçaları
+        self._fresh: List[str] = []    # henüz string_part olarak bildirilmeyenler
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+        # Sayı / literal
+        self._token: List[str] = []
+
+        self._events: List[JSONEvent] = []
+
+    @property
+    def done(self) -> bool:
+        """Kök değer tamamlandı mı"""
+        return self._state == _DONE
+
+    @property
+    def value(self) -> Any:
+        """Tamamlanan kök değer (done değilse None)"""
+        return self._root if self.done else None
+
+    # ==================== BESLEME ====================
+
+    def feed(self, text: str) -> List[JSONEvent]:
+        """
+        Yeni metin parçasını işle.
+
+        Returns:
+            Bu parçada oluşan olaylar
+        """
+        i, n = 0, len(text)
+        while i < n:
+            state = self._state
+
+            if state == _STRING:
+                i = self._feed_string(text, i)
+                continue
+
+            char = text[i]
+
+            if state == _NUMBER or state == _LITERAL:
+                if (char in _NUMBER_CHARS) if state == _NUMBER else char.isalpha():
+                    self._token.append(char)
+                    i += 1
+                    self._pos += 1
+                    continue
+                self._finish_token()
+                continue  # karakter yeni durumda tekrar işlenir
+
+            if char in _WHITESPACE:
+                i += 1
+                self._pos += 1
+                continue
+
+            if state == _VALUE or state == _VALUE_OR_END:
+                if char == "]" and state == _VALUE_OR_END:
+                    self._close(list)
+                else:
+                    self._start_value(char)
+            elif state == _KEY_OR_END or state == _KEY:
+                if char == '"':
+                    self._start_string(is_key=True)
+                elif char == "}" and state == _KEY_OR_END:
+                    self._close(dict)
+                else:
+                    self._fail(f"Anahtar bekleniyordu, '{char}' geldi")
+            elif state == _COLON:
+                if char != ":":
+                    self._fail(f"':' bekleniyordu, '{char}' geldi")
+                self._state = _VALUE
+            elif state == _AFTER_VALUE:
+                if char == ",":
+                    self._state = _KEY if isinstance(self._stack[-1], dict) else _VALUE
+                elif char == "}":
+                    self._close(dict)
+                elif char == "]":
+                    self._close(list)
+                else:
+                    self._fail(f"',' veya kapanış bekleniyordu, '{char}' geldi")
+            else:  # _DONE
+                self._fail(f"Kök değerden sonra beklenmeyen karakter '{char}'")
+
+            i += 1
+            self._pos += 1
+
+        # Yarım kalan string değerin yeni kısmı
+        if self._state == _STRING and not self._is_key and self._fresh:
+            self._emit("string_part", tuple(self._path), "".join(self._fresh))
+            self._fresh = []
+
+        events, self._events = self._events, []
+        return events
+
+    def close(self) -> List[JSONEvent]:
+        """
+        Akış bitti: bekleyen sayı/literal'i tamamla ve belgenin bittiğini doğrula.
+
+        Raises:
+            StreamParseError: Belge yarım kaldıysa
+        """
+        if self._state == _NUMBER or self._state == _LITERAL:
+            self._finish_token()
+        if self._state != _DONE:
+            self._fail("JSON yarım kaldı")
+        events, self._events = self._events, []
+        return events
+
+    # ==================== DEĞERLER ====================
+
+    def _start_value(self, char: str) -> None:
+        path = tuple(self._path)
+        if char == "{":
+            self._emit("start", path, "object")
+            self._stack.append({})
+            self._path.append(None)
+            self._state = _KEY_OR_END
+        elif char == "[":
+            self._emit("start", path, "array")
+            self._stack.append([])
+            self._path.append(0)
+            self._state = _VALUE_OR_END
+        elif char == '"':
+            self._start_string(is_key=False)
+        elif char == "-" or char.isdigit():
+            self._token = [char]
+            self._state = _NUMBER
+        elif char in "tfn":
+            self._token = [char]
+            self._state = _LITERAL
+        else:
+            self._fail(f"Değer bekleniyordu, '{char}' geldi")
+
+    def _finish_token(self) -> None:
+        token = "".join(self._token)
+        if self._state == _NUMBER:
+            try:
+                value = json.loads(token)
+            except json.JSONDecodeError:
+                self._fail(f"Geçersiz sayı '{token}'")
+        else:
+            if token not in _LITERALS:
+                self._fail(f"Geçersiz literal '{token}'")
+            value = _LITERALS[token]
+        self._token = []
+        self._emit("value", tuple(self._path), value)
+        self._complete(value)
+
+    def _close(self, kind: type) -> None:
+        container = self._stack[-1] if self._stack else None
+        if not isinstance(container, kind):
+            self._fail("Eşleşmeyen kapanış")
+        self._stack.pop()
+        self._path.pop()
+        self._emit("end", tuple(self._path), container)
+        self._complete(container)
+
+    def _complete(self, value: Any) -> None:
+        """Tamamlanan değeri üst container'a ekle"""
+        if not self._stack:
+            self._root = value
+            self._state = _DONE
+            return
+
+        parent = self._stack[-1]
+        if isinstance(parent, dict):
+            parent[self._path[-1]] = value
+        else:
+            parent.append(value)
+            self._path[-1] = len(parent)
+        self._state = _AFTER_VALUE
+
+    # ==================== STRING ====================
+
+    def _start_string(self, is_key: bool) -> None:
+        self._is_key = is_key
+        self._chars = []
+        self._fresh = []
+        self._state = _STRING
+
+    def _feed_string(self, text: str, i: int) -> int:
+        """String içeriğini işle; işlenen son konumu döndür"""
+        if self._escape is not None:
+            return self._feed_escape(text, i)
+
+        match = _STRING_RUN.match(text, i)
+        if match:
+            self._append(match.group())
+            self._pos += match.end() - i
+            return match.end()
+
+        char = text[i]
+        self._pos += 1
+        if char == "\\":
+            self._escape = ""
+            return i + 1
+
+        # Kapanış tırnağı
+        self._flush_surrogate()
+        value = "".join(self._chars)
+        path = tuple(self._path)
+        if self._is_key:
+            self._path[-1] = value
+            self._emit("key", tuple(self._path), value)
+            self._state = _COLON
+        else:
+            if self._fresh:
+                self._emit("string_part", path, "".join(self._fresh))
+            self._emit("value", path, value)
+            self._complete(value)
+        self._chars = []
+        self._fresh = []
+        return i + 1
+
+    def _feed_escape(self, text: str, i: int) -> int:
+        char = text[i]
+        self._pos += 1
+
+        if self._escape == "":
+            if char == "u":
+                self._escape = "u"
+            elif char in _ESCAPES:
+                self._escape = None
+                self._append(_ESCAPES[char])
+            else:
+                self._fail(f"Geçersiz kaçış dizisi '\\{char}'")
+            return i + 1
+
+        # \uXXXX
+        if char not in "0123456789abcdefABCDEF":
+            self._fail(f"Geçersiz unicode kaçışı '{char}'")
+        self._escape += char
+        if len(self._escape) == 5:
+            code = int(self._escape[1:], 16)
+            self._escape = None
+            if 0xD800 <= code < 0xDC00:
+                self._flush_surrogate()
+                self._high_surrogate = code
+            elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                high, self._high_surrogate = self._high_surrogate, None
+                self._append(chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)))
+            else:
+                self._append(chr(code))
+        return i + 1
+
+    def _append(self, chars: str) -> None:
+        self._flush_surrogate()
+        self._chars.append(chars)
+        if not self._is_key:
+            self._fresh.append(chars)
+
+    def _flush_surrogate(self) -> None:
+        """Eşi gelmeyen yüksek surrogate'i olduğu gibi ekle"""
+        if self._high_surrogate is not None:
+            code, self._high_surrogate = self._high_surrogate, None
+            self._append(chr(code))
+
+    # ==================== YARDIMCI ====================
+
+    def _emit(self, kind: str, path: tuple, value: Any = None) -> None:
+        self._events.append(JSONEvent(kind, path, value))
+
+    def _fail(self, message: str) -> None:
+        raise StreamParseError(message, self._pos)
+
+
+class ModelStreamParser:
+    """
+    Pydantic modeline göre doğrulayan artımlı parser.
+
+    Anahtarlar geldikçe modelde tanımlı olup olmadıkları, container'lar
+    açıldıkça tipleri kontrol edilir; şemadan sapan akış hemen
+    StreamParseError ile kesilir. İç içe model nesneleri kapandıkça
+    doğrulanır ve "model" olayı olarak bildirilir.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        """
+        ModelStreamParser başlat.
+
+        Args:
+            model: Beklenen kök model
+        """
+        self.model = model
+        self._json = IncrementalJSONParser()
+        self._types: Dict[tuple, Any] = {(): model}
+
+    def feed(self, text: str) -> List[JSONEvent]:
+        """Metin parçasını işle ve doğrulanmış olayları döndür"""
+        return self._check(self._json.feed(text))
+
+    def close(self) -> BaseModel:
+        """
+        Akışı bitir ve kök modeli döndür.
+
+        Raises:
+            StreamParseError: Belge yarım veya modele uymuyorsa
+        """
+        self._check(self._json.close())
+        try:
+            return self.model.model_validate(self._json.value)
+        except ValidationError as e:
+            raise StreamParseError(f"Yanıt {self.model.__name__} şemasına uymuyor: {e}")
+
+    def _check(self, events: List[JSONEvent]) -> List[JSONEvent]:
+        checked: List[JSONEvent] = []
+        for event in events:
+            checked.append(event)
+
+            if event.kind == "key":
+                owner = self._resolve(event.path[:-1])
+                if _is_model(owner):
+                    field = owner.model_fields.get(event.value)
+                    if field is None:
+                        raise StreamParseError(
+                            f"{owner.__name__} şemasında olmayan alan: '{event.value}'"
+                        )
+                    self._types[event.path] = field.annotation
+
+            elif event.kind == "start":
+                expected = self._resolve(event.path)
+                if _is_model(expected) or get_origin(expected) is dict:
+                    if event.value != "object":
+                        raise StreamParseError(f"{_path_str(event.path)} nesne olmalı")
+                elif get_origin(expected) is list and event.value != "array":
+                    raise StreamParseError(f"{_path_str(event.path)} liste olmalı")
+
+            elif event.kind == "end" and event.path:
+                expected = self._resolve(event.path)
+                if _is_model(expected):
+                    try:
+                        instance = expected.model_validate(event.value)
+                    except ValidationError as e:
+                        raise StreamParseError(f"{_path_str(event.path)} geçersiz: {e}")
+                    checked.append(JSONEvent("model", event.path, instance))
+
+        return checked
+
+    def _resolve(self, path: tuple) -> Any:
+        """Yoldaki değerin beklenen tipi (Optional açılmış; bilinmiyorsa Any)"""
+        if path in self._types:
+            return _unwrap_optional(self._types[path])
+
+        parent = self._resolve(path[:-1]) if path else Any
+        args = get_args(parent)
+        if get_origin(parent) is list and args:
+            annotation = args[0]
+        elif get_origin(parent) is dict and len(args) == 2:
+            annotation = args[1]
+        else:
+            annotation = Any
+        self._types[path] = annotation
+        return _unwrap_optional(annotation)
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _path_str(path: tuple) -> str:
+    return ".".join(str(part) for part in path) or "<kök>"
@@ -0,0 +1,405 @@
+"""
+Call Telemetry.
+Her Gemini API çağrısı için span kaydı (gecikme, TTFT, token/s, cache oranı).
+"""
+
+import os
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from ..models.project import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+
+# Çağrıyı yapan modül/adım; span'lere etiket olarak eklenir
+_call_context: ContextVar[Dict[str, Any]] = ContextVar("gemini_call_context", default={})
+
+
+@contextmanager
+def call_context(**labels: Any):
+    """
+    Bu blok içindeki Gemini çağrılarını etiketle (dıştaki etiketlere eklenir).
+
+    Kullanım:
+        with call_context(module="senaryo", step="write_scene", scene_number=3):
+            ...
+    """
+    merged = {**_call_context.get(), **{k: v for k, v in labels.items() if v is not None}}
+    token = _call_context.set(merged)
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_call_context() -> Dict[str, Any]:
+    """Aktif çağrı etiketleri"""
+    return _call_context.get()
+
+
+@dataclass
+class CallSpan:
+    """Tek bir API çağrısı denemesi"""
+    span_id: str
+    operation: str                 # chat, chat_structured, structured, stream, chat_stream
+    model: str
+    project_id: Optional[str] = None
+    module: Optional[str] = None
+    step: Optional[str] = None     # call_context ile verilmezse schema adı veya operation
+    thinking_level: Optional[str] = None
+    schema: Optional[str] = None
+    priority: Optional[str] = None
+    started_at: str = ""
+    queue_ms: float = 0.0          # rate limiter'da bekleme
+    ttft_ms: Optional[float] = None  # ilk chunk (stream) / yanıt (tek parça)
+    latency_ms: float = 0.0        # gönderimden son chunk'a (kuyruk hariç)
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    total_tokens: int = 0
+    output_tokens_per_s: Optional[float] = None
+    cache_hit_ratio: float = 0.0
+    status: str = "ok"              # ok, error, aborted
+    error: Optional[str] = None
+
+    # Ölçüm için (kaydedilmez)
+    _t_start: float = 0.0
+    _t_sent: float = 0.0
+
+    def record(self) -> Dict[str, Any]:
+        """Kaydedilecek alanlar"""
+        return {k: v for k, v in asdict(self).items() if not k.startswith("_")}
+
+
+class Telemetry:
+    """
+    Çağrı span'lerinin toplayıcısı.
+
+    Span'ler bellekte sabit boyutlu bir halkada (son N çağrı, metrikler
+    buradan hesaplanır) ve kalıcı analiz için SQLite'ta tutulur. SQLite'a
+    yazma arka plan thread'inde yapılır: çağıran (event loop dahil) sadece
+    kuyruğa ekler, kuyrukta biriken span'ler tek commit'te yazılır. Kayıt
+    hatası çağrıyı asla etkilemez.
+    """
+
+    DEFAULT_DB_PATH = "data/telemetry.db"
+    DEFAULT_RING_SIZE = 2_000
+    DEFAULT_MAX_ROWS = 100_000
+    PRUNE_EVERY = 500   # bu kadar kayıtta bir eski satırlar silinir
+    MAX_BATCH = 256     # tek commit'te yazılan en fazla span
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        ring_size: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        persist: Optional[bool] = None
+    ):
+        """
+        Telemetry başlat.
+
+        Args:
+            db_path: SQLite dosya yolu
+            ring_size: Bellekte tutulan son span sayısı
+            max_rows: SQLite'ta tutulan en fazla span
+            persist: SQLite'a yazılsın mı (None ise GEMINI_TELEMETRY_PERSIST env var)
+        """
+        self.db_path = Path(db_path)
+        self.max_rows = max_rows or self.DEFAULT_MAX_ROWS
+        if persist is None:
+            persist = os.getenv("GEMINI_TELEMETRY_PERSIST", "1").lower() not in ("0", "false", "no")
+        self.persist = persist
+
+        self._ring: deque = deque(maxlen=ring_size or self.DEFAULT_RING_SIZE)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._written = 0
+        self._write_errors = 0
+
+        # Yazıcı: kuyruktaki span'leri toplu yazan tek thread
+        self._writes: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+        if self.persist:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._init_database()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Veritabanı bağlantısı"""
+        if self._connection is None:
+            self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        return self._connection
+
+    def _init_database(self) -> None:
+        """Tabloyu oluştur"""
+        with self._lock:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS call_spans (
+                    span_id TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    project_id TEXT,
+                    module TEXT,
+                    step TEXT,
+                    thinking_level TEXT,
+                    schema TEXT,
+                    priority TEXT,
+                    started_at TEXT NOT NULL,
+                    queue_ms REAL,
+                    ttft_ms REAL,
+                    latency_ms REAL,
+                    prompt_tokens INTEGER,
+                    cached_tokens INTEGER,
+                    output_tokens INTEGER,
+                    thinking_tokens INTEGER,
+                    total_tokens INTEGER,
+                    output_tokens_per_s REAL,
+                    cache_hit_ratio REAL,
+                    status TEXT NOT NULL,
+                    error TEXT
+                )
+            """)
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_call_spans_step ON call_spans(step, started_at)"
+            )
+            self.connection.commit()
+
+    # ==================== SPAN YAŞAM DÖNGÜSÜ ====================
+
+    def start(
+        self,
+        operation: str,
+        model: str,
+        project_id: Optional[str] = None,
+        thinking_level: Optional[str] = None,
+        schema: Optional[str] = None,
+        labels: Optional[Dict[str, Any]] = None
+    ) -> CallSpan:
+        """
+        Deneme başında span aç.
+
+        Etiketler aktif call_context'ten alınır; generator'lar gibi
+        call_context bloğunun dışında çalışan çağrılar labels verir.
+        """
+        labels = {**current_call_context(), **(labels or {})}
+        return CallSpan(
+            span_id=uuid.uuid4().hex,
+            operation=operation,
+            model=model,
+            project_id=project_id,
+            module=labels.get("module"),
+            step=labels.get("step") or schema or operation,
+            thinking_level=thinking_level,
+            schema=schema,
+            started_at=datetime.now().isoformat(),
+            _t_start=time.monotonic()
+        )
+
+    @staticmethod
+    def sent(span: CallSpan, queue_seconds: float, priority: Optional[str] = None) -> None:
+        """Kota alındı, istek gönderiliyor"""
+        span._t_sent = time.monotonic()
+        span.queue_ms = round(queue_seconds * 1000, 2)
+        span.priority = priority
+
+    @staticmethod
+    def first_token(span: CallSpan) -> None:
+        """İlk chunk geldi"""
+        if span.ttft_ms is None:
+            span.ttft_ms = round((time.monotonic() - span._t_sent) * 1000, 2)
+
+    def finish(self, span: CallSpan, usage: TokenUsage) -> None:
+        """Başarılı çağrıyı kapat ve kaydet"""
+        elapsed = time.monotonic() - span._t_sent
+        span.latency_ms = round(elapsed * 1000, 2)
+        if span.ttft_ms is None:
+            span.ttft_ms = span.latency_ms
+
+        span.prompt_tokens = usage.prompt_tokens
+        span.cached_tokens = usage.cached_tokens
+        span.output_tokens = usage.output_tokens
+        span.thinking_tokens = usage.thinking_tokens
+        span.total_tokens = usage.total_tokens
+        span.cache_hit_ratio = round(usage.cache_hit_ratio, 4)
+
+        # Üretim hızı: ilk token'dan sonrası (stream) veya tüm süre
+        generation = elapsed - (span.ttft_ms / 1000 if span.ttft_ms != span.latency_ms else 0)
+        produced = usage.output_tokens + usage.thinking_tokens
+        if produced and generation > 0:
+            span.output_tokens_per_s = round(produced / generation, 2)
+
+        self._record(span)
+
+    def fail(self, span: CallSpan, error: BaseException, status: str = "error") -> None:
+        """Başarısız (veya tüketicinin yarıda bıraktığı, status="aborted") denemeyi kaydet"""
+        span.latency_ms = round((time.monotonic() - (span._t_sent or span._t_start)) * 1000, 2)
+        span.status = status
+        span.error = (type(error).__name__ + (f": {error}" if str(error) else ""))[:500]
+        self._record(span)
+
+    def _record(self, span: CallSpan) -> None:
+        record = span.record()
+        with self._lock:
+            self._ring.append(record)
+        if self.persist:
+            self._ensure_writer()
+            self._writes.put(record)
+
+    # ==================== YAZICI THREAD ====================
+
+    def _ensure_writer(self) -> None:
+        """Yazıcı thread'i gerekiyorsa başlat (close() sonrası da)"""
+        if self._writer and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._writer_loop, name="telemetry-writer", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self) -> None:
+        while True:
+            record = self._writes.get()
+            if record is None:
+                return
+
+            # Kuyrukta bekleyenleri aynı commit'e topla
+            group = [record]
+            stop = False
+            while len(group) < self.MAX_BATCH:
+                try:
+                    queued = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is None:
+                    stop = True
+                    break
+                group.append(queued)
+
+            self._write_group(group)
+            if stop:
+                return
+
+    def _write_group(self, group: List[Dict[str, Any]]) -> None:
+        """Span'leri tek transaction'da yaz (bağlantıyı sadece yazıcı kullanır)"""
+        columns = list(group[0])
+        try:
+            self.connection.executemany(
+                f"INSERT INTO call_spans ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(record[c] for c in columns) for record in group]
+            )
+            written = self._written + len(group)
+            if written // self.PRUNE_EVERY != self._written // self.PRUNE_EVERY:
+                self._prune()
+            self.connection.commit()
+            self._written = written
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            self._write_errors += len(group)
+            logger.warning(f"{len(group)} span kaydedilemedi: {e}")
+
+    def _prune(self) -> None:
+        """En eski span'leri sil (yazıcı thread'de)"""
+        self.connection.execute("""
+            DELETE FROM call_spans WHERE span_id IN (
+                SELECT span_id FROM call_spans ORDER BY started_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_rows,))
+
+    # ==================== METRİKLER ====================
+
+    def recent(self, limit: int = 100, step: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Bellekteki son span'ler (yeniden eskiye)"""
+        with self._lock:
+            spans = list(self._ring)
+        if step:
+            spans = [s for s in spans if s["step"] == step]
+        return spans[::-1][:limit]
+
+    def summary(self) -> Dict[str, Any]:
+        """Adım bazında gecikme yüzdelikleri ve token metrikleri (bellekteki span'ler)"""
+        with self._lock:
+            spans = list(self._ring)
+
+        steps: Dict[str, List[Dict[str, Any]]] = {}
+        for span in spans:
+            steps.setdefault(span["step"], []).append(span)
+
+        return {
+            "spans": len(spans),
+            "persisted": self._written,
+            "pending_writes": self._writes.qsize(),
+            "write_errors": self._write_errors,
+            "steps": {step: self._step_summary(items) for step, items in sorted(steps.items())}
+        }
+
+    def _step_summary(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ok = [s for s in spans if s["status"] == "ok"]
+        prompt = sum(s["prompt_tokens"] for s in ok)
+        return {
+            "calls": len(spans),
+            "errors": len(spans) - len(ok),
+            "latency_ms": self._percentiles([s["latency_ms"] for s in ok]),
+            "ttft_ms": self._percentiles([s["ttft_ms"] for s in ok if s["ttft_ms"] is not None]),
+            "queue_ms": self._percentiles([s["queue_ms"] for s in ok]),
+            "output_tokens_per_s": self._percentiles(
+                [s["output_tokens_per_s"] for s in ok if s["output_tokens_per_s"] is not None]
+            ),
+            "avg_output_tokens": round(sum(s["output_tokens"] for s in ok) / len(ok), 1) if ok else 0,
+            "avg_thinking_tokens": round(sum(s["thinking_tokens"] for s in ok) / len(ok), 1) if ok else 0,
+            "cache_hit_ratio": round(sum(s["cached_tokens"] for s in ok) / prompt, 4) if prompt else 0.0
+        }
+
+    @classmethod
+    def _percentiles(cls, values: List[float]) -> Dict[str, Optional[float]]:
+        """En yakın sıra yöntemiyle p50/p95/p99"""
+        if not values:
+            return {f"p{p}": None for p in cls.PERCENTILES}
+        values = sorted(values)
+        return {
+            f"p{p}": values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))]
+            for p in cls.PERCENTILES
+        }
+
+    def close(self) -> None:
+        """Bekleyen span'leri yaz, yazıcıyı durdur ve bağlantıyı kapat"""
+        with self._writer_lock:
+            if self._writer and self._writer.is_alive():
+                self._writes.put(None)
+                self._writer.join()
+            self._writer = None
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+
+# Global instance
+_telemetry: Optional[Telemetry] = None
+
+
+def get_telemetry() -> Telemetry:
+    """Global telemetry toplayıcısını al"""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry()
+    return _telemetry
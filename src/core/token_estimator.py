@@ -0,0 +1,229 @@
+"""
+Token Estimator.
+Dil ve model bazında gerçek kullanımdan kalibre edilen yerel token tahmini.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable
+
+
+@dataclass
+class CalibrationState:
+    """Bir (dil, model) anahtarının kalibrasyon durumu"""
+    chars_per_token: float
+    samples: int = 0
+    abs_pct_error: float = 0.0   # EWMA, sadece tahmini bilinen örneklerden
+    error_samples: int = 0
+    last_error: float = 0.0      # (tahmin - gerçek) / gerçek
+
+
+class TokenEstimator:
+    """
+    Kalibre edilen token tahmincisi.
+
+    Karakter/token oranı dile göre çok değişir (Türkçe, İngilizce'den
+    belirgin şekilde daha fazla token üretir). Oran her çağrının
+    usage_metadata'sından (cache dışı input token) ve count_tokens
+    sonuçlarından üstel hareketli ortalama ile öğrenilir:
+
+    - (dil, model) anahtarı yeterli örneğe sahipse kendi oranı,
+    - yoksa dilin tüm modellerdeki oranı,
+    - o da yoksa dil için varsayılan oran kullanılır.
+
+    Büyük içerikler (kaynak dosya, uzun metinler) için count_tokens
+    sonuçları içerik hash'i ile saklanır; aynı içerik tekrar sayılmaz.
+    """
+
+    # Başlangıç oranları (karakter / token)
+    DEFAULT_CHARS_PER_TOKEN = {"tr": 3.0, "en": 4.0}
+    FALLBACK_CHARS_PER_TOKEN = 3.5
+
+    EWMA_ALPHA = 0.2
+    MIN_SAMPLE_TOKENS = 32      # daha küçük örnekler oranı bozar
+    MIN_MODEL_SAMPLES = 3       # model anahtarı bu kadar örnekten sonra kullanılır
+    MAX_MEMO_ENTRIES = 1_000
+
+    ANY_MODEL = "*"
+
+    def __init__(self):
+        self._states: Dict[tuple[str, str], CalibrationState] = {}
+        self._memo: "OrderedDict[str, int]" = OrderedDict()
+        self._memo_hits = 0
+        self._memo_misses = 0
+        self._lock = threading.Lock()
+
+    # ==================== TAHMİN ====================
+
+    def chars_per_token(self, language: Optional[str] = None, model: Optional[str] = None) -> float:
+        """Kullanılacak karakter/token oranı"""
+        language = self._language(language)
+        with self._lock:
+            state = self._states.get((language, model)) if model else None
+            if state and state.samples >= self.MIN_MODEL_SAMPLES:
+                return state.chars_per_token
+            state = self._states.get((language, self.ANY_MODEL))
+            if state and state.samples:
+                return state.chars_per_token
+        return self.DEFAULT_CHARS_PER_TOKEN.get(language, self.FALLBACK_CHARS_PER_TOKEN)
+
+    def estimate(self, text: str, language: Optional[str] = None, model: Optional[str] = None) -> int:
+        """Metnin tahmini token sayısı"""
+        return self.estimate_chars(len(text), language, model)
+
+    def estimate_chars(self, chars: int, language: Optional[str] = None, model: Optional[str] = None) -> int:
+        """Karakter sayısından tahmini token sayısı"""
+        if chars <= 0:
+            return 0
+        return max(1, round(chars / self.chars_per_token(language, model)))
+
+    # ==================== KALİBRASYON ====================
+
+    def observe(
+        self,
+        language: Optional[str],
+        model: Optional[str],
+        chars: int,
+        actual_tokens: int,
+        estimated_tokens: Optional[int] = None
+    ) -> None:
+        """
+        Gerçek token sayısıyla oranı güncelle.
+
+        Args:
+            language: İçeriğin dili
+            model: Model adı
+            chars: Tahminde kullanılan karakter sayısı
+            actual_tokens: API'nin saydığı token (cache dışı input)
+            estimated_tokens: Çağrı öncesi yapılan tahmin (hata metriği için)
+        """
+        if actual_tokens < self.MIN_SAMPLE_TOKENS or chars <= 0:
+            return
+
+        language = self._language(language)
+        ratio = chars / actual_tokens
+        error = (estimated_tokens - actual_tokens) / actual_tokens if estimated_tokens else None
+
+        with self._lock:
+            for key in ((language, model or self.ANY_MODEL), (language, self.ANY_MODEL)):
+                state = self._states.get(key)
+                if state is None:
+                    state = self._states[key] = CalibrationState(chars_per_token=ratio)
+                else:
+                    state.chars_per_token += self.EWMA_ALPHA * (ratio - state.chars_per_token)
+                state.samples += 1
+
+                if error is not None:
+                    state.last_error = error
+                    state.abs_pct_error = (
+                        abs(error) if state.error_samples == 0
+                        else state.abs_pct_error + self.EWMA_ALPHA * (abs(error) - state.abs_pct_error)
+                    )
+                    state.error_samples += 1
+
+                if model is None:
+                    break  # ANY_MODEL anahtarı bir kez güncellenir
+
+    # ==================== count_tokens MEMO ====================
+
+    @staticmethod
+    def content_key(model: str, content: str) -> str:
+        """count_tokens memo anahtarı (model + içerik hash'i)"""
+        return hashlib.sha256(f"{model}\x1f{content}".encode()).hexdigest()
+
+    def count(
+        self,
+        key: str,
+        counter: Callable[[], int],
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        chars: Optional[int] = None
+    ) -> int:
+        """
+        Memoize edilmiş count_tokens.
+
+        Args:
+            key: İçerik anahtarı (content_key veya dosya SHA-256'sı)
+            counter: Gerçek sayımı yapan fonksiyon (API çağrısı)
+            language: Kalibrasyon için dil
+            model: Kalibrasyon için model
+            chars: İçeriğin karakter sayısı (biliniyorsa oran kalibre edilir)
+        """
+        tokens = self.lookup(key)
+        if tokens is None:
+            tokens = self.remember(key, counter(), language, model, chars)
+        return tokens
+
+    def lookup(self, key: str) -> Optional[int]:
+        """Saklanan sayım (yoksa None)"""
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self._memo_hits += 1
+                return self._memo[key]
+            self._memo_misses += 1
+            return None
+
+    def remember(
+        self,
+        key: str,
+        tokens: int,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        chars: Optional[int] = None
+    ) -> int:
+        """count_tokens sonucunu sakla (async çağıranlar için; bkz. count)"""
+        if chars:
+            self.observe(
+                language, model, chars, tokens,
+                estimated_tokens=self.estimate_chars(chars, language, model)
+            )
+
+        with self._lock:
+            self._memo[key] = tokens
+            while len(self._memo) > self.MAX_MEMO_ENTRIES:
+                self._memo.popitem(last=False)
+        return tokens
+
+    # ==================== METRİKLER ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """Anahtar bazında oran ve tahmin hatası"""
+        with self._lock:
+            calibration = {
+                f"{language}/{model}": {
+                    "chars_per_token": round(state.chars_per_token, 3),
+                    "samples": state.samples,
+                    "mean_abs_pct_error": round(state.abs_pct_error * 100, 2),
+                    "last_error_pct": round(state.last_error * 100, 2)
+                }
+                for (language, model), state in self._states.items()
+            }
+            lookups = self._memo_hits + self._memo_misses
+            return {
+                "calibration": calibration,
+                "count_tokens_memo": {
+                    "entries": len(self._memo),
+                    "hits": self._memo_hits,
+                    "misses": self._memo_misses,
+                    "hit_rate": self._memo_hits / lookups if lookups else 0.0
+                }
+            }
+
+    @staticmethod
+    def _language(language: Optional[str]) -> str:
+        return (language or "und").lower()
+
+
+# Global instance
+_token_estimator: Optional[TokenEstimator] = None
+
+
+def get_token_estimator() -> TokenEstimator:
+    """Global token tahmincisini al"""
+    global _token_estimator
+    if _token_estimator is None:
+        _token_estimator = TokenEstimator()
+    return _token_estimator
@@ -0,0 +1,727 @@
+"""
+Gemini Transport.
+Canlı, kayıt (record), tekrar oynatma (replay) ve sentetik backend seçimi.
+
+GEMINI_TRANSPORT env var ile seçilir:
+    live      -> gerçek genai.Client (varsayılan)
+    record    -> gerçek çağrılar yapılır, yanıtlar cassette dosyalarına yazılır
+    replay    -> cassette'lerden ağ olmadan yanıt verilir
+    synthetic -> JSON schema'dan geçerli sahte yanıt üretilir (ağ yok)
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import uuid
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Callable, Iterator, AsyncIterator
+
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+
+# Transport modları
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+SYNTHETIC = "synthetic"
+OFFLINE_MODES = (REPLAY, SYNTHETIC)
+
+# Offline modlarda API key gerekmez
+OFFLINE_API_KEY = "offline"
+
+
+def transport_mode() -> str:
+    """Aktif transport modu (GEMINI_TRANSPORT)"""
+    mode = os.getenv("GEMINI_TRANSPORT", LIVE).strip().lower()
+    if mode not in (LIVE, RECORD, REPLAY, SYNTHETIC):
+        raise ValueError(f"Geçersiz GEMINI_TRANSPORT: {mode}")
+    return mode
+
+
+def is_offline() -> bool:
+    """Ağ kullanılmayan bir modda mıyız"""
+    return transport_mode() in OFFLINE_MODES
+
+
+def _env_ms(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) / 1000 if value else None
+
+
+class ReplayTiming:
+    """
+    Offline yanıt zamanlaması.
+
+    Env ile verilen değerler kayıttaki zamanlamayı override eder:
+        GEMINI_REPLAY_LATENCY_MS -> stream olmayan çağrının toplam süresi
+        GEMINI_REPLAY_TTFT_MS    -> ilk chunk'a kadar geçen süre
+        GEMINI_REPLAY_CHUNK_MS   -> chunk'lar arası süre
+        GEMINI_REPLAY_SPEED      -> kayıttaki sürelerin çarpanı (0 = beklemesiz)
+    """
+
+    # Sentetik mod ve zamanlaması olmayan kayıtlar için varsayılanlar (saniye)
+    DEFAULT_LATENCY = 0.8
+    DEFAULT_TTFT = 0.3
+    DEFAULT_CHUNK = 0.03
+
+    def __init__(self):
+        self.latency = _env_ms("GEMINI_REPLAY_LATENCY_MS")
+        self.ttft = _env_ms("GEMINI_REPLAY_TTFT_MS")
+        self.chunk = _env_ms("GEMINI_REPLAY_CHUNK_MS")
+        self.speed = float(os.getenv("GEMINI_REPLAY_SPEED", "1.0"))
+
+    def plan(self, recorded: Optional[Dict[str, float]], chunk_count: int) -> tuple[float, float, float]:
+        """
+        Returns:
+            (toplam gecikme, TTFT, chunk aralığı) - saniye
+        """
+        recorded = recorded or {}
+        total = recorded.get("duration_ms", self.DEFAULT_LATENCY * 1000) / 1000 * self.speed
+        ttft = recorded.get("ttft_ms", self.DEFAULT_TTFT * 1000) / 1000 * self.speed
+        if chunk_count > 1 and "duration_ms" in recorded:
+            chunk = max(0.0, total - ttft) / (chunk_count - 1)
+        else:
+            chunk = self.DEFAULT_CHUNK * self.speed
+
+        return (
+            self.latency if self.latency is not None else total,
+            self.ttft if self.ttft is not None else ttft,
+            self.chunk if self.chunk is not None else chunk
+        )
+
+
+# ==================== CASSETTE ====================
+
+def _jsonable(value: Any) -> Any:
+    """SDK nesnelerini hash'lenebilir JSON'a çevir"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+class CassetteStore:
+    """
+    Kayıtlı yanıt deposu.
+
+    Her istek için bir JSON dosyası tutulur: {anahtar}.json
+    Anahtar model, içerik ve config'den üretilir. Gemini cache adları her
+    kayıtta farklı olduğundan anahtara dahil edilmez.
+    """
+
+    DEFAULT_DIR = "data/cassettes"
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("GEMINI_CASSETTE_DIR", self.DEFAULT_DIR))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, contents: Any, config: Any) -> str:
+        """İstek anahtarı"""
+        config_data = _jsonable(config) or {}
+        if isinstance(config_data, dict):
+            config_data = {
+                k: v for k, v in config_data.items()
+                if k not in ("cached_content", "http_options")
+            }
+            config_data["cached"] = bool(getattr(config, "cached_content", None))
+        payload = json.dumps(
+            {"model": model, "contents": _jsonable(contents), "config": config_data},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Kaydı oku (yoksa None)"""
+        path = self.directory / f"{key}.json"
+        with self._lock:
+            if not path.exists():
+                self.misses += 1
+                return None
+            self.replayed += 1
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(
+        self,
+        key: str,
+        model: str,
+        chunks: List[types.GenerateContentResponse],
+        ttft_ms: float,
+        duration_ms: float
+    ) -> None:
+        """Yanıtı (tüm chunk'ları ve zamanlamayı) kaydet"""
+        entry = {
+            "model": model,
+            "recorded_at": datetime.now().isoformat(),
+            "timing": {"ttft_ms": ttft_ms, "duration_ms": duration_ms},
+            "chunks": [_jsonable(c) for c in chunks]
+        }
+        path = self.directory / f"{key}.json"
+        with self._lock:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, indent=2)
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses
+        }
+
+
+# ==================== SENTETİK ÜRETİCİ ====================
+
+class SyntheticGenerator:
+    """
+    JSON schema'dan geçerli sahte veri üretir.
+
+    Pydantic model_json_schema() çıktısını ($defs/$ref, anyOf, enum,
+    minItems/maxItems, minimum/maximum) destekler; böylece SceneResponse,
+    BeatSheetResponse vb. modeller doğrulamadan geçer.
+    """
+
+    # Dizi uzunluğu (minItems/maxItems sınırları içinde)
+    ARRAY_LENGTH = 3
+
+    LOREM = (
+        "Rüzgar eski kalenin taş duvarlarında uğulduyor. Kahraman yavaşça "
+        "başını kaldırıyor, gözleri ufukta bir şey arıyor. Uzaktan bir at "
+        "kişnemesi duyuluyor."
+    )
+
+    def generate(self, schema: Dict[str, Any]) -> Any:
+        """Schema'ya uygun değer üret"""
+        return self._value(schema, schema.get("$defs", {}), name="value", index=0)
+
+    def text(self) -> str:
+        """Serbest metin yanıtı"""
+        return self.LOREM
+
+    def _value(self, schema: Dict[str, Any], defs: Dict[str, Any], name: str, index: int) -> Any:
+        if "$ref" in schema:
+            return self._value(defs[schema["$ref"].split("/")[-1]], defs, name, index)
+        if "const" in schema:
+            return schema["const"]
+        if "enum" in schema:
+            return schema["enum"][0]
+        for key in ("anyOf", "oneOf", "allOf"):
+            if key in schema:
+                options = [s for s in schema[key] if s.get("type") != "null"]
+                return self._value(options[0] if options else {}, defs, name, index)
+
+        kind = schema.get("type")
+        if isinstance(kind, list):
+            kind = next((k for k in kind if k != "null"), "string")
+
+        if kind == "object" or "properties" in schema:
+            return {
+                prop: self._value(sub, defs, prop, index)
+                for prop, sub in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            length = max(schema.get("minItems", 1), self.ARRAY_LENGTH)
+            length = min(length, schema.get("maxItems", length))
+            item = schema.get("items", {})
+            return [self._value(item, defs, name, i) for i in range(length)]
+        if kind in ("integer", "number"):
+            # Sıra numaraları dizideki konumu izlesin (scene_number, number...)
+            value = index + 1 if name.endswith("number") else 60 if "seconds" in name else 1
+            value = max(value, schema.get("minimum", value))
+            value = min(value, schema.get("maximum", value))
+            return value if kind == "integer" else float(value)
+        if kind == "boolean":
+            return False
+        return f"{schema.get('title', name)} {index + 1}: {self.LOREM[:80]}"
+
+
+# ==================== OFFLINE İSTEMCİ ====================
+
+def _estimate_tokens(value: Any) -> int:
+    return len(json.dumps(_jsonable(value), ensure_ascii=False)) // 4
+
+
+def _response(text: str, usage: Optional[types.GenerateContentResponseUsageMetadata]) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            finish_reason=types.FinishReason.STOP
+        )],
+        usage_metadata=usage
+    )
+
+
+def _merge(chunks: List[types.GenerateContentResponse]) -> types.GenerateContentResponse:
+    """Stream chunk'larını tek yanıta birleştir"""
+    if len(chunks) == 1:
+        return chunks[0]
+    text = "".join(c.text or "" for c in chunks)
+    usage = next((c.usage_metadata for c in reversed(chunks) if c.usage_metadata), None)
+    return _response(text, usage)
+
+
+def _split(response: types.GenerateContentResponse, size: int = 40) -> List[types.GenerateContentResponse]:
+    """Tek yanıtı stream chunk'larına böl (usage son chunk'ta)"""
+    text = response.text or ""
+    pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+    chunks = [_response(p, None) for p in pieces]
+    chunks[-1].usage_metadata = response.usage_metadata
+    return chunks
+
+
+class _OfflineModels:
+    """Offline models yüzeyi (sync)"""
+
+    def __init__(self, backend: "OfflineBackend"):
+        self._backend = backend
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None) -> types.GenerateContentResponse:
+        chunks, timing = self._backend.respond(model, contents, config)
+        latency, _, _ = self._backend.timing.plan(timing, 1)
+        time.sleep(latency)
+        return _merge(chunks)
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None) -> Iterator[types.GenerateContentResponse]:
+        chunks, timing = self._backend.respond(model, contents, config)
+        if len(chunks) == 1:
+            chunks = _split(chunks[0])
+        _, ttft, interval = self._backend.timing.plan(timing, len(chunks))
+        time.sleep(ttft)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(interval)
+            yield chunk
+
+    def count_tokens(self, *, model: str, contents: Any, config: Any = None) -> types.CountTokensResponse:
+        return types.CountTokensResponse(total_tokens=_estimate_tokens(contents))
+
+    def get(self, *, model: str, config: Any = None) -> types.Model:
+        return types.Model(name=model, input_token_limit=1_048_576, output_token_limit=65_536)
+
+
+class _OfflineAsyncModels:
+    """Offline models yüzeyi (async)"""
+
+    def __init__(self, backend: "OfflineBackend"):
+        self._backend = backend
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None) -> types.GenerateContentResponse:
+        chunks, timing = self._backend.respond(model, contents, config)
+        latency, _, _ = self._backend.timing.plan(timing, 1)
+        await asyncio.sleep(latency)
+        return _merge(chunks)
+
+    async def generate_content_stream(self, *, model: str, contents: Any, config: Any = None) -> AsyncIterator[types.GenerateContentResponse]:
+        chunks, timing = self._backend.respond(model, contents, config)
+        if len(chunks) == 1:
+            chunks = _split(chunks[0])
+        _, ttft, interval = self._backend.timing.plan(timing, len(chunks))
+
+        async def stream():
+            await asyncio.sleep(ttft)
+            for i, chunk in enumerate(chunks):
+                if i:
+                    await asyncio.sleep(interval)
+                yield chunk
+
+        return stream()
+
+    async def count_tokens(self, *, model: str, contents: Any, config: Any = None) -> types.CountTokensResponse:
+        return types.CountTokensResponse(total_tokens=_estimate_tokens(contents))
+
+
+class _OfflineFiles:
+    """Yerel Files API (dosya yüklenmez, sadece meta veri üretilir)"""
+
+    def __init__(self):
+        self._files: Dict[str, types.File] = {}
+
+    def upload(self, *, file: Any, config: Any = None) -> types.File:
+        path = Path(file)
+        config = config or {}
+        display_name = config.get("display_name") if isinstance(config, dict) else config.display_name
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        name = f"files/{digest[:16]}"
+        self._files[name] = types.File(
+            name=name,
+            display_name=display_name or path.name,
+            uri=f"offline://{name}",
+            mime_type="text/plain",
+            size_bytes=path.stat().st_size,
+            sha256_hash=digest,
+            state=types.FileState.ACTIVE,
+            create_time=datetime.now(timezone.utc),
+            expiration_time=datetime.now(timezone.utc) + timedelta(hours=48)
+        )
+        return self._files[name]
+
+    def get(self, *, name: str, config: Any = None) -> types.File:
+        if name not in self._files:
+            raise FileNotFoundError(f"Offline dosya bulunamadı: {name}")
+        return self._files[name]
+
+    def list(self, *, config: Any = None) -> List[types.File]:
+        return list(self._files.values())
+
+    def delete(self, *, name: str, config: Any = None) -> None:
+        self._files.pop(name, None)
+
+
+def _ttl(config: Any) -> timedelta:
+    """Cache config'indeki TTL ("3600s" veya dict)"""
+    ttl = config.get("ttl") if isinstance(config, dict) else getattr(config, "ttl", None)
+    return timedelta(seconds=float(str(ttl).rstrip("s"))) if ttl else timedelta(hours=1)
+
+
+class _OfflineCaches:
+    """Yerel Context Cache API"""
+
+    def __init__(self):
+        self._caches: Dict[str, types.CachedContent] = {}
+
+    def create(self, *, model: str, config: Any = None) -> types.CachedContent:
+        display_name = getattr(config, "display_name", None) or "cache"
+        tokens = _estimate_tokens(getattr(config, "system_instruction", "") or "")
+        for content in getattr(config, "contents", None) or []:
+            tokens += (getattr(content, "size_bytes", 0) or 0) // 4
+        name = f"cachedContents/{hashlib.sha256(f'{display_name}{time.time()}'.encode()).hexdigest()[:16]}"
+        now = datetime.now(timezone.utc)
+        self._caches[name] = types.CachedContent(
+            name=name,
+            display_name=display_name,
+            model=model,
+            create_time=now,
+            expire_time=now + _ttl(config),
+            usage_metadata=types.CachedContentUsageMetadata(total_token_count=tokens)
+        )
+        return self._caches[name]
+
+    def get(self, *, name: str, config: Any = None) -> types.CachedContent:
+        if name not in self._caches:
+            raise KeyError(f"Offline cache bulunamadı: {name}")
+        return self._caches[name]
+
+    def update(self, *, name: str, config: Any = None) -> types.CachedContent:
+        cache = self.get(name=name)
+        cache.expire_time = datetime.now(timezone.utc) + _ttl(config)
+        return cache
+
+    def delete(self, *, name: str, config: Any = None) -> None:
+        self._caches.pop(name, None)
+
+    def list(self, *, config: Any = None) -> List[types.CachedContent]:
+        return list(self._caches.values())
+
+
+class _OfflineBatches:
+    """
+    Yerel Batch API.
+
+    İş, oluşturulduktan GEMINI_BATCH_DELAY_MS sonra (varsayılan hemen)
+    ilk sorguda sentetik/replay yanıtlarla tamamlanır; inline istek ve
+    yanıtlar metadata'larıyla birlikte döner.
+    """
+
+    def __init__(self, backend: "OfflineBackend"):
+        self._backend = backend
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, *, model: str, src: Any, config: Any = None) -> types.BatchJob:
+        requests = src.inlined_requests if isinstance(src, types.BatchJobSource) else src
+        config = config or {}
+        display_name = config.get("display_name") if isinstance(config, dict) else config.display_name
+        name = f"batches/offline-{uuid.uuid4().hex[:12]}"
+        job = types.BatchJob(
+            name=name,
+            display_name=display_name,
+            model=model,
+            state=types.JobState.JOB_STATE_PENDING,
+            create_time=datetime.now(timezone.utc)
+        )
+        with self._lock:
+            self._jobs[name] = {
+                "job": job,
+                "requests": list(requests),
+                "ready_at": time.monotonic() + (_env_ms("GEMINI_BATCH_DELAY_MS") or 0.0)
+            }
+        return job.model_copy()
+
+    def get(self, *, name: str, config: Any = None) -> types.BatchJob:
+        with self._lock:
+            entry = self._jobs.get(name)
+            if entry is None:
+                raise FileNotFoundError(f"Offline batch işi bulunamadı: {name}")
+            job = entry["job"]
+            if job.state == types.JobState.JOB_STATE_PENDING:
+                job.state = types.JobState.JOB_STATE_RUNNING
+                job.start_time = datetime.now(timezone.utc)
+            if job.state == types.JobState.JOB_STATE_RUNNING and time.monotonic() >= entry["ready_at"]:
+                self._complete(job, entry["requests"])
+            return job.model_copy()
+
+    def cancel(self, *, name: str, config: Any = None) -> None:
+        with self._lock:
+            entry = self._jobs.get(name)
+            if entry and entry["job"].state in (types.JobState.JOB_STATE_PENDING, types.JobState.JOB_STATE_RUNNING):
+                entry["job"].state = types.JobState.JOB_STATE_CANCELLED
+                entry["job"].end_time = datetime.now(timezone.utc)
+
+    def list(self, *, config: Any = None) -> List[types.BatchJob]:
+        with self._lock:
+            return [entry["job"].model_copy() for entry in self._jobs.values()]
+
+    def delete(self, *, name: str, config: Any = None) -> None:
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def _complete(self, job: types.BatchJob, requests: List[Any]) -> None:
+        responses = []
+        for request in requests:
+            if isinstance(request, dict):
+                request = types.InlinedRequest.model_validate(request)
+            try:
+                chunks, _ = self._backend.respond(request.model or job.model, request.contents, request.config)
+                responses.append(types.InlinedResponse(response=_merge(chunks), metadata=request.metadata))
+            except Exception as e:
+                responses.append(types.InlinedResponse(
+                    error=types.JobError(code=500, message=str(e)),
+                    metadata=request.metadata
+                ))
+        job.dest = types.BatchJobDestination(inlined_responses=responses)
+        job.state = types.JobState.JOB_STATE_SUCCEEDED
+        job.end_time = datetime.now(timezone.utc)
+
+
+class _AsyncWrapper:
+    """Sync yüzeyi async metodlarla sarmalar (offline files/caches/batches için)"""
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self._target, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class _OfflineAio:
+    """Offline async yüzey (client.aio karşılığı)"""
+
+    def __init__(self, backend: "OfflineBackend"):
+        self.models = _OfflineAsyncModels(backend)
+        self.files = _AsyncWrapper(backend.files)
+        self.caches = _AsyncWrapper(backend.caches)
+        self.batches = _AsyncWrapper(backend.batches)
+
+
+class OfflineBackend:
+    """
+    Replay ve sentetik modların ortak istemcisi.
+
+    genai.Client ile aynı yüzeyi sunar (models, files, caches, batches,
+    aio.*); GeminiClient farkı bilmez.
+    """
+
+    def __init__(self, mode: str, store: Optional[CassetteStore] = None):
+        self.mode = mode
+        self.store = store or (CassetteStore() if mode == REPLAY else None)
+        self.timing = ReplayTiming()
+        self.generator = SyntheticGenerator()
+
+        self.models = _OfflineModels(self)
+        self.files = _OfflineFiles()
+        self.caches = _OfflineCaches()
+        self.batches = _OfflineBatches(self)
+        self.aio = _OfflineAio(self)
+
+    def respond(
+        self,
+        model: str,
+        contents: Any,
+        config: Any
+    ) -> tuple[List[types.GenerateContentResponse], Optional[Dict[str, float]]]:
+        """
+        İsteğe yanıt chunk'larını bul/üret.
+
+        Replay modunda kayıt yoksa sentetik yanıta düşülür (uyarı ile).
+
+        Returns:
+            (chunk listesi, kayıttaki zamanlama veya None)
+        """
+        if self.mode == REPLAY:
+            entry = self.store.load(CassetteStore.key(model, contents, config))
+            if entry:
+                chunks = [types.GenerateContentResponse.model_validate(c) for c in entry["chunks"]]
+                return chunks, entry.get("timing")
+            logger.warning(f"Cassette bulunamadı ({model}), sentetik yanıt üretiliyor")
+
+        return [self._synthetic(contents, config)], None
+
+    def _synthetic(self, contents: Any, config: Any) -> types.GenerateContentResponse:
+        schema = getattr(config, "response_json_schema", None)
+        if schema:
+            text = json.dumps(self.generator.generate(schema), ensure_ascii=False)
+        else:
+            text = self.generator.text()
+
+        prompt_tokens = _estimate_tokens(contents)
+        output_tokens = len(text) // 4
+        return _response(text, types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens
+        ))
+
+
+# ==================== KAYIT ====================
+
+class _RecordingModels:
+    """Gerçek models yüzeyini sarmalayıp yanıtları kaydeder (sync)"""
+
+    def __init__(self, target: Any, store: CassetteStore):
+        self._target = target
+        self._store = store
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None):
+        started = time.monotonic()
+        response = self._target.generate_content(model=model, contents=contents, config=config)
+        elapsed = (time.monotonic() - started) * 1000
+        self._store.save(CassetteStore.key(model, contents, config), model, [response], elapsed, elapsed)
+        return response
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None):
+        started = time.monotonic()
+        chunks, ttft = [], 0.0
+        for chunk in self._target.generate_content_stream(model=model, contents=contents, config=config):
+            if not chunks:
+                ttft = (time.monotonic() - started) * 1000
+            chunks.append(chunk)
+            yield chunk
+        self._store.save(
+            CassetteStore.key(model, contents, config), model, chunks,
+            ttft, (time.monotonic() - started) * 1000
+        )
+
+
+class _RecordingAsyncModels:
+    """Gerçek models yüzeyini sarmalayıp yanıtları kaydeder (async)"""
+
+    def __init__(self, target: Any, store: CassetteStore):
+        self._target = target
+        self._store = store
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None):
+        started = time.monotonic()
+        response = await self._target.generate_content(model=model, contents=contents, config=config)
+        elapsed = (time.monotonic() - started) * 1000
+        self._store.save(CassetteStore.key(model, contents, config), model, [response], elapsed, elapsed)
+        return response
+
+    async def generate_content_stream(self, *, model: str, contents: Any, config: Any = None):
+        started = time.monotonic()
+        stream = await self._target.generate_content_stream(model=model, contents=contents, config=config)
+        store = self._store
+
+        async def recorded():
+            chunks, ttft = [], 0.0
+            async for chunk in stream:
+                if not chunks:
+                    ttft = (time.monotonic() - started) * 1000
+                chunks.append(chunk)
+                yield chunk
+            store.save(
+                CassetteStore.key(model, contents, config), model, chunks,
+                ttft, (time.monotonic() - started) * 1000
+            )
+
+        return recorded()
+
+
+class _RecordingAio:
+    """Async yüzey; sadece models kayıt yapar"""
+
+    def __init__(self, aio: Any, store: CassetteStore):
+        self._aio = aio
+        self.models = _RecordingAsyncModels(aio.models, store)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._aio, name)
+
+
+class RecordingClient:
+    """
+    Gerçek genai.Client'ı sarmalar; model yanıtlarını cassette'e yazar.
+    Files/caches çağrıları doğrudan gerçek istemciye gider.
+    """
+
+    def __init__(self, client: genai.Client, store: Optional[CassetteStore] = None):
+        self._client = client
+        self.store = store or CassetteStore()
+        self.models = _RecordingModels(client.models, self.store)
+        self.aio = _RecordingAio(client.aio, self.store)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+# ==================== FABRİKA ====================
+
+def create_client(api_key: str, http_options: Callable[[], types.HttpOptions]) -> Any:
+    """
+    Aktif transport moduna göre istemci oluştur.
+
+    Args:
+        api_key: Gemini API key (offline modlarda kullanılmaz)
+        http_options: Canlı istemci için HTTP ayarlarını üreten fonksiyon
+
+    Returns:
+        genai.Client veya aynı yüzeye sahip offline/kayıt istemcisi
+    """
+    mode = transport_mode()
+    if mode in OFFLINE_MODES:
+        logger.info(f"Gemini transport: {mode} (ağ kullanılmıyor)")
+        return OfflineBackend(mode)
+
+    client = genai.Client(api_key=api_key, http_options=http_options())
+    if mode == RECORD:
+        logger.info("Gemini transport: record (yanıtlar cassette'e yazılıyor)")
+        return RecordingClient(client)
+    return client
+
+
+def transport_stats(client: Any) -> Dict[str, Any]:
+    """İstemcinin transport bilgisi"""
+    store = getattr(client, "store", None)
+    return {
+        "mode": transport_mode(),
+        "cassettes": store.stats() if store else None
+    }
@@ -4,6 +4,6 @@ SQLite veritabanı yönetimi.
 """
 
 from .database import Database, get_db
-from .repository import ProjectRepository
+from .repository import ProjectRepository, ProjectUnitOfWork
 
-__all__ = ["Database", "get_db", "ProjectRepository"]
+__all__ = ["Database", "get_db", "ProjectRepository", "ProjectUnitOfWork"]
@@ -0,0 +1,115 @@
+"""
+Screenplay Write Benchmark.
+Sahne başına kaydetme ve senaryo açma maliyetinin senaryo uzunluğundan
+bağımsız olduğunu ölçer.
+
+Kullanım:
+    python -m src.db.bench_screenplay --scenes 400
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from .database import Database
+from .repository import ProjectRepository
+from ..models.project import ProjectConfig
+from ..models.screenplay import Screenplay, SceneOutline, Scene, DialogueLine
+
+
+def _scene(number: int) -> Scene:
+    """Gerçekçi boyutta örnek sahne (~2 KB aksiyon, 6 diyalog)"""
+    return Scene(
+        scene_number=number,
+        header=f"SCENE {number}: ARENA - GECE - [SÜRE: 60 Saniye]",
+        action="\n".join(f"Mikro-aksiyon {number}.{i}: " + "toz havada asılı kalır. " * 8 for i in range(10)),
+        dialogue=[
+            DialogueLine(character=f"KARAKTER {i % 3}", line="Bu gece her şey değişecek. " * 3)
+            for i in range(6)
+        ],
+        duration_seconds=60
+    )
+
+
+def run(scenes: int = 400, checkpoints: tuple = (25, 100, 200, 400)) -> List[Dict[str, Any]]:
+    """
+    Boş bir senaryoya sahneleri tek tek ekleyip her eklemede kaydet.
+
+    Returns:
+        Her kontrol noktası için: sahne sayısı, son eklemelerin medyan
+        kaydetme süresi, kaydetme başına ifade sayısı, eski JSON kolonu
+        yönteminde yeniden yazılacak byte, senaryoyu açma (tembel) ve
+        tamamen yükleme süresi
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "bench.db"))
+        repo = ProjectRepository(db)
+        project = repo.create_project("bench", "Bench", ProjectConfig())
+
+        screenplay = Screenplay(
+            title="Bench",
+            scene_outlines=[
+                SceneOutline(
+                    scene_number=n, location="ARENA", time_of_day="GECE",
+                    duration_seconds=60, brief_description=f"Sahne {n}"
+                )
+                for n in range(1, scenes + 1)
+            ]
+        )
+        repo.save_screenplay(project.id, screenplay)
+
+        results = []
+        window: List[float] = []
+        statements: List[int] = []
+        for number in range(1, scenes + 1):
+            screenplay.scenes.append(_scene(number))
+            started = time.perf_counter()
+            statements.append(repo.save_screenplay(project.id, screenplay))
+            window.append((time.perf_counter() - started) * 1000)
+
+            if number in checkpoints or number == scenes:
+                started = time.perf_counter()
+                opened = ProjectRepository(db).get_screenplay(project.id)
+                open_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                opened.load_all()
+                load_ms = (time.perf_counter() - started) * 1000
+                results.append({
+                    "scenes": number,
+                    "save_ms_p50": round(statistics.median(window), 3),
+                    "statements_per_save": round(statistics.mean(statements), 2),
+                    "legacy_blob_bytes": len(json.dumps([s.model_dump() for s in screenplay.scenes])),
+                    "open_ms": round(open_ms, 3),
+                    "full_load_ms": round(load_ms, 3)
+                })
+                window, statements = [], []
+
+        # Okunan senaryo yazılanla aynı olmalı
+        assert repo.get_screenplay(project.id).scenes == screenplay.scenes
+        db.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sahne kaydetme benchmark'ı")
+    parser.add_argument("--scenes", type=int, default=400, help="Eklenecek sahne sayısı")
+    args = parser.parse_args()
+
+    print(
+        f"{'sahne':>6} {'kaydetme p50 (ms)':>18} {'ifade/kaydetme':>15} {'eski blob (KB)':>15} "
+        f"{'açma (ms)':>10} {'tam yükleme (ms)':>17}"
+    )
+    for row in run(args.scenes):
+        print(
+            f"{row['scenes']:>6} {row['save_ms_p50']:>18} "
+            f"{row['statements_per_save']:>15} {row['legacy_blob_bytes'] / 1024:>15.1f} "
+            f"{row['open_ms']:>10} {row['full_load_ms']:>17}"
+        )
+
+
+if __name__ == "__main__":
+    main()
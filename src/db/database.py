@@ -1,13 +1,20 @@
 """
 SQLite Database Manager.
-Tek kullanıcılı lokal uygulama için basit veritabanı yönetimi.
+Tek yazıcı thread'li, thread başına okuma bağlantılı veritabanı yönetimi.
 """
 
 import sqlite3
 import json
 import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Tuple
 from contextlib import contextmanager
 from datetime import datetime
 
@@ -15,16 +22,49 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class WriteResult:
+    """Yazma batch'inin son ifadesinin sonucu (cursor yerine döner)"""
+    rowcount: int
+    lastrowid: Optional[int]
+
+
+@dataclass
+class WriteBatch:
+    """
+    Tek transaction'da çalışacak yazma ifadeleri.
+
+    transaction() bloğunda cursor yerine verilir: ifadeler toplanır, blok
+    bitince yazıcı thread'e gönderilir ve commit'e kadar beklenir.
+    """
+    statements: List[Tuple[str, Any, bool]] = field(default_factory=list)
+    future: Future = field(default_factory=Future)
+    queued_at: float = 0.0
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        self.statements.append((query, params, False))
+
+    def executemany(self, query: str, params_list: List[tuple]) -> None:
+        self.statements.append((query, list(params_list), True))
+
+
 class Database:
     """
     SQLite veritabanı yöneticisi.
-    Thread-safe değil (tek kullanıcı için tasarlandı).
+    
+    Okumalar her thread'in kendi bağlantısından yapılır (WAL ile yazmayı
+    beklemeden paralel okunur). Tüm yazmalar tek bir yazıcı thread'in
+    bağlantısından, kuyruğa giren batch'ler halinde yapılır: commit'ler
+    birbirine karışmaz, her batch ya tamamen uygulanır ya hiç. Kuyrukta
+    bekleyen batch'ler tek commit'te toplanır (her biri kendi SAVEPOINT'inde,
+    hatalı batch diğerlerini etkilemez). Yazma çağrıları commit'e kadar bloklar.
     """
     
-    # Singleton instance
-    _instance: Optional["Database"] = None
+    DEFAULT_PATH = "data/filmstudio.db"
+    MAX_GROUP = 64              # tek commit'te toplanan en fazla batch
+    LATENCY_WINDOW = 1_000      # metrikler için tutulan son batch sayısı
     
-    def __init__(self, db_path: str = "data/filmstudio.db"):
+    def __init__(self, db_path: str = DEFAULT_PATH):
         """
         Database başlat.
         
@@ -34,35 +74,64 @@ class Database:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        self._connection: Optional[sqlite3.Connection] = None
+        # Thread başına okuma bağlantısı (kapatmak için hepsi listede)
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        
+        # Yazıcı: tek bağlantı, tek thread
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writes: "queue.Queue[Optional[WriteBatch]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        
+        # Yazma metrikleri
+        self._stats = {"batches": 0, "statements": 0, "commits": 0, "errors": 0}
+        self._wait_ms: deque = deque(maxlen=self.LATENCY_WINDOW)
+        self._commit_ms: deque = deque(maxlen=self.LATENCY_WINDOW)
+        
         self._init_database()
     
     @classmethod
-    def get_instance(cls, db_path: str = "data/filmstudio.db") -> "Database":
-        """Singleton instance al"""
-        if cls._instance is None:
-            cls._instance = cls(db_path)
-        return cls._instance
+    def get_instance(cls, db_path: str = DEFAULT_PATH) -> "Database":
+        """Global instance al (get_db ile aynı)"""
+        return get_db(db_path)
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Okuma bağlantıları close() için başka thread'den kapatılabilmeli
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
     
     @property
     def connection(self) -> sqlite3.Connection:
-        """Veritabanı bağlantısı"""
-        if self._connection is None:
-            self._connection = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False  # Tek kullanıcı için güvenli
-            )
-            self._connection.row_factory = sqlite3.Row
-            # WAL mode - daha güvenli yazma
-            self._connection.execute("PRAGMA journal_mode=WAL")
-            self._connection.execute("PRAGMA foreign_keys=ON")
-        return self._connection
+        """Bu thread'in okuma bağlantısı"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    def _writer_connection(self) -> sqlite3.Connection:
+        """Yazıcı bağlantısı (transaction'lar elle yönetilir)"""
+        if self._writer_conn is None:
+            conn = self._connect()
+            conn.isolation_level = None
+            # WAL mode - okumalar yazmayı beklemez
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._writer_conn = conn
+        return self._writer_conn
     
     def _init_database(self) -> None:
-        """Veritabanı tablolarını oluştur"""
+        """Veritabanı tablolarını oluştur (yazıcı thread başlamadan)"""
         logger.info(f"Veritabanı başlatılıyor: {self.db_path}")
         
-        cursor = self.connection.cursor()
+        cursor = self._writer_connection().cursor()
+        cursor.execute("BEGIN")
         
         # Projects tablosu
         cursor.execute("""
@@ -119,6 +188,55 @@ class Database:
             )
         """)
         
+        # Sahne outline'ları, sahneler ve diyaloglar (sahne başına satır; tek
+        # sahne değişikliği sadece kendi satırlarını yazar)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scene_outlines (
+                project_id TEXT NOT NULL,
+                scene_number INTEGER NOT NULL,
+                location TEXT NOT NULL,
+                time_of_day TEXT NOT NULL,
+                duration_seconds INTEGER NOT NULL,
+                brief_description TEXT NOT NULL,
+                beat_reference INTEGER,
+                emotional_arc TEXT,
+                PRIMARY KEY (project_id, scene_number),
+                FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scenes (
+                project_id TEXT NOT NULL,
+                scene_number INTEGER NOT NULL,
+                header TEXT NOT NULL,
+                action TEXT NOT NULL,
+                dialogue_count INTEGER,
+                duration_seconds INTEGER NOT NULL,
+                status TEXT DEFAULT 'draft',
+                revision_count INTEGER DEFAULT 0,
+                notes TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (project_id, scene_number),
+                FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dialogue_lines (
+                project_id TEXT NOT NULL,
+                scene_number INTEGER NOT NULL,
+                line_index INTEGER NOT NULL,
+                character TEXT NOT NULL,
+                line TEXT NOT NULL,
+                parenthetical TEXT,
+                PRIMARY KEY (project_id, scene_number, line_index),
+                FOREIGN KEY (project_id, scene_number)
+                    REFERENCES scenes(project_id, scene_number) ON DELETE CASCADE
+            )
+        """)
+        # Sahneleri tablolara taşınmış senaryolar (eski JSON kolonları dokunulmadan kalır)
+        self._ensure_column(cursor, "screenplays", "scenes_migrated", "INTEGER DEFAULT 0")
+        self._migrate_screenplay_json(cursor)
+        
         # Context tablosu (token kullanımı geçmişi)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS context_state (
@@ -143,37 +261,350 @@ class Database:
             )
         """)
         
-        self.connection.commit()
+        # Chat Turns tablosu (chat geçmişi; restart sonrası chat bundan kurulur)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS chat_turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT NOT NULL,
+                chat_id TEXT NOT NULL,
+                module TEXT NOT NULL,
+                role TEXT NOT NULL,
+                kind TEXT,
+                content TEXT NOT NULL,
+                token_count INTEGER DEFAULT 0,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_chat_turns_chat ON chat_turns(chat_id, id)
+        """)
+        self._ensure_column(cursor, "chat_turns", "kind", "TEXT")
+        
+        # Source Files tablosu (Files API handle'ları - 48 saatte süresi dolar)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS source_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                local_path TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                uri TEXT NOT NULL,
+                mime_type TEXT,
+                state TEXT NOT NULL,
+                expires_at TEXT,
+                uploaded_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
+                UNIQUE(project_id, sha256)
+            )
+        """)
+        
+        # Module Caches tablosu (cache_id -> Gemini cache adı eşlemesi)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS module_caches (
+                cache_id TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                cache_name TEXT NOT NULL,
+                model TEXT NOT NULL,
+                token_count INTEGER DEFAULT 0,
+                ttl_seconds INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                expires_at TEXT NOT NULL,
+                FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Shared Caches tablosu (projeler arası paylaşılan system prompt cache'leri;
+        # referanslar module_caches satırlarıdır)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS shared_caches (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                cache_name TEXT NOT NULL,
+                token_count INTEGER DEFAULT 0,
+                ttl_seconds INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                expires_at TEXT NOT NULL
+            )
+        """)
+        
+        # Batch Jobs tablosu (Batch API işleri; sonuçlar tamamlanınca uygulanır)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS batch_jobs (
+                job_name TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                module TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                model TEXT NOT NULL,
+                state TEXT NOT NULL,
+                request_keys TEXT NOT NULL,
+                error TEXT,
+                applied INTEGER DEFAULT 0,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_batch_jobs_project ON batch_jobs(project_id, created_at)
+        """)
+        
+        # Usage Ledger tablosu (çağrı başına token kullanımı ve maliyet; sadece
+        # eklenir, proje silinse de harcama geçmişi kalır)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usage_ledger (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT NOT NULL,
+                module TEXT,
+                step TEXT,
+                scene_number INTEGER,
+                model TEXT NOT NULL,
+                batch INTEGER DEFAULT 0,
+                prompt_tokens INTEGER DEFAULT 0,
+                cached_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                thinking_tokens INTEGER DEFAULT 0,
+                total_tokens INTEGER DEFAULT 0,
+                cost_usd REAL DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_usage_ledger_project ON usage_ledger(project_id, created_at)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_usage_ledger_step ON usage_ledger(step, created_at)
+        """)
+        
+        # Kurulum kimliği - bu kurulumun oluşturduğu uzak kaynakların
+        # display_name etiketi (aynı API key'i paylaşan kurulumlar birbirinin
+        # cache/dosyalarını silmesin diye)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS installation (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO installation (key, value, created_at)
+            VALUES ('installation_id', ?, ?)
+        """, (uuid.uuid4().hex[:12], datetime.now().isoformat()))
+        
+        cursor.execute("COMMIT")
         logger.info("Veritabanı tabloları oluşturuldu")
     
+    @staticmethod
+    def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> None:
+        """Eski veritabanlarında eksik kolonu ekle"""
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"Kolon eklendi: {table}.{column}")
+    
+    @staticmethod
+    def _migrate_screenplay_json(cursor: sqlite3.Cursor) -> None:
+        """
+        Eski screenplays.scenes_json / scene_outlines_json kolonlarını
+        sahne tablolarına kopyala.
+        
+        Eski kolonlar değiştirilmez (önceki sürüme dönülürse senaryo
+        taşındığı haliyle okunur); taşınan satır scenes_migrated ile
+        işaretlenir. Aynı numaralı kayıtlardan ilki alınır (API de ilkini
+        düzenleyip onaylıyordu), diğerleri uyarı ile JSON kolonunda kalır.
+        """
+        rows = cursor.execute("""
+            SELECT project_id, scene_outlines_json, scenes_json FROM screenplays
+            WHERE COALESCE(scenes_migrated, 0) = 0
+        """).fetchall()
+        if not rows:
+            return
+        
+        now = datetime.now().isoformat()
+        for project_id, outlines_json, scenes_json in rows:
+            outlines = json.loads(outlines_json or "[]")
+            scenes = json.loads(scenes_json or "[]")
+            skipped: Dict[str, List[int]] = {"outline": [], "sahne": []}
+            
+            for o in outlines:
+                inserted = cursor.execute("""
+                    INSERT OR IGNORE INTO scene_outlines (
+                        project_id, scene_number, location, time_of_day, duration_seconds,
+                        brief_description, beat_reference, emotional_arc
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    project_id, o["scene_number"], o["location"], o["time_of_day"], o["duration_seconds"],
+                    o["brief_description"], o.get("beat_reference"), o.get("emotional_arc")
+                )).rowcount
+                if not inserted:
+                    skipped["outline"].append(o["scene_number"])
+            
+            for s in scenes:
+                dialogue = s.get("dialogue")
+                inserted = cursor.execute("""
+                    INSERT OR IGNORE INTO scenes (
+                        project_id, scene_number, header, action, dialogue_count, duration_seconds,
+                        status, revision_count, notes, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    project_id, s["scene_number"], s["header"], s["action"],
+                    None if dialogue is None else len(dialogue), s["duration_seconds"],
+                    s.get("status", "draft"), s.get("revision_count", 0), s.get("notes"), now
+                )).rowcount
+                if not inserted:
+                    skipped["sahne"].append(s["scene_number"])
+                    continue
+                cursor.executemany("""
+                    INSERT INTO dialogue_lines (
+                        project_id, scene_number, line_index, character, line, parenthetical
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (project_id, s["scene_number"], i, d["character"], d["line"], d.get("parenthetical"))
+                    for i, d in enumerate(dialogue or [])
+                ])
+            
+            cursor.execute(
+                "UPDATE screenplays SET scenes_migrated = 1 WHERE project_id = ?", (project_id,)
+            )
+            for kind, numbers in skipped.items():
+                if numbers:
+                    logger.warning(
+                        f"Aynı numaralı {kind} kayıtları taşınmadı ({project_id}, numara: {numbers}); "
+                        f"ilki kullanılıyor, diğerleri eski JSON kolonunda duruyor"
+                    )
+            if outlines or scenes:
+                logger.info(
+                    f"Sahneler tablolara taşındı: {project_id} "
+                    f"({len(outlines)} outline, {len(scenes)} sahne)"
+                )
+    
+    # ==================== YAZICI THREAD ====================
+    
+    def _submit(self, batch: WriteBatch) -> WriteResult:
+        """Batch'i yazıcıya gönder ve commit'i bekle"""
+        if not batch.statements:
+            return WriteResult(rowcount=0, lastrowid=None)
+        self._ensure_writer()
+        batch.queued_at = time.monotonic()
+        self._writes.put(batch)
+        return batch.future.result()
+    
+    def _ensure_writer(self) -> None:
+        """Yazıcı thread'i gerekiyorsa başlat (close() sonrası da)"""
+        if self._writer and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+            self._writer.start()
+    
+    def _writer_loop(self) -> None:
+        conn = self._writer_connection()
+        while True:
+            batch = self._writes.get()
+            if batch is None:
+                return
+            
+            # Kuyrukta bekleyenleri aynı commit'e topla
+            group = [batch]
+            stop = False
+            while len(group) < self.MAX_GROUP:
+                try:
+                    queued = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is None:
+                    stop = True
+                    break
+                group.append(queued)
+            
+            self._commit_group(conn, group)
+            if stop:
+                return
+    
+    def _commit_group(self, conn: sqlite3.Connection, group: List[WriteBatch]) -> None:
+        """Batch'leri tek transaction'da uygula; her batch kendi SAVEPOINT'inde"""
+        started = time.monotonic()
+        results: List[Tuple[WriteBatch, Any]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for batch in group:
+                results.append((batch, self._apply(conn, batch)))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN/COMMIT hatası: hiçbir batch uygulanmadı
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error(f"SQL commit hatası: {e}")
+            self._stats["errors"] += len(group)
+            for batch in group:
+                batch.future.set_exception(e)
+            return
+        
+        commit_ms = (time.monotonic() - started) * 1000
+        self._stats["commits"] += 1
+        self._commit_ms.append(commit_ms)
+        for batch, result in results:
+            self._stats["batches"] += 1
+            self._stats["statements"] += len(batch.statements)
+            self._wait_ms.append((started - batch.queued_at) * 1000)
+            if isinstance(result, Exception):
+                self._stats["errors"] += 1
+                batch.future.set_exception(result)
+            else:
+                batch.future.set_result(result)
+    
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, batch: WriteBatch) -> Any:
+        """Batch'i SAVEPOINT içinde uygula; hata batch'e döner, grup sürer"""
+        conn.execute("SAVEPOINT batch")
+        try:
+            cursor = conn.cursor()
+            for query, params, many in batch.statements:
+                if many:
+                    cursor.executemany(query, params)
+                else:
+                    cursor.execute(query, params)
+        except Exception as e:
+            conn.execute("ROLLBACK TO batch")
+            conn.execute("RELEASE batch")
+            logger.error(f"SQL hatası: {batch.statements[-1][0].strip()[:100]}... - {e}")
+            return e
+        conn.execute("RELEASE batch")
+        return WriteResult(rowcount=cursor.rowcount, lastrowid=cursor.lastrowid)
+    
+    # ==================== SORGULAR ====================
+    
     @contextmanager
     def transaction(self):
-        """Transaction context manager"""
-        cursor = self.connection.cursor()
+        """
+        Yazma transaction'ı: bloktaki ifadeler tek batch olarak commit edilir.
+        
+        Blok içinde ifadeler toplanır, sonuçları okunamaz; blok hata ile
+        biterse hiçbiri gönderilmez.
+        """
+        batch = WriteBatch()
+        yield batch
         try:
-            yield cursor
-            self.connection.commit()
+            self._submit(batch)
         except Exception as e:
-            self.connection.rollback()
             logger.error(f"Transaction hatası: {e}")
             raise
     
-    def execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
-        """SQL sorgusu çalıştır"""
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            self.connection.commit()
-            return cursor
-        except Exception as e:
-            logger.error(f"SQL hatası: {query[:100]}... - {e}")
-            raise
+    def execute(self, query: str, params: tuple = ()) -> WriteResult:
+        """Yazma sorgusu çalıştır (commit'e kadar bekler)"""
+        batch = WriteBatch()
+        batch.execute(query, params)
+        return self._submit(batch)
     
     def execute_many(self, query: str, params_list: List[tuple]) -> None:
-        """Çoklu SQL sorgusu çalıştır"""
-        cursor = self.connection.cursor()
-        cursor.executemany(query, params_list)
-        self.connection.commit()
+        """Çoklu yazma sorgusu çalıştır (tek transaction)"""
+        batch = WriteBatch()
+        batch.executemany(query, params_list)
+        self._submit(batch)
     
     def fetch_one(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
         """Tek satır getir"""
@@ -187,21 +618,56 @@ class Database:
         cursor.execute(query, params)
         return cursor.fetchall()
     
+    # ==================== METRİKLER ====================
+    
+    def stats(self) -> Dict[str, Any]:
+        """Yazma kuyruğu ve gecikme metrikleri (son LATENCY_WINDOW batch)"""
+        return {
+            **self._stats,
+            "queue_depth": self._writes.qsize(),
+            "readers": len(self._readers),
+            "queue_wait_ms": self._percentiles(list(self._wait_ms)),
+            "commit_ms": self._percentiles(list(self._commit_ms))
+        }
+    
+    @staticmethod
+    def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+        if not values:
+            return {"p50": None, "p95": None, "p99": None}
+        values = sorted(values)
+        return {
+            f"p{p}": round(values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))], 3)
+            for p in (50, 95, 99)
+        }
+    
     def close(self) -> None:
-        """Bağlantıyı kapat"""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
-            logger.info("Veritabanı bağlantısı kapatıldı")
+        """Bekleyen yazmaları bitir, yazıcıyı durdur ve bağlantıları kapat"""
+        with self._writer_lock:
+            if self._writer and self._writer.is_alive():
+                self._writes.put(None)
+                self._writer.join()
+            self._writer = None
+        if self._writer_conn:
+            self._writer_conn.close()
+            self._writer_conn = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+        logger.info("Veritabanı bağlantısı kapatıldı")
 
 
 # Global instance
 _db_instance: Optional[Database] = None
+_db_lock = threading.Lock()
 
 
-def get_db(db_path: str = "data/filmstudio.db") -> Database:
+def get_db(db_path: str = Database.DEFAULT_PATH) -> Database:
     """Global veritabanı instance al"""
     global _db_instance
     if _db_instance is None:
-        _db_instance = Database(db_path)
+        with _db_lock:
+            if _db_instance is None:
+                _db_instance = Database(db_path)
     return _db_instance
@@ -5,6 +5,8 @@ Proje CRUD işlemleri ve veritabanı yönetimi.
 
 import json
 import logging
+import threading
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from pathlib import Path
@@ -14,11 +16,26 @@ from ..models.project import (
     Project, ProjectConfig, ModuleType, ModuleProgress,
     TokenUsage, CacheInfo
 )
-from ..models.screenplay import Screenplay, ProjectStatus
+from ..models.screenplay import Screenplay, LazyScreenplay, ProjectStatus
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ProjectUnitOfWork:
+    """
+    Tek transaction'da kaydedilecek proje durumu.
+    
+    None bırakılan bölümler bu kaydetmenin parçası değildir. Repository
+    her bölümün son yazılan halini tutar; sadece değişen alanlar yazılır.
+    """
+    project_id: str
+    project: Optional[Project] = None
+    context_components: Optional[Dict[str, Any]] = None
+    context_usage: Optional[TokenUsage] = None
+    active_chats: Optional[Dict[str, str]] = None
+
+
 class ProjectRepository:
     """
     Proje Repository.
@@ -34,6 +51,11 @@ class ProjectRepository:
         """
         self.db = db or get_db()
         self._cache: Dict[str, Project] = {}  # RAM önbellek
+        
+        # Proje durumunun son yazılan hali (kirli alan tespiti için)
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._screenplay_snapshots: Dict[str, Dict[str, Any]] = {}
+        self._state_lock = threading.Lock()
     
     # ==================== PROJECT CRUD ====================
     
@@ -65,40 +87,40 @@ class ProjectRepository:
             updated_at=datetime.now()
         )
         
-        # Veritabanına kaydet
-        self.db.execute("""
-            INSERT INTO projects (
-                id, name, config_json, source_file_uri, source_file_name,
-                total_token_usage_json, active_caches_json, output_files_json,
-                created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            project_id,
-            name,
-            config.model_dump_json(),
-            None,
-            None,
-            project.total_token_usage.model_dump_json(),
-            json.dumps([]),
-            json.dumps([]),
-            now,
-            now
-        ))
-        
-        # Modül progress kayıtlarını oluştur
-        for module in ModuleType:
-            self.db.execute("""
+        # Veritabanına kaydet (proje, modül ilerlemeleri ve context tek transaction'da)
+        with self.db.transaction() as batch:
+            batch.execute("""
+                INSERT INTO projects (
+                    id, name, config_json, source_file_uri, source_file_name,
+                    total_token_usage_json, active_caches_json, output_files_json,
+                    created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                project_id,
+                name,
+                config.model_dump_json(),
+                None,
+                None,
+                project.total_token_usage.model_dump_json(),
+                json.dumps([]),
+                json.dumps([]),
+                now,
+                now
+            ))
+            
+            # Modül progress kayıtlarını oluştur
+            batch.executemany("""
                 INSERT INTO module_progress (
                     project_id, module, is_started, is_completed,
                     progress_percentage, current_step
                 ) VALUES (?, ?, 0, 0, 0, NULL)
-            """, (project_id, module.value))
-        
-        # Context state oluştur
-        self.db.execute("""
-            INSERT INTO context_state (project_id, components_json, total_usage_json, max_tokens)
-            VALUES (?, '{}', '{}', 1000000)
-        """, (project_id,))
+            """, [(project_id, module.value) for module in ModuleType])
+            
+            # Context state oluştur
+            batch.execute("""
+                INSERT INTO context_state (project_id, components_json, total_usage_json, max_tokens)
+                VALUES (?, '{}', '{}', 1000000)
+            """, (project_id,))
         
         # Cache'e ekle
         self._cache[project_id] = project
@@ -156,67 +178,12 @@ class ProjectRepository:
     
     def update_project(self, project: Project) -> None:
         """
-        Projeyi güncelle.
+        Projeyi güncelle (sadece değişen alanlar, tek transaction).
         
         Args:
             project: Güncellenecek proje
         """
-        now = datetime.now().isoformat()
-        
-        # Active caches JSON olarak serialize et
-        caches_json = json.dumps([
-            c.model_dump(mode="json") for c in project.active_caches
-        ])
-        
-        self.db.execute("""
-            UPDATE projects SET
-                name = ?,
-                config_json = ?,
-                source_file_uri = ?,
-                source_file_name = ?,
-                total_token_usage_json = ?,
-                active_caches_json = ?,
-                output_files_json = ?,
-                updated_at = ?
-            WHERE id = ?
-        """, (
-            project.name,
-            project.config.model_dump_json(),
-            project.source_file_uri,
-            project.source_file_name,
-            project.total_token_usage.model_dump_json(),
-            caches_json,
-            json.dumps(project.output_files),
-            now,
-            project.id
-        ))
-        
-        # Module progress güncelle
-        for mp in project.module_progress:
-            self.db.execute("""
-                UPDATE module_progress SET
-                    is_started = ?,
-                    is_completed = ?,
-                    progress_percentage = ?,
-                    current_step = ?,
-                    total_steps = ?,
-                    completed_steps = ?
-                WHERE project_id = ? AND module = ?
-            """, (
-                int(mp.is_started),
-                int(mp.is_completed),
-                mp.progress_percentage,
-                mp.current_step,
-                mp.total_steps,
-                mp.completed_steps,
-                project.id,
-                mp.module.value
-            ))
-        
-        # Cache güncelle
-        self._cache[project.id] = project
-        
-        logger.debug(f"Proje güncellendi: {project.id}")
+        self.save_state(ProjectUnitOfWork(project.id, project=project))
     
     def delete_project(self, project_id: str) -> bool:
         """
@@ -236,6 +203,8 @@ class ProjectRepository:
         # Cache'den sil
         if project_id in self._cache:
             del self._cache[project_id]
+        self._snapshots.pop(project_id, None)
+        self._screenplay_snapshots.pop(project_id, None)
         
         success = cursor.rowcount > 0
         if success:
@@ -270,100 +239,171 @@ class ProjectRepository:
     
     # ==================== SCREENPLAY CRUD ====================
     
-    def save_screenplay(self, project_id: str, screenplay: Screenplay) -> None:
+    SCREENPLAY_COLUMNS = (
+        "title", "source_summary", "concepts_json", "selected_concept_index",
+        "protagonist_json", "beat_sheet_json", "total_duration_minutes",
+        "status", "optimization_report_json"
+    )
+    
+    def save_screenplay(self, project_id: str, screenplay: Screenplay) -> int:
         """
         Senaryoyu kaydet.
         
+        Senaryo satırı, outline'lar ve sahneler son yazılan halleriyle
+        karşılaştırılır; sadece değişen kolonlar ve değişen sahnelerin
+        satırları tek transaction'da yazılır. Sahne eklemek veya onaylamak
+        senaryo uzunluğundan bağımsız olarak tek sahne satırı (ve o sahnenin
+        diyalogları) yazar. LazyScreenplay'in hiç yüklenmemiş bölümleri
+        değişmemiştir, atlanır.
+        
         Args:
             project_id: Proje ID
             screenplay: Kaydedilecek senaryo
+        
+        Returns:
+            Yazılan ifade sayısı (0 ise commit yapılmadı)
         """
-        now = datetime.now().isoformat()
+        unloaded = screenplay.unloaded_fields() if isinstance(screenplay, LazyScreenplay) else []
         
-        # JSON serialize
-        concepts_json = json.dumps([c.model_dump() for c in screenplay.concepts])
-        protagonist_json = screenplay.protagonist.model_dump_json() if screenplay.protagonist else None
-        beat_sheet_json = screenplay.beat_sheet.model_dump_json() if screenplay.beat_sheet else None
-        scene_outlines_json = json.dumps([o.model_dump() for o in screenplay.scene_outlines])
-        scenes_json = json.dumps([s.model_dump() for s in screenplay.scenes])
-        optimization_json = screenplay.optimization_report.model_dump_json() if screenplay.optimization_report else None
-        
-        # UPSERT
-        existing = self.db.fetch_one("""
-            SELECT id FROM screenplays WHERE project_id = ?
-        """, (project_id,))
+        if project_id not in self._screenplay_snapshots:
+            # İlk kaydetme: tablolardaki son hal okunur (get_screenplay snapshot'ı doldurur)
+            self.get_screenplay(project_id)
+        snapshot = self._screenplay_snapshots.get(project_id)
+        if snapshot and snapshot["row"] is not None:
+            # Yüklenmeden üzerine yazılan bölümlerin tablodaki hali
+            if "scene_outlines" not in unloaded and "outlines" not in snapshot:
+                self._load_scene_outlines(project_id)
+            if "scenes" not in unloaded and "scenes" not in snapshot:
+                self._load_scenes(project_id)
         
-        if existing:
-            self.db.execute("""
-                UPDATE screenplays SET
-                    title = ?,
-                    source_summary = ?,
-                    concepts_json = ?,
-                    selected_concept_index = ?,
-                    protagonist_json = ?,
-                    beat_sheet_json = ?,
-                    scene_outlines_json = ?,
-                    scenes_json = ?,
-                    total_duration_minutes = ?,
-                    status = ?,
-                    optimization_report_json = ?,
-                    updated_at = ?
-                WHERE project_id = ?
-            """, (
-                screenplay.title,
-                screenplay.source_summary,
-                concepts_json,
-                screenplay.selected_concept_index,
-                protagonist_json,
-                beat_sheet_json,
-                scene_outlines_json,
-                scenes_json,
-                screenplay.total_duration_minutes,
-                screenplay.status.value if isinstance(screenplay.status, ProjectStatus) else screenplay.status,
-                optimization_json,
-                now,
-                project_id
-            ))
-        else:
-            self.db.execute("""
-                INSERT INTO screenplays (
-                    project_id, title, source_summary, concepts_json,
-                    selected_concept_index, protagonist_json, beat_sheet_json,
-                    scene_outlines_json, scenes_json, total_duration_minutes,
-                    status, optimization_report_json, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                project_id,
-                screenplay.title,
-                screenplay.source_summary,
-                concepts_json,
-                screenplay.selected_concept_index,
-                protagonist_json,
-                beat_sheet_json,
-                scene_outlines_json,
-                scenes_json,
-                screenplay.total_duration_minutes,
-                screenplay.status.value if isinstance(screenplay.status, ProjectStatus) else screenplay.status,
-                optimization_json,
-                now,
-                now
-            ))
+        with self._state_lock:
+            snapshot = self._screenplay_snapshots.get(project_id, {"row": None})
+            
+            now = datetime.now().isoformat()
+            row = self._screenplay_columns(screenplay)
+            outlines = {} if "scene_outlines" in unloaded else {
+                o.scene_number: self._outline_values(o) for o in screenplay.scene_outlines
+            }
+            scenes = {} if "scenes" in unloaded else {
+                s.scene_number: self._scene_values(s) for s in screenplay.scenes
+            }
+            if "scenes" not in unloaded and len(scenes) != len(screenplay.scenes):
+                # Sahneler numara ile saklanır; kopya sessizce diğerinin üzerine yazılmasın
+                raise ValueError(
+                    f"Aynı numaralı sahneler var ({project_id}); sahneler Screenplay.put_scene ile eklenmeli"
+                )
+            statements = 0
+            
+            with self.db.transaction() as batch:
+                previous_row = snapshot["row"]
+                if previous_row is None:
+                    batch.execute(f"""
+                        INSERT INTO screenplays (
+                            project_id, {", ".join(self.SCREENPLAY_COLUMNS)},
+                            scenes_migrated, created_at, updated_at
+                        ) VALUES (?, {", ".join("?" * len(self.SCREENPLAY_COLUMNS))}, 1, ?, ?)
+                    """, (project_id, *row.values(), now, now))
+                    statements += 1
+                else:
+                    dirty = [c for c in self.SCREENPLAY_COLUMNS if previous_row.get(c, ...) != row[c]]
+                    if dirty:
+                        assignments = ", ".join(f"{c} = ?" for c in dirty + ["updated_at"])
+                        batch.execute(
+                            f"UPDATE screenplays SET {assignments} WHERE project_id = ?",
+                            (*(row[c] for c in dirty), now, project_id)
+                        )
+                        statements += 1
+                
+                # Outline'lar
+                previous_outlines = outlines if "scene_outlines" in unloaded else snapshot.get("outlines", {})
+                removed = [(project_id, n) for n in previous_outlines if n not in outlines]
+                upserts = [
+                    (project_id, n, *values)
+                    for n, values in outlines.items() if previous_outlines.get(n) != values
+                ]
+                if removed:
+                    batch.executemany(
+                        "DELETE FROM scene_outlines WHERE project_id = ? AND scene_number = ?", removed
+                    )
+                if upserts:
+                    batch.executemany("""
+                        INSERT OR REPLACE INTO scene_outlines (
+                            project_id, scene_number, location, time_of_day, duration_seconds,
+                            brief_description, beat_reference, emotional_arc
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, upserts)
+                statements += len(removed) + len(upserts)
+                
+                # Sahneler (diyaloglar sahne silinince CASCADE ile silinir)
+                previous_scenes = scenes if "scenes" in unloaded else snapshot.get("scenes", {})
+                removed = [(project_id, n) for n in previous_scenes if n not in scenes]
+                if removed:
+                    batch.executemany(
+                        "DELETE FROM scenes WHERE project_id = ? AND scene_number = ?", removed
+                    )
+                    statements += len(removed)
+                for number, (values, dialogue) in scenes.items():
+                    previous = previous_scenes.get(number)
+                    if previous is None or previous[0] != values:
+                        batch.execute("""
+                            INSERT INTO scenes (
+                                project_id, scene_number, header, action, dialogue_count,
+                                duration_seconds, status, revision_count, notes, updated_at
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (project_id, scene_number) DO UPDATE SET
+                                header = excluded.header,
+                                action = excluded.action,
+                                dialogue_count = excluded.dialogue_count,
+                                duration_seconds = excluded.duration_seconds,
+                                status = excluded.status,
+                                revision_count = excluded.revision_count,
+                                notes = excluded.notes,
+                                updated_at = excluded.updated_at
+                        """, (project_id, number, *values, now))
+                        statements += 1
+                    if previous is None or previous[1] != dialogue:
+                        if previous is not None and previous[1]:
+                            batch.execute(
+                                "DELETE FROM dialogue_lines WHERE project_id = ? AND scene_number = ?",
+                                (project_id, number)
+                            )
+                            statements += 1
+                        if dialogue:
+                            batch.executemany("""
+                                INSERT INTO dialogue_lines (
+                                    project_id, scene_number, line_index, character, line, parenthetical
+                                ) VALUES (?, ?, ?, ?, ?, ?)
+                            """, [(project_id, number, i, *line) for i, line in enumerate(dialogue)])
+                            statements += 1
+            
+            # Yazma başarılıysa son hali güncelle
+            written = {"row": row}
+            if "scene_outlines" not in unloaded:
+                written["outlines"] = outlines
+            if "scenes" not in unloaded:
+                written["scenes"] = scenes
+            self._screenplay_snapshots[project_id] = {**snapshot, **written}
         
-        logger.debug(f"Screenplay kaydedildi: {project_id}")
+        logger.debug(f"Screenplay kaydedildi: {project_id} ({statements} ifade)")
+        return statements
     
     def get_screenplay(self, project_id: str) -> Optional[Screenplay]:
         """
         Senaryoyu getir.
         
+        Veritabanı satırları güvenilir olduğundan modeller doğrulamasız
+        (model_construct) kurulur. Sahne outline'ları ve sahneler ilk
+        erişimde yüklenir (bkz. LazyScreenplay); açılış maliyeti senaryo
+        uzunluğundan bağımsızdır.
+        
         Args:
             project_id: Proje ID
             
         Returns:
-            Screenplay instance veya None
+            LazyScreenplay instance veya None
         """
         from ..models.screenplay import (
-            FilmConcept, CharacterCard, BeatSheet, Beat,
-            SceneOutline, Scene, DialogueLine, OptimizationReport
+            FilmConcept, CharacterCard, BeatSheet, Beat, StoryMethodology, LazyScreenplay
         )
         
         row = self.db.fetch_one("""
@@ -374,27 +414,279 @@ class ProjectRepository:
             return None
         
         # JSON deserialize
-        concepts = [FilmConcept(**c) for c in json.loads(row["concepts_json"] or "[]")]
-        protagonist = CharacterCard.model_validate_json(row["protagonist_json"]) if row["protagonist_json"] else None
-        beat_sheet = BeatSheet.model_validate_json(row["beat_sheet_json"]) if row["beat_sheet_json"] else None
-        scene_outlines = [SceneOutline(**o) for o in json.loads(row["scene_outlines_json"] or "[]")]
-        scenes = [Scene(**s) for s in json.loads(row["scenes_json"] or "[]")]
-        optimization = OptimizationReport.model_validate_json(row["optimization_report_json"]) if row["optimization_report_json"] else None
-        
-        return Screenplay(
+        concepts = [FilmConcept.model_construct(**c) for c in json.loads(row["concepts_json"] or "[]")]
+        protagonist = None
+        if row["protagonist_json"]:
+            protagonist = CharacterCard.model_construct(**json.loads(row["protagonist_json"]))
+        beat_sheet = None
+        if row["beat_sheet_json"]:
+            data = json.loads(row["beat_sheet_json"])
+            beat_sheet = BeatSheet.model_construct(**{
+                **data,
+                "methodology": StoryMethodology(data["methodology"]),
+                "beats": [Beat.model_construct(**b) for b in data["beats"]]
+            })
+        
+        screenplay = LazyScreenplay.construct_lazy(
+            loaders={
+                "scene_outlines": lambda: self._load_scene_outlines(project_id),
+                "scenes": lambda: self._load_scenes(project_id)
+            },
             title=row["title"],
             source_summary=row["source_summary"],
             concepts=concepts,
             selected_concept_index=row["selected_concept_index"],
             protagonist=protagonist,
             beat_sheet=beat_sheet,
-            scene_outlines=scene_outlines,
-            scenes=scenes,
             total_duration_minutes=row["total_duration_minutes"],
-            status=row["status"],
-            optimization_report=optimization
+            status=ProjectStatus(row["status"]),
+            optimization_report=row["optimization_report_json"]
+        )
+        
+        # Okunan hal son yazılan haldir (sonraki kaydetme sadece farkı yazar);
+        # outline ve sahnelerinki yüklendiklerinde eklenir
+        with self._state_lock:
+            self._screenplay_snapshots[project_id] = {"row": self._screenplay_columns(screenplay)}
+        return screenplay
+    
+    def _load_scene_outlines(self, project_id: str) -> List[Any]:
+        """Sahne outline'larını yükle ve son yazılan hali kaydet"""
+        from ..models.screenplay import SceneOutline
+        
+        outlines = [
+            SceneOutline.model_construct(**{k: o[k] for k in o.keys() if k != "project_id"})
+            for o in self.db.fetch_all("""
+                SELECT * FROM scene_outlines WHERE project_id = ? ORDER BY scene_number
+            """, (project_id,))
+        ]
+        with self._state_lock:
+            self._screenplay_snapshots.setdefault(project_id, {"row": None})["outlines"] = {
+                o.scene_number: self._outline_values(o) for o in outlines
+            }
+        return outlines
+    
+    def count_scenes(self, project_id: str) -> int:
+        """Yazılmış sahne sayısı (sahneleri yüklemeden)"""
+        row = self.db.fetch_one("SELECT COUNT(*) AS n FROM scenes WHERE project_id = ?", (project_id,))
+        return row["n"]
+    
+    def _load_scenes(self, project_id: str) -> List[Any]:
+        """Sahneleri (diyaloglarıyla) yükle ve son yazılan hali kaydet"""
+        from ..models.screenplay import Scene, DialogueLine
+        
+        dialogue: Dict[int, List[DialogueLine]] = {}
+        for d in self.db.fetch_all("""
+            SELECT * FROM dialogue_lines WHERE project_id = ? ORDER BY scene_number, line_index
+        """, (project_id,)):
+            dialogue.setdefault(d["scene_number"], []).append(DialogueLine.model_construct(
+                character=d["character"], line=d["line"], parenthetical=d["parenthetical"]
+            ))
+        
+        scenes = [
+            Scene.model_construct(
+                scene_number=s["scene_number"],
+                header=s["header"],
+                action=s["action"],
+                dialogue=None if s["dialogue_count"] is None else dialogue.get(s["scene_number"], []),
+                duration_seconds=s["duration_seconds"],
+                status=s["status"],
+                revision_count=s["revision_count"],
+                notes=s["notes"]
+            )
+            for s in self.db.fetch_all("""
+                SELECT * FROM scenes WHERE project_id = ? ORDER BY scene_number
+            """, (project_id,))
+        ]
+        with self._state_lock:
+            self._screenplay_snapshots.setdefault(project_id, {"row": None})["scenes"] = {
+                s.scene_number: self._scene_values(s) for s in scenes
+            }
+        return scenes
+    
+    @staticmethod
+    def _screenplay_columns(screenplay: Screenplay) -> Dict[str, Any]:
+        """screenplays satırının kolon değerleri (sahneler hariç)"""
+        return {
+            "title": screenplay.title,
+            "source_summary": screenplay.source_summary,
+            "concepts_json": json.dumps([c.model_dump() for c in screenplay.concepts]),
+            "selected_concept_index": screenplay.selected_concept_index,
+            "protagonist_json": screenplay.protagonist.model_dump_json() if screenplay.protagonist else None,
+            "beat_sheet_json": screenplay.beat_sheet.model_dump_json() if screenplay.beat_sheet else None,
+            "total_duration_minutes": screenplay.total_duration_minutes,
+            "status": screenplay.status.value if isinstance(screenplay.status, ProjectStatus) else screenplay.status,
+            "optimization_report_json": screenplay.optimization_report
+        }
+    
+    @staticmethod
+    def _outline_values(outline: Any) -> tuple:
+        """scene_outlines satırı (anahtar hariç)"""
+        return (
+            outline.location, outline.time_of_day, outline.duration_seconds,
+            outline.brief_description, outline.beat_reference, outline.emotional_arc
         )
     
+    @staticmethod
+    def _scene_values(scene: Any) -> tuple:
+        """(scenes satırı, diyalog satırları) (anahtar ve updated_at hariç)"""
+        dialogue = tuple((d.character, d.line, d.parenthetical) for d in scene.dialogue or [])
+        return (
+            (
+                scene.header, scene.action, None if scene.dialogue is None else len(dialogue),
+                scene.duration_seconds, scene.status, scene.revision_count, scene.notes
+            ),
+            dialogue
+        )
+    
+    # ==================== PROJE DURUMU (UNIT OF WORK) ====================
+    
+    # Kaydetme metrikleri (tüm repository'ler ortak)
+    _save_stats = {"saves": 0, "clean_saves": 0, "commits": 0, "statements": 0}
+    _save_stats_lock = threading.Lock()
+    
+    PROJECT_COLUMNS = (
+        "name", "config_json", "source_file_uri", "source_file_name",
+        "total_token_usage_json", "active_caches_json", "output_files_json"
+    )
+    
+    def save_state(self, unit: ProjectUnitOfWork) -> int:
+        """
+        Proje durumunu tek transaction'da kaydet.
+        
+        Her bölüm son yazılan haliyle karşılaştırılır; sadece değişen
+        kolonlar, modül ilerlemeleri ve chat kayıtları yazılır. Hiçbir şey
+        değişmediyse commit yapılmaz.
+        
+        Args:
+            unit: Kaydedilecek bölümler
+        
+        Returns:
+            Yazılan ifade sayısı (0 ise commit yapılmadı)
+        """
+        # Kirli alan tespiti ile yazma arasında başka kaydetme araya girmesin
+        with self._state_lock:
+            snapshot = self._snapshots.get(unit.project_id, {})
+            written: Dict[str, Any] = {}
+            statements = 0
+            
+            with self.db.transaction() as batch:
+                if unit.project is not None:
+                    project = unit.project
+                    columns = self._project_columns(project)
+                    previous = snapshot.get("project", {})
+                    dirty = [c for c in self.PROJECT_COLUMNS if previous.get(c, ...) != columns[c]]
+                    
+                    progress = {
+                        mp.module.value: (
+                            int(mp.is_started), int(mp.is_completed), mp.progress_percentage,
+                            mp.current_step, mp.total_steps, mp.completed_steps
+                        )
+                        for mp in project.module_progress
+                    }
+                    previous_progress = snapshot.get("module_progress", {})
+                    changed_progress = [
+                        (*values, project.id, module)
+                        for module, values in progress.items()
+                        if previous_progress.get(module) != values
+                    ]
+                    
+                    if dirty or changed_progress:
+                        assignments = ", ".join(f"{c} = ?" for c in dirty + ["updated_at"])
+                        batch.execute(
+                            f"UPDATE projects SET {assignments} WHERE id = ?",
+                            (*(columns[c] for c in dirty), datetime.now().isoformat(), project.id)
+                        )
+                        statements += 1
+                    if changed_progress:
+                        batch.executemany("""
+                            UPDATE module_progress SET
+                                is_started = ?,
+                                is_completed = ?,
+                                progress_percentage = ?,
+                                current_step = ?,
+                                total_steps = ?,
+                                completed_steps = ?
+                            WHERE project_id = ? AND module = ?
+                        """, changed_progress)
+                        statements += len(changed_progress)
+                    written["project"] = columns
+                    written["module_progress"] = progress
+                
+                if unit.context_components is not None and unit.context_usage is not None:
+                    context = (json.dumps(unit.context_components), unit.context_usage.model_dump_json())
+                    if snapshot.get("context") != context:
+                        batch.execute("""
+                            UPDATE context_state SET
+                                components_json = ?,
+                                total_usage_json = ?
+                            WHERE project_id = ?
+                        """, (*context, unit.project_id))
+                        statements += 1
+                    written["context"] = context
+                
+                if unit.active_chats is not None:
+                    chats = dict(unit.active_chats)
+                    previous_chats = snapshot.get("active_chats")
+                    if previous_chats is None:
+                        # İlk kaydetme: tablodaki eski kayıtlar bilinmiyor
+                        batch.execute("DELETE FROM active_chats WHERE project_id = ?", (unit.project_id,))
+                        statements += 1
+                        previous_chats = {}
+                    removed = [(unit.project_id, m) for m in previous_chats if m not in chats]
+                    upserts = [
+                        (unit.project_id, m, chat_id)
+                        for m, chat_id in chats.items() if previous_chats.get(m) != chat_id
+                    ]
+                    if removed:
+                        batch.executemany(
+                            "DELETE FROM active_chats WHERE project_id = ? AND module = ?", removed
+                        )
+                    if upserts:
+                        batch.executemany("""
+                            INSERT OR REPLACE INTO active_chats (project_id, module, chat_id)
+                            VALUES (?, ?, ?)
+                        """, upserts)
+                    statements += len(removed) + len(upserts)
+                    written["active_chats"] = chats
+            
+            # Yazma başarılıysa son hali güncelle
+            self._snapshots[unit.project_id] = {**snapshot, **written}
+            if unit.project is not None:
+                self._cache[unit.project_id] = unit.project
+        
+        with self._save_stats_lock:
+            stats = ProjectRepository._save_stats
+            stats["saves"] += 1
+            stats["statements"] += statements
+            if statements:
+                stats["commits"] += 1
+            else:
+                stats["clean_saves"] += 1
+        return statements
+    
+    @staticmethod
+    def _project_columns(project: Project) -> Dict[str, Any]:
+        """projects satırının kolon değerleri"""
+        return {
+            "name": project.name,
+            "config_json": project.config.model_dump_json(),
+            "source_file_uri": project.source_file_uri,
+            "source_file_name": project.source_file_name,
+            "total_token_usage_json": project.total_token_usage.model_dump_json(),
+            "active_caches_json": json.dumps([c.model_dump(mode="json") for c in project.active_caches]),
+            "output_files_json": json.dumps(project.output_files)
+        }
+    
+    @classmethod
+    def save_stats(cls) -> Dict[str, Any]:
+        """Durum kaydetme metrikleri (kaydetme başına commit ve ifade)"""
+        with cls._save_stats_lock:
+            stats = dict(cls._save_stats)
+        saves = stats["saves"]
+        stats["commits_per_save"] = round(stats["commits"] / saves, 3) if saves else 0.0
+        stats["statements_per_save"] = round(stats["statements"] / saves, 2) if saves else 0.0
+        return stats
+    
     # ==================== CONTEXT STATE ====================
     
     def save_context_state(
@@ -403,16 +695,9 @@ class ProjectRepository:
         components: Dict[str, Any],
         total_usage: TokenUsage
     ) -> None:
-        """Context state kaydet"""
-        self.db.execute("""
-            UPDATE context_state SET
-                components_json = ?,
-                total_usage_json = ?
-            WHERE project_id = ?
-        """, (
-            json.dumps(components),
-            total_usage.model_dump_json(),
-            project_id
+        """Context state kaydet (değiştiyse)"""
+        self.save_state(ProjectUnitOfWork(
+            project_id, context_components=components, context_usage=total_usage
         ))
     
     def get_context_state(self, project_id: str) -> Optional[Dict[str, Any]]:
@@ -433,18 +718,8 @@ class ProjectRepository:
     # ==================== ACTIVE CHATS ====================
     
     def save_active_chats(self, project_id: str, chats: Dict[str, str]) -> None:
-        """Active chats kaydet"""
-        # Önce mevcut kayıtları sil
-        self.db.execute("""
-            DELETE FROM active_chats WHERE project_id = ?
-        """, (project_id,))
-        
-        # Yeni kayıtları ekle
-        for module, chat_id in chats.items():
-            self.db.execute("""
-                INSERT INTO active_chats (project_id, module, chat_id)
-                VALUES (?, ?, ?)
-            """, (project_id, module, chat_id))
+        """Active chats kaydet (sadece eklenen/değişen/silinen modüller)"""
+        self.save_state(ProjectUnitOfWork(project_id, active_chats=chats))
     
     def get_active_chats(self, project_id: str) -> Dict[str, str]:
         """Active chats getir"""
@@ -454,6 +729,453 @@ class ProjectRepository:
         
         return {r["module"]: r["chat_id"] for r in rows}
     
+    # ==================== CHAT TURNS ====================
+    
+    def append_chat_turns(
+        self,
+        project_id: str,
+        chat_id: str,
+        module: str,
+        turns: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Chat turlarını geçmişe ekle.
+        
+        Args:
+            project_id: Proje ID
+            chat_id: Chat ID
+            module: Modül adı
+            turns: role, kind, content (types.Content JSON) ve token_count alanları
+        """
+        with self.db.transaction() as cursor:
+            self._insert_chat_turns(cursor, project_id, chat_id, module, turns)
+    
+    def replace_chat_turns(
+        self,
+        project_id: str,
+        chat_id: str,
+        module: str,
+        turns: List[Dict[str, Any]]
+    ) -> None:
+        """Chat geçmişini tek transaction'da yenisiyle değiştir (sıkıştırma sonrası)"""
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM chat_turns WHERE chat_id = ?", (chat_id,))
+            self._insert_chat_turns(cursor, project_id, chat_id, module, turns)
+    
+    @staticmethod
+    def _insert_chat_turns(
+        cursor: Any,
+        project_id: str,
+        chat_id: str,
+        module: str,
+        turns: List[Dict[str, Any]]
+    ) -> None:
+        now = datetime.now().isoformat()
+        cursor.executemany("""
+            INSERT INTO chat_turns (
+                project_id, chat_id, module, role, kind, content, token_count, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (project_id, chat_id, module, t["role"], t["kind"], t["content"], t["token_count"], now)
+            for t in turns
+        ])
+    
+    def get_chat_turns(self, chat_id: str, token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Chat geçmişi (eskiden yeniye).
+        
+        Args:
+            chat_id: Chat ID
+            token_budget: Verilirse sadece toplamı bu bütçeye sığan en
+                yeni turlar döner
+        """
+        if token_budget is None:
+            rows = self.db.fetch_all("""
+                SELECT role, kind, content, token_count FROM chat_turns
+                WHERE chat_id = ? ORDER BY id
+            """, (chat_id,))
+        else:
+            rows = self.db.fetch_all("""
+                SELECT role, kind, content, token_count FROM (
+                    SELECT id, role, kind, content, token_count,
+                        SUM(token_count) OVER (ORDER BY id DESC) AS running_tokens
+                    FROM chat_turns WHERE chat_id = ?
+                ) WHERE running_tokens <= ? ORDER BY id
+            """, (chat_id, token_budget))
+        
+        return [dict(r) for r in rows]
+    
+    def get_chat_history_stats(self, project_id: str) -> Dict[str, Dict[str, int]]:
+        """Modül bazında chat geçmişi büyüklüğü (tur ve token)"""
+        rows = self.db.fetch_all("""
+            SELECT module, COUNT(*) AS turns, COALESCE(SUM(token_count), 0) AS tokens
+            FROM chat_turns WHERE project_id = ? GROUP BY module
+        """, (project_id,))
+        
+        return {r["module"]: {"turns": r["turns"], "tokens": r["tokens"]} for r in rows}
+    
+    # ==================== BATCH JOBS ====================
+    
+    def save_batch_job(
+        self,
+        project_id: str,
+        job_name: str,
+        module: str,
+        kind: str,
+        model: str,
+        state: str,
+        request_keys: List[str]
+    ) -> None:
+        """
+        Gönderilen batch işini kaydet.
+        
+        Args:
+            project_id: Proje ID
+            job_name: Batch API iş adı ("batches/...")
+            module: Modül adı
+            kind: İş türü (sonuçların nereye uygulanacağı, örn. "scenes")
+            model: Model adı
+            state: JobState değeri
+            request_keys: İsteklerin key'leri (gönderim sırasıyla)
+        """
+        now = datetime.now().isoformat()
+        self.db.execute("""
+            INSERT INTO batch_jobs (
+                job_name, project_id, module, kind, model, state,
+                request_keys, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (job_name, project_id, module, kind, model, state, json.dumps(request_keys), now, now))
+    
+    def update_batch_job(
+        self,
+        job_name: str,
+        state: str,
+        error: Optional[str] = None,
+        applied: Optional[bool] = None
+    ) -> None:
+        """Batch işinin durumunu güncelle (applied verilmezse değişmez)"""
+        self.db.execute("""
+            UPDATE batch_jobs SET
+                state = ?,
+                error = COALESCE(?, error),
+                applied = COALESCE(?, applied),
+                updated_at = ?
+            WHERE job_name = ?
+        """, (
+            state,
+            error,
+            None if applied is None else int(applied),
+            datetime.now().isoformat(),
+            job_name
+        ))
+    
+    def get_batch_job(self, job_name: str) -> Optional[Dict[str, Any]]:
+        """Batch işi kaydı"""
+        row = self.db.fetch_one("SELECT * FROM batch_jobs WHERE job_name = ?", (job_name,))
+        return self._row_to_batch_job(row) if row else None
+    
+    def list_batch_jobs(
+        self,
+        project_id: str,
+        kind: Optional[str] = None,
+        pending_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Projenin batch işleri (yeniden eskiye).
+        
+        Args:
+            project_id: Proje ID
+            kind: Sadece bu türdeki işler
+            pending_only: Sadece sonuçları henüz uygulanmamış işler
+        """
+        query = "SELECT * FROM batch_jobs WHERE project_id = ?"
+        params: List[Any] = [project_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if pending_only:
+            query += " AND applied = 0"
+        rows = self.db.fetch_all(query + " ORDER BY created_at DESC", tuple(params))
+        return [self._row_to_batch_job(r) for r in rows]
+    
+    @staticmethod
+    def _row_to_batch_job(row: Any) -> Dict[str, Any]:
+        job = dict(row)
+        job["request_keys"] = json.loads(job["request_keys"])
+        job["applied"] = bool(job["applied"])
+        return job
+    
+    # ==================== USAGE LEDGER ====================
+    
+    # usage_summary gruplama anahtarları -> SQL ifadesi
+    USAGE_GROUPS = {
+        "day": "substr(created_at, 1, 10)",
+        "project": "project_id",
+        "module": "module",
+        "step": "step",
+        "model": "model"
+    }
+    
+    def append_usage(
+        self,
+        project_id: str,
+        model: str,
+        usage: TokenUsage,
+        cost_usd: float,
+        module: Optional[str] = None,
+        step: Optional[str] = None,
+        scene_number: Optional[int] = None,
+        batch: bool = False
+    ) -> None:
+        """
+        Deftere tek çağrının kullanımını ekle.
+        
+        Args:
+            project_id: Proje ID
+            model: Model adı
+            usage: Çağrının token kullanımı
+            cost_usd: Çağrı anındaki fiyatlarla maliyet
+            module: Modül adı
+            step: İş akışı adımı (örn. "write_scene")
+            scene_number: İlgili sahne (varsa)
+            batch: Batch API ile mi çalıştı
+        """
+        self.db.execute("""
+            INSERT INTO usage_ledger (
+                project_id, module, step, scene_number, model, batch,
+                prompt_tokens, cached_tokens, output_tokens, thinking_tokens,
+                total_tokens, cost_usd, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            project_id, module, step, scene_number, model, int(batch),
+            usage.prompt_tokens, usage.cached_tokens, usage.output_tokens,
+            usage.thinking_tokens, usage.total_tokens, cost_usd,
+            datetime.now().isoformat()
+        ))
+    
+    def usage_summary(
+        self,
+        group_by: str = "step",
+        project_id: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Defteri gruplayıp topla (maliyete göre azalan).
+        
+        Args:
+            group_by: USAGE_GROUPS anahtarlarından biri
+            project_id: Sadece bu projenin çağrıları
+            since: Sadece bu tarihten sonraki çağrılar
+            
+        Raises:
+            ValueError: Bilinmeyen gruplama anahtarı
+        """
+        if group_by not in self.USAGE_GROUPS:
+            raise ValueError(f"Geçersiz gruplama: {group_by} (geçerli: {', '.join(self.USAGE_GROUPS)})")
+        
+        query = f"""
+            SELECT
+                {self.USAGE_GROUPS[group_by]} AS key,
+                COUNT(*) AS calls,
+                SUM(batch) AS batch_calls,
+                SUM(prompt_tokens) AS prompt_tokens,
+                SUM(cached_tokens) AS cached_tokens,
+                SUM(output_tokens) AS output_tokens,
+                SUM(thinking_tokens) AS thinking_tokens,
+                SUM(total_tokens) AS total_tokens,
+                SUM(cost_usd) AS cost_usd
+            FROM usage_ledger WHERE 1 = 1
+        """
+        params: List[Any] = []
+        if project_id:
+            query += " AND project_id = ?"
+            params.append(project_id)
+        if since:
+            query += " AND created_at >= ?"
+            params.append(since.isoformat())
+        rows = self.db.fetch_all(query + " GROUP BY key ORDER BY cost_usd DESC", tuple(params))
+        
+        summary = []
+        for row in rows:
+            item = dict(row)
+            item["cost_usd"] = round(item["cost_usd"], 6)
+            item["cache_hit_ratio"] = (
+                round(item["cached_tokens"] / item["prompt_tokens"], 4) if item["prompt_tokens"] else 0.0
+            )
+            summary.append(item)
+        return summary
+    
+    # ==================== KURULUM ====================
+    
+    def get_installation_id(self) -> str:
+        """Bu kurulumun kimliği (veritabanı ilk oluşturulduğunda üretilir)"""
+        row = self.db.fetch_one(
+            "SELECT value FROM installation WHERE key = 'installation_id'"
+        )
+        return row["value"]
+    
+    # ==================== SOURCE FILES ====================
+    
+    def save_source_file(self, project_id: str, record: Dict[str, Any]) -> None:
+        """
+        Kaynak dosya handle'ını kaydet (proje + içerik hash'i başına tek kayıt).
+        
+        Args:
+            project_id: Proje ID
+            record: sha256, local_path, file_name, uri, mime_type, state,
+                expires_at (ISO string) ve uploaded_at alanları
+        """
+        self.db.execute("""
+            INSERT INTO source_files (
+                project_id, sha256, local_path, file_name, uri, mime_type,
+                state, expires_at, uploaded_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(project_id, sha256) DO UPDATE SET
+                local_path = excluded.local_path,
+                file_name = excluded.file_name,
+                uri = excluded.uri,
+                mime_type = excluded.mime_type,
+                state = excluded.state,
+                expires_at = excluded.expires_at,
+                uploaded_at = excluded.uploaded_at,
+                updated_at = excluded.updated_at
+        """, (
+            project_id,
+            record["sha256"],
+            record["local_path"],
+            record["file_name"],
+            record["uri"],
+            record.get("mime_type"),
+            record["state"],
+            record.get("expires_at"),
+            record["uploaded_at"],
+            datetime.now().isoformat()
+        ))
+    
+    def get_source_file(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Projenin güncel kaynak dosya handle'ı (en son kaydedilen)"""
+        row = self.db.fetch_one("""
+            SELECT * FROM source_files WHERE project_id = ?
+            ORDER BY updated_at DESC LIMIT 1
+        """, (project_id,))
+        
+        return dict(row) if row else None
+    
+    def list_source_files(self) -> List[Dict[str, Any]]:
+        """Tüm projelerin kaynak dosya handle'ları"""
+        rows = self.db.fetch_all("SELECT * FROM source_files")
+        return [dict(r) for r in rows]
+    
+    # ==================== MODULE CACHES ====================
+    
+    def save_module_cache(
+        self,
+        project_id: str,
+        cache_id: str,
+        cache_info: CacheInfo,
+        ttl_seconds: int
+    ) -> None:
+        """cache_id -> Gemini cache eşlemesini kaydet (varsa değiştir)"""
+        self.db.execute("""
+            INSERT OR REPLACE INTO module_caches (
+                cache_id, project_id, cache_name, model, token_count,
+                ttl_seconds, created_at, expires_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            cache_id,
+            project_id,
+            cache_info.cache_name,
+            cache_info.model,
+            cache_info.token_count,
+            ttl_seconds,
+            cache_info.created_at.isoformat(),
+            cache_info.expires_at.isoformat()
+        ))
+    
+    def get_module_caches(self, project_id: str) -> Dict[str, CacheInfo]:
+        """Projenin cache eşlemeleri (cache_id -> CacheInfo)"""
+        rows = self.db.fetch_all("""
+            SELECT * FROM module_caches WHERE project_id = ?
+        """, (project_id,))
+        
+        return {r["cache_id"]: self._row_to_cache_info(r) for r in rows}
+    
+    def list_module_caches(self) -> List[Dict[str, Any]]:
+        """Tüm cache eşlemeleri (projenin son güncellenme zamanı ile)"""
+        rows = self.db.fetch_all("""
+            SELECT mc.*, p.updated_at AS project_updated_at
+            FROM module_caches mc JOIN projects p ON p.id = mc.project_id
+        """)
+        return [dict(r) for r in rows]
+    
+    def update_module_cache_expiry(self, cache_name: str, expires_at: datetime) -> None:
+        """Uzatılan cache'in bitiş zamanını güncelle (paylaşılan cache'in tüm referansları dahil)"""
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                UPDATE module_caches SET expires_at = ? WHERE cache_name = ?
+            """, (expires_at.isoformat(), cache_name))
+            cursor.execute("""
+                UPDATE shared_caches SET expires_at = ? WHERE cache_name = ?
+            """, (expires_at.isoformat(), cache_name))
+    
+    def delete_module_cache(self, cache_id: str) -> None:
+        """Cache eşlemesini sil"""
+        self.db.execute("DELETE FROM module_caches WHERE cache_id = ?", (cache_id,))
+    
+    def count_cache_refs(self, cache_name: str) -> int:
+        """Aynı Gemini cache'ini kullanan modül cache eşlemesi sayısı"""
+        row = self.db.fetch_one("""
+            SELECT COUNT(*) AS refs FROM module_caches WHERE cache_name = ?
+        """, (cache_name,))
+        return row["refs"]
+    
+    # ==================== SHARED CACHES ====================
+    
+    def save_shared_cache(
+        self,
+        cache_key: str,
+        prompt_hash: str,
+        cache_info: CacheInfo,
+        ttl_seconds: int
+    ) -> None:
+        """Paylaşılan cache kaydı (model + prompt hash'i başına tek kayıt)"""
+        self.db.execute("""
+            INSERT OR REPLACE INTO shared_caches (
+                cache_key, model, prompt_hash, cache_name, token_count,
+                ttl_seconds, created_at, expires_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            cache_key,
+            cache_info.model,
+            prompt_hash,
+            cache_info.cache_name,
+            cache_info.token_count,
+            ttl_seconds,
+            cache_info.created_at.isoformat(),
+            cache_info.expires_at.isoformat()
+        ))
+    
+    def get_shared_cache(self, cache_key: str) -> Optional[CacheInfo]:
+        """Paylaşılan cache (yoksa None)"""
+        row = self.db.fetch_one("""
+            SELECT * FROM shared_caches WHERE cache_key = ?
+        """, (cache_key,))
+        return self._row_to_cache_info(row) if row else None
+    
+    def list_shared_caches(self) -> List[Dict[str, Any]]:
+        """Paylaşılan cache'ler ve referans sayıları"""
+        rows = self.db.fetch_all("""
+            SELECT sc.*, (
+                SELECT COUNT(*) FROM module_caches mc WHERE mc.cache_name = sc.cache_name
+            ) AS refs
+            FROM shared_caches sc
+        """)
+        return [dict(r) for r in rows]
+    
+    def delete_shared_cache(self, cache_name: str) -> None:
+        """Paylaşılan cache kaydını sil"""
+        self.db.execute("DELETE FROM shared_caches WHERE cache_name = ?", (cache_name,))
+    
     # ==================== HELPER METHODS ====================
     
     def _row_to_project(self, row: Any) -> Project:
@@ -489,6 +1211,16 @@ class ProjectRepository:
             module_progress=[]  # Ayrı sorguyla yüklenecek
         )
     
+    def _row_to_cache_info(self, row: Any) -> CacheInfo:
+        """module_caches satırını CacheInfo'ya dönüştür"""
+        return CacheInfo(
+            cache_name=row["cache_name"],
+            model=row["model"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            expires_at=datetime.fromisoformat(row["expires_at"]),
+            token_count=row["token_count"]
+        )
+    
     def clear_cache(self) -> None:
         """RAM cache'i temizle"""
         self._cache.clear()
@@ -7,6 +7,7 @@ from .screenplay import (
     SceneOutline,
     Scene,
     Screenplay,
+    LazyScreenplay,
     ProjectStatus
 )
 from .asset import Asset, AssetType, AssetList
@@ -20,6 +21,7 @@ __all__ = [
     "SceneOutline",
     "Scene",
     "Screenplay",
+    "LazyScreenplay",
     "ProjectStatus",
     "Asset",
     "AssetType",
@@ -99,6 +99,25 @@ class ProjectConfig(BaseModel):
         le=86400,  # Maximum 24 saat
         description="Cache TTL (saniye)"
     )
+    chat_replay_token_budget: int = Field(
+        default=200_000,
+        ge=0,
+        description="Restart sonrası chat geçmişinden yeniden oynatılacak en fazla token"
+    )
+    chat_compaction_threshold_tokens: int = Field(
+        default=60_000,
+        ge=0,
+        description="Chat geçmişi bu kadar token'ı geçince eski sahne turları özetlenir (0 = kapalı)"
+    )
+    speculative_scenes: bool = Field(
+        default=False,
+        description="Sahne döndükten sonra sıradaki sahneyi arka planda önceden yaz"
+    )
+    state_flush_window_ms: int = Field(
+        default=0,
+        ge=0,
+        description="Write-behind: durum değişiklikleri bu pencerede toplanıp arka planda kaydedilir (0 = her değişiklikte senkron)"
+    )
     
     # İleri seviye
     auto_save: bool = Field(
@@ -116,6 +135,7 @@ class TokenUsage(BaseModel):
     prompt_tokens: int = Field(default=0, description="Input token sayısı")
     cached_tokens: int = Field(default=0, description="Cache'den gelen token")
     output_tokens: int = Field(default=0, description="Output token sayısı")
+    thinking_tokens: int = Field(default=0, description="Düşünme (thinking) token sayısı")
     total_tokens: int = Field(default=0, description="Toplam token")
     
     @property
@@ -272,4 +292,5 @@ class Project(BaseModel):
         self.total_token_usage.prompt_tokens += usage.prompt_tokens
         self.total_token_usage.cached_tokens += usage.cached_tokens
         self.total_token_usage.output_tokens += usage.output_tokens
+        self.total_token_usage.thinking_tokens += usage.thinking_tokens
         self.total_token_usage.total_tokens += usage.total_tokens
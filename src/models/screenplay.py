@@ -3,8 +3,10 @@ Senaryo yazımı için Pydantic modelleri.
 Gemini API Structured Output ile uyumlu.
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+import copy
+import threading
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import List, Optional, Dict, Any, Callable, ClassVar, Tuple
 from enum import Enum
 from datetime import datetime
 
@@ -315,6 +317,15 @@ class Scene(BaseModel):
         description="Yazar/yönetmen notları"
     )
 
+    def summary(self, action_chars: int = 240) -> str:
+        """Tek satırlık özet: başlık, ilk aksiyon satırı ve konuşanlar"""
+        action = self.action.strip().split("\n")[0][:action_chars]
+        line = f"{self.header}: {action}"
+        speakers = sorted({d.character for d in self.dialogue or []})
+        if speakers:
+            line += f" (Konuşanlar: {', '.join(speakers)})"
+        return line
+
 
 class Screenplay(BaseModel):
     """
@@ -387,6 +398,26 @@ class Screenplay(BaseModel):
         """Seçilen konsepti döndür"""
         return self.concepts[self.selected_concept_index]
     
+    def put_scene(self, scene: Scene) -> Optional[Scene]:
+        """
+        Sahneyi numarasına göre yerleştir.
+        
+        Aynı numaralı sahne varsa yerine geçer (sahneler numara ile
+        saklanır; ikinci kopya tutulmaz), yoksa numara sırasına eklenir.
+        
+        Returns:
+            Yerine geçilen sahne veya None
+        """
+        for i, existing in enumerate(self.scenes):
+            if existing.scene_number == scene.scene_number:
+                self.scenes[i] = scene
+                return existing
+            if existing.scene_number > scene.scene_number:
+                self.scenes.insert(i, scene)
+                return None
+        self.scenes.append(scene)
+        return None
+    
     @property
     def completed_scenes_count(self) -> int:
         """Tamamlanan sahne sayısı"""
@@ -400,6 +431,106 @@ class Screenplay(BaseModel):
         return (len(self.scenes) / len(self.scene_outlines)) * 100
 
 
+# Tembel alan yüklemeleri arasında (nadir, kısa) ortak kilit
+_lazy_load_lock = threading.Lock()
+
+
+class LazyScreenplay(Screenplay):
+    """
+    Bölümleri ilk erişimde yüklenen senaryo.
+    
+    Veritabanından okunan senaryo için kullanılır: başlık, konseptler ve
+    beat sheet gibi küçük alanlar hemen kurulur; sahne outline'ları ve
+    sahneler (senaryo büyüdükçe büyüyen kısım) ilk erişimde loader ile
+    yüklenir. Yüklenmemiş alan __dict__'te yoktur; atama yapılırsa loader
+    hiç çağrılmaz. Serileştirme ve karşılaştırma önce her şeyi yükler.
+    """
+    
+    LAZY_FIELDS: ClassVar[Tuple[str, ...]] = ("scene_outlines", "scenes")
+    
+    _loaders: Dict[str, Callable[[], Any]] = PrivateAttr(default_factory=dict)
+    
+    @classmethod
+    def construct_lazy(cls, loaders: Dict[str, Callable[[], Any]], **values: Any) -> "LazyScreenplay":
+        """
+        Doğrulamasız kur (güvenilir veritabanı satırları için).
+        
+        Args:
+            loaders: Tembel alan adı -> değeri döndüren fonksiyon
+            **values: Hemen kurulan alanlar
+        """
+        screenplay = cls.model_construct(**values)
+        for name in cls.LAZY_FIELDS:
+            if name in loaders:
+                screenplay.__dict__.pop(name, None)   # model_construct varsayılanı
+        screenplay._loaders = dict(loaders)
+        return screenplay
+    
+    def __getattr__(self, name: str) -> Any:
+        if name in LazyScreenplay.LAZY_FIELDS:
+            with _lazy_load_lock:
+                if name not in self.__dict__:
+                    self.__dict__[name] = self.__pydantic_private__["_loaders"][name]()
+            return self.__dict__[name]
+        return super().__getattr__(name)
+    
+    def unloaded_fields(self) -> List[str]:
+        """Henüz yüklenmemiş (değişmemiş olduğu kesin) alanlar"""
+        return [name for name in self.LAZY_FIELDS if name not in self.__dict__]
+    
+    def load_all(self) -> "LazyScreenplay":
+        """Tüm tembel alanları yükle"""
+        for name in self.unloaded_fields():
+            getattr(self, name)
+        return self
+    
+    @classmethod
+    def snapshot(cls, screenplay: Screenplay, previous: Optional[Screenplay] = None) -> "LazyScreenplay":
+        """
+        Başka thread'de yazılacak kopya (serileştirmeden).
+        
+        Küçük alanlar kopyalanır. Outline ve sahnelerden sadece previous
+        kopyasından beri değişenler kopyalanır; değişmeyenler previous'un
+        (kimsenin değiştirmediği) nesneleridir. Yüklenmemiş bölümler kopyada
+        da yüklenmemiş kalır ve aynı loader ile yüklenir.
+        
+        Args:
+            screenplay: Canlı senaryo
+            previous: Aynı senaryonun önceki kopyası
+        """
+        unloaded = screenplay.unloaded_fields() if isinstance(screenplay, LazyScreenplay) else []
+        values = {
+            name: copy.deepcopy(value) for name, value in screenplay.__dict__.items()
+            if name not in cls.LAZY_FIELDS
+        }
+        for name in cls.LAZY_FIELDS:
+            if name in unloaded:
+                continue
+            kept = {item.scene_number: item for item in previous.__dict__.get(name) or []} if previous else {}
+            values[name] = [
+                kept[item.scene_number] if kept.get(item.scene_number) == item else item.model_copy(deep=True)
+                for item in screenplay.__dict__[name]
+            ]
+        return cls.construct_lazy({name: screenplay._loaders[name] for name in unloaded}, **values)
+    
+    def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
+        return super(LazyScreenplay, self.load_all()).model_dump(**kwargs)
+    
+    def model_dump_json(self, **kwargs: Any) -> str:
+        return super(LazyScreenplay, self.load_all()).model_dump_json(**kwargs)
+    
+    def model_copy(self, **kwargs: Any) -> "LazyScreenplay":
+        return super(LazyScreenplay, self.load_all()).model_copy(**kwargs)
+    
+    def __eq__(self, other: Any) -> bool:
+        # Loader'lar (private) karşılaştırılmaz; aynı içerikli Screenplay'e eşittir
+        if not isinstance(other, Screenplay):
+            return NotImplemented
+        if isinstance(other, LazyScreenplay):
+            other.load_all()
+        return self.load_all().__dict__ == other.__dict__
+
+
 # === YAPILANDIRILMIŞ ÇIKTI İÇİN YARDIMCI MODELLER ===
 
 class ConceptsResponse(BaseModel):
@@ -179,6 +179,39 @@ SCENE {scene_number}: {location} - {time_of_day} - [SÜRE: {duration_seconds} Sa
 
 [Aksiyon ve diyalog burada...]
 
+JSON formatında yanıt ver.""",
+
+    # Toplu yazım: sahne chat geçmişi olmadan, outline ve komşu sahnelerle yazılır
+    "write_scene_standalone": """Senaryonun **SCENE {scene_number}** sahnesini yaz. Sadece bu sahneyi yaz.
+
+KARAKTERLER:
+{characters}
+
+SAHNE LİSTESİ (tüm film):
+{outline}
+
+KOMŞU SAHNELER (süreklilik için):
+{neighbours}
+
+Sahne bilgisi:
+- Mekan: {location}
+- Zaman: {time_of_day}
+- Hedef Süre: {duration_seconds} saniye
+- Açıklama: {description}
+- Duygusal Ark: {emotional_arc}
+
+KRİTİK KURALLAR:
+1. Visual Decompression uygula - HER SANİYEYİ betimle
+2. Özet fiiller YASAK (savaşır, yürür, koşar vb.)
+3. Mikro-aksiyonlarla yaz
+4. {duration_seconds} saniyelik görsel detay üret
+5. Komşu sahnelerle sürekliliği koru (mekan, eşya, karakterlerin fiziksel durumu)
+
+Sahne formatı:
+SCENE {scene_number}: {location} - {time_of_day} - [SÜRE: {duration_seconds} Saniye]
+
+[Aksiyon ve diyalog burada...]
+
 JSON formatında yanıt ver.""",
 
     "expand_scene": """Mevcut sahneyi **UZAT**.
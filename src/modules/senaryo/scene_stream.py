@@ -0,0 +1,79 @@
+"""
+Sahne akışı.
+Streaming sahne yanıtını alanlar tamamlandıkça tipli olaylara çevirir.
+"""
+
+from typing import Dict, Any, List
+
+from ...core.stream_parser import ModelStreamParser, JSONEvent
+from ...models.screenplay import SceneResponse
+
+
+HEADER_PATH = ("scene", "header")
+ACTION_PATH = ("scene", "action")
+DIALOGUE_PATH = ("scene", "dialogue")
+
+
+class SceneStreamParser:
+    """
+    SceneResponse akışını olaylara çevirir.
+
+    Olaylar (SSE payload'ı olarak doğrudan gönderilebilir):
+        {"type": "header", "header": str}
+        {"type": "action", "index": int, "text": str}      - tamamlanan paragraf
+        {"type": "dialogue", "index": int, "line": dict}   - doğrulanmış DialogueLine
+
+    Şemadan sapan akış StreamParseError fırlatır; çağıran akışı keser.
+    """
+
+    def __init__(self):
+        self._parser = ModelStreamParser(SceneResponse)
+        self._action_tail: List[str] = []   # henüz satır sonu gelmemiş aksiyon metni
+        self._paragraphs = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Metin parçasını işle ve tamamlanan alanları döndür"""
+        events: List[Dict[str, Any]] = []
+        for event in self._parser.feed(chunk):
+            self._translate(event, events)
+        return events
+
+    def close(self) -> SceneResponse:
+        """
+        Akışı bitir ve doğrulanmış yanıtı döndür.
+
+        Raises:
+            StreamParseError: Yanıt yarım kaldıysa veya şemaya uymuyorsa
+        """
+        return self._parser.close()
+
+    def _translate(self, event: JSONEvent, events: List[Dict[str, Any]]) -> None:
+        if event.path == HEADER_PATH and event.kind == "value":
+            events.append({"type": "header", "header": event.value})
+
+        elif event.path == ACTION_PATH and event.kind == "string_part":
+            # Paragraf = satır; sadece satır sonu gelenler tamamlanmıştır
+            *complete, tail = event.value.split("\n")
+            if complete:
+                complete[0] = "".join(self._action_tail) + complete[0]
+                self._action_tail = []
+                for paragraph in complete:
+                    self._add_paragraph(paragraph, events)
+            self._action_tail.append(tail)
+
+        elif event.path == ACTION_PATH and event.kind == "value":
+            self._add_paragraph("".join(self._action_tail), events)
+            self._action_tail = []
+
+        elif event.kind == "model" and event.path[:-1] == DIALOGUE_PATH:
+            events.append({
+                "type": "dialogue",
+                "index": event.path[-1],
+                "line": event.value.model_dump()
+            })
+
+    def _add_paragraph(self, text: str, events: List[Dict[str, Any]]) -> None:
+        text = text.strip()
+        if text:
+            events.append({"type": "action", "index": self._paragraphs, "text": text})
+            self._paragraphs += 1
@@ -3,11 +3,22 @@ Senaryo yazım servisi.
 Ana iş mantığını içerir.
 """
 
-from typing import Optional, Generator
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Generator, AsyncGenerator
 from pathlib import Path
+from contextlib import closing, aclosing
+from functools import partial
 
 from ...core.session import ProjectSession
+from ...core.gemini_client import BatchRequest
 from ...core.context_manager import ContextManager
+from ...core.schema_registry import SchemaVariant
+from ...core.resilience import CircuitOpenError
+from ...core.rate_limiter import CallPriority, call_priority
+from ...core.telemetry import call_context
 from ...models.project import ModuleType, TokenUsage
 from ...models.screenplay import (
     Screenplay,
@@ -28,6 +39,19 @@ from ...models.screenplay import (
     get_methodology_steps
 )
 from .prompts import SYSTEM_PROMPT, STEP_PROMPTS, USER_GUIDANCE
+from .scene_stream import SceneStreamParser
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SceneSpeculation:
+    """Arka planda önceden yazılan sıradaki sahne"""
+    scene_number: int
+    prompt: str
+    chat_turns: Optional[int]   # başladığı andaki chat tur sayısı
+    task: asyncio.Task          # -> (SceneResponse, ham metin, TokenUsage, süre)
 
 
 class ScenarioService:
@@ -36,6 +60,16 @@ class ScenarioService:
     Tüm senaryo yazım akışını yönetir.
     """
     
+    # Sahne adımları sık tekrarlanır ve format prompt'ta zaten tarif edilir;
+    # bu adımlarda kısaltılmış schema yeterli
+    SCENE_SCHEMA_VARIANT = SchemaVariant.COMPACT
+    
+    # Toplu sahne yazımı
+    PARALLEL_SCENES = 4        # aynı anda yazılan sahne
+    SCENE_MAX_ATTEMPTS = 3     # sahne başına deneme
+    CONTINUITY_WINDOW = 2      # her yönde prompt'a eklenen komşu sahne
+    SCENE_BATCH_KIND = "scenes"
+    
     def __init__(self, session: ProjectSession):
         """
         ScenarioService başlat.
@@ -46,16 +80,35 @@ class ScenarioService:
         self.session = session
         self.module = ModuleType.SENARYO
         
+        # Cache'i kaybolan chat'in kurtarılabilmesi için system prompt'u bildir
+        self.session.set_module_prompt(self.module, SYSTEM_PROMPT)
+        
         # Durum takibi
         self._current_step = "init"
-        self._current_scene_index = 0
+        # Sıradaki sahne (ilk kullanımda yazılmış sahne sayısından; bkz. _current_scene_index)
+        self._scene_index: Optional[int] = None
+        
+        # Spekülatif sahne yazımı (config.speculative_scenes)
+        self._speculation: Optional[SceneSpeculation] = None
+        self._speculation_stats = {
+            "started": 0,
+            "served": 0,
+            "discarded": 0,
+            "failed": 0,
+            "wasted_tokens": 0,
+            "latency_saved_seconds": 0.0
+        }
         
     # ==================== ADIM 1: ANALİZ ====================
     
-    def analyze_source(self) -> ConceptsResponse:
+    def analyze_source(self, use_cache: Optional[bool] = None) -> ConceptsResponse:
         """
         Kaynak materyali analiz et ve 3 konsept öner.
         
+        Args:
+            use_cache: Yanıt cache'i kullanılsın mı (None ise konseptler
+                zaten varsa kullanılmaz; bkz. _analyze_use_cache)
+        
         Returns:
             ConceptsResponse (3 film konsepti)
         """
@@ -78,10 +131,47 @@ class ScenarioService:
             module=self.module,
             prompt=STEP_PROMPTS["analyze"],
             response_schema=ConceptsResponse,
+            cache_id=cache_id,
+            use_cache=self._analyze_use_cache(use_cache)
+        )
+        
+        return self._after_analyze(result)
+    
+    async def analyze_source_async(self, use_cache: Optional[bool] = None) -> ConceptsResponse:
+        """Kaynak materyali analiz et (async). Bkz. analyze_source."""
+        cache_id = f"{self.session.project_id}_{self.module.value}"
+        if not self.session.gemini.get_cache(cache_id):
+            await self.session.create_module_cache_async(
+                module=self.module,
+                system_prompt=SYSTEM_PROMPT
+            )
+        
+        self.session.start_module_chat(
+            module=self.module,
             cache_id=cache_id
         )
         
-        # Durumu güncelle
+        result = await self.session.generate_structured_async(
+            module=self.module,
+            prompt=STEP_PROMPTS["analyze"],
+            response_schema=ConceptsResponse,
+            cache_id=cache_id,
+            use_cache=self._analyze_use_cache(use_cache)
+        )
+        
+        return self._after_analyze(result)
+    
+    def _analyze_use_cache(self, use_cache: Optional[bool]) -> Optional[bool]:
+        """
+        Konseptler zaten varsa analiz yeniden üretimdir: aynı prompt ve
+        geçmişle cache'teki konseptler döneceği için yanıt cache'i atlanır.
+        """
+        if use_cache is None and self.session.screenplay and self.session.screenplay.concepts:
+            return False
+        return use_cache
+    
+    def _after_analyze(self, result: ConceptsResponse) -> ConceptsResponse:
+        """Analiz sonrası durumu güncelle"""
         self._current_step = "concepts_generated"
         self.session.update_progress(self.module, 10, "Konseptler oluşturuldu")
         
@@ -104,22 +194,42 @@ class ScenarioService:
         Returns:
             CharacterCardResponse (karakter kartı)
         """
+        # Karakter kartı oluştur - Chat history'den önceki konuşmalar alınacak
+        result = self.session.generate_structured(
+            module=self.module,
+            prompt=self._character_prompt(concept_index, duration_minutes),
+            response_schema=CharacterCardResponse
+        )
+        
+        return self._after_select_concept(result)
+    
+    async def select_concept_async(
+        self,
+        concept_index: int,
+        duration_minutes: int
+    ) -> CharacterCardResponse:
+        """Konsept seç ve karakter kartı oluştur (async). Bkz. select_concept."""
+        result = await self.session.generate_structured_async(
+            module=self.module,
+            prompt=self._character_prompt(concept_index, duration_minutes),
+            response_schema=CharacterCardResponse
+        )
+        
+        return self._after_select_concept(result)
+    
+    def _character_prompt(self, concept_index: int, duration_minutes: int) -> str:
+        """Karakter kartı promptunu hazırla"""
         # Proje config güncelle
         self.session.project.config.target_duration_minutes = duration_minutes
         
         # Prompt'u doldur (sadece seçili konsept index ve süre)
-        character_prompt = STEP_PROMPTS["character_card"].format(
+        return STEP_PROMPTS["character_card"].format(
             concept_index=concept_index + 1,  # 1-indexed göster
             duration_minutes=duration_minutes
         )
-        
-        # Karakter kartı oluştur - Chat history'den önceki konuşmalar alınacak
-        result = self.session.generate_structured(
-            module=self.module,
-            prompt=character_prompt,
-            response_schema=CharacterCardResponse
-        )
-        
+    
+    def _after_select_concept(self, result: CharacterCardResponse) -> CharacterCardResponse:
+        """Konsept seçimi sonrası durumu güncelle"""
         self._current_step = "character_created"
         self.session.update_progress(self.module, 20, "Karakter kartı oluşturuldu")
         
@@ -137,6 +247,26 @@ class ScenarioService:
         Returns:
             BeatSheetResponse
         """
+        result = self.session.generate_structured(
+            module=self.module,
+            prompt=self._beat_sheet_prompt(),
+            response_schema=BeatSheetResponse
+        )
+        
+        return self._after_beat_sheet(result)
+    
+    async def create_beat_sheet_async(self) -> BeatSheetResponse:
+        """Hikaye iskeletini oluştur (async). Bkz. create_beat_sheet."""
+        result = await self.session.generate_structured_async(
+            module=self.module,
+            prompt=self._beat_sheet_prompt(),
+            response_schema=BeatSheetResponse
+        )
+        
+        return self._after_beat_sheet(result)
+    
+    def _beat_sheet_prompt(self) -> str:
+        """Metodolojiye göre beat sheet promptunu hazırla"""
         duration = self.session.project.config.target_duration_minutes
         methodology = self.session.project.config.story_methodology
         
@@ -150,19 +280,17 @@ class ScenarioService:
             for s in method_steps
         ])
         
-        prompt = STEP_PROMPTS["beat_sheet"].format(
+        return STEP_PROMPTS["beat_sheet"].format(
             methodology_name=method_info["name"],
             methodology_description=method_info["description"],
             step_count=method_info["step_count"],
             duration=duration,
             methodology_steps=f"Adımlar:\n{steps_text}"
         )
-        
-        result = self.session.generate_structured(
-            module=self.module,
-            prompt=prompt,
-            response_schema=BeatSheetResponse
-        )
+    
+    def _after_beat_sheet(self, result: BeatSheetResponse) -> BeatSheetResponse:
+        """Beat sheet sonrası durumu güncelle"""
+        method_info = get_methodology_info(self.session.project.config.story_methodology)
         
         self._current_step = "beat_sheet_created"
         self.session.update_progress(self.module, 30, f"Beat sheet oluşturuldu ({method_info['name']})")
@@ -178,20 +306,36 @@ class ScenarioService:
         Returns:
             SceneOutlinesResponse
         """
-        duration = self.session.project.config.target_duration_minutes
-        total_seconds = duration * 60
-        
-        prompt = STEP_PROMPTS["scene_outline"].format(
-            duration=duration,
-            total_seconds=total_seconds
+        result = self.session.generate_structured(
+            module=self.module,
+            prompt=self._scene_outline_prompt(),
+            response_schema=SceneOutlinesResponse
         )
         
-        result = self.session.generate_structured(
+        return self._after_scene_outlines(result)
+    
+    async def create_scene_outlines_async(self) -> SceneOutlinesResponse:
+        """Zaman ayarlı sahne listesi oluştur (async). Bkz. create_scene_outlines."""
+        result = await self.session.generate_structured_async(
             module=self.module,
-            prompt=prompt,
+            prompt=self._scene_outline_prompt(),
             response_schema=SceneOutlinesResponse
         )
         
+        return self._after_scene_outlines(result)
+    
+    def _scene_outline_prompt(self) -> str:
+        """Sahne listesi promptunu hazırla"""
+        duration = self.session.project.config.target_duration_minutes
+        total_seconds = duration * 60
+        
+        return STEP_PROMPTS["scene_outline"].format(
+            duration=duration,
+            total_seconds=total_seconds
+        )
+    
+    def _after_scene_outlines(self, result: SceneOutlinesResponse) -> SceneOutlinesResponse:
+        """Sahne listesi sonrası durumu güncelle"""
         self._current_step = "outlines_created"
         self.session.update_progress(self.module, 40, "Sahne listesi oluşturuldu")
         
@@ -203,7 +347,7 @@ class ScenarioService:
         self,
         scene_outlines: list[SceneOutline],
         stream: bool = False
-    ) -> SceneResponse | Generator[str, None, SceneResponse]:
+    ) -> SceneResponse | Generator[Dict[str, Any], None, SceneResponse]:
         """
         Sıradaki sahneyi yaz.
         
@@ -212,8 +356,61 @@ class ScenarioService:
             stream: Streaming yanıt mı
             
         Returns:
-            SceneResponse veya Generator (stream=True ise)
+            SceneResponse veya olay Generator'ı (stream=True ise)
+        """
+        outline, prompt = self._next_scene_prompt(scene_outlines)
+        
+        if stream:
+            return self._write_scene_streaming(prompt, len(scene_outlines), outline.scene_number)
+        
+        with call_context(step="write_scene", scene_number=outline.scene_number):
+            result = self.session.generate_structured(
+                module=self.module,
+                prompt=prompt,
+                response_schema=SceneResponse,
+                schema_variant=self.SCENE_SCHEMA_VARIANT
+            )
+        
+        result.scene.scene_number = outline.scene_number   # sıra outline'dan gelir
+        self._current_scene_index += 1
+        self._update_scene_progress(len(scene_outlines))
+        
+        return result
+    
+    async def write_next_scene_async(
+        self,
+        scene_outlines: list[SceneOutline]
+    ) -> SceneResponse:
+        """
+        Sıradaki sahneyi yaz (async). Bkz. write_next_scene.
+        
+        Sahne önceden spekülatif olarak yazıldıysa ve chat o zamandan beri
+        değişmediyse o yanıt kullanılır; ardından (açıksa) bir sonraki
+        sahnenin spekülasyonu başlatılır.
         """
+        outline, prompt = self._next_scene_prompt(scene_outlines)
+        
+        speculated = await self._take_speculation(prompt)
+        if speculated:
+            result = speculated[0]
+        else:
+            with call_context(step="write_scene", scene_number=outline.scene_number):
+                result = await self.session.generate_structured_async(
+                    module=self.module,
+                    prompt=prompt,
+                    response_schema=SceneResponse,
+                    schema_variant=self.SCENE_SCHEMA_VARIANT
+                )
+        
+        result.scene.scene_number = outline.scene_number   # sıra outline'dan gelir
+        self._current_scene_index += 1
+        self._update_scene_progress(len(scene_outlines))
+        self._speculate_next_scene(scene_outlines)
+        
+        return result
+    
+    def _next_scene_prompt(self, scene_outlines: list[SceneOutline]) -> tuple[SceneOutline, str]:
+        """Sıradaki sahnenin outline'ını ve promptunu hazırla"""
         if self._current_scene_index >= len(scene_outlines):
             raise ValueError("Tüm sahneler yazıldı!")
         
@@ -227,67 +424,111 @@ class ScenarioService:
             description=outline.brief_description
         )
         
-        if stream:
-            return self._write_scene_streaming(outline, prompt, len(scene_outlines))
-        
-        result = self.session.generate_structured(
-            module=self.module,
-            prompt=prompt,
-            response_schema=SceneResponse
-        )
-        
-        self._current_scene_index += 1
-        self._update_scene_progress(len(scene_outlines))
-        
-        return result
+        return outline, prompt
     
     def _write_scene_streaming(
         self,
-        outline: SceneOutline,
         prompt: str,
-        total_scenes: int
-    ) -> Generator[str, None, SceneResponse]:
+        total_scenes: int,
+        scene_number: int
+    ) -> Generator[Dict[str, Any], None, SceneResponse]:
         """
         Streaming modunda sahne yaz.
         
         Yields:
-            str: Metin parçaları
+            dict: Metin parçaları ({"type": "chunk"}) ve tamamlanan alanlar
+            (bkz. SceneStreamParser)
             
         Returns:
             SceneResponse: Final sonuç
+            
+        Raises:
+            StreamParseError: Akış şemadan saparsa (akış kesilir, sahne
+            ilerlemesi değişmez)
         """
-        # Streaming için chat API kullan
-        full_text = ""
+        parser = SceneStreamParser()
         
         # generate_content_stream metodunu kullan
         model = self.session.project.config.scenario_model.value
         cache_id = f"{self.session.project_id}_{self.module.value}"
         
-        for chunk in self.session.gemini.generate_content_stream(
+        with closing(self.session.gemini.generate_content_stream(
             model=model,
             prompt=prompt,
-            cache_id=cache_id
-        ):
-            full_text += chunk
-            yield chunk
+            cache_id=cache_id,
+            response_schema=SceneResponse,
+            schema_variant=self.SCENE_SCHEMA_VARIANT,
+            labels=self._stream_labels(scene_number)
+        )) as stream:
+            for chunk in stream:
+                yield {"type": "chunk", "text": chunk}
+                yield from parser.feed(chunk)
         
-        # Sonucu parse et
-        import json
-        try:
-            scene_data = json.loads(full_text)
-            result = SceneResponse(**scene_data)
-        except (json.JSONDecodeError, Exception):
-            # Fallback: Manuel oluştur
-            result = SceneResponse(
-                scene=Scene(
-                    scene_number=outline.scene_number,
-                    header=f"SCENE {outline.scene_number}: {outline.location} - {outline.time_of_day} - [SÜRE: {outline.duration_seconds} Saniye]",
-                    action=full_text,
-                    duration_seconds=outline.duration_seconds,
-                    status="draft",
-                    revision_count=0
-                )
-            )
+        return self._finish_streamed_scene(parser, total_scenes, scene_number)
+    
+    def _stream_labels(self, scene_number: int) -> Dict[str, Any]:
+        """Sahne akışının etiketleri (generator call_context dışında çalışır)"""
+        return {"module": self.module.value, "step": "write_scene", "scene_number": scene_number}
+    
+    async def stream_next_scene_async(
+        self,
+        scene_outlines: list[SceneOutline]
+    ) -> AsyncGenerator[Dict[str, Any] | SceneResponse, None]:
+        """
+        Sıradaki sahneyi async streaming ile yaz.
+        
+        Raises:
+            ValueError: Tüm sahneler yazıldıysa (ilk iterasyonda)
+            StreamParseError: Akış şemadan saparsa
+        
+        Yields:
+            dict: Metin parçaları ve tamamlanan alanlar (bkz.
+            _write_scene_streaming); son eleman SceneResponse
+        """
+        outline, prompt = self._next_scene_prompt(scene_outlines)
+        parser = SceneStreamParser()
+        
+        speculated = await self._take_speculation(prompt)
+        if speculated:
+            # Hazır yanıt tek parça halinde akıtılır
+            text = speculated[1]
+            yield {"type": "chunk", "text": text}
+            for event in parser.feed(text):
+                yield event
+            yield self._finish_streamed_scene(parser, len(scene_outlines), outline.scene_number)
+            self._speculate_next_scene(scene_outlines)
+            return
+        
+        model = self.session.project.config.scenario_model.value
+        cache_id = f"{self.session.project_id}_{self.module.value}"
+        labels = self._stream_labels(outline.scene_number)
+        
+        async with aclosing(self.session.gemini.aio.generate_content_stream(
+            model=model,
+            prompt=prompt,
+            cache_id=cache_id,
+            on_usage=partial(self.session.record_usage_async, module=self.module, labels=labels),
+            response_schema=SceneResponse,
+            schema_variant=self.SCENE_SCHEMA_VARIANT,
+            labels=labels
+        )) as stream:
+            async for chunk in stream:
+                yield {"type": "chunk", "text": chunk}
+                for event in parser.feed(chunk):
+                    yield event
+        
+        yield self._finish_streamed_scene(parser, len(scene_outlines), outline.scene_number)
+        self._speculate_next_scene(scene_outlines)
+    
+    def _finish_streamed_scene(
+        self,
+        parser: SceneStreamParser,
+        total_scenes: int,
+        scene_number: int
+    ) -> SceneResponse:
+        """Streaming sonucunu doğrula ve ilerlemeyi güncelle"""
+        result = parser.close()
+        result.scene.scene_number = scene_number   # sıra outline'dan gelir
         
         self._current_scene_index += 1
         self._update_scene_progress(total_scenes)
@@ -305,7 +546,448 @@ class ScenarioService:
             progress,
             f"Sahne {self._current_scene_index}/{total_scenes} yazıldı"
         )
-    
+
+    # ==================== SPEKÜLATİF SAHNE YAZIMI ====================
+
+    def _speculate_next_scene(self, scene_outlines: list[SceneOutline]) -> None:
+        """
+        Kullanıcı sahneyi okurken sıradaki sahneyi arka planda yaz.
+
+        Yanıt modül chat'inin o anki geçmişiyle üretilir ama geçmişe
+        yazılmaz; sahne istendiğinde chat değişmemişse tur olarak eklenip
+        anında döndürülür (bkz. _take_speculation). Chat'te tur olmayan
+        akışlarda (ör. analizden önce) spekülasyon yapılmaz.
+        """
+        if not self.session.project.config.speculative_scenes:
+            return
+        if self._current_scene_index >= len(scene_outlines):
+            return
+        chat_turns = self.session.chat_turn_count(self.module)
+        if chat_turns is None:
+            return
+
+        self._discard_speculation("yeni spekülasyon")
+        outline, prompt = self._next_scene_prompt(scene_outlines)
+
+        # Etkileşimli isteklerin önüne geçmesin; öncelik ve etiketler task'a kopyalanır
+        with call_priority(CallPriority.BACKGROUND), \
+                call_context(step="speculative_scene", scene_number=outline.scene_number):
+            task = asyncio.create_task(self._run_speculation(prompt))
+        # Kimse almazsa hata "retrieved" sayılsın (asyncio uyarısı olmasın)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        self._speculation = SceneSpeculation(
+            scene_number=outline.scene_number,
+            prompt=prompt,
+            chat_turns=chat_turns,
+            task=task
+        )
+        self._speculation_stats["started"] += 1
+
+    async def _run_speculation(self, prompt: str) -> tuple[SceneResponse, str, TokenUsage, float]:
+        """Spekülatif çağrı; üretim süresini de döndürür"""
+        started = time.monotonic()
+        result, text, usage = await self.session.speculate_structured_async(
+            module=self.module,
+            prompt=prompt,
+            response_schema=SceneResponse,
+            schema_variant=self.SCENE_SCHEMA_VARIANT
+        )
+        return result, text, usage, time.monotonic() - started
+
+    async def _take_speculation(self, prompt: str) -> Optional[tuple[SceneResponse, str]]:
+        """
+        Geçerli spekülasyonu kullan ve chat'e tur olarak ekle.
+
+        Spekülasyon aynı prompt için ve chat o zamandan beri değişmediyse
+        (revizyon, genişletme vb. yoksa) geçerlidir. Hâlâ sürüyorsa
+        beklenir; sıfırdan başlamaktan yine hızlıdır.
+
+        Returns:
+            (SceneResponse, ham yanıt metni) veya None (normal yazıma devam)
+        """
+        spec, self._speculation = self._speculation, None
+        if spec is None:
+            return None
+        if spec.prompt != prompt or spec.chat_turns != self.session.chat_turn_count(self.module):
+            self._drop_speculation(spec, "geçersiz")
+            return None
+
+        waiting_since = time.monotonic()
+        try:
+            result, text, usage, duration = await spec.task
+        except Exception as e:
+            logger.warning(f"Spekülatif sahne {spec.scene_number} başarısız, normal yazıma geçiliyor: {e}")
+            self._speculation_stats["failed"] += 1
+            return None
+
+        # Beklerken chat değiştiyse (eşzamanlı revizyon) yanıt kullanılamaz
+        if spec.chat_turns != self.session.chat_turn_count(self.module):
+            self._drop_speculation(spec, "beklerken chat değişti")
+            return None
+
+        await self.session.commit_chat_turn_async(self.module, prompt, text, SceneResponse.__name__)
+        self._speculation_stats["served"] += 1
+        self._speculation_stats["latency_saved_seconds"] += max(
+            0.0, duration - (time.monotonic() - waiting_since)
+        )
+        logger.info(f"Spekülatif sahne kullanıldı: Sahne {spec.scene_number}")
+        return result, text
+
+    def _discard_speculation(self, reason: str) -> None:
+        """Bekleyen spekülasyonu iptal et (chat'i değiştirecek işlemlerden önce)"""
+        spec, self._speculation = self._speculation, None
+        if spec:
+            self._drop_speculation(spec, reason)
+
+    def _drop_speculation(self, spec: SceneSpeculation, reason: str) -> None:
+        """Spekülasyonu at; tamamlandıysa harcanan token israf sayılır"""
+        task = spec.task
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled() and task.exception() is None:
+            self._speculation_stats["wasted_tokens"] += task.result()[2].total_tokens
+        self._speculation_stats["discarded"] += 1
+        logger.info(f"Spekülatif sahne {spec.scene_number} atıldı ({reason})")
+
+    def speculation_stats(self) -> Dict[str, Any]:
+        """Spekülasyon isabet oranı ve israf edilen token"""
+        stats = dict(self._speculation_stats)
+        resolved = stats["served"] + stats["discarded"] + stats["failed"]
+        stats["hit_rate"] = stats["served"] / resolved if resolved else 0.0
+        stats["latency_saved_seconds"] = round(stats["latency_saved_seconds"], 2)
+        stats["pending"] = self._speculation.scene_number if self._speculation else None
+        stats["enabled"] = self.session.project.config.speculative_scenes
+        return stats
+
+    # ==================== TOPLU SAHNE YAZIMI ====================
+
+    async def write_remaining_scenes_async(
+        self,
+        concurrency: Optional[int] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Kalan tüm sahneleri sınırlı paralellikle yaz.
+
+        Sahneler chat geçmişi yerine outline, karakter kartı ve komşu
+        sahnelerin özetleriyle (bkz. _standalone_scene_prompt) bağımsız
+        çağrılarla yazılır. Sonuçlar bitiş sırasından bağımsız olarak sahne
+        sırasıyla Screenplay.scenes'e eklenir ve her eklemede kaydedilir.
+        Bir sahne tüm denemelerde başarısız olursa sonraki sahneler eklenmez
+        (sıra korunur); yazım write_next_scene ile o sahneden sürdürülebilir.
+
+        Args:
+            concurrency: Aynı anda yazılan sahne sayısı (varsayılan PARALLEL_SCENES)
+
+        Raises:
+            ValueError: Sahne listesi yoksa veya tüm sahneler yazıldıysa
+            (ilk iterasyonda)
+
+        Yields:
+            dict: İlerleme olayları - "started", "scene_started", "scene_retry",
+            "scene_written", "scene_committed", "scene_failed", "complete"
+        """
+        screenplay = self.session.screenplay
+        if not screenplay or not screenplay.scene_outlines:
+            raise ValueError("Önce sahne listesi oluşturulmalı")
+
+        outlines = screenplay.scene_outlines
+        start = len(screenplay.scenes)
+        if start >= len(outlines):
+            raise ValueError("Tüm sahneler yazıldı!")
+
+        self._discard_speculation("toplu yazım")
+
+        cache_id = f"{self.session.project_id}_{self.module.value}"
+        if not self.session.gemini.get_cache(cache_id):
+            await self.session.create_module_cache_async(
+                module=self.module,
+                system_prompt=SYSTEM_PROMPT
+            )
+
+        pending = iter(range(start, len(outlines)))   # worker'lar arasında paylaşılır
+        workers_count = min(max(1, concurrency or self.PARALLEL_SCENES), len(outlines) - start)
+        written: Dict[int, Scene] = {}
+        events: asyncio.Queue = asyncio.Queue()
+        stop = asyncio.Event()
+
+        async def worker():
+            for index in pending:
+                if stop.is_set():
+                    return
+                scene = await self._write_scene_with_retries(index, outlines, written, cache_id, events)
+                if scene is None:
+                    stop.set()
+                    return
+                written[index] = scene
+                events.put_nowait({"type": "scene_written", "scene_number": outlines[index].scene_number})
+
+        async def run_workers():
+            try:
+                await asyncio.gather(*(worker() for _ in range(workers_count)))
+            finally:
+                events.put_nowait(None)
+
+        runner = asyncio.create_task(run_workers())
+        next_index = start
+        ready: set[int] = set()      # "scene_written" olayı gönderilmiş sahne numaraları
+        failed: list[int] = []
+
+        try:
+            yield {
+                "type": "started",
+                "first_scene": outlines[start].scene_number,
+                "remaining": len(outlines) - start,
+                "total": len(outlines),
+                "concurrency": workers_count
+            }
+
+            while (event := await events.get()) is not None:
+                if event["type"] == "scene_written":
+                    ready.add(event["scene_number"])
+                elif event["type"] == "scene_failed":
+                    failed.append(event["scene_number"])
+                yield event
+
+                # Sıradaki sahne hazırsa (ve arkasından gelenler) sırayla ekle
+                while next_index < len(outlines) and outlines[next_index].scene_number in ready:
+                    scene = written[next_index]
+                    screenplay.put_scene(scene)
+                    next_index += 1
+                    self._current_scene_index = next_index
+                    self._update_scene_progress(len(outlines))
+                    await self.session.save_screenplay_async()
+                    yield {
+                        "type": "scene_committed",
+                        "scene_number": scene.scene_number,
+                        "scene": scene.model_dump(mode="json"),
+                        "written": next_index,
+                        "total": len(outlines)
+                    }
+
+            await runner
+            yield {
+                "type": "complete",
+                "committed": next_index - start,
+                "failed": failed,
+                "all_scenes_completed": next_index >= len(outlines)
+            }
+        finally:
+            # İstemci koptuysa veya hata olduysa yarım kalan çağrıları iptal et
+            stop.set()
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    async def _write_scene_with_retries(
+        self,
+        index: int,
+        outlines: list[SceneOutline],
+        written: Dict[int, Scene],
+        cache_id: str,
+        events: asyncio.Queue
+    ) -> Optional[Scene]:
+        """Tek sahneyi yeniden denemelerle yaz; başarısızsa None"""
+        outline = outlines[index]
+
+        for attempt in range(1, self.SCENE_MAX_ATTEMPTS + 1):
+            events.put_nowait({"type": "scene_started", "scene_number": outline.scene_number, "attempt": attempt})
+            try:
+                # Prompt her denemede yeniden kurulur: bu arada biten komşular özetlenir
+                with call_context(step="bulk_scene", scene_number=outline.scene_number):
+                    result = await self.session.generate_structured_async(
+                        module=self.module,
+                        prompt=self._standalone_scene_prompt(index, outlines, written),
+                        response_schema=SceneResponse,
+                        cache_id=cache_id,
+                        use_chat=False,
+                        schema_variant=self.SCENE_SCHEMA_VARIANT
+                    )
+                scene = result.scene
+                scene.scene_number = outline.scene_number   # sıra outline'dan gelir
+                return scene
+            except CircuitOpenError as e:
+                # Model devre dışı: denemeye devam etmek anlamsız
+                error = str(e)
+                break
+            except Exception as e:
+                error = str(e)
+                if attempt < self.SCENE_MAX_ATTEMPTS:
+                    logger.warning(f"Sahne {outline.scene_number} yazılamadı (deneme {attempt}): {e}")
+                    events.put_nowait({
+                        "type": "scene_retry",
+                        "scene_number": outline.scene_number,
+                        "attempt": attempt,
+                        "error": error
+                    })
+
+        logger.error(f"Sahne {outline.scene_number} yazılamadı: {error}")
+        events.put_nowait({
+            "type": "scene_failed",
+            "scene_number": outline.scene_number,
+            "attempts": attempt,
+            "error": error
+        })
+        return None
+
+    def _standalone_scene_prompt(
+        self,
+        index: int,
+        outlines: list[SceneOutline],
+        written: Dict[int, Scene]
+    ) -> str:
+        """Chat geçmişi olmadan sahne yazım promptunu hazırla"""
+        screenplay = self.session.screenplay
+        outline = outlines[index]
+
+        characters = []
+        if screenplay.protagonist:
+            card = screenplay.protagonist
+            characters.append(
+                f"- {card.name} (ana karakter): İhtiyaç: {card.dramatic_need} | "
+                f"Bakış açısı: {card.point_of_view} | Tavır: {card.attitude} | Değişim: {card.arc}"
+            )
+            if card.flaws:
+                characters.append(f"  Kusurlar: {', '.join(card.flaws)}")
+        for card in screenplay.supporting_characters or []:
+            characters.append(f"- {card.name}: {card.dramatic_need}")
+
+        outline_lines = [
+            f"{'→' if i == index else '-'} SCENE {o.scene_number}: {o.location} - {o.time_of_day} "
+            f"({o.duration_seconds} sn): {o.brief_description}"
+            for i, o in enumerate(outlines)
+        ]
+
+        neighbours = []
+        low = max(0, index - self.CONTINUITY_WINDOW)
+        high = min(len(outlines), index + self.CONTINUITY_WINDOW + 1)
+        for i in range(low, high):
+            if i == index:
+                continue
+            scene = written.get(i) or (screenplay.scenes[i] if i < len(screenplay.scenes) else None)
+            if scene:
+                neighbours.append(f"- [yazıldı] {scene.summary()}")
+            else:
+                o = outlines[i]
+                neighbours.append(f"- [planlandı] SCENE {o.scene_number}: {o.location} - {o.time_of_day}: {o.brief_description}")
+
+        return STEP_PROMPTS["write_scene_standalone"].format(
+            scene_number=outline.scene_number,
+            characters="\n".join(characters) or "-",
+            outline="\n".join(outline_lines),
+            neighbours="\n".join(neighbours) or "-",
+            location=outline.location,
+            time_of_day=outline.time_of_day,
+            duration_seconds=outline.duration_seconds,
+            description=outline.brief_description,
+            emotional_arc=outline.emotional_arc or "-"
+        )
+
+    # ==================== BATCH SAHNE YAZIMI ====================
+
+    async def submit_scene_batch_async(self) -> Dict[str, Any]:
+        """
+        Kalan tüm sahneleri tek Batch API işi olarak gönder.
+
+        write_remaining_scenes_async'in etkileşimsiz karşılığı (gece
+        çalışmaları için): aynı bağımsız sahne promptlarıyla indirimli batch
+        fiyatından yazılır. Komşu sahneler henüz yazılmadığından outline
+        satırlarıyla verilir. Sonuçlar collect_scene_batch_async ile alınır.
+
+        Raises:
+            ValueError: Sahne listesi yoksa, tüm sahneler yazıldıysa veya
+            sonuçlanmamış bir sahne batch'i varsa
+
+        Returns:
+            {"job_name": str, "scene_numbers": [int]}
+        """
+        screenplay = self.session.screenplay
+        if not screenplay or not screenplay.scene_outlines:
+            raise ValueError("Önce sahne listesi oluşturulmalı")
+
+        outlines = screenplay.scene_outlines
+        start = len(screenplay.scenes)
+        if start >= len(outlines):
+            raise ValueError("Tüm sahneler yazıldı!")
+
+        jobs = await asyncio.to_thread(self.session.batch_jobs, self.SCENE_BATCH_KIND, pending_only=True)
+        running = [
+            job["job_name"] for job in jobs
+            if not self.session.gemini.batch_done(job["state"])
+        ]
+        if running:
+            raise ValueError(f"Sonuçlanmamış sahne batch işi var: {running[0]}")
+
+        self._discard_speculation("batch")
+
+        cache_id = f"{self.session.project_id}_{self.module.value}"
+        if not self.session.gemini.get_cache(cache_id):
+            await self.session.create_module_cache_async(
+                module=self.module,
+                system_prompt=SYSTEM_PROMPT
+            )
+
+        requests = [
+            BatchRequest(
+                key=str(index),
+                prompt=self._standalone_scene_prompt(index, outlines, {}),
+                response_schema=SceneResponse,
+                cache_id=cache_id,
+                schema_variant=self.SCENE_SCHEMA_VARIANT
+            )
+            for index in range(start, len(outlines))
+        ]
+        job_name = await self.session.submit_batch_async(self.module, self.SCENE_BATCH_KIND, requests)
+
+        return {
+            "job_name": job_name,
+            "scene_numbers": [o.scene_number for o in outlines[start:]]
+        }
+
+    async def collect_scene_batch_async(self, job_name: str) -> Dict[str, Any]:
+        """
+        Sahne batch işini bir kez sorgula; bittiyse sahneleri sırayla ekle.
+
+        Sadece Screenplay.scenes'in devamı olan sahneler eklenir: başarısız
+        sahnede durulur (sıra korunur), gönderimden sonra başka yolla yazılan
+        sahneler atlanır. Kalanlar normal yazımla sürdürülebilir.
+
+        Returns:
+            {"job_name", "state", "done", "committed": [sahne no], "failed": [sahne no]}
+        """
+        screenplay = self.session.screenplay
+        state, results = await self.session.poll_batch_async(job_name, SceneResponse)
+        report = {
+            "job_name": job_name,
+            "state": state,
+            "done": self.session.gemini.batch_done(state),
+            "committed": [],
+            "failed": []
+        }
+        if results is None:
+            return report
+
+        outlines = screenplay.scene_outlines
+        labels = {r.key: {"scene_number": outlines[int(r.key)].scene_number} for r in results}
+        written = {int(r.key): r.result.scene for r in results if r.result}
+        report["failed"] = sorted(outlines[int(r.key)].scene_number for r in results if r.result is None)
+
+        index = len(screenplay.scenes)
+        while index in written:
+            scene = written[index]
+            scene.scene_number = outlines[index].scene_number   # sıra outline'dan gelir
+            screenplay.put_scene(scene)
+            report["committed"].append(scene.scene_number)
+            index += 1
+
+        if report["committed"]:
+            self._discard_speculation("batch")
+            self._current_scene_index = index
+            self._update_scene_progress(len(outlines))
+            await self.session.save_screenplay_async()
+        await self.session.complete_batch_async(job_name, results, labels)
+
+        return report
+
     def expand_scene(self, scene: Scene) -> SceneResponse:
         """
         Mevcut sahneyi genişlet (2x).
@@ -316,20 +998,42 @@ class ScenarioService:
         Returns:
             SceneResponse (genişletilmiş sahne)
         """
+        self._discard_speculation("genişletme")
+        with call_context(step="expand_scene", scene_number=scene.scene_number):
+            result = self.session.generate_structured(
+                module=self.module,
+                prompt=self._expand_prompt(scene),
+                response_schema=SceneResponse,
+                use_cache=False,   # yeniden yazım: her istek yeni yanıt
+                schema_variant=self.SCENE_SCHEMA_VARIANT
+            )
+        
+        result.scene.scene_number = scene.scene_number   # sahne numarası değişmez
+        return result
+    
+    async def expand_scene_async(self, scene: Scene) -> SceneResponse:
+        """Mevcut sahneyi genişlet (async). Bkz. expand_scene."""
+        self._discard_speculation("genişletme")
+        with call_context(step="expand_scene", scene_number=scene.scene_number):
+            result = await self.session.generate_structured_async(
+                module=self.module,
+                prompt=self._expand_prompt(scene),
+                response_schema=SceneResponse,
+                use_cache=False,   # yeniden yazım: her istek yeni yanıt
+                schema_variant=self.SCENE_SCHEMA_VARIANT
+            )
+        
+        result.scene.scene_number = scene.scene_number   # sahne numarası değişmez
+        return result
+    
+    def _expand_prompt(self, scene: Scene) -> str:
+        """Genişletme promptunu hazırla"""
         new_duration = scene.duration_seconds * 2
         
-        prompt = STEP_PROMPTS["expand_scene"].format(
+        return STEP_PROMPTS["expand_scene"].format(
             current_scene=scene.model_dump_json(),
             new_duration=new_duration
         )
-        
-        result = self.session.generate_structured(
-            module=self.module,
-            prompt=prompt,
-            response_schema=SceneResponse
-        )
-        
-        return result
     
     def revise_scene(
         self,
@@ -346,22 +1050,50 @@ class ScenarioService:
         Returns:
             SceneResponse
         """
-        prompt = STEP_PROMPTS["revise_scene"].format(
-            current_scene=scene.model_dump_json(),
-            revision_notes=revision_notes
-        )
+        self._discard_speculation("revizyon")
+        with call_context(step="revise_scene", scene_number=scene.scene_number):
+            result = self.session.generate_structured(
+                module=self.module,
+                prompt=self._revise_prompt(scene, revision_notes),
+                response_schema=SceneResponse,
+                use_cache=False,   # yeniden yazım: her istek yeni yanıt
+                schema_variant=self.SCENE_SCHEMA_VARIANT
+            )
         
-        result = self.session.generate_structured(
-            module=self.module,
-            prompt=prompt,
-            response_schema=SceneResponse
-        )
+        # Revizyon sayısını artır (sahne numarası değişmez)
+        result.scene.scene_number = scene.scene_number
+        result.scene.revision_count = scene.revision_count + 1
         
-        # Revizyon sayısını artır
+        return result
+    
+    async def revise_scene_async(
+        self,
+        scene: Scene,
+        revision_notes: str
+    ) -> SceneResponse:
+        """Sahneyi revize et (async). Bkz. revise_scene."""
+        self._discard_speculation("revizyon")
+        with call_context(step="revise_scene", scene_number=scene.scene_number):
+            result = await self.session.generate_structured_async(
+                module=self.module,
+                prompt=self._revise_prompt(scene, revision_notes),
+                response_schema=SceneResponse,
+                use_cache=False,   # yeniden yazım: her istek yeni yanıt
+                schema_variant=self.SCENE_SCHEMA_VARIANT
+            )
+        
+        result.scene.scene_number = scene.scene_number
         result.scene.revision_count = scene.revision_count + 1
         
         return result
     
+    def _revise_prompt(self, scene: Scene, revision_notes: str) -> str:
+        """Revizyon promptunu hazırla"""
+        return STEP_PROMPTS["revise_scene"].format(
+            current_scene=scene.model_dump_json(),
+            revision_notes=revision_notes
+        )
+    
     def quality_check(self, scene: Scene) -> dict:
         """
         Sahneyi kalite kontrolünden geçir.
@@ -404,16 +1136,9 @@ class ScenarioService:
         Returns:
             OptimizationReport
         """
-        # Senaryo metnini hazırla
-        screenplay_text = self._format_screenplay_for_analysis(screenplay)
-        
-        prompt = STEP_PROMPTS["optimization"].format(
-            screenplay=screenplay_text
-        )
-        
         result = self.session.generate_structured(
             module=self.module,
-            prompt=prompt,
+            prompt=self._optimization_prompt(screenplay),
             response_schema=OptimizationReport
         )
         
@@ -421,15 +1146,54 @@ class ScenarioService:
         
         return result
     
+    async def run_optimization_async(self, screenplay: Screenplay) -> OptimizationReport:
+        """Script Doctor analizi çalıştır (async). Bkz. run_optimization."""
+        result = await self.session.generate_structured_async(
+            module=self.module,
+            prompt=self._optimization_prompt(screenplay),
+            response_schema=OptimizationReport
+        )
+        
+        await self.session.update_progress_async(self.module, 95, "Optimizasyon tamamlandı")
+        
+        return result
+    
+    def _optimization_prompt(self, screenplay: Screenplay) -> str:
+        """Senaryo metnini analiz promptuna yerleştir"""
+        screenplay_text = self._format_screenplay_for_analysis(screenplay)
+        
+        return STEP_PROMPTS["optimization"].format(
+            screenplay=screenplay_text
+        )
+    
     # ==================== YARDIMCI METODLAR ====================
     
+    @property
+    def _current_scene_index(self) -> int:
+        """
+        Sıradaki sahnenin indeksi.
+        
+        Yeniden başlatmada yazılmış sahneler tekrar yazılmasın diye ilk
+        kullanımda yazılmış sahne sayısından başlar; sahneler yüklenmemişse
+        sayı veritabanından okunur (servis oluşturmak senaryoyu yüklemez).
+        """
+        if self._scene_index is None:
+            self._scene_index = self.session.scene_count()
+        return self._scene_index
+    
+    @_current_scene_index.setter
+    def _current_scene_index(self, value: int) -> None:
+        self._scene_index = value
+    
     def get_status(self) -> dict:
         """Mevcut durumu döndür"""
         return {
             "current_step": self._current_step,
             "current_scene_index": self._current_scene_index,
             "progress": self.session.project.get_module_progress(self.module),
-            "context_status": self.session.context.check_status()
+            "context_status": self.session.context.check_status(),
+            "chat_compaction": self.session.compaction_stats(self.module),
+            "speculation": self.speculation_stats()
         }
     
     def get_user_guidance(self) -> str:
@@ -484,6 +1248,9 @@ class ScenarioService:
         
         if self.session.screenplay:
             self.session.screenplay.status = ProjectStatus.COMPLETED
-            return self.session.save_screenplay()
+            output_file = self.session.save_screenplay()
+            # Tamamlanan senaryo write-behind penceresini beklemesin
+            self.session.checkpoint()
+            return output_file
         
         raise ValueError("Kaydedilecek senaryo yok")